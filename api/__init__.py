@@ -5,6 +5,7 @@ api_bp = Blueprint("api_v1", __name__, url_prefix="/api/v1")
 
 def init_app(app):
     """Register all API blueprints."""
+    from api.ai_jobs import ai_jobs_bp  # Async AI grading job polling
     from api.azure_tts import azure_tts_bp  # Azure TTS API
     from api.dictation import dictation_bp  # Dictation API
     from api.dictation_input import dictation_input_bp  # Strict spelling input policy
@@ -26,7 +27,7 @@ def init_app(app):
     from api.vocab_review import vocab_review_bp
     from api.wechat import wechat_bp
     from api.writing_library import writing_library_bp
-    from models import WritingTypingAttempt, db
+    from models import AiJob, AiResponseCache, SchedulerRangeCache, SubscribePushLog, WritingTypingAttempt, db
 
     app.register_blueprint(wechat_bp, url_prefix="/api/wechat")  # Restore url_prefix
     app.register_blueprint(api_bp)
@@ -49,9 +50,14 @@ def init_app(app):
     app.register_blueprint(mock_exam_student_bp)  # Register student mock exam review
     app.register_blueprint(mock_exam_review_bp)
     app.register_blueprint(writing_library_bp)
+    app.register_blueprint(ai_jobs_bp)
 
     # The project still uses check-first schema creation for additive SQLite
     # tables in production. Keep this local to the feature instead of adding
     # more migration logic to the legacy app.py monolith.
     with app.app_context():
         WritingTypingAttempt.__table__.create(bind=db.engine, checkfirst=True)
+        AiJob.__table__.create(bind=db.engine, checkfirst=True)
+        AiResponseCache.__table__.create(bind=db.engine, checkfirst=True)
+        SubscribePushLog.__table__.create(bind=db.engine, checkfirst=True)
+        SchedulerRangeCache.__table__.create(bind=db.engine, checkfirst=True)
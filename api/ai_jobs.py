@@ -0,0 +1,26 @@
+"""Polling endpoint for AI grading jobs submitted with ``async``.
+
+The job key is a random 128-bit capability handed only to the submitter, the
+same model as listening access tokens, so the endpoint needs no session or
+bearer auth and works for both the web pages and the mini-program.
+"""
+
+from flask import Blueprint, jsonify, request
+
+from services import ai_jobs
+
+ai_jobs_bp = Blueprint("ai_jobs", __name__, url_prefix="/api/ai-jobs")
+
+
+@ai_jobs_bp.get("/<job_key>")
+def ai_job_status(job_key: str):
+    job = ai_jobs.get_job(job_key)
+    if not job:
+        return jsonify({"ok": False, "error": "job_not_found"}), 404
+    try:
+        wait_seconds = float(request.args.get("wait") or 0)
+    except ValueError:
+        wait_seconds = 0.0
+    if wait_seconds > 0:
+        job = ai_jobs.wait_for_job(job, wait_seconds)
+    return jsonify(ai_jobs.job_status_payload(job))
@@ -7,6 +7,8 @@ from typing import Any
 import requests
 from flask import current_app
 
+from services import http_client
+
 
 def _dashscope_host() -> str:
     config = current_app.config
@@ -32,7 +34,7 @@ def _submit_task(api_key: str, model: str, file_url: str) -> tuple[str | None, d
         "input": {"file_urls": [file_url]},
         "parameters": {"channel_id": [0]},
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=30)
+    resp = http_client.post("dashscope", url, headers=headers, json=payload, timeout=30)
     resp.raise_for_status()
     data = resp.json()
     task_id = (
@@ -47,13 +49,13 @@ def _query_task(api_key: str, task_id: str) -> dict[str, Any]:
     host = _dashscope_host()
     url = f"https://{host}/api/v1/tasks/{task_id}"
     headers = {"Authorization": f"Bearer {api_key}"}
-    resp = requests.post(url, headers=headers, timeout=30)
+    resp = http_client.post("dashscope", url, headers=headers, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
 
 def _fetch_transcript(transcription_url: str) -> dict[str, Any]:
-    resp = requests.get(transcription_url, timeout=30)
+    resp = http_client.get("media", transcription_url, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
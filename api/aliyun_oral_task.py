@@ -6,6 +6,8 @@ from typing import Any
 import requests
 from flask import current_app
 
+from services import http_client
+
 
 def _submit_task(
     appid: str,
@@ -24,7 +26,7 @@ def _submit_task(
         "recordidlist": record_id_list,
     }
     try:
-        resp = requests.post(url, json=payload, timeout=timeout)
+        resp = http_client.post("aliyun_oral", url, json=payload, timeout=timeout)
         resp.raise_for_status()
         raw = resp.json()
     except requests.RequestException as exc:
@@ -51,7 +53,7 @@ def _query_task(
         "taskid": taskid,
     }
     try:
-        resp = requests.post(url, json=payload, timeout=timeout)
+        resp = http_client.post("aliyun_oral", url, json=payload, timeout=timeout)
         resp.raise_for_status()
         raw = resp.json()
     except requests.RequestException as exc:
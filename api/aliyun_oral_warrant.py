@@ -7,6 +7,8 @@ from typing import Any
 import requests
 from flask import current_app
 
+from services import http_client
+
 
 def _md5_hex(text: str) -> str:
     return hashlib.md5(text.encode("utf-8")).hexdigest()
@@ -62,7 +64,7 @@ def create_oral_warrant(user_id: str, user_client_ip: str) -> tuple[bool, dict[s
     last_error: dict[str, Any] | None = None
     for endpoint in endpoints:
         try:
-            resp = requests.post(endpoint, data=payload, timeout=timeout)
+            resp = http_client.post("aliyun_oral", endpoint, data=payload, timeout=timeout)
             resp.raise_for_status()
             raw = resp.json()
         except requests.RequestException as exc:
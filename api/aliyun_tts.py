@@ -5,6 +5,8 @@ from typing import Any
 import requests
 from flask import current_app
 
+from services import http_client
+
 
 def _dashscope_host() -> str:
     config = current_app.config
@@ -43,7 +45,7 @@ def synthesize_text(text: str) -> tuple[bool, dict[str, Any]]:
     }
 
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=20)
+        resp = http_client.post("dashscope", url, headers=headers, json=payload, timeout=20)
         resp.raise_for_status()
         data = resp.json()
     except requests.RequestException as exc:
@@ -54,7 +56,7 @@ def synthesize_text(text: str) -> tuple[bool, dict[str, Any]]:
         return False, {"error": "tts_missing_audio_url", "details": data}
 
     try:
-        audio_resp = requests.get(audio_url, timeout=20)
+        audio_resp = http_client.get("media", audio_url, timeout=20)
         audio_resp.raise_for_status()
     except requests.RequestException as exc:
         return False, {"error": "tts_fetch_failed", "details": str(exc)}
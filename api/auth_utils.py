@@ -1,15 +1,30 @@
 import hashlib
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from functools import wraps
 
 import jwt
-from flask import current_app, jsonify, request
+from flask import current_app, has_app_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 
-from models import User, db
+from models import StudentProfile, User, db
 
 TOKEN_TTL_HOURS = 168
 
+# Bearer principals are cached per app for a short time so the dozens of
+# mini-program calls in one practice session do not each re-read the user
+# table.  Writes to User/StudentProfile through the ORM invalidate the entry
+# immediately; the TTL bounds staleness for out-of-process changes (scripts).
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_ENTRIES = 4096
+
 
 def _hash_token(raw: str) -> str:
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -37,6 +52,190 @@ def issue_token(user: User) -> tuple[str, str]:
 def revoke_token(user: User) -> None:
     user.clear_api_token()
     db.session.commit()
+    invalidate_user_principals(user.id)
+
+
+@dataclass(frozen=True)
+class ApiPrincipal:
+    """What auth checks need about a bearer caller, without an ORM instance."""
+
+    user_id: int
+    role: str
+    is_active: bool
+    student_profile_id: int | None
+    token_hash: str
+
+
+class PrincipalCache:
+    """Thread-safe TTL + LRU map of token hash -> (principal, user columns)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict[str, tuple[float, ApiPrincipal, dict]] = OrderedDict()
+        self._by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token_hash: str) -> tuple[ApiPrincipal, dict] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._discard(token_hash)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, principal: ApiPrincipal, columns: dict) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._discard(principal.token_hash)
+            self._entries[principal.token_hash] = (expires_at, principal, columns)
+            self._by_user.setdefault(principal.user_id, set()).add(principal.token_hash)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token_hash in list(self._by_user.get(user_id, ())):
+                self._discard(token_hash)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, token_hash: str) -> None:
+        entry = self._entries.pop(token_hash, None)
+        if entry is None:
+            return
+        user_id = entry[1].user_id
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(token_hash)
+            if not keys:
+                del self._by_user[user_id]
+
+
+def get_principal_cache(app=None) -> PrincipalCache:
+    app = app or current_app._get_current_object()
+    cache = app.extensions.get("api_principal_cache")
+    if cache is None:
+        cache = PrincipalCache(
+            app.config.get("API_PRINCIPAL_CACHE_TTL", PRINCIPAL_CACHE_TTL_SECONDS),
+            app.config.get("API_PRINCIPAL_CACHE_SIZE", PRINCIPAL_CACHE_MAX_ENTRIES),
+        )
+        app.extensions["api_principal_cache"] = cache
+    return cache
+
+
+def invalidate_user_principals(user_id) -> None:
+    if user_id is None or not has_app_context():
+        return
+    cache = current_app.extensions.get("api_principal_cache")
+    if cache is not None:
+        cache.invalidate_user(int(user_id))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_user_write(mapper, connection, target) -> None:
+    # Covers deactivation, role changes and token revocation alike.
+    invalidate_user_principals(target.id)
+
+
+@event.listens_for(StudentProfile, "after_insert")
+@event.listens_for(StudentProfile, "after_update")
+@event.listens_for(StudentProfile, "after_delete")
+def _invalidate_on_profile_write(mapper, connection, target) -> None:
+    history = sa_inspect(target).attrs.user_id.history
+    for user_id in {target.user_id, *history.deleted}:
+        invalidate_user_principals(user_id)
+
+
+def _user_columns(user: User) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+
+
+def _attach_cached_user(columns: dict) -> User:
+    """Return a session-bound User rebuilt from cached columns without a SELECT."""
+    key = identity_key(User, columns["id"])
+    existing = db.session.identity_map.get(key)
+    if existing is not None:
+        return existing
+    user = User(**columns)
+    make_transient_to_detached(user)
+    db.session.add(user)
+    return user
+
+
+def authenticate_bearer(token: str):
+    """Resolve a bearer JWT to ``(principal, user)`` or ``(None, (error, status))``.
+
+    ``error`` is ``invalid_token`` (401) or ``user_inactive`` (403); callers
+    keep their own response wording.
+    """
+
+    try:
+        payload = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return None, ("invalid_token", 401)
+
+    cache = get_principal_cache()
+    token_hash = _hash_token(token)
+    cached = cache.get(token_hash)
+    if cached is not None:
+        principal, columns = cached
+        if not principal.is_active:
+            return None, ("user_inactive", 403)
+        return principal, _attach_cached_user(columns)
+
+    try:
+        user_id = int(payload.get("sub", 0))
+    except (TypeError, ValueError):
+        return None, ("invalid_token", 401)
+    user = db.session.get(User, user_id)
+    if not user:
+        return None, ("user_inactive", 403)
+    profile_id = db.session.query(StudentProfile.id).filter_by(user_id=user.id).scalar()
+    principal = ApiPrincipal(
+        user_id=user.id,
+        role=user.role,
+        is_active=bool(user.is_active),
+        student_profile_id=profile_id,
+        token_hash=token_hash,
+    )
+    cache.put(principal, _user_columns(user))
+    if not principal.is_active:
+        return None, ("user_inactive", 403)
+    return principal, user
+
+
+def attach_api_user(principal: ApiPrincipal, user: User) -> None:
+    request.api_principal = principal
+    request.current_api_user = user
+
+
+def current_student_profile_id() -> int | None:
+    """The bearer user's StudentProfile id, read from the cached principal.
+
+    Handlers that only filter by the student's id use this instead of
+    ``user.student_profile``, which costs a SELECT per request.
+    """
+    principal = getattr(request, "api_principal", None)
+    if principal is not None:
+        return principal.student_profile_id
+    user = getattr(request, "current_api_user", None)
+    profile = user.student_profile if user is not None else None
+    return profile.id if profile is not None else None
 
 
 def can_view_all_schedules(user: User) -> bool:
@@ -69,21 +268,15 @@ def require_api_user(*roles):
             if not auth_header.startswith("Bearer "):
                 return jsonify({"ok": False, "error": "missing_token"}), 401
             token = auth_header.split(" ", 1)[1]
-            try:
-                payload = jwt.decode(
-                    token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
-                )
-            except jwt.PyJWTError:
-                return jsonify({"ok": False, "error": "invalid_token"}), 401
-
-            user = User.query.get(int(payload.get("sub", 0)))
-            if not user or not user.is_active:
-                return jsonify({"ok": False, "error": "user_inactive"}), 403
-
-            if roles and user.role not in roles and user.role != User.ROLE_ADMIN:
+            principal, result = authenticate_bearer(token)
+            if principal is None:
+                error, status = result
+                return jsonify({"ok": False, "error": error}), status
+
+            if roles and principal.role not in roles and principal.role != User.ROLE_ADMIN:
                 return jsonify({"ok": False, "error": "forbidden"}), 403
 
-            request.current_api_user = user
+            attach_api_user(principal, result)
             return fn(*args, **kwargs)
 
         return wrapper
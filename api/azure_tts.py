@@ -2,9 +2,10 @@
 
 import hashlib
 import os
-import requests
 from flask import Blueprint, request, jsonify
 
+from services import http_client
+
 azure_tts_bp = Blueprint('azure_tts', __name__, url_prefix='/api/azure-tts')
 
 # Azure TTS 配置
@@ -66,7 +67,7 @@ def synthesize_speech_azure(text, voice="en-US-JennyNeural", speed=1.0):
     }
     
     try:
-        response = requests.post(url, headers=headers, data=ssml.encode('utf-8'), timeout=10)
+        response = http_client.post("azure_tts", url, headers=headers, data=ssml.encode('utf-8'), timeout=10)
         
         if response.status_code == 200:
             audio_data = response.content
@@ -15,7 +15,6 @@ import wave
 from pathlib import Path
 from datetime import datetime
 from functools import lru_cache, wraps
-import jwt
 import requests
 from flask import Blueprint, current_app, jsonify, request, send_file
 from flask_login import current_user, login_required
@@ -32,6 +31,7 @@ from models import (
     StudentWordMastery,
     Task,
 )
+from api.auth_utils import attach_api_user, authenticate_bearer
 from api.qwen import generate_word_enrichment
 from dictation_answers import (
     canonical_vocabulary_word,
@@ -41,6 +41,7 @@ from dictation_answers import (
     serialize_answer_variants,
     strip_part_of_speech_prefix,
 )
+from services import ai_jobs, http_client, pdf_text
 from services.dictation_audio import word_tts_playback_url
 from services.dictation_review import DictationReviewError, submit_dictation_answer
 from services.vocabulary_mastery import (
@@ -66,18 +67,14 @@ def require_session_or_bearer(fn):
         auth_header = request.headers.get("Authorization", "")
         if auth_header.startswith("Bearer "):
             token = auth_header.split(" ", 1)[1]
-            try:
-                payload = jwt.decode(
-                    token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
-                )
-            except jwt.PyJWTError:
-                return jsonify({"ok": False, "error": "invalid_token"}), 401
-
-            user = User.query.get(int(payload.get("sub", 0)))
-            if not user or not user.is_active:
-                return jsonify({"ok": False, "error": "forbidden"}), 403
-
-            request.current_api_user = user
+            principal, result = authenticate_bearer(token)
+            if principal is None:
+                error, status = result
+                if error != "invalid_token":
+                    error = "forbidden"
+                return jsonify({"ok": False, "error": error}), status
+
+            attach_api_user(principal, result)
             return fn(*args, **kwargs)
 
         return jsonify({"ok": False, "error": "unauthorized"}), 401
@@ -283,36 +280,7 @@ def _append_vocab_entry(entries, seen, english, chinese, topic):
 
 
 def _extract_pdf_text(pdf_path):
-    all_text = []
-    try:
-        from pypdf import PdfReader
-
-        reader = PdfReader(str(pdf_path))
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                all_text.append(text)
-    except ImportError:
-        try:
-            import pdfplumber
-
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        all_text.append(text)
-        except ImportError:
-            result = subprocess.run(
-                ["pdftotext", str(pdf_path), "-"],
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            if result.returncode != 0:
-                raise RuntimeError(f"failed to extract pdf text: {result.stderr.strip()}")
-            if result.stdout:
-                all_text.append(result.stdout)
-    return "\n".join(all_text)
+    return pdf_text.extract_text(pdf_path, **pdf_text.app_options())
 
 
 # ============================================================================
@@ -665,7 +633,7 @@ def _download_file(url: str, target: Path) -> bool:
     target.parent.mkdir(parents=True, exist_ok=True)
     tmp_path = target.with_suffix(target.suffix + ".tmp")
     try:
-        with requests.get(url, stream=True, timeout=60) as resp:
+        with http_client.get("media", url, stream=True, timeout=60) as resp:
             resp.raise_for_status()
             with tmp_path.open("wb") as f:
                 for chunk in resp.iter_content(chunk_size=1024 * 1024):
@@ -808,7 +776,7 @@ def _dashscope_tts(text: str) -> bytes | None:
     }
     timeout = _config_float("DICTATION_TTS_PROVIDER_TIMEOUT", 8)
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
+        resp = http_client.post("dashscope", url, headers=headers, json=payload, timeout=timeout)
         if resp.status_code != 200:
             current_app.logger.warning("DashScope TTS failed %s: %s", text, resp.status_code)
             return None
@@ -816,7 +784,7 @@ def _dashscope_tts(text: str) -> bytes | None:
         audio_url = data.get("output", {}).get("audio", {}).get("url")
         if not audio_url:
             return None
-        audio_resp = requests.get(audio_url, timeout=timeout)
+        audio_resp = http_client.get("media", audio_url, timeout=timeout)
         if audio_resp.status_code == 200 and audio_resp.content:
             raw = audio_resp.content
             # Convert WAV → MP3 via ffmpeg for smaller file size
@@ -866,7 +834,7 @@ def _youdao_tts(text: str) -> bytes | None:
         return None
     url = f"https://dict.youdao.com/dictvoice?audio={requests.utils.quote(query)}&type=2"
     try:
-        resp = requests.get(url, timeout=5)
+        resp = http_client.get("youdao", url, timeout=5)
         if resp.status_code == 200 and resp.content:
             return resp.content
         current_app.logger.warning("Youdao TTS fetch failed %s: %s", text, resp.status_code)
@@ -1762,11 +1730,7 @@ def edit_word_enrichment(word_id):
     return jsonify({"ok": True, "item": _admin_word_payload(word)})
 
 
-@dictation_bp.route("/example/<int:word_id>/regenerate", methods=["POST"])
-@login_required
-@role_required(User.ROLE_TEACHER, User.ROLE_ASSISTANT)
-def regenerate_word_enrichment(word_id):
-    word = DictationWord.query.get_or_404(word_id)
+def _regenerate_word_enrichment(word: DictationWord) -> tuple[dict, int]:
     result = generate_word_enrichment(
         word.word,
         word.translation or "",
@@ -1776,12 +1740,44 @@ def regenerate_word_enrichment(word_id):
     if not result:
         word.vocab_ai_status = "failed"
         db.session.commit()
-        return jsonify({"ok": False, "error": "qwen_generation_failed"}), 502
+        return {"ok": False, "error": "qwen_generation_failed"}, 502
 
     _apply_enrichment_result(word, result, status="generated")
     word.vocab_report_count = 0
     db.session.commit()
-    return jsonify({"ok": True, "item": _admin_word_payload(word)})
+    return {"ok": True, "item": _admin_word_payload(word)}, 200
+
+
+def _regenerate_word_enrichment_job(job_payload: dict) -> tuple[dict, int]:
+    word = db.session.get(DictationWord, int(job_payload.get("word_id") or 0))
+    if not word:
+        return {"ok": False, "error": "not_found"}, 404
+    return _regenerate_word_enrichment(word)
+
+
+# generate_word_enrichment already retries internally; do not multiply that.
+ai_jobs.register_handler(
+    "qwen_word_enrichment",
+    _regenerate_word_enrichment_job,
+    max_attempts=1,
+    timeout_seconds=240,
+)
+
+
+@dictation_bp.route("/example/<int:word_id>/regenerate", methods=["POST"])
+@login_required
+@role_required(User.ROLE_TEACHER, User.ROLE_ASSISTANT)
+def regenerate_word_enrichment(word_id):
+    word = DictationWord.query.get_or_404(word_id)
+    if ai_jobs.wants_async(request.get_json(silent=True)):
+        job = ai_jobs.submit_job(
+            "qwen_word_enrichment",
+            {"word_id": word.id},
+            created_by_id=current_user.id,
+        )
+        return ai_jobs.accepted_response(job)
+    payload, status = _regenerate_word_enrichment(word)
+    return jsonify(payload), status
 
 
 @dictation_bp.route("/example/<int:word_id>/clear", methods=["POST"])
@@ -9,7 +9,6 @@ Phase 2: business logic implementation.
 - 主观题（essay）等老师人工录入
 """
 
-import base64
 import html
 import json
 import os
@@ -22,10 +21,11 @@ from flask import Blueprint, current_app, jsonify, make_response, render_templat
 from flask_login import current_user, login_required
 
 try:
-    from weasyprint import CSS, HTML
+    from weasyprint import CSS, HTML, default_url_fetcher
 except ImportError:  # pragma: no cover
     HTML = None
     CSS = None
+    default_url_fetcher = None
 
 from api.entrance_session import (
     EntranceSessionError,
@@ -36,6 +36,8 @@ from api.entrance_session import (
     mark_visible,
     normalize_answer_map,
     paper_duration_minutes,
+    paper_question_ids,
+    paper_version,
     save_answers,
     serialize_draft,
     start_or_resume,
@@ -53,9 +55,15 @@ from models import (
     User,
     db,
 )
+from services import http_cache, pdf_images
+from services.lru import LruCache
 
 entrance_bp = Blueprint("entrance", __name__, url_prefix="/api/entrance")
 
+STUDENT_PAPER_CACHE_SIZE = 32
+# paper_id -> (paper_version, student-facing dict, precompressed JSON body)
+_student_papers = LruCache(STUDENT_PAPER_CACHE_SIZE)
+
 
 # ============================================================================
 # Helpers
@@ -210,6 +218,27 @@ def _serialize_paper_for_student(paper):
     }
 
 
+def _student_paper(paper):
+    """Cached ``_serialize_paper_for_student`` output and its ``{"ok", "paper"}`` body.
+
+    Rebuilt only when :func:`paper_version` changes, so candidates loading or
+    resuming a test do not re-parse every stem and option list.  Admin edits
+    also drop this worker's copy right away via :func:`_forget_student_paper`.
+    """
+    version = paper_version(paper)
+    cached = _student_papers.get(paper.id)
+    if cached is None or cached[0] != version:
+        data = _serialize_paper_for_student(paper)
+        body = http_cache.build_body(current_app.json.dumps({"ok": True, "paper": data}))
+        cached = (version, data, body)
+        _student_papers.set(paper.id, cached)
+    return cached[1], cached[2]
+
+
+def _forget_student_paper(paper_id):
+    _student_papers.pop(paper_id)
+
+
 def _serialize_paper_full(paper):
     """For admin/teacher viewing — includes answers."""
     data = _serialize_paper_for_student(paper)
@@ -243,32 +272,19 @@ _ANSWER_EDGE_CHARS = (
 )
 
 
-def _pdf_image_data_uri(url_path):
-    """Convert a stem [image:/static/...] path into a base64 data URI for WeasyPrint.
+def _pdf_image_src(url_path):
+    """Map a stem [image:/static/...] path to a ``pdf-image:`` URL for WeasyPrint.
 
-    仅允许 static/uploads 目录下的真实文件，防止路径穿越。
+    图片不再 base64 内联进 HTML，由 _pdf_url_fetcher 按需读取打印尺寸的缓存副本。
     """
-    rel = str(url_path or "").strip().lstrip("/")
-    if not (rel.startswith("static/") or rel.startswith("uploads/")):
-        return None
-    root = os.path.realpath(current_app.root_path)
-    full = os.path.realpath(os.path.join(root, rel))
-    if not full.startswith(root + os.sep) or not os.path.isfile(full):
-        return None
-    mime = {
-        "png": "image/png",
-        "jpg": "image/jpeg",
-        "jpeg": "image/jpeg",
-        "gif": "image/gif",
-        "webp": "image/webp",
-    }.get(full.rsplit(".", 1)[-1].lower())
-    if not mime:
-        return None
-    try:
-        with open(full, "rb") as f:
-            return f"data:{mime};base64," + base64.b64encode(f.read()).decode("ascii")
-    except OSError:
-        return None
+    return pdf_images.image_src(current_app.root_path, url_path)
+
+
+def _pdf_url_fetcher():
+    cache_dir = current_app.config.get("ENTRANCE_PDF_IMAGE_CACHE_DIR") or os.path.join(
+        current_app.root_path, "data", "pdf_image_cache"
+    )
+    return pdf_images.make_url_fetcher(current_app.root_path, cache_dir, default_url_fetcher)
 
 
 def _stem_parts_for_pdf(stem):
@@ -277,9 +293,9 @@ def _stem_parts_for_pdf(stem):
     for line in str(stem or "").splitlines():
         match = re.match(r"^\[image:(.+)\]$", line.strip())
         if match:
-            data_uri = _pdf_image_data_uri(match.group(1))
-            if data_uri:
-                parts.append({"type": "image", "value": data_uri})
+            src = _pdf_image_src(match.group(1))
+            if src:
+                parts.append({"type": "image", "value": src})
             continue
         parts.append({"type": "text", "value": line})
     return parts
@@ -343,14 +359,6 @@ def _session_error_response(error):
     return jsonify({"ok": False, "error": error.code}), error.status_code
 
 
-def _paper_question_ids(paper):
-    return {
-        question.id
-        for section in paper.sections
-        for question in section.questions
-    }
-
-
 def _finalize_attempt(invitation, answer_map, submitted_at=None):
     """Persist and grade a final answer map. Caller commits the transaction."""
     submitted_at = submitted_at or datetime.utcnow()
@@ -411,7 +419,7 @@ def _finalize_attempt(invitation, answer_map, submitted_at=None):
 def _finalize_expired_draft(invitation, raw_answers=None):
     answer_map = draft_answer_map(invitation.draft)
     if raw_answers is not None:
-        normalized = normalize_answer_map(raw_answers, _paper_question_ids(invitation.paper))
+        normalized = normalize_answer_map(raw_answers, paper_question_ids(invitation.paper))
         answer_map.update({int(key): value for key, value in normalized.items()})
     attempt, scores = _finalize_attempt(invitation, answer_map)
     db.session.commit()
@@ -487,10 +495,13 @@ def start_entrance_session(token):
             return _finalize_expired_draft(inv)
         return _session_error_response(error)
     db.session.commit()
+    paper, body = _student_paper(inv.paper)
     return jsonify(
         {
             "ok": True,
-            "paper": _serialize_paper_for_student(inv.paper),
+            # The page may fetch the paper from /session/<token>/paper instead (ETag).
+            "paper": paper if payload.get("include_paper", True) else None,
+            "paper_etag": body.etag,
             "session": serialize_draft(draft),
         }
     )
@@ -515,15 +526,40 @@ def get_paper(token):
             return _finalize_expired_draft(inv)
         return _session_error_response(error)
     db.session.commit()
+    paper, body = _student_paper(inv.paper)
     return jsonify(
         {
             "ok": True,
-            "paper": _serialize_paper_for_student(inv.paper),
+            "paper": paper,
+            "paper_etag": body.etag,
             "session": serialize_draft(draft),
         }
     )
 
 
+@entrance_bp.route("/session/<token>/paper", methods=["GET"])
+def get_session_paper(token):
+    """Student-facing paper only, with an ETag so reloads revalidate to a 304."""
+    inv = EntranceTestInvitation.query.filter_by(token=token).first()
+    if not inv:
+        return jsonify({"ok": False, "error": "invitation_not_found"}), 404
+    if inv.status in ("submitted", "graded"):
+        return jsonify({"ok": False, "error": "already_submitted"}), 400
+    if not inv.paper:
+        return jsonify({"ok": False, "error": "no_paper_assigned"}), 400
+    if not inv.paper.is_active:
+        return jsonify({"ok": False, "error": "paper_not_active"}), 400
+    try:
+        validate_active_session(inv, _request_device_id())
+    except EntranceSessionError as error:
+        if error.code == "time_expired" and inv.draft:
+            return _finalize_expired_draft(inv)
+        return _session_error_response(error)
+    db.session.commit()
+    _paper, body = _student_paper(inv.paper)
+    return http_cache.send(body, cache_control="private, no-cache")
+
+
 @entrance_bp.route("/session/<token>/save", methods=["POST"])
 def save_entrance_draft(token):
     inv = EntranceTestInvitation.query.filter_by(token=token).first()
@@ -617,7 +653,7 @@ def submit_answers(token):
         draft = validate_active_session(inv, _request_device_id(payload))
         submitted_map = normalize_answer_map(
             payload.get("answers") or [],
-            _paper_question_ids(inv.paper),
+            paper_question_ids(inv.paper),
         )
     except EntranceSessionError as error:
         if error.code == "time_expired" and inv.draft:
@@ -993,14 +1029,7 @@ def admin_report_pdf(attempt_id):
             "questions": qs,
         })
 
-    # Embed logo
-    logo_base64 = ""
-    logo_path = os.path.join(current_app.static_folder, "sagepath_entrance_logo.png")
-    try:
-        with open(logo_path, "rb") as f:
-            logo_base64 = base64.b64encode(f.read()).decode("utf-8")
-    except Exception:
-        logo_base64 = ""
+    logo_src = _pdf_image_src("static/sagepath_entrance_logo.png") or ""
 
     target_exam_label = {
         "ielts": "IELTS 雅思",
@@ -1023,7 +1052,7 @@ def admin_report_pdf(attempt_id):
         sections=sections_data,
         listening_max=listening_max,
         reading_max=reading_max,
-        logo_base64=logo_base64,
+        logo_src=logo_src,
         target_exam_label=target_exam_label,
         reviewer_name=reviewer_name,
         generated_at=datetime.now(),
@@ -1033,7 +1062,7 @@ def admin_report_pdf(attempt_id):
         @page { size: A4; margin: 16mm; }
         body { font-family: "Noto Sans CJK SC", "Microsoft YaHei", sans-serif; }
     """)
-    pdf_bytes = HTML(string=html).write_pdf(stylesheets=[css])
+    pdf_bytes = HTML(string=html, url_fetcher=_pdf_url_fetcher()).write_pdf(stylesheets=[css])
 
     response = make_response(pdf_bytes)
     response.headers["Content-Type"] = "application/pdf"
@@ -1149,6 +1178,7 @@ def admin_update_paper(paper_id):
     if "is_active" in data:
         paper.is_active = bool(data["is_active"])
     db.session.commit()
+    _forget_student_paper(paper.id)
     return jsonify({"ok": True})
 
 
@@ -1167,6 +1197,7 @@ def admin_delete_paper(paper_id):
         return jsonify({"ok": False, "error": "paper_has_attempts"}), 400
     db.session.delete(paper)  # cascades to sections/questions
     db.session.commit()
+    _forget_student_paper(paper_id)
     return jsonify({"ok": True})
 
 
@@ -1197,6 +1228,7 @@ def admin_create_section(paper_id):
     )
     db.session.add(section)
     db.session.commit()
+    _forget_student_paper(paper.id)
     return jsonify({"ok": True, "section_id": section.id})
 
 
@@ -1218,6 +1250,7 @@ def admin_update_section(section_id):
     if "sequence" in data:
         section.sequence = int(data["sequence"])
     db.session.commit()
+    _forget_student_paper(section.paper_id)
     return jsonify({"ok": True})
 
 
@@ -1228,8 +1261,10 @@ def admin_delete_section(section_id):
     if err:
         return err
     section = EntranceTestSection.query.get_or_404(section_id)
+    paper_id = section.paper_id
     db.session.delete(section)
     db.session.commit()
+    _forget_student_paper(paper_id)
     return jsonify({"ok": True})
 
 
@@ -1268,6 +1303,7 @@ def admin_create_question(section_id):
     q.sequence = data.get("sequence") or ((section.questions.count() or 0) + 1)
     db.session.add(q)
     db.session.commit()
+    _forget_student_paper(section.paper_id)
     return jsonify({"ok": True, "question_id": q.id})
 
 
@@ -1283,6 +1319,7 @@ def admin_update_question(question_id):
     if "sequence" in data:
         q.sequence = int(data["sequence"])
     db.session.commit()
+    _forget_student_paper(q.section.paper_id)
     return jsonify({"ok": True})
 
 
@@ -1293,6 +1330,8 @@ def admin_delete_question(question_id):
     if err:
         return err
     q = EntranceTestQuestion.query.get_or_404(question_id)
+    paper_id = q.section.paper_id
     db.session.delete(q)
     db.session.commit()
+    _forget_student_paper(paper_id)
     return jsonify({"ok": True})
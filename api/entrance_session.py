@@ -1,17 +1,43 @@
-"""Server-side draft and interruption controls for entrance tests."""
+"""Server-side draft and interruption controls for entrance tests.
+
+On an entrance exam day every candidate autosaves and pings a heartbeat
+every 30 seconds.  To keep those requests off the SQLite write lock:
+
+* a paper's question ids are cached per paper version (:func:`paper_version`
+  is one aggregate query instead of lazy-loading every section and question);
+* autosaves merge only the answers that changed into the stored draft and
+  write nothing when the answers are unchanged;
+* last-seen times go into an in-memory :class:`HeartbeatBuffer` and are
+  written in one batched UPDATE every ``HEARTBEAT_FLUSH_SECONDS``.
+"""
 
 from __future__ import annotations
 
 import hashlib
 import json
+import logging
 import math
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
-from models import EntranceTestDraft, db
+from flask import current_app
+from sqlalchemy import bindparam, func, or_, update
+
+from models import EntranceTestDraft, EntranceTestQuestion, EntranceTestSection, db
+from services.background_flush import BackgroundFlusher
+from services.lru import LruCache
+
+logger = logging.getLogger(__name__)
 
 RESUME_GRACE_SECONDS = 120
 MAX_ANSWER_CHARS = 20000
 MAX_ANSWERS = 300
+# Heartbeats arrive every 30s; stored last-seen times may lag by one heartbeat
+# plus one flush, which must stay well inside RESUME_GRACE_SECONDS so another
+# worker resuming the session does not mistake the lag for an interruption.
+HEARTBEAT_FLUSH_SECONDS = 30
+PAPER_INDEX_CACHE_SIZE = 64
 
 
 class EntranceSessionError(Exception):
@@ -49,6 +75,65 @@ def dump_json_object(value: dict) -> str:
     return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
 
 
+def paper_version(paper) -> str:
+    """Fingerprint of a paper's structure; changes whenever a section or question does."""
+    stats = (
+        db.session.query(
+            func.count(func.distinct(EntranceTestSection.id)),
+            func.max(EntranceTestSection.updated_at),
+            func.count(EntranceTestQuestion.id),
+            func.max(EntranceTestQuestion.updated_at),
+        )
+        .select_from(EntranceTestSection)
+        .outerjoin(EntranceTestQuestion, EntranceTestQuestion.section_id == EntranceTestSection.id)
+        .filter(EntranceTestSection.paper_id == paper.id)
+        .one()
+    )
+    raw = json.dumps([paper.id, paper.updated_at, *stats], default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass(frozen=True)
+class PaperIndex:
+    question_ids: frozenset[int]
+    audio_section_ids: frozenset[int]
+
+
+_paper_indexes = LruCache(PAPER_INDEX_CACHE_SIZE)
+
+
+def paper_index(paper) -> PaperIndex:
+    """Question ids and listening-audio section ids, cached per paper version."""
+    key = (paper.id, paper_version(paper))
+    cached = _paper_indexes.get(key)
+    if cached is not None:
+        return cached
+    rows = (
+        db.session.query(
+            EntranceTestSection.id,
+            EntranceTestSection.section_type,
+            EntranceTestSection.audio_url,
+            EntranceTestQuestion.id,
+        )
+        .outerjoin(EntranceTestQuestion, EntranceTestQuestion.section_id == EntranceTestSection.id)
+        .filter(EntranceTestSection.paper_id == paper.id)
+        .all()
+    )
+    index = PaperIndex(
+        question_ids=frozenset(question_id for _sid, _type, _audio, question_id in rows if question_id),
+        audio_section_ids=frozenset(
+            section_id for section_id, section_type, audio_url, _qid in rows
+            if section_type == "listening" and audio_url
+        ),
+    )
+    _paper_indexes.set(key, index)
+    return index
+
+
+def paper_question_ids(paper) -> frozenset[int]:
+    return paper_index(paper).question_ids
+
+
 def normalize_answer_map(raw_answers, valid_question_ids: set[int]) -> dict[str, str]:
     if not isinstance(raw_answers, list) or len(raw_answers) > MAX_ANSWERS:
         raise EntranceSessionError("invalid_answers", 400)
@@ -70,6 +155,96 @@ def normalize_answer_map(raw_answers, valid_question_ids: set[int]) -> dict[str,
     return result
 
 
+class HeartbeatBuffer:
+    """Latest last-seen time per draft, written to the database in batches.
+
+    Flushed by a :class:`~services.background_flush.BackgroundFlusher`; with
+    ``ENTRANCE_HEARTBEAT_BACKGROUND_FLUSH`` off (tests) callers flush
+    themselves.
+    """
+
+    def __init__(self, flush_interval: float = HEARTBEAT_FLUSH_SECONDS):
+        self.flush_interval = flush_interval
+        self._seen: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._worker = BackgroundFlusher(
+            "entrance-heartbeat-flush",
+            self._lock,
+            self._flush_in_background,
+            lambda: not self._seen,
+            config_flag="ENTRANCE_HEARTBEAT_BACKGROUND_FLUSH",
+            interval=flush_interval,
+        )
+
+    def touch(self, app, draft_id: int, now: datetime) -> None:
+        with self._lock:
+            if self._seen.get(draft_id) is None or self._seen[draft_id] < now:
+                self._seen[draft_id] = now
+            self._worker.wake(app)
+
+    def last_seen(self, draft_id: int) -> datetime | None:
+        with self._lock:
+            return self._seen.get(draft_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+
+    def _restore(self, entries: dict[int, datetime]) -> None:
+        with self._lock:
+            for draft_id, seen_at in entries.items():
+                if self._seen.get(draft_id) is None or self._seen[draft_id] < seen_at:
+                    self._seen[draft_id] = seen_at
+
+    def flush(self) -> int:
+        """Write buffered times into the current session (the caller commits)."""
+        with self._lock:
+            entries, self._seen = self._seen, {}
+        if not entries:
+            return 0
+        table = EntranceTestDraft.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("draft_id"))
+            .where(or_(table.c.last_seen_at.is_(None), table.c.last_seen_at < bindparam("seen_at")))
+            .values(last_seen_at=bindparam("seen_at"))
+        )
+        try:
+            db.session.execute(
+                stmt,
+                [{"draft_id": draft_id, "seen_at": seen_at} for draft_id, seen_at in entries.items()],
+            )
+        except Exception:
+            self._restore(entries)
+            raise
+        return len(entries)
+
+    def _flush_in_background(self, app) -> None:
+        with app.app_context():
+            with self._lock:
+                snapshot = dict(self._seen)
+            try:
+                self.flush()
+                db.session.commit()
+            except Exception as exc:
+                db.session.rollback()
+                self._restore(snapshot)
+                logger.warning("Entrance heartbeat flush failed: %s", exc)
+            finally:
+                db.session.remove()
+
+
+HEARTBEATS = HeartbeatBuffer()
+
+
+def last_seen_at(draft: EntranceTestDraft) -> datetime | None:
+    """Stored last-seen time, or a newer one still waiting in the buffer."""
+    buffered = HEARTBEATS.last_seen(draft.id) if draft.id else None
+    if buffered and (draft.last_seen_at is None or buffered > draft.last_seen_at):
+        return buffered
+    return draft.last_seen_at
+
+
 def get_or_create_draft(invitation, now: datetime | None = None):
     now = now or utcnow()
     draft = invitation.draft
@@ -121,12 +296,13 @@ def _close_hidden_period(draft: EntranceTestDraft, now: datetime) -> int:
 
 
 def _check_existing_gap(draft: EntranceTestDraft, now: datetime) -> None:
-    if draft.hidden_at or not draft.last_seen_at:
+    seen_at = last_seen_at(draft)
+    if draft.hidden_at or not seen_at:
         return
-    seconds = max(0, int((now - draft.last_seen_at).total_seconds()))
+    seconds = max(0, int((now - seen_at).total_seconds()))
     if seconds > RESUME_GRACE_SECONDS:
         draft.exit_count = (draft.exit_count or 0) + 1
-        draft.last_exit_at = draft.last_seen_at
+        draft.last_exit_at = seen_at
         draft.total_hidden_seconds = (draft.total_hidden_seconds or 0) + seconds
         _lock(draft, "session_interrupted", now)
 
@@ -171,7 +347,7 @@ def validate_active_session(
         raise EntranceSessionError("session_not_started", 409)
     _claim_or_validate_device(draft, device_id, now)
     _raise_if_unavailable(draft, now)
-    draft.last_seen_at = now
+    HEARTBEATS.touch(current_app._get_current_object(), draft.id, now)
     return draft
 
 
@@ -181,17 +357,20 @@ def save_answers(
     raw_answers,
     now: datetime | None = None,
 ) -> EntranceTestDraft:
+    """Merge the submitted answers into the draft; unchanged answers write nothing.
+
+    Answers missing from ``raw_answers`` are kept, so clients may send only
+    the questions that changed since their last successful save.
+    """
     now = now or utcnow()
     draft = validate_active_session(invitation, device_id, now)
-    valid_question_ids = {
-        question.id
-        for section in invitation.paper.sections
-        for question in section.questions
-    }
-    draft.answers_json = dump_json_object(
-        normalize_answer_map(raw_answers, valid_question_ids)
-    )
-    draft.last_saved_at = now
+    submitted = normalize_answer_map(raw_answers, paper_question_ids(invitation.paper))
+    stored = load_json_object(draft.answers_json)
+    changed = {key: value for key, value in submitted.items() if stored.get(key) != value}
+    if changed:
+        stored.update(changed)
+        draft.answers_json = dump_json_object(stored)
+        draft.last_saved_at = now
     return draft
 
 
@@ -241,12 +420,7 @@ def mark_audio_started(
 ):
     now = now or utcnow()
     draft = validate_active_session(invitation, device_id, now)
-    valid_section_ids = {
-        section.id
-        for section in invitation.paper.sections
-        if section.section_type == "listening" and section.audio_url
-    }
-    if section_id not in valid_section_ids:
+    if section_id not in paper_index(invitation.paper).audio_section_ids:
         raise EntranceSessionError("invalid_audio_section", 404)
 
     state = load_json_object(draft.audio_state_json)
@@ -296,6 +470,7 @@ def draft_answer_map(draft: EntranceTestDraft | None) -> dict[int, str]:
 
 def serialize_draft(draft: EntranceTestDraft, now: datetime | None = None) -> dict:
     now = now or utcnow()
+    seen_at = last_seen_at(draft)
     remaining = None
     if draft.deadline_at:
         remaining = max(0, math.ceil((draft.deadline_at - now).total_seconds()))
@@ -305,7 +480,7 @@ def serialize_draft(draft: EntranceTestDraft, now: datetime | None = None) -> di
         "deadline_at": draft.deadline_at.isoformat() if draft.deadline_at else None,
         "remaining_seconds": remaining,
         "last_saved_at": draft.last_saved_at.isoformat() if draft.last_saved_at else None,
-        "last_seen_at": draft.last_seen_at.isoformat() if draft.last_seen_at else None,
+        "last_seen_at": seen_at.isoformat() if seen_at else None,
         "exit_count": draft.exit_count or 0,
         "total_hidden_seconds": draft.total_hidden_seconds or 0,
         "device_switch_count": draft.device_switch_count or 0,
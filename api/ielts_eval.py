@@ -7,9 +7,16 @@ from typing import Any
 import requests
 from flask import Blueprint, current_app, jsonify, request
 
+from services import ai_jobs, ai_response_cache, http_client
+
 from .auth_utils import require_api_user
 
 
+# Bump when a prompt builder or result normalizer changes so cached results
+# produced by the old version are no longer served.
+EVAL_PROMPT_VERSION = "ielts-eval-1"
+QUICK_REPLY_PROMPT_VERSION = "quick-reply-1"
+
 eval_bp = Blueprint("ielts_eval", __name__, url_prefix="/api/v1/ielts")
 
 
@@ -454,9 +461,13 @@ def run_quick_reply(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
         "max_tokens": 300,
         "response_format": {"type": "json_object"},
     }
+    cached = ai_response_cache.lookup("ielts_quick_reply", model, QUICK_REPLY_PROMPT_VERSION, req_payload)
+    if cached is not None:
+        return {**cached, "cached": True}, 200
 
     try:
-        resp = requests.post(
+        resp = http_client.post(
+            "deepseek",
             chat_url,
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -481,7 +492,7 @@ def run_quick_reply(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
     if not ok:
         return {"ok": False, "error": "invalid_json_response", "raw": content}, 502
 
-    return {
+    result = {
         "ok": True,
         "reply_text": (parsed.get("reply_text") or "").strip(),
         "follow_up_question": (parsed.get("follow_up_question") or "").strip(),
@@ -493,10 +504,18 @@ def run_quick_reply(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
         },
         "usage": raw.get("usage"),
         "model": raw.get("model", model),
-    }, 200
+    }
+    ai_response_cache.store("ielts_quick_reply", model, QUICK_REPLY_PROMPT_VERSION, req_payload, result)
+    return result, 200
+
 
+def run_ielts_eval(data: dict[str, Any], *, budget_seconds: float | None = None) -> tuple[dict[str, Any], int]:
+    """Band-score a speaking answer with DeepSeek.
 
-def run_ielts_eval(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
+    ``budget_seconds`` bounds all attempts together (the speaking evaluation
+    deadline); each attempt's timeouts are cut to its share of what is left.
+    """
+    started = time.monotonic()
     transcript = data.get("transcript") or data.get("student_answer")
     if not transcript:
         return {"ok": False, "error": "missing_transcript"}, 400
@@ -520,6 +539,9 @@ def run_ielts_eval(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
         "max_tokens": 2000,
         "response_format": {"type": "json_object"},
     }
+    cached = ai_response_cache.lookup("ielts_eval", model, EVAL_PROMPT_VERSION, payload)
+    if cached is not None:
+        return {**cached, "cached": True}, 200
 
     attempt_plan = [chat_url] * max(1, retries + 1)
     last_error: dict[str, Any] | None = None
@@ -528,15 +550,23 @@ def run_ielts_eval(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
 
     for idx, url in enumerate(attempt_plan):
         final_url = url
+        attempt_timeout: Any = timeout
+        if budget_seconds is not None:
+            remaining = budget_seconds - (time.monotonic() - started)
+            if remaining <= 0.5:
+                return {"ok": False, "error": "ielts_eval_timeout", "deadline_seconds": budget_seconds}, 504
+            share = remaining / (len(attempt_plan) - idx)
+            attempt_timeout = http_client.budget_timeout("deepseek", "POST", min(share, timeout))
         try:
-            resp = requests.post(
+            resp = http_client.post(
+                "deepseek",
                 url,
                 headers={
                     "Authorization": f"Bearer {api_key}",
                     "Content-Type": "application/json",
                 },
                 json=payload,
-                timeout=timeout,
+                timeout=attempt_timeout,
             )
         except requests.RequestException as exc:
             last_error = {"error": "deepseek_request_failed", "details": str(exc), "endpoint": url}
@@ -582,19 +612,35 @@ def run_ielts_eval(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
     )
     ok, parsed = _extract_json(content)
     normalized = _normalize_result(parsed, str(data.get("target_band") or "7.0")) if ok else None
-    return {
+    result = {
         "ok": ok,
         "result": normalized if ok else parsed,
         "raw": content if not ok else None,
         "usage": raw.get("usage"),
         "model": raw.get("model", model),
         "endpoint": final_url,
-    }, 200
+    }
+    if ok:
+        ai_response_cache.store("ielts_eval", model, EVAL_PROMPT_VERSION, payload, result)
+    return result, 200
+
+
+# run_ielts_eval already retries DeepSeek DEEPSEEK_RETRIES times; do not
+# multiply that.  The timeout covers DEEPSEEK_TIMEOUT per attempt.
+ai_jobs.register_handler(
+    "ielts_eval",
+    run_ielts_eval,
+    max_attempts=1,
+    timeout_seconds=240,
+)
 
 
 @eval_bp.post("/evaluate")
 @require_api_user()
 def evaluate_ielts():
     data = request.get_json(silent=True) or {}
+    if ai_jobs.wants_async(data):
+        job = ai_jobs.submit_job("ielts_eval", data, created_by_id=request.current_api_user.id)
+        return ai_jobs.accepted_response(job)
     payload, status = run_ielts_eval(data)
     return jsonify(payload), status
@@ -780,22 +780,16 @@ def parse_pdf():
 
 def _parse_pdf_upload(file):
     """Parse grammar questions from PDF file."""
-    import pdfplumber
     import tempfile
     import os
+    from services import pdf_text
 
     tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
     file.save(tmp.name)
     tmp.close()
 
     try:
-        with pdfplumber.open(tmp.name) as pdf:
-            all_text = []
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    all_text.append(text)
-            full_text = '\n'.join(all_text)
+        full_text = pdf_text.extract_text(tmp.name, engines=("pdfplumber",), **pdf_text.app_options())
     finally:
         os.unlink(tmp.name)
 
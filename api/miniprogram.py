@@ -4,10 +4,11 @@ import json
 import html
 import hashlib
 import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, date, timedelta
 from pathlib import Path
-from urllib.parse import quote
-import requests
+from urllib.parse import quote, unquote, urlparse
 from flask import Blueprint, jsonify, request, current_app, url_for
 from werkzeug.utils import secure_filename
 from sqlalchemy import func, and_, or_
@@ -21,7 +22,7 @@ from models import (
     DictationBook, DictationWord, DictationRecord, StudentWordMastery,
     ListeningSegmentResult, ListeningTestSubmission, ReadingTestSubmission
 )
-from .auth_utils import can_view_all_schedules, require_api_user
+from .auth_utils import can_view_all_schedules, current_student_profile_id, require_api_user
 from .listening_intensive import (
     build_intensive_catalog,
     load_registered_intensive_exercise,
@@ -46,9 +47,12 @@ from .tencent_soe import evaluate_pronunciation
 from .aliyun_oral_warrant import create_oral_warrant
 from .aliyun_oral_task import run_oral_task
 from practice_tables import normalize_practice_table
+from services import ai_jobs, http_client, wechat_push
 from services.scheduler_client import (
     coerce_schedule_list as _shared_coerce_schedule_list,
     fetch_range_schedules_by_dates as _shared_fetch_range_schedules_by_dates,
+    get_range_snapshot,
+    mark_range_diffed,
 )
 from services.vocabulary_mastery import vocabulary_goal_for_task
 from services.listening_training import (
@@ -1165,13 +1169,96 @@ def _load_conversation_history(session, student_id, limit=6):
     return history
 
 
-@mp_bp.route("/speaking/evaluate", methods=["POST"])
-@require_api_user(User.ROLE_STUDENT)
-def evaluate_speaking():
-    data = request.get_json(silent=True) or {}
+# Band scoring (DeepSeek) and pronunciation scoring (Tencent SOE) are
+# independent network calls; running them side by side makes an evaluation
+# cost max(LLM, SOE) instead of the sum.  Both calls get the deadline as their
+# own time budget, so work abandoned at the deadline frees its slot right
+# after.  Each evaluation takes two slots, and the pool has two for every
+# thread that can run one (gunicorn threads plus inline AI job workers), so a
+# call never waits in the queue while the request's deadline runs.
+_SPEAKING_EVAL_POOL = ThreadPoolExecutor(
+    max_workers=2 * (
+        int(os.environ.get("GUNICORN_THREADS", "6")) + int(os.environ.get("AI_JOBS_INLINE_THREADS", "2"))
+    ),
+    thread_name_prefix="speaking-eval",
+)
 
+
+def _call_in_app_context(app, fn, *args, **kwargs):
+    with app.app_context():
+        return fn(*args, **kwargs)
+
+
+def _local_upload_path(audio_url: str, host: str) -> str | None:
+    """Map an /uploads/ URL served by this host back to the file on disk."""
+    parsed = urlparse(audio_url)
+    if parsed.netloc and parsed.netloc != host:
+        return None
+    path = unquote(parsed.path or "")
+    if not path.startswith("/uploads/"):
+        return None
+    upload_root = os.path.realpath(current_app.config.get("UPLOAD_FOLDER", "uploads"))
+    candidate = os.path.realpath(os.path.join(upload_root, path[len("/uploads/"):]))
+    if os.path.commonpath([upload_root, candidate]) != upload_root:
+        return None
+    return candidate if os.path.isfile(candidate) else None
+
+
+def _score_speaking_concurrently(data: dict, audio_url: str, transcript: str, host_url: str):
+    """Return ``(payload, status, pronunciation_ok, pronunciation_result)``.
+
+    ``pronunciation_ok`` is None when pronunciation was not requested.
+    """
+    app = current_app._get_current_object()
+    deadline = float(current_app.config.get("SPEAKING_EVAL_DEADLINE_SECONDS") or 90)
+    started = time.monotonic()
+
+    llm_future = _SPEAKING_EVAL_POOL.submit(
+        _call_in_app_context, app, run_ielts_eval, data, budget_seconds=deadline
+    )
+    soe_future = None
+    if audio_url and transcript:
+        local_path = _local_upload_path(audio_url, urlparse(host_url).netloc)
+        if not local_path and not audio_url.startswith("http"):
+            base_url = host_url.rstrip("/")
+            audio_url = f"{base_url}{audio_url if audio_url.startswith('/') else '/' + audio_url}"
+        soe_future = _SPEAKING_EVAL_POOL.submit(
+            _call_in_app_context,
+            app,
+            evaluate_pronunciation,
+            audio_url,
+            transcript,
+            audio_path=local_path,
+            timeout=deadline,
+        )
+
+    wait([f for f in (llm_future, soe_future) if f is not None], timeout=deadline)
+    elapsed = round(time.monotonic() - started, 2)
+
+    if llm_future.done():
+        payload, status = llm_future.result()
+    else:
+        payload, status = {
+            "ok": False,
+            "error": "ielts_eval_timeout",
+            "deadline_seconds": deadline,
+        }, 504
+
+    pron_ok, pron_res = None, None
+    if soe_future is not None:
+        if not soe_future.done():
+            pron_ok, pron_res = False, {"error": "tencent_soe_timeout", "deadline_seconds": deadline}
+        else:
+            try:
+                pron_ok, pron_res = soe_future.result()
+            except Exception as exc:  # noqa: BLE001
+                pron_ok, pron_res = False, {"error": "tencent_soe_request_failed", "details": str(exc)}
+    payload["elapsed_seconds"] = elapsed
+    return payload, status, pron_ok, pron_res
+
+
+def _evaluate_speaking(user: User, data: dict, host_url: str) -> tuple[dict, int]:
     # Inject conversation history for multi-turn context
-    user = request.current_api_user
     student = user.student_profile if user else None
     session_id = data.get("session_id")
     if session_id and student:
@@ -1181,29 +1268,26 @@ def evaluate_speaking():
         if session:
             data["conversation_history"] = _load_conversation_history(session, student.id)
 
-    payload, status = run_ielts_eval(data)
+    audio_url = (data.get("audio_url") or "").strip()
+    transcript = (data.get("transcript") or "").strip()
+    payload, status, pron_ok, pron_res = _score_speaking_concurrently(
+        data, audio_url, transcript, host_url
+    )
 
-    if not student:
-        user = request.current_api_user
-        student = user.student_profile if user else None
     pronunciation_payload = None
     pronunciation_error = None
-    audio_url = (data.get("audio_url") or "").strip()
-    transcript = (data.get("transcript") or "").strip()
-    if payload.get("ok") and payload.get("result") and audio_url and transcript:
-        if not audio_url.startswith("http"):
-            base_url = request.host_url.rstrip("/")
-            audio_url = f"{base_url}{audio_url if audio_url.startswith('/') else '/' + audio_url}"
-        pron_ok, pron_res = evaluate_pronunciation(audio_url, transcript)
-        if pron_ok:
-            payload["result"] = _merge_pronunciation_result(payload["result"], pron_res)
-            pronunciation_payload = pron_res
-            payload["pronunciation_engine"] = {
-                "engine": pron_res.get("engine"),
-                "request_id": pron_res.get("request_id"),
-            }
-        else:
-            pronunciation_error = pron_res
+    if pron_ok and payload.get("ok") and payload.get("result"):
+        payload["result"] = _merge_pronunciation_result(payload["result"], pron_res)
+        pronunciation_payload = pron_res
+        payload["pronunciation_engine"] = {
+            "engine": pron_res.get("engine"),
+            "request_id": pron_res.get("request_id"),
+        }
+    elif pron_ok:
+        # Band scoring failed or timed out; still hand back the pronunciation half.
+        payload["pronunciation"] = pron_res
+    elif pron_ok is False:
+        pronunciation_error = pron_res
 
     oral_payload = None
     oral_error = None
@@ -1290,6 +1374,37 @@ def evaluate_speaking():
         payload["oral_engine_error"] = oral_error
     if payload.get("result"):
         payload["follow_up_question"] = (payload["result"].get("follow_up_question") or "").strip()
+    return payload, status
+
+
+def _job_user(job_payload: dict) -> User | None:
+    user = db.session.get(User, int(job_payload.get("user_id") or 0))
+    return user if user and user.is_active else None
+
+
+def _speaking_evaluate_job(job_payload: dict) -> tuple[dict, int]:
+    user = _job_user(job_payload)
+    if not user:
+        return {"ok": False, "error": "user_inactive"}, 403
+    return _evaluate_speaking(user, job_payload.get("data") or {}, job_payload.get("host_url") or "")
+
+
+ai_jobs.register_handler("speaking_evaluate", _speaking_evaluate_job, timeout_seconds=300)
+
+
+@mp_bp.route("/speaking/evaluate", methods=["POST"])
+@require_api_user(User.ROLE_STUDENT)
+def evaluate_speaking():
+    data = request.get_json(silent=True) or {}
+    user = request.current_api_user
+    if ai_jobs.wants_async(data):
+        job = ai_jobs.submit_job(
+            "speaking_evaluate",
+            {"user_id": user.id, "data": data, "host_url": request.host_url},
+            created_by_id=user.id,
+        )
+        return ai_jobs.accepted_response(job)
+    payload, status = _evaluate_speaking(user, data, request.host_url)
     return jsonify(payload), status
 
 
@@ -1315,12 +1430,11 @@ def transcribe_speaking_audio():
 @require_api_user(User.ROLE_STUDENT)
 def get_oral_warrant():
     """Create temporary warrant_id for Aliyun oral evaluation SDK."""
-    user = request.current_api_user
-    student = user.student_profile
-    if not student:
+    student_id = current_student_profile_id()
+    if not student_id:
         return jsonify({"ok": False, "error": "no_student_profile"}), 404
 
-    user_id = f"student_{student.id}"
+    user_id = f"student_{student_id}"
     user_client_ip = (
         request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
         or request.remote_addr
@@ -1341,9 +1455,8 @@ def get_oral_warrant():
 def evaluate_oral_task():
     """Run Aliyun oral evaluation task using record_id list returned by client SDK."""
     data = request.get_json(silent=True) or {}
-    user = request.current_api_user
-    student = user.student_profile
-    if not student:
+    student_id = current_student_profile_id()
+    if not student_id:
         return jsonify({"ok": False, "error": "no_student_profile"}), 404
 
     warrant_id = str(data.get("warrant_id") or "").strip()
@@ -1366,7 +1479,7 @@ def evaluate_oral_task():
 
     ok, payload = run_oral_task(
         appid=appid,
-        user_id=f"student_{student.id}",
+        user_id=f"student_{student_id}",
         warrant_id=warrant_id,
         record_id_list=record_id_list,
     )
@@ -1388,13 +1501,12 @@ def create_speaking_session():
     if not question:
         return jsonify({"ok": False, "error": "missing_question"}), 400
 
-    user = request.current_api_user
-    student = user.student_profile
-    if not student:
+    student_id = current_student_profile_id()
+    if not student_id:
         return jsonify({"ok": False, "error": "no_student_profile"}), 404
 
     session = SpeakingSession(
-        student_id=student.id,
+        student_id=student_id,
         part=part,
         question=question,
         question_type=question_type or None,
@@ -1424,13 +1536,12 @@ def create_speaking_session():
 @mp_bp.route("/speaking/session/<int:session_id>", methods=["GET"])
 @require_api_user(User.ROLE_STUDENT)
 def get_speaking_session(session_id: int):
-    user = request.current_api_user
-    student = user.student_profile
-    if not student:
+    student_id = current_student_profile_id()
+    if not student_id:
         return jsonify({"ok": False, "error": "no_student_profile"}), 404
 
     session = SpeakingSession.query.filter_by(
-        id=session_id, student_id=student.id
+        id=session_id, student_id=student_id
     ).first()
     if not session:
         return jsonify({"ok": False, "error": "session_not_found"}), 404
@@ -1476,14 +1587,13 @@ def get_speaking_session(session_id: int):
 @mp_bp.route("/speaking/sessions", methods=["GET"])
 @require_api_user(User.ROLE_STUDENT)
 def list_speaking_sessions():
-    user = request.current_api_user
-    student = user.student_profile
-    if not student:
+    student_id = current_student_profile_id()
+    if not student_id:
         return jsonify({"ok": False, "error": "no_student_profile"}), 404
 
     limit = min(int(request.args.get("limit", 20)), 50)
     sessions = (
-        SpeakingSession.query.filter_by(student_id=student.id)
+        SpeakingSession.query.filter_by(student_id=student_id)
         .order_by(SpeakingSession.created_at.desc())
         .limit(limit)
         .all()
@@ -1504,13 +1614,7 @@ def list_speaking_sessions():
     })
 
 
-@mp_bp.route("/speaking/quick-reply", methods=["POST"])
-@require_api_user(User.ROLE_STUDENT)
-def quick_reply_speaking():
-    """Lightweight eval for call mode — fast reply without full scoring."""
-    data = request.get_json(silent=True) or {}
-
-    user = request.current_api_user
+def _speaking_quick_reply(user: User, data: dict) -> tuple[dict, int]:
     student = user.student_profile if user else None
     session_id = data.get("session_id")
     if session_id and student:
@@ -1559,6 +1663,33 @@ def quick_reply_speaking():
 
     if payload.get("result"):
         payload["follow_up_question"] = (payload["result"].get("follow_up_question") or "").strip()
+    return payload, status
+
+
+def _speaking_quick_reply_job(job_payload: dict) -> tuple[dict, int]:
+    user = _job_user(job_payload)
+    if not user:
+        return {"ok": False, "error": "user_inactive"}, 403
+    return _speaking_quick_reply(user, job_payload.get("data") or {})
+
+
+ai_jobs.register_handler("speaking_quick_reply", _speaking_quick_reply_job, timeout_seconds=240)
+
+
+@mp_bp.route("/speaking/quick-reply", methods=["POST"])
+@require_api_user(User.ROLE_STUDENT)
+def quick_reply_speaking():
+    """Lightweight eval for call mode — fast reply without full scoring."""
+    data = request.get_json(silent=True) or {}
+    user = request.current_api_user
+    if ai_jobs.wants_async(data):
+        job = ai_jobs.submit_job(
+            "speaking_quick_reply",
+            {"user_id": user.id, "data": data},
+            created_by_id=user.id,
+        )
+        return ai_jobs.accepted_response(job)
+    payload, status = _speaking_quick_reply(user, data)
     return jsonify(payload), status
 
 
@@ -2537,7 +2668,7 @@ def submit_task(task_id):
     item = PlanItem.query.get(task_id)
     if item:
         # 验证该任务是否属于当前学生
-        if item.plan.student_id != user.student_profile.id:
+        if item.plan.student_id != current_student_profile_id():
             return jsonify({"ok": False, "error": "forbidden"}), 403
             
         # 更新任务状态
@@ -2617,7 +2748,7 @@ def start_timer(task_id):
         return jsonify({"ok": False, "error": "task_not_found"}), 404
         
     # Verify ownership
-    if item.plan.student_id != user.student_profile.id:
+    if item.plan.student_id != current_student_profile_id():
         return jsonify({"ok": False, "error": "forbidden"}), 403
     
     # Create session for new format
@@ -2664,7 +2795,7 @@ def stop_timer(task_id, session_id):
     
     # Handle new PlanItem format with sessions
     session = PlanItemSession.query.get(session_id)
-    if not session or session.plan_item.plan.student_id != user.student_profile.id:
+    if not session or session.plan_item.plan.student_id != current_student_profile_id():
         return jsonify({"ok": False, "error": "forbidden"}), 403
     
     # Update session end time
@@ -3570,7 +3701,8 @@ def _fetch_tomorrow_schedules():
     if not base_url or not token:
         return None, "scheduler_config_missing"
     try:
-        resp = requests.get(
+        resp = http_client.get(
+            "scheduler",
             f"{base_url}/api/schedules/tomorrow",
             headers={"X-Push-Token": token},
             timeout=5,
@@ -3589,6 +3721,18 @@ def _fetch_range_schedules_by_dates(start: date, end: date, teacher_id=None):
     return _shared_fetch_range_schedules_by_dates(start, end, teacher_id=teacher_id)
 
 
+def _fetch_range_schedules_cached(start: date, end: date, teacher_id=None):
+    """同上，但优先使用 scheduler_range_cache 中的短期缓存（课表页反复打开时不再每次远程拉取）。
+
+    返回 ``(data, err, stale)``；排课系统不可用时可能返回缓存旧副本，``stale`` 为 True，
+    课表接口把它透传给前端提示老师。
+    """
+    snapshot, err = get_range_snapshot(start, end, teacher_id=teacher_id)
+    if err:
+        return None, err, False
+    return snapshot.payload, None, snapshot.stale
+
+
 def _fetch_range_schedules(days=7, teacher_id=None):
     """调用排课系统 range 接口，返回指定天数内的课表。"""
     today = date.today()
@@ -3696,37 +3840,6 @@ def _serialize_class_feedback(feedback: ClassFeedback):
     }
 
 
-def _collect_student_openids(student_id, student_name):
-    openids = []
-    profile = None
-    if student_id:
-        profile = StudentProfile.query.filter_by(scheduler_student_id=student_id).first()
-    if not profile and student_name:
-        profile = StudentProfile.query.filter_by(full_name=student_name).first()
-    if profile:
-        if profile.user and profile.user.wechat_openid:
-            openids.append(profile.user.wechat_openid)
-        links = ParentStudentLink.query.filter_by(student_name=profile.full_name, is_active=True).all()
-        for link in links:
-            parent = User.query.get(link.parent_id)
-            if parent and parent.wechat_openid:
-                openids.append(parent.wechat_openid)
-    return list(dict.fromkeys(openids))
-
-
-def _collect_teacher_openid(scheduler_teacher_id):
-    if not scheduler_teacher_id:
-        return None
-    teacher = User.query.filter(
-        User.scheduler_teacher_id == scheduler_teacher_id,
-        User.is_active.is_(True),
-        User.role.in_([User.ROLE_TEACHER, User.ROLE_ADMIN, User.ROLE_ASSISTANT]),
-    ).first()
-    if teacher and teacher.wechat_openid:
-        return teacher.wechat_openid
-    return None
-
-
 def _course_template_id():
     return current_app.config.get("WECHAT_COURSE_TEMPLATE_ID")
 
@@ -3765,6 +3878,15 @@ def send_tomorrow_class_reminders():
     return jsonify(result), 400
 
 
+def _course_message_data(course_name, start_time, end_time, teacher_name, label=""):
+    return {
+        "thing27": {"value": f"{label}{(course_name or '课程')}"[:20]},
+        "time6": {"value": str(start_time)[:32]},
+        "time38": {"value": str(end_time or start_time)[:32]},
+        "thing15": {"value": (teacher_name or "")[:20]},
+    }
+
+
 def send_tomorrow_class_reminders_internal():
     template_id = _course_template_id()
     if not template_id:
@@ -3774,32 +3896,27 @@ def send_tomorrow_class_reminders_internal():
     student_error = err
     schedules_list = [] if err else _coerce_schedule_list(schedules)
 
-    sent = 0
-    student_sent = 0
-    teacher_sent = 0
-    teacher_total = 0
-    teacher_errors = []
+    student_rows = []
     dedupe = set()
     for item in schedules_list:
-        schedule_id, student_id, teacher_id, course_name, start_time, end_time, teacher_name, student_name = _extract_schedule_fields(item)
+        fields = _extract_schedule_fields(item)
+        schedule_id = fields[0]
         if schedule_id and schedule_id in dedupe:
             continue
         if schedule_id:
             dedupe.add(schedule_id)
-        # 学生+家长
-        openids = _collect_student_openids(student_id, student_name)
-        if openids:
-            data = {
-                "thing27": {"value": (course_name or "课程")[:20]},
-                "time6": {"value": str(start_time)[:32]},
-                "time38": {"value": str(end_time or start_time)[:32]},
-                "thing15": {"value": (teacher_name or "")[:20]},
-            }
-            for oid in openids:
-                if send_subscribe_message(oid, template_id, data, page="pages/student/home/index"):
-                    sent += 1
-                    student_sent += 1
+        student_rows.append(fields)
 
+    # 学生+家长：一次性预取所有收件人 openid，消息统一并发发送
+    directory = wechat_push.RecipientDirectory((row[1], row[7]) for row in student_rows)
+    messages = []
+    for _schedule_id, student_id, _teacher_id, course_name, start_time, end_time, teacher_name, student_name in student_rows:
+        data = _course_message_data(course_name, start_time, end_time, teacher_name)
+        for oid in directory.student_openids(student_id, student_name):
+            messages.append(wechat_push.PushMessage(oid, template_id, data, "pages/student/home/index", category="student"))
+
+    teacher_total = 0
+    teacher_errors = []
     tomorrow = date.today() + timedelta(days=1)
     teachers = User.query.filter(
         User.scheduler_teacher_id.isnot(None),
@@ -3835,31 +3952,38 @@ def send_tomorrow_class_reminders_internal():
             if dedupe_key in teacher_dedupe:
                 continue
             teacher_dedupe.add(dedupe_key)
-            if teacher_openid:
-                data_t = {
-                    "thing27": {"value": (course_name or "课程")[:20]},
-                    "time6": {"value": str(start_time)[:32]},
-                    "time38": {"value": str(end_time or start_time)[:32]},
-                    "thing15": {"value": (teacher_name or teacher.display_name or teacher.username or "")[:20]},
-                }
-                result = send_subscribe_message_result(
-                    teacher_openid,
-                    template_id,
-                    data_t,
-                    page="pages/teacher/home/index",
-                )
-                if result.get("ok"):
-                    sent += 1
-                    teacher_sent += 1
-                else:
-                    teacher_errors.append({
-                        "teacher_id": teacher.id,
-                        "error": _normalize_subscribe_push_error(result),
-                    })
+            data_t = _course_message_data(
+                course_name,
+                start_time,
+                end_time,
+                teacher_name or teacher.display_name or teacher.username,
+            )
+            messages.append(wechat_push.PushMessage(
+                teacher_openid,
+                template_id,
+                data_t,
+                "pages/teacher/home/index",
+                category="teacher",
+                ref=teacher.id,
+            ))
+
+    results = wechat_push.deliver(
+        messages,
+        send_subscribe_message_result,
+        batch=f"tomorrow_reminders:{tomorrow.isoformat()}",
+    )
+    student_sent = sum(1 for r in results if r.ok and r.message.category == "student")
+    teacher_sent = sum(1 for r in results if r.ok and r.message.category == "teacher")
+    for r in results:
+        if not r.ok and r.message.category == "teacher":
+            teacher_errors.append({
+                "teacher_id": r.message.ref,
+                "error": _normalize_subscribe_push_error(r.response),
+            })
 
     return {
         "ok": True,
-        "sent": sent,
+        "sent": student_sent + teacher_sent,
         "student_sent": student_sent,
         "teacher_sent": teacher_sent,
         "total": len(schedules_list),
@@ -3885,24 +4009,40 @@ def check_schedule_changes_internal(days=7):
     end_date = start_date + timedelta(days=days)
     added = 0
     removed = 0
-    sent = 0
+    # (scheduler_teacher_id, student_id, student_name, message data) per change
+    changes = []
+    diffed = []
 
     for teacher in teachers:
-        data, err = _fetch_range_schedules_by_dates(start_date, end_date, teacher_id=teacher.scheduler_teacher_id)
+        # 总是向排课系统条件刷新（If-None-Match）；内容与上次已对比的版本一致时跳过整位老师。
+        range_snapshot, err = get_range_snapshot(
+            start_date, end_date, teacher.scheduler_teacher_id, max_age=0, allow_stale=False
+        )
         if err:
             continue
-        schedules = _coerce_schedule_list(data)
+        if not range_snapshot.needs_diff:
+            continue
+        diffed.append(range_snapshot)
+        schedules = _coerce_schedule_list(range_snapshot.payload)
 
-        current_uids = set()
+        parsed = []
         for item in schedules:
             schedule_id, student_id, teacher_id, course_name, start_time, end_time, teacher_name, student_name = _extract_schedule_fields(item)
             schedule_date = item.get("schedule_date") or item.get("date")
             if not schedule_date and start_time and " " in str(start_time):
                 schedule_date = str(start_time).split(" ")[0]
-
             uid = _build_schedule_uid(schedule_id, teacher.scheduler_teacher_id, student_id, course_name, start_time)
-            current_uids.add(uid)
-            snapshot = ScheduleSnapshot.query.filter_by(schedule_uid=uid).first()
+            parsed.append((uid, schedule_id, student_id, course_name, start_time, end_time, teacher_name, student_name, schedule_date))
+
+        current_uids = {row[0] for row in parsed}
+        known = {}
+        if current_uids:
+            known = {
+                s.schedule_uid: s
+                for s in ScheduleSnapshot.query.filter(ScheduleSnapshot.schedule_uid.in_(current_uids))
+            }
+        for uid, schedule_id, student_id, course_name, start_time, end_time, teacher_name, student_name, schedule_date in parsed:
+            snapshot = known.get(uid)
             if not snapshot:
                 snapshot = ScheduleSnapshot(
                     schedule_uid=uid,
@@ -3910,6 +4050,7 @@ def check_schedule_changes_internal(days=7):
                     scheduler_teacher_id=teacher.scheduler_teacher_id,
                 )
                 db.session.add(snapshot)
+                known[uid] = snapshot
                 is_new = True
             else:
                 is_new = snapshot.status != "active"
@@ -3926,21 +4067,12 @@ def check_schedule_changes_internal(days=7):
 
             if is_new:
                 added += 1
-                change_label = "新增"
-                openids = _collect_student_openids(student_id, student_name)
-                teacher_openid = _collect_teacher_openid(teacher.scheduler_teacher_id)
-                if teacher_openid:
-                    openids.append(teacher_openid)
-                openids = list(dict.fromkeys(openids))
-                data_msg = {
-                    "thing27": {"value": f"[{change_label}]{(course_name or '课程')}"[:20]},
-                    "time6": {"value": str(start_time)[:32]},
-                    "time38": {"value": str(end_time or start_time)[:32]},
-                    "thing15": {"value": (teacher_name or "")[:20]},
-                }
-                for oid in openids:
-                    if send_subscribe_message(oid, template_id, data_msg, page="pages/teacher/home/index"):
-                        sent += 1
+                changes.append((
+                    teacher.scheduler_teacher_id,
+                    student_id,
+                    student_name,
+                    _course_message_data(course_name, start_time, end_time, teacher_name, label="[新增]"),
+                ))
 
         # 检测取消的课程
         existing = ScheduleSnapshot.query.filter(
@@ -3953,27 +4085,40 @@ def check_schedule_changes_internal(days=7):
             if snapshot.schedule_uid not in current_uids:
                 snapshot.status = "removed"
                 removed += 1
-                change_label = "取消"
-                openids = _collect_student_openids(snapshot.student_id, snapshot.student_name)
-                teacher_openid = _collect_teacher_openid(teacher.scheduler_teacher_id)
-                if teacher_openid:
-                    openids.append(teacher_openid)
-                openids = list(dict.fromkeys(openids))
-                data_msg = {
-                    "thing27": {"value": f"[{change_label}]{(snapshot.course_name or '课程')}"[:20]},
-                    "time6": {"value": str(snapshot.start_time)[:32]},
-                    "time38": {"value": str(snapshot.end_time or snapshot.start_time)[:32]},
-                    "thing15": {"value": ""[:20]},
-                }
-                for oid in openids:
-                    if send_subscribe_message(oid, template_id, data_msg, page="pages/teacher/home/index"):
-                        sent += 1
+                changes.append((
+                    teacher.scheduler_teacher_id,
+                    snapshot.student_id,
+                    snapshot.student_name,
+                    _course_message_data(snapshot.course_name, snapshot.start_time, snapshot.end_time, "", label="[取消]"),
+                ))
 
     try:
         db.session.commit()
     except Exception as exc:
         db.session.rollback()
         current_app.logger.warning("Schedule snapshot commit failed: %s", exc)
+    else:
+        for range_snapshot in diffed:
+            mark_range_diffed(range_snapshot)
+
+    directory = wechat_push.RecipientDirectory(
+        students=((student_id, student_name) for _tid, student_id, student_name, _data in changes),
+        teacher_ids={tid for tid, *_rest in changes},
+    )
+    messages = []
+    for scheduler_teacher_id, student_id, student_name, data_msg in changes:
+        openids = directory.student_openids(student_id, student_name)
+        teacher_openid = directory.teacher_openid(scheduler_teacher_id)
+        if teacher_openid:
+            openids.append(teacher_openid)
+        for oid in dict.fromkeys(openids):
+            messages.append(wechat_push.PushMessage(oid, template_id, data_msg, "pages/teacher/home/index", category="schedule_change"))
+    results = wechat_push.deliver(
+        messages,
+        send_subscribe_message_result,
+        batch=f"schedule_changes:{start_date.isoformat()}",
+    )
+    sent = sum(1 for r in results if r.ok)
 
     return {"ok": True, "added": added, "removed": removed, "sent": sent}
 
@@ -5145,7 +5290,7 @@ def teacher_schedules():
     else:
         start_date = date.today() - timedelta(days=past_days)
         end_date = date.today() + timedelta(days=days)
-    data, err = _fetch_range_schedules_by_dates(start_date, end_date, teacher_id=user.scheduler_teacher_id)
+    data, err, stale = _fetch_range_schedules_cached(start_date, end_date, teacher_id=user.scheduler_teacher_id)
     if err:
         return jsonify({"ok": False, "error": err}), 400
 
@@ -5158,6 +5303,7 @@ def teacher_schedules():
         "past_days": past_days,
         "month": month_arg or None,
         "count": len(normalized),
+        "stale": stale,
         "schedules": normalized
     })
 
@@ -5215,7 +5361,7 @@ def teacher_all_schedules():
     if err:
         return jsonify({"ok": False, "error": err}), 400
 
-    data, err = _fetch_range_schedules_by_dates(start_date, end_date, teacher_id=None)
+    data, err, stale = _fetch_range_schedules_cached(start_date, end_date, teacher_id=None)
     if err:
         return jsonify({"ok": False, "error": err}), 400
 
@@ -5228,6 +5374,7 @@ def teacher_all_schedules():
         "past_days": past_days,
         "month": month_arg or None,
         "count": len(normalized),
+        "stale": stale,
         "schedules": normalized
     })
 
@@ -5258,7 +5405,9 @@ def update_scheduler_student_profile(scheduler_student_id):
         return jsonify({"ok": False, "error": "empty_payload"}), 400
 
     try:
-        resp = requests.patch(
+        resp = http_client.request(
+            "scheduler",
+            "PATCH",
             f"{base_url}/api/students/{scheduler_student_id}/profile",
             headers={"X-Push-Token": token},
             json=body,
@@ -5320,7 +5469,7 @@ def teacher_monthly_stats():
     start_date = date(year, month, 1)
     end_date = date(year, month, last_day)
 
-    data, err = _fetch_range_schedules_by_dates(start_date, end_date, teacher_id=user.scheduler_teacher_id)
+    data, err, stale = _fetch_range_schedules_cached(start_date, end_date, teacher_id=user.scheduler_teacher_id)
     if err:
         return jsonify({"ok": False, "error": err}), 400
 
@@ -5370,4 +5519,5 @@ def teacher_monthly_stats():
         "month": f"{year:04d}-{month:02d}",
         "subjects": subjects,
         "total": total,
+        "stale": stale,
     })
@@ -8,9 +8,10 @@ import re
 import time
 from typing import Any
 
-import requests
 from flask import current_app
 
+from services import http_client
+
 
 QWEN_CHAT_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions"
 
@@ -236,7 +237,7 @@ def generate_vocab_enrichment(
     last_error: Exception | None = None
     for attempt in range(max_retries + 1):
         try:
-            resp = requests.post(_chat_url(), headers=headers, json=payload, timeout=timeout)
+            resp = http_client.post("qwen", _chat_url(), headers=headers, json=payload, timeout=timeout)
             resp.raise_for_status()
             data = resp.json()
             content = data["choices"][0]["message"]["content"]
@@ -3,6 +3,12 @@
 Runtime is AI-free: everything here is a plain DB read, except the small
 student-scoped expression bookmarks. Keep route functions thin (< 60 lines) and
 push logic into ``_helper`` functions per repo convention.
+
+The catalog (metadata only, ``payload_json`` deferred) and each passage body
+are cached in-process. The catalog cache is keyed by a (count, max updated_at)
+fingerprint of the ready rows, so an import from any process invalidates it;
+passage bodies are keyed by ``updated_at`` and served with content-hash ETags
+and a precompressed gzip variant (see services/http_cache.py).
 """
 
 from __future__ import annotations
@@ -11,8 +17,8 @@ import re
 
 from flask import (
     Blueprint,
-    Response,
     abort,
+    current_app,
     jsonify,
     render_template,
     request,
@@ -20,7 +26,9 @@ from flask import (
 )
 from flask_login import current_user
 from jinja2 import TemplateNotFound
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 
 from api.reading_study_glossary import glossary_payload
 from models import (
@@ -30,9 +38,21 @@ from models import (
     User,
     db,
 )
+from services import http_cache
+from services.lru import LruCache
 
 reading_study_bp = Blueprint("reading_study", __name__)
 
+PASSAGE_CACHE_SIZE = 128
+_CATALOG_COLUMNS = (
+    ReadingPassageAnalysis.passage_id,
+    ReadingPassageAnalysis.test_id,
+    ReadingPassageAnalysis.source_kind,
+    ReadingPassageAnalysis.passage_title,
+    ReadingPassageAnalysis.difficulty,
+    ReadingPassageAnalysis.sentence_count,
+)
+
 
 # --------------------------------------------------------------------------- #
 # Helpers
@@ -57,8 +77,83 @@ def _passage_sort_key(row: ReadingPassageAnalysis):
     return (int(match.group(1)) if match else 999, row.passage_id or "")
 
 
-def _ready_passages(test_id: str) -> list[ReadingPassageAnalysis]:
-    return ReadingPassageAnalysis.query.filter_by(test_id=test_id, status="ready").all()
+class _Catalog:
+    """Ready-passage metadata for one fingerprint, plus its encoded responses."""
+
+    def __init__(self, fingerprint, rows: list[ReadingPassageAnalysis]):
+        self.fingerprint = fingerprint
+        self.by_test: dict[str, list[dict]] = {}
+        self.source_kinds: dict[str, str] = {}
+        self.sources: dict[str, list[dict]] = {}
+        for row in sorted(rows, key=lambda r: (r.source_kind, r.test_id or "", _passage_sort_key(r))):
+            self.sources.setdefault(row.source_kind, []).append({**_passage_meta(row), "test_id": row.test_id})
+        for row in sorted(rows, key=_passage_sort_key):
+            self.source_kinds.setdefault(row.test_id, row.source_kind)
+            self.by_test.setdefault(row.test_id, []).append(_passage_meta(row))
+        self.bodies: dict[str | None, http_cache.CachedBody] = {}
+
+    def body(self, test_id: str | None) -> http_cache.CachedBody:
+        body = self.bodies.get(test_id)
+        if body is None:
+            if test_id:
+                payload = {"test_id": test_id, "passages": self.by_test.get(test_id, [])}
+            else:
+                payload = {"test_id": None, "sources": self.sources}
+            body = self.bodies[test_id] = http_cache.build_body(current_app.json.dumps(payload))
+        return body
+
+
+_catalog_cache: _Catalog | None = None
+_passage_bodies = LruCache(PASSAGE_CACHE_SIZE)
+
+
+def _catalog_fingerprint():
+    count, latest = (
+        db.session.query(func.count(ReadingPassageAnalysis.id), func.max(ReadingPassageAnalysis.updated_at))
+        .filter(ReadingPassageAnalysis.status == "ready")
+        .one()
+    )
+    return (str(db.engine.url), count, latest)
+
+
+def _catalog() -> _Catalog:
+    global _catalog_cache
+    fingerprint = _catalog_fingerprint()
+    cached = _catalog_cache
+    if cached is not None and cached.fingerprint == fingerprint:
+        return cached
+    rows = (
+        ReadingPassageAnalysis.query.options(load_only(*_CATALOG_COLUMNS))
+        .filter_by(status="ready")
+        .all()
+    )
+    _catalog_cache = _Catalog(fingerprint, rows)
+    return _catalog_cache
+
+
+def _passage_body(passage_id: str) -> http_cache.CachedBody | None:
+    """Cached body for a ready passage; a cheap updated_at probe decides freshness."""
+    ready = ReadingPassageAnalysis.query.filter_by(passage_id=passage_id, status="ready")
+    updated_at = ready.with_entities(ReadingPassageAnalysis.updated_at).scalar()
+    if updated_at is None:
+        return None
+    key = (str(db.engine.url), passage_id, updated_at)
+    body = _passage_bodies.get(key)
+    if body is None:
+        payload_json = ready.with_entities(ReadingPassageAnalysis.payload_json).scalar()
+        if payload_json is None:
+            return None
+        # payload_json 原样返回（已含归一化 concept / label）。
+        body = http_cache.build_body(payload_json)
+        _passage_bodies.set(key, body)
+    return body
+
+
+def invalidate_caches() -> None:
+    """Drop this process's catalog/passage caches (import script hook)."""
+    global _catalog_cache
+    _catalog_cache = None
+    _passage_bodies.clear()
 
 
 def _practice_url(test_id: str, source_kind: str) -> str:
@@ -115,14 +210,16 @@ def _requested_normalized_text() -> str:
 # --------------------------------------------------------------------------- #
 @reading_study_bp.route("/reading/study/<test_id>")
 def reading_study_page(test_id: str):
-    rows = sorted(_ready_passages(test_id), key=_passage_sort_key)
-    if not rows:
+    catalog = _catalog()
+    passages = catalog.by_test.get(test_id)
+    if not passages:
         abort(404)
+    source_kind = catalog.source_kinds[test_id]
     context = {
         "test_id": test_id,
-        "passages": [_passage_meta(row) for row in rows],
-        "source_kind": rows[0].source_kind,
-        "practice_url": _practice_url(test_id, rows[0].source_kind),
+        "passages": passages,
+        "source_kind": source_kind,
+        "practice_url": _practice_url(test_id, source_kind),
     }
     try:
         return render_template("reading/study.html", **context)
@@ -138,26 +235,15 @@ def reading_study_page(test_id: str):
 @reading_study_bp.route("/api/reading-study/catalog")
 def reading_study_catalog():
     test_id = (request.args.get("test_id") or "").strip()
-    if test_id:
-        rows = sorted(_ready_passages(test_id), key=_passage_sort_key)
-        return jsonify({"test_id": test_id, "passages": [_passage_meta(row) for row in rows]})
-
-    rows = ReadingPassageAnalysis.query.filter_by(status="ready").all()
-    sources: dict[str, list] = {}
-    for row in sorted(rows, key=lambda r: (r.source_kind, r.test_id or "", _passage_sort_key(r))):
-        meta = _passage_meta(row)
-        meta["test_id"] = row.test_id
-        sources.setdefault(row.source_kind, []).append(meta)
-    return jsonify({"test_id": None, "sources": sources})
+    return http_cache.send(_catalog().body(test_id or None))
 
 
 @reading_study_bp.route("/api/reading-study/passage/<passage_id>")
 def reading_study_passage(passage_id: str):
-    row = ReadingPassageAnalysis.query.filter_by(passage_id=passage_id, status="ready").first()
-    if row is None:
+    body = _passage_body(passage_id)
+    if body is None:
         abort(404)
-    # payload_json 原样返回（已含归一化 concept / label）。
-    return Response(row.payload_json, mimetype="application/json")
+    return http_cache.send(body)
 
 
 @reading_study_bp.route("/api/reading-study/glossary")
@@ -6,11 +6,11 @@ TTS is handled by the existing /api/dictation/tts endpoint.
 
 import os
 from functools import wraps
-import jwt
 from flask import Blueprint, current_app, jsonify, request
 from flask_login import current_user, login_required
 from sqlalchemy.orm import joinedload
 
+from api.auth_utils import attach_api_user, authenticate_bearer
 from models import db, User, SpeakingBook, SpeakingPhrase
 
 
@@ -23,14 +23,13 @@ def require_session_or_bearer(fn):
         auth_header = request.headers.get("Authorization", "")
         if auth_header.startswith("Bearer "):
             token = auth_header.split(" ", 1)[1]
-            try:
-                payload = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
-            except jwt.PyJWTError:
-                return jsonify({"ok": False, "error": "invalid_token"}), 401
-            user = User.query.get(int(payload.get("sub", 0)))
-            if not user or not user.is_active:
-                return jsonify({"ok": False, "error": "forbidden"}), 403
-            request.current_api_user = user
+            principal, result = authenticate_bearer(token)
+            if principal is None:
+                error, status = result
+                if error != "invalid_token":
+                    error = "forbidden"
+                return jsonify({"ok": False, "error": error}), status
+            attach_api_user(principal, result)
             return fn(*args, **kwargs)
         return jsonify({"ok": False, "error": "unauthorized"}), 401
     return wrapper
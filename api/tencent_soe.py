@@ -4,6 +4,7 @@ import base64
 import hashlib
 import hmac
 import json
+import os
 import random
 import re
 import ssl
@@ -16,6 +17,8 @@ import requests
 import websocket
 from flask import current_app
 
+from services import http_client
+
 
 SOE_WS_HOST = "soe.cloud.tencent.com"
 SOE_WS_PATH = "/soe/api"
@@ -26,9 +29,9 @@ def _is_enabled() -> bool:
     return value in {"1", "true", "yes", "on"}
 
 
-def _download_audio(audio_url: str, timeout: float, max_bytes: int) -> tuple[bool, dict[str, Any]]:
+def _download_audio(audio_url: str, timeout, max_bytes: int) -> tuple[bool, dict[str, Any]]:
     try:
-        resp = requests.get(audio_url, timeout=timeout)
+        resp = http_client.get("media", audio_url, timeout=timeout)
         resp.raise_for_status()
     except requests.RequestException as exc:
         return False, {"error": "tencent_audio_download_failed", "details": str(exc)}
@@ -46,6 +49,24 @@ def _download_audio(audio_url: str, timeout: float, max_bytes: int) -> tuple[boo
     return True, {"audio_bytes": audio_bytes, "size_bytes": len(audio_bytes)}
 
 
+def _read_local_audio(audio_path: str, max_bytes: int) -> tuple[bool, dict[str, Any]]:
+    try:
+        size = os.path.getsize(audio_path)
+        if size > max_bytes:
+            return False, {
+                "error": "tencent_audio_too_large",
+                "size_bytes": size,
+                "max_bytes": max_bytes,
+            }
+        with open(audio_path, "rb") as fh:
+            audio_bytes = fh.read()
+    except OSError as exc:
+        return False, {"error": "tencent_audio_read_failed", "details": str(exc)}
+    if not audio_bytes:
+        return False, {"error": "tencent_audio_empty"}
+    return True, {"audio_bytes": audio_bytes, "size_bytes": len(audio_bytes)}
+
+
 def _voice_format_from_url(audio_url: str) -> int:
     path = (urlparse(audio_url).path or "").lower()
     if path.endswith(".pcm"):
@@ -247,7 +268,21 @@ def _parse_soe_result(result: Any) -> dict[str, Any]:
     }
 
 
-def evaluate_pronunciation(audio_url: str, ref_text: str) -> tuple[bool, dict[str, Any]]:
+def evaluate_pronunciation(
+    audio_url: str,
+    ref_text: str,
+    *,
+    audio_path: str | None = None,
+    timeout: float | None = None,
+) -> tuple[bool, dict[str, Any]]:
+    """Score ``ref_text`` pronunciation against the recording.
+
+    ``audio_path`` reads an upload from local storage instead of fetching
+    ``audio_url`` over HTTP (the URL still decides the voice format).
+    ``timeout`` caps the configured TENCENT_SOE_TIMEOUT, e.g. to a caller's
+    remaining deadline, and bounds the whole call: download, connect and the
+    wait for the final result share it.
+    """
     if not _is_enabled():
         return False, {"error": "tencent_soe_disabled"}
 
@@ -260,7 +295,9 @@ def evaluate_pronunciation(audio_url: str, ref_text: str) -> tuple[bool, dict[st
     if not app_id:
         return False, {"error": "missing_tencent_soe_app_id"}
 
-    timeout = float(config.get("TENCENT_SOE_TIMEOUT") or 20)
+    configured_timeout = float(config.get("TENCENT_SOE_TIMEOUT") or 20)
+    timeout = min(configured_timeout, timeout) if timeout else configured_timeout
+    give_up_at = time.monotonic() + timeout
     max_bytes = int(config.get("TENCENT_SOE_MAX_AUDIO_BYTES") or 980000)
     score_coeff = float(config.get("TENCENT_SOE_SCORE_COEFF") or 4.0)
     engine_type = (config.get("TENCENT_SOE_ENGINE_MODEL_TYPE") or "16k_en").strip()
@@ -270,7 +307,14 @@ def evaluate_pronunciation(audio_url: str, ref_text: str) -> tuple[bool, dict[st
     if not ref_text_clean:
         return False, {"error": "tencent_soe_empty_ref_text"}
 
-    ok, downloaded = _download_audio(audio_url, timeout=timeout, max_bytes=max_bytes)
+    if audio_path:
+        ok, downloaded = _read_local_audio(audio_path, max_bytes=max_bytes)
+    else:
+        ok, downloaded = _download_audio(
+            audio_url,
+            timeout=http_client.budget_timeout("media", "GET", timeout),
+            max_bytes=max_bytes,
+        )
     if not ok:
         return False, downloaded
 
@@ -305,7 +349,7 @@ def evaluate_pronunciation(audio_url: str, ref_text: str) -> tuple[bool, dict[st
     try:
         ws = websocket.create_connection(
             url,
-            timeout=timeout,
+            timeout=max(0.1, give_up_at - time.monotonic()),
             sslopt=_websocket_sslopt(ssl_verify),
         )
         handshake = _json_message(ws.recv())
@@ -320,8 +364,8 @@ def evaluate_pronunciation(audio_url: str, ref_text: str) -> tuple[bool, dict[st
         ws.send_binary(audio_bytes)
         ws.send(json.dumps({"type": "end"}))
 
-        deadline = time.time() + timeout
-        while time.time() < deadline:
+        while time.monotonic() < give_up_at:
+            ws.settimeout(max(0.1, give_up_at - time.monotonic()))
             message = _json_message(ws.recv())
             if int(message.get("code") or 0) != 0:
                 return False, {
@@ -19,6 +19,8 @@ from flask import (
     session,
 )
 from flask_login import current_user
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
 
 from models import (
     StudentProfile,
@@ -54,6 +56,8 @@ RECORDING_SUFFIXES = {
     ".ogg": "audio/ogg",
 }
 OFFICIAL_FLOW_VERSION = "2026-01-21-r-l-w-s"
+# Payload keys that make a delta sync touch navigation/timer state.
+STATE_SYNC_FIELDS = ("state", "currentPhase", "remainingSeconds")
 
 
 def _recording_root() -> Path:
@@ -179,6 +183,7 @@ def _serialize_attempt(attempt: ToeflMockAttempt) -> dict[str, Any]:
         "current_phase": attempt.current_phase,
         "remaining_seconds": attempt.remaining_seconds,
         "state": _load_json_text(attempt.state_json, {}),
+        "version": attempt.state_version,
         "routes": _load_json_text(attempt.routes_json, {}),
         "responses": _response_map(attempt),
         "started_at": attempt.started_at.isoformat() if attempt.started_at else None,
@@ -461,6 +466,30 @@ def start_attempt():
     return jsonify({"attempt": _serialize_attempt(attempt)}), 201
 
 
+def _response_write_error(
+    attempt: ToeflMockAttempt, question_id: str, value: Any
+) -> tuple[dict[str, Any], int] | None:
+    if not question_id.startswith(f"{attempt.exam_id}:"):
+        return {"error": "question_not_in_attempt"}, 400
+    question, error = _require_current_phase_question(attempt, question_id)
+    if error:
+        return error
+    if not question.get("available", True):
+        return {
+            "error": "question_blocked",
+            "message": "该题来源不完整，不能作答或进入判分分母",
+        }, 409
+    response_error = validate_response_value(question, value)
+    if response_error:
+        return {"error": response_error}, 400
+    mock_definition = _attempt_definition(attempt)
+    if _refresh_server_clock(attempt, mock_definition) == 0 and (
+        mock_definition["phases"][_phase_indices(attempt)[0]].get("duration_seconds") is not None
+    ):
+        return {"error": "phase_expired"}, 409
+    return None
+
+
 @toefl_mock_bp.post("/api/toefl/responses")
 def save_response():
     payload = request.get_json(silent=True) or {}
@@ -470,26 +499,9 @@ def save_response():
     if attempt.status != "in_progress":
         return jsonify({"error": "attempt_closed"}), 409
     question_id = str(payload.get("questionId") or "").strip()
-    if not question_id.startswith(f"{attempt.exam_id}:"):
-        return jsonify({"error": "question_not_in_attempt"}), 400
-    question, error = _require_current_phase_question(attempt, question_id)
+    error = _response_write_error(attempt, question_id, payload.get("response"))
     if error:
         return jsonify(error[0]), error[1]
-    if not question.get("available", True):
-        return jsonify(
-            {
-                "error": "question_blocked",
-                "message": "该题来源不完整，不能作答或进入判分分母",
-            }
-        ), 409
-    response_error = validate_response_value(question, payload.get("response"))
-    if response_error:
-        return jsonify({"error": response_error}), 400
-    mock_definition = _attempt_definition(attempt)
-    if _refresh_server_clock(attempt, mock_definition) == 0 and (
-        mock_definition["phases"][_phase_indices(attempt)[0]].get("duration_seconds") is not None
-    ):
-        return jsonify({"error": "phase_expired"}), 409
     _upsert_response(attempt, question_id, payload.get("response"))
     db.session.commit()
     return jsonify({"saved": True, "questionId": question_id})
@@ -646,20 +658,16 @@ def resume_attempt(attempt_id: str):
     )
 
 
-@toefl_mock_bp.route(
-    "/api/toefl/attempts/<attempt_id>/state", methods=["GET", "PUT"]
-)
-def attempt_state(attempt_id: str):
-    attempt = _owned_attempt(attempt_id)
-    if not attempt:
-        return jsonify({"error": "attempt_not_found"}), 404
-    if request.method == "GET":
-        _refresh_server_clock(attempt, _attempt_definition(attempt))
-        return jsonify({"attempt": _serialize_attempt(attempt)})
-    if attempt.status != "in_progress":
-        return jsonify({"error": "attempt_closed"}), 409
-    payload = request.get_json(silent=True) or {}
-    mock_definition = _attempt_definition(attempt)
+def _apply_state_update(
+    attempt: ToeflMockAttempt,
+    mock_definition: dict[str, Any],
+    payload: dict[str, Any],
+) -> tuple[dict[str, Any] | None, tuple[dict[str, Any], int] | None]:
+    """Validate a navigation/timer update and apply it to ``attempt``.
+
+    Returns the new state dict (not yet written to ``state_json``) or the
+    error response.  Shared by the full PUT and the delta PATCH.
+    """
     previous = _state(attempt)
     current_phase, current_group = _phase_indices(attempt)
     incoming = payload.get("state") if isinstance(payload.get("state"), dict) else {}
@@ -667,7 +675,7 @@ def attempt_state(attempt_id: str):
         target_phase = int(incoming.get("phaseIndex", current_phase))
         target_group = int(incoming.get("groupIndex", current_group))
     except (TypeError, ValueError):
-        return jsonify({"error": "invalid_attempt_state"}), 400
+        return None, ({"error": "invalid_attempt_state"}, 400)
     error = validate_navigation_state(
         mock_definition, current_phase, current_group, target_phase, target_group
     )
@@ -676,7 +684,7 @@ def attempt_state(attempt_id: str):
             "invalid_navigation_jump",
             "back_navigation_disabled",
         } else 400
-        return jsonify({"error": error}), status
+        return None, ({"error": error}, status)
     current_phase_definition = mock_definition["phases"][current_phase]
     target_phase_definition = mock_definition["phases"][target_phase]
     if (
@@ -686,21 +694,21 @@ def attempt_state(attempt_id: str):
         and target_phase_definition.get("module") == "m2"
         and current_phase_definition.get("section") not in _load_json_text(attempt.routes_json, {})
     ):
-        return jsonify({"error": "m2_route_required"}), 409
+        return None, ({"error": "m2_route_required"}, 409)
     target_phase_id = mock_definition["phases"][target_phase]["id"]
     if "currentPhase" in payload and str(payload["currentPhase"] or "") != target_phase_id:
-        return jsonify({"error": "invalid_current_phase"}), 400
+        return None, ({"error": "invalid_current_phase"}, 400)
     if "audio" in incoming:
         audio_state, audio_error = _validated_audio_state(
             attempt, mock_definition, incoming["audio"]
         )
         if audio_error:
-            return jsonify(audio_error[0]), audio_error[1]
+            return None, audio_error
         previous["audio"] = audio_state
     if "deviceCheck" in incoming:
         device_check = _validated_device_check(incoming["deviceCheck"])
         if device_check is None:
-            return jsonify({"error": "device_check_invalid"}), 400
+            return None, ({"error": "device_check_invalid"}, 400)
         previous["deviceCheck"] = device_check
     if "returnTo" in incoming:
         previous["returnTo"] = _safe_return_to(incoming["returnTo"])
@@ -710,7 +718,7 @@ def attempt_state(attempt_id: str):
         try:
             previous["questionIndex"] = max(0, int(incoming["questionIndex"]))
         except (TypeError, ValueError):
-            return jsonify({"error": "invalid_attempt_state"}), 400
+            return None, ({"error": "invalid_attempt_state"}, 400)
     phase_changed = target_phase != current_phase
     if phase_changed:
         current_phase_id = current_phase_definition["id"]
@@ -732,16 +740,16 @@ def attempt_state(attempt_id: str):
     else:
         requested_running = incoming.get("phaseRunning")
         if requested_running is not None and not isinstance(requested_running, bool):
-            return jsonify({"error": "invalid_phase_running"}), 400
+            return None, ({"error": "invalid_phase_running"}, 400)
         was_running = previous.get("phaseRunning") is not False
         if was_running and requested_running is False:
-            return jsonify({"error": "phase_pause_not_allowed"}), 409
+            return None, ({"error": "phase_pause_not_allowed"}, 409)
         if not was_running and requested_running is True:
             if (
                 target_phase_definition.get("section") == "speaking"
                 and (previous.get("deviceCheck") or {}).get("microphone") != "passed"
             ):
-                return jsonify({"error": "microphone_check_required"}), 409
+                return None, ({"error": "microphone_check_required"}, 409)
             previous["phaseRunning"] = True
             previous["phaseStartedAt"] = _utcnow_naive().isoformat() + "Z"
             server_remaining = attempt.remaining_seconds
@@ -753,15 +761,15 @@ def attempt_state(attempt_id: str):
         if "remainingSeconds" in payload:
             if payload["remainingSeconds"] is None:
                 if mock_definition["phases"][target_phase].get("duration_seconds") is not None:
-                    return jsonify({"error": "invalid_remaining_seconds"}), 400
+                    return None, ({"error": "invalid_remaining_seconds"}, 400)
                 attempt.remaining_seconds = None
             else:
                 try:
                     requested = int(payload["remainingSeconds"])
                 except (TypeError, ValueError):
-                    return jsonify({"error": "invalid_remaining_seconds"}), 400
+                    return None, ({"error": "invalid_remaining_seconds"}, 400)
                 if server_remaining is not None and requested > server_remaining + 1:
-                    return jsonify({"error": "remaining_time_increase"}), 409
+                    return None, ({"error": "remaining_time_increase"}, 409)
                 attempt.remaining_seconds = (
                     max(0, requested) if server_remaining is not None else None
                 )
@@ -770,8 +778,141 @@ def attempt_state(attempt_id: str):
             target_phase_definition["id"],
             attempt.remaining_seconds,
         )
-    attempt.state_json = _json_text(previous)
     attempt.current_phase = target_phase_id
+    return previous, None
+
+
+def _claim_state_version(attempt: ToeflMockAttempt, expected_version: int) -> bool:
+    """Atomically move ``state_version`` forward from ``expected_version``."""
+    with db.session.no_autoflush:
+        result = db.session.execute(
+            update(ToeflMockAttempt)
+            .where(
+                ToeflMockAttempt.id == attempt.id,
+                ToeflMockAttempt.state_version == expected_version,
+            )
+            .values(state_version=expected_version + 1),
+            execution_options={"synchronize_session": False},
+        )
+    if result.rowcount != 1:
+        return False
+    set_committed_value(attempt, "state_version", expected_version + 1)
+    return True
+
+
+def _version_conflict(attempt: ToeflMockAttempt):
+    db.session.rollback()
+    _refresh_server_clock(attempt, _attempt_definition(attempt))
+    return jsonify(
+        {
+            "error": "version_conflict",
+            "version": attempt.state_version,
+            "state": _state(attempt),
+            "current_phase": attempt.current_phase,
+            "remaining_seconds": attempt.remaining_seconds,
+        }
+    ), 409
+
+
+def _sync_attempt_delta(attempt: ToeflMockAttempt, payload: dict[str, Any]):
+    """Apply a client delta of changed responses and navigation fields.
+
+    Navigation/timer fields require ``baseVersion`` to match
+    ``state_version``; a stale base gets 409 with the current state so the
+    client can rebase.  Response-only deltas skip the check because every
+    answer is its own row.  The reply carries only the state keys that
+    changed and the ids of rewritten answers, never the full response map.
+    """
+    incoming_responses = payload.get("responses", {})
+    if not isinstance(incoming_responses, dict):
+        return jsonify({"error": "invalid_responses"}), 400
+    responses = {
+        str(question_id).strip(): value
+        for question_id, value in incoming_responses.items()
+    }
+    touches_state = any(key in payload for key in STATE_SYNC_FIELDS)
+    base_version = payload.get("baseVersion")
+    if touches_state:
+        if isinstance(base_version, bool) or not isinstance(base_version, int):
+            return jsonify({"error": "base_version_required"}), 400
+        if base_version != attempt.state_version:
+            return _version_conflict(attempt)
+    for question_id, value in responses.items():
+        error = _response_write_error(attempt, question_id, value)
+        if error:
+            return jsonify({**error[0], "questionId": question_id}), error[1]
+    changed: dict[str, Any] = {}
+    if touches_state:
+        before = _state(attempt)
+        state, error = _apply_state_update(
+            attempt, _attempt_definition(attempt), payload
+        )
+        if error:
+            return jsonify(error[0]), error[1]
+        changed = {
+            key: value
+            for key, value in state.items()
+            if key not in before or before[key] != value
+        }
+        if changed:
+            if not _claim_state_version(attempt, base_version):
+                return _version_conflict(attempt)
+            attempt.state_json = _json_text(state)
+    written = []
+    if responses:
+        rows = {
+            row.question_id: row
+            for row in ToeflMockResponse.query.filter(
+                ToeflMockResponse.attempt_id == attempt.id,
+                ToeflMockResponse.question_id.in_(list(responses)),
+            )
+        }
+        for question_id, value in responses.items():
+            encoded = _json_text(value)
+            row = rows.get(question_id)
+            if row is None:
+                row = ToeflMockResponse(attempt_id=attempt.id, question_id=question_id)
+                db.session.add(row)
+            elif row.response_json == encoded:
+                continue
+            row.response_json = encoded
+            written.append(question_id)
+    if changed or written:
+        db.session.commit()
+    _refresh_server_clock(attempt, _attempt_definition(attempt))
+    return jsonify(
+        {
+            "version": attempt.state_version,
+            "state": changed,
+            "current_phase": attempt.current_phase,
+            "remaining_seconds": attempt.remaining_seconds,
+            "written": written,
+        }
+    )
+
+
+@toefl_mock_bp.route(
+    "/api/toefl/attempts/<attempt_id>/state", methods=["GET", "PUT", "PATCH"]
+)
+def attempt_state(attempt_id: str):
+    attempt = _owned_attempt(attempt_id)
+    if not attempt:
+        return jsonify({"error": "attempt_not_found"}), 404
+    if request.method == "GET":
+        _refresh_server_clock(attempt, _attempt_definition(attempt))
+        return jsonify({"attempt": _serialize_attempt(attempt)})
+    if attempt.status != "in_progress":
+        return jsonify({"error": "attempt_closed"}), 409
+    payload = request.get_json(silent=True) or {}
+    if request.method == "PATCH":
+        return _sync_attempt_delta(attempt, payload)
+    state, error = _apply_state_update(attempt, _attempt_definition(attempt), payload)
+    if error:
+        return jsonify(error[0]), error[1]
+    attempt.state_json = _json_text(state)
+    # Full writes stay last-write-wins but still move the version forward so
+    # delta clients notice them.
+    attempt.state_version = ToeflMockAttempt.state_version + 1
     db.session.commit()
     return jsonify({"attempt": _serialize_attempt(attempt)})
 
@@ -903,7 +1044,7 @@ def student_attempt_history():
     )
     return _private_json(
         {
-            "attempts": [review_workflow.attempt_summary(item) for item in attempts]
+            "attempts": review_workflow.attempt_summaries(attempts)
         }
     )
 
@@ -938,7 +1079,7 @@ def teacher_attempt_list_api():
         return _private_json({"error": "staff_required"}, 403)
     attempts = _teacher_attempt_query().all()
     return _private_json(
-        {"attempts": [review_workflow.attempt_summary(item) for item in attempts]}
+        {"attempts": review_workflow.attempt_summaries(attempts)}
     )
 
 
@@ -1105,7 +1246,7 @@ def student_attempt_history_page():
     )
     response = render_template(
         "toefl/attempt_history.html",
-        attempts=[review_workflow.attempt_summary(item) for item in attempts],
+        attempts=review_workflow.attempt_summaries(attempts),
     )
     return no_store(response)
 
@@ -1134,7 +1275,7 @@ def teacher_attempt_list_page():
     attempts = _teacher_attempt_query().all()
     response = render_template(
         "toefl/teacher_attempts.html",
-        attempts=[review_workflow.attempt_summary(item) for item in attempts],
+        attempts=review_workflow.attempt_summaries(attempts),
     )
     return no_store(response)
 
@@ -1,13 +1,17 @@
-import requests
+import threading
 import time
 from flask import Blueprint, current_app, jsonify, request
 from models import User, StudentProfile, ParentStudentLink, db
+from services import http_client
 from .auth_utils import issue_token
 
 wechat_bp = Blueprint("wechat", __name__)
 
 # Token cache for subscribe message
 _token_cache = {"value": None, "expires_at": 0}
+# Subscribe fan-out sends from several threads; fetching a new token revokes
+# the previous one, so only one thread may refresh it.
+_token_lock = threading.Lock()
 
 def _get_wechat_config():
     appid = current_app.config.get("WECHAT_APPID") or current_app.config.get("WECHAT_APP_ID")
@@ -19,13 +23,28 @@ def _get_access_token():
     now = time.time()
     if _token_cache["value"] and now < _token_cache["expires_at"]:
         return _token_cache["value"]
+    with _token_lock:
+        if _token_cache["value"] and time.time() < _token_cache["expires_at"]:
+            return _token_cache["value"]
+        return _fetch_access_token(now)
 
+
+def invalidate_access_token(token=None):
+    """Forget the cached token (e.g. WeChat answered 40001 for it)."""
+    with _token_lock:
+        if token is None or _token_cache["value"] == token:
+            _token_cache["value"] = None
+            _token_cache["expires_at"] = 0
+
+
+def _fetch_access_token(now):
     appid, secret = _get_wechat_config()
     if not appid or not secret:
         current_app.logger.warning("WECHAT_APPID/WECHAT_SECRET not configured")
         return None
 
-    resp = requests.get(
+    resp = http_client.get(
+        "wechat",
         "https://api.weixin.qq.com/cgi-bin/token",
         params={
             "grant_type": "client_credential",
@@ -54,7 +73,8 @@ def send_subscribe_message_result(
         "page": page,
         "data": data,
     }
-    resp = requests.post(
+    resp = http_client.post(
+        "wechat",
         f"https://api.weixin.qq.com/cgi-bin/message/subscribe/send?access_token={token}",
         json=payload,
         timeout=5,
@@ -63,6 +83,8 @@ def send_subscribe_message_result(
     if res.get("errcode") == 0:
         return {"ok": True}
     current_app.logger.error("Send subscribe fail: %s", res)
+    if res.get("errcode") in (40001, 42001):  # token revoked/expired early
+        invalidate_access_token(token)
     return {
         "ok": False,
         "error": "send_failed",
@@ -84,7 +106,7 @@ def get_wechat_session(code):
         "js_code": code,
         "grant_type": "authorization_code"
     }
-    resp = requests.get(url, params=params)
+    resp = http_client.get("wechat", url, params=params, timeout=5)
     return resp.json()
 
 @wechat_bp.route("/login", methods=["POST"])
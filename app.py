@@ -1,19 +1,17 @@
 import os
 import re
 import secrets
-import ssl
 import time
 import uuid
 import subprocess
+import hashlib
 import json
 from pathlib import Path
 from collections import defaultdict
 from datetime import date, datetime, timedelta
-from urllib.error import HTTPError, URLError
-from urllib.parse import quote, urlencode
-from urllib.request import Request, urlopen
+from urllib.parse import quote
 
-import certifi
+import requests
 from flask import (
     Flask,
     current_app,
@@ -61,6 +59,7 @@ from services.vocabulary_mastery import (
     resolve_task_vocabulary_goal,
 )
 from services.ielts_practice_scoring import (
+    READING_GRADER_VERSION,
     grade_listening_jijing_answers as _grade_listening_jijing_answers,
     grade_listening_test_answers as _grade_listening_test_answers_shared,
     grade_reading_test_answers as _grade_reading_test_answers_shared,
@@ -77,7 +76,15 @@ from services.listening_training import (
 )
 from services import mock_exam_review as _mock_review
 from services import mock_exam_review_workflow as _mock_review_workflow
+from services import mock_exam_autosave as _mock_autosave
 from services import mock_exam_writing as _mock_writing
+from services import http_client
+from services import static_assets
+from services import listening_alignment_jobs as _listening_alignment_jobs
+from services.lru import LruCache
+from services.mock_exam_autosave import DraftBuffer
+from services.regrade_queue import RegradeQueue
+from services.rate_limit import TokenBucketLimiter
 from practice_tables import normalize_practice_tables
 from toefl_practice import catalog_summary as _toefl_catalog_summary
 from toefl_practice import toefl_bp
@@ -106,6 +113,8 @@ from models import (
     StageReport,
     ListeningSegmentResult,
     ListeningRepeatResult,
+    ListeningAlignmentJob,
+    RateLimitBucket,
     ListeningTestSubmission,
     PracticeSubmissionAttempt,
     ReadingTestSubmission,
@@ -114,6 +123,7 @@ from models import (
     ToeflQuestionResponse,
     ToeflTestSubmission,
     MockExam,
+    MockExamDraftDelta,
     MockExamSession,
 )
 
@@ -198,8 +208,16 @@ WORD_LOOKUP_YOUDAO_URL = "https://dict.youdao.com/suggest"
 WORD_LOOKUP_USER_AGENT = (
     "Mozilla/5.0 (compatible; StudyTrackerWordLookup/1.0; +https://studytracker.xin)"
 )
-WORD_LOOKUP_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
-_WORD_LOOKUP_RATE_BUCKETS = defaultdict(list)
+WORD_TRANSLATION_LRU_SIZE = 4096
+# Shared across gunicorn workers via the rate_limit_bucket table; the LRU is a
+# per-process front for word_translation_cache (rows are insert-only, so a
+# cached entry never goes stale).
+_WORD_LOOKUP_LIMITER = TokenBucketLimiter(
+    "word_lookup",
+    capacity=WORD_LOOKUP_RATE_LIMIT,
+    refill_per_second=WORD_LOOKUP_RATE_LIMIT / WORD_LOOKUP_RATE_WINDOW_SECONDS,
+)
+_WORD_TRANSLATION_LRU = LruCache(WORD_TRANSLATION_LRU_SIZE)
 _WORD_TRANSLATION_CACHE_READY = False
 
 
@@ -240,6 +258,23 @@ def _ensure_word_translation_cache_table() -> None:
 
 
 def _lookup_cached_word_translation(word: str) -> dict | None:
+    row = _WORD_TRANSLATION_LRU.get(word)
+    if row is None:
+        row = _select_cached_word_translation(word)
+        if not row:
+            return None
+        _WORD_TRANSLATION_LRU.set(word, row)
+    return {
+        "ok": True,
+        "found": True,
+        "word": row["word"],
+        "translation": row["translation"],
+        "source": "cache",
+        "cached_source": row["source"] or "",
+    }
+
+
+def _select_cached_word_translation(word: str) -> dict | None:
     _ensure_word_translation_cache_table()
     row = (
         db.session.execute(
@@ -255,16 +290,7 @@ def _lookup_cached_word_translation(word: str) -> dict | None:
         .mappings()
         .first()
     )
-    if not row:
-        return None
-    return {
-        "ok": True,
-        "found": True,
-        "word": row["word"],
-        "translation": row["translation"],
-        "source": "cache",
-        "cached_source": row["source"] or "",
-    }
+    return dict(row) if row else None
 
 
 def _cache_word_translation(word: str, translation: str, source: str) -> None:
@@ -286,6 +312,8 @@ def _cache_word_translation(word: str, translation: str, source: str) -> None:
 
 
 def _lookup_dictation_word_translation(word: str) -> dict | None:
+    # ``word`` is already lower-cased; LOWER(w.word) must stay spelled exactly
+    # like ix_dictation_word_word_lower so SQLite seeks the expression index.
     row = (
         db.session.execute(
             text(
@@ -328,29 +356,21 @@ def _lookup_word_client_key() -> str:
 
 
 def _word_lookup_rate_limited() -> bool:
-    now = time.time()
-    cutoff = now - WORD_LOOKUP_RATE_WINDOW_SECONDS
-    client_key = _lookup_word_client_key()
-    bucket = _WORD_LOOKUP_RATE_BUCKETS[client_key]
-    bucket[:] = [timestamp for timestamp in bucket if timestamp >= cutoff]
-    if len(bucket) >= WORD_LOOKUP_RATE_LIMIT:
-        return True
-    bucket.append(now)
-    return False
+    return not _WORD_LOOKUP_LIMITER.allow(_lookup_word_client_key())
 
 
 def _lookup_google_word_translation(word: str) -> dict | None:
-    query = urlencode(
-        {"client": "gtx", "sl": "en", "tl": "zh-CN", "dt": "t", "q": word}
-    )
-    req = Request(
-        f"{WORD_LOOKUP_GOOGLE_URL}?{query}",
-        headers={"User-Agent": WORD_LOOKUP_USER_AGENT},
-    )
     try:
-        with urlopen(req, timeout=2.5, context=WORD_LOOKUP_SSL_CONTEXT) as resp:
-            payload = json.loads(resp.read().decode("utf-8"))
-    except (HTTPError, URLError, TimeoutError, ValueError, json.JSONDecodeError):
+        resp = http_client.get(
+            "word_lookup_google",
+            WORD_LOOKUP_GOOGLE_URL,
+            params={"client": "gtx", "sl": "en", "tl": "zh-CN", "dt": "t", "q": word},
+            headers={"User-Agent": WORD_LOOKUP_USER_AGENT},
+            timeout=2.5,
+        )
+        resp.raise_for_status()
+        payload = resp.json()
+    except (requests.RequestException, ValueError):
         return None
 
     try:
@@ -371,24 +391,24 @@ def _lookup_google_word_translation(word: str) -> dict | None:
 
 
 def _lookup_youdao_word_translation(word: str) -> dict | None:
-    query = urlencode(
-        {
-            "num": "5",
-            "ver": "3.0",
-            "doctype": "json",
-            "cache": "false",
-            "le": "en",
-            "q": word,
-        }
-    )
-    req = Request(
-        f"{WORD_LOOKUP_YOUDAO_URL}?{query}",
-        headers={"User-Agent": WORD_LOOKUP_USER_AGENT},
-    )
     try:
-        with urlopen(req, timeout=2.5, context=WORD_LOOKUP_SSL_CONTEXT) as resp:
-            payload = json.loads(resp.read().decode("utf-8"))
-    except (HTTPError, URLError, TimeoutError, ValueError, json.JSONDecodeError):
+        resp = http_client.get(
+            "word_lookup_youdao",
+            WORD_LOOKUP_YOUDAO_URL,
+            params={
+                "num": "5",
+                "ver": "3.0",
+                "doctype": "json",
+                "cache": "false",
+                "le": "en",
+                "q": word,
+            },
+            headers={"User-Agent": WORD_LOOKUP_USER_AGENT},
+            timeout=2.5,
+        )
+        resp.raise_for_status()
+        payload = resp.json()
+    except (requests.RequestException, ValueError):
         return None
 
     entries = ((payload.get("data") or {}).get("entries") or [])
@@ -1060,6 +1080,60 @@ def _refresh_reading_test_submission_grade(task: Task, payload: dict, safe_id: s
     return True
 
 
+_READING_GRADE_VERSIONS = LruCache(256)
+
+
+def _reading_test_grade_version(test_path: Path | None, payload: dict) -> str:
+    """Grader version plus a digest of the question groups (answers, options).
+
+    Memoized per test file (mtime, size) so result reads do not rehash.
+    """
+    key = None
+    if test_path is not None:
+        try:
+            stat = test_path.stat()
+            key = (str(test_path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = None
+    version = _READING_GRADE_VERSIONS.get(key) if key else None
+    if version is None:
+        groups = [passage.get("groups") for passage in payload.get("passages") or []]
+        digest = hashlib.sha256(
+            json.dumps(groups, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+        version = f"{READING_GRADER_VERSION}:{digest[:24]}"
+        if key:
+            _READING_GRADE_VERSIONS.set(key, version)
+    return version
+
+
+def _regrade_reading_test_submission(task_id: int) -> None:
+    task = db.session.get(Task, task_id)
+    submission = task.reading_test_submission if task else None
+    if not submission:
+        return
+    payload, test_path, safe_id = _load_reading_test_payload(task.reading_test_id or submission.test_id)
+    if not payload:
+        return
+    version = _reading_test_grade_version(test_path, payload)
+    if submission.grade_version == version:
+        return
+    _refresh_reading_test_submission_grade(task, payload, safe_id)
+    submission.grade_version = version
+
+
+_READING_REGRADE_QUEUE = RegradeQueue("reading_test", _regrade_reading_test_submission)
+
+
+def _reading_test_grade_is_current(task: Task, test_path: Path | None, payload: dict) -> bool:
+    """Read-only freshness check; a stale submission is queued for regrading."""
+    submission = task.reading_test_submission
+    if not submission or submission.grade_version == _reading_test_grade_version(test_path, payload):
+        return True
+    _READING_REGRADE_QUEUE.enqueue(current_app._get_current_object(), task.id)
+    return False
+
+
 PRACTICE_STAFF_ROLES = {User.ROLE_ADMIN, User.ROLE_TEACHER, User.ROLE_ASSISTANT}
 
 
@@ -1826,6 +1900,7 @@ app = Flask(__name__)
 app.config.from_object(Config)
 db.init_app(app)
 init_api(app)
+static_assets.init_app(app)
 app.register_blueprint(toefl_bp)
 
 
@@ -2002,6 +2077,18 @@ def ensure_legacy_schema() -> None:
                     current_app.logger.warning(
                         "Failed to add accepted_answers to dictation_word: %s", exc
                     )
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS ix_dictation_word_word_lower "
+                        "ON dictation_word (lower(word))"
+                    )
+                )
+        except Exception as exc:  # pragma: no cover - best-effort safeguard
+            current_app.logger.warning(
+                "Failed to ensure dictation_word lower(word) index: %s", exc
+            )
     if "student_answer" in tables:
         columns = {col["name"] for col in inspector.get_columns("student_answer")}
         if "is_uncertain" not in columns:
@@ -2018,6 +2105,54 @@ def ensure_legacy_schema() -> None:
                     "Failed to add is_uncertain to student_answer table: %s", exc
                 )
 
+    if "toefl_mock_attempt" in tables:
+        columns = {col["name"] for col in inspector.get_columns("toefl_mock_attempt")}
+        if "state_version" not in columns:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(
+                        text(
+                            "ALTER TABLE toefl_mock_attempt "
+                            "ADD COLUMN state_version INTEGER NOT NULL DEFAULT 1"
+                        )
+                    )
+            except Exception as exc:  # pragma: no cover - best-effort safeguard
+                current_app.logger.warning(
+                    "Failed to add state_version to toefl_mock_attempt table: %s", exc
+                )
+
+    if "reading_test_submission" in tables:
+        columns = {col["name"] for col in inspector.get_columns("reading_test_submission")}
+        if "grade_version" not in columns:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(
+                        text(
+                            "ALTER TABLE reading_test_submission "
+                            "ADD COLUMN grade_version VARCHAR(40)"
+                        )
+                    )
+            except Exception as exc:  # pragma: no cover - best-effort safeguard
+                current_app.logger.warning(
+                    "Failed to add grade_version to reading_test_submission table: %s", exc
+                )
+
+    if "mock_exam_session" in tables:
+        columns = {col["name"] for col in inspector.get_columns("mock_exam_session")}
+        if "writing_draft_revision" not in columns:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(
+                        text(
+                            "ALTER TABLE mock_exam_session "
+                            "ADD COLUMN writing_draft_revision BIGINT NOT NULL DEFAULT 0"
+                        )
+                    )
+            except Exception as exc:  # pragma: no cover - best-effort safeguard
+                current_app.logger.warning(
+                    "Failed to add writing_draft_revision to mock_exam_session table: %s", exc
+                )
+
     if "plan_item" in tables:
         columns = {col["name"] for col in inspector.get_columns("plan_item")}
         plan_item_resource_columns = {
@@ -2169,6 +2304,18 @@ def ensure_legacy_schema() -> None:
         current_app.logger.warning(
             "Failed to ensure listening_repeat_result table exists: %s", exc
         )
+    try:
+        ListeningAlignmentJob.__table__.create(bind=db.engine, checkfirst=True)
+    except Exception as exc:  # pragma: no cover
+        current_app.logger.warning(
+            "Failed to ensure listening_alignment_job table exists: %s", exc
+        )
+    try:
+        RateLimitBucket.__table__.create(bind=db.engine, checkfirst=True)
+    except Exception as exc:  # pragma: no cover
+        current_app.logger.warning(
+            "Failed to ensure rate_limit_bucket table exists: %s", exc
+        )
     try:
         ListeningTestSubmission.__table__.create(bind=db.engine, checkfirst=True)
     except Exception as exc:  # pragma: no cover
@@ -2197,6 +2344,13 @@ def ensure_legacy_schema() -> None:
             "Failed to ensure TOEFL submission/attempt tables exist: %s", exc
         )
 
+    try:
+        MockExamDraftDelta.__table__.create(bind=db.engine, checkfirst=True)
+    except Exception as exc:  # pragma: no cover
+        current_app.logger.warning(
+            "Failed to ensure mock_exam_draft_delta table exists: %s", exc
+        )
+
     # Vocabulary review owns its incremental columns/tables in a service
     # module; keep this call here so existing production databases upgrade on
     # startup without a destructive migration.
@@ -7422,7 +7576,7 @@ def api_reading_test_practice(test_id):
 @app.get("/api/reading/test/<test_id>/submission")
 def api_reading_test_submission(test_id):
     """返回当前登录学生今天对该阅读 Test 的提交结果。"""
-    data, _test_path, safe_id = _load_reading_test_payload(test_id)
+    data, test_path, safe_id = _load_reading_test_payload(test_id)
     if not data:
         return jsonify({"ok": False, "error": "test_not_found"}), 404
     task_id = request.args.get("task_id", type=int)
@@ -7433,10 +7587,10 @@ def api_reading_test_submission(test_id):
             return jsonify({"ok": False, "error": "task_not_found"}), 404
         if not task.reading_access_token or not secrets.compare_digest(task.reading_access_token, token):
             return jsonify({"ok": False, "error": "invalid_token"}), 403
-        if _refresh_reading_test_submission_grade(task, data, safe_id):
-            db.session.commit()
+        grade_current = _reading_test_grade_is_current(task, test_path, data)
         return jsonify({
             "ok": True,
+            "grade_current": grade_current,
             "task": {
                 "id": task.id,
                 "status": task.status,
@@ -7465,10 +7619,10 @@ def api_reading_test_submission(test_id):
     task = _latest_submitted_task(query.order_by(Task.id.desc()).all())
     if not task:
         return jsonify({"ok": True, "submission": None})
-    if _refresh_reading_test_submission_grade(task, data, safe_id):
-        db.session.commit()
+    grade_current = _reading_test_grade_is_current(task, test_path, data)
     return jsonify({
         "ok": True,
+        "grade_current": grade_current,
         "task": {
             "id": task.id,
             "status": task.status,
@@ -7483,7 +7637,7 @@ def api_reading_test_submission(test_id):
 @app.post("/api/reading/test/<test_id>/submit")
 def api_reading_test_submit(test_id):
     """提交剑雅阅读整套 Test 答案并回写任务/报告。"""
-    payload, _test_path, safe_id = _load_reading_test_payload(test_id)
+    payload, test_path, safe_id = _load_reading_test_payload(test_id)
     if not payload:
         return jsonify({"ok": False, "error": "test_not_found"}), 404
 
@@ -7579,6 +7733,7 @@ def api_reading_test_submit(test_id):
     submission.answers_json = json.dumps(answers, ensure_ascii=False)
     submission.results_json = json.dumps(grade["results"], ensure_ascii=False)
     submission.wrong_numbers_json = json.dumps(grade["wrong_numbers"], ensure_ascii=False)
+    submission.grade_version = _reading_test_grade_version(test_path, payload)
     submission.submitted_at = now
     append_submission_attempt(
         submission,
@@ -8227,12 +8382,14 @@ def mock_exam_writing(exam_id, token):
         return f"写作题目 {exam.writing_test_id} 不存在", 404
 
     now = datetime.utcnow()
+    _MOCK_EXAM_DRAFTS.flush_and_commit([sess.id])
     if not sess.writing_started_at:
         sess.writing_started_at = now
         sess.writing_deadline_at = now + timedelta(minutes=exam.writing_minutes)
         sess.current_section = MockExamSession.SECTION_WRITING
         db.session.commit()
 
+    essay_task1, essay_task2, _revision = _mock_autosave.current_draft(sess)
     return render_template(
         "exam/writing.html",
         test=test,
@@ -8240,8 +8397,8 @@ def mock_exam_writing(exam_id, token):
         session=sess,
         exam_context=_exam_section_context(exam, sess, MockExamSession.SECTION_WRITING),
         draft_url=url_for("api_mock_exam_save_writing_draft", exam_id=exam.id, token=token),
-        essay_task1=sess.writing_essay_task1 or "",
-        essay_task2=sess.writing_essay_task2 or "",
+        essay_task1=essay_task1,
+        essay_task2=essay_task2,
     )
 
 
@@ -8374,6 +8531,10 @@ def api_mock_exam_submit_reading(exam_id, token):
     })
 
 
+# 写作草稿自动保存不再每次提交：先进进程内缓冲，按间隔批量以增量落库。
+_MOCK_EXAM_DRAFTS = DraftBuffer(app.config["MOCK_EXAM_DRAFT_FLUSH_SECONDS"])
+
+
 @app.post("/api/exam/<int:exam_id>/session/<token>/save-writing-draft")
 def api_mock_exam_save_writing_draft(exam_id, token):
     exam, sess, err = _get_mock_exam_session_or_404(exam_id, token)
@@ -8383,9 +8544,25 @@ def api_mock_exam_save_writing_draft(exam_id, token):
         return jsonify({"ok": True, "already_submitted": True})
 
     data = request.get_json(silent=True) or {}
-    counts = _mock_writing.apply_writing_draft(sess, data.get("essay_task1"), data.get("essay_task2"))
-    db.session.commit()
-    return jsonify({"ok": True, **counts})
+    try:
+        revision = int(data.get("revision"))
+    except (TypeError, ValueError):
+        revision = int(time.time() * 1000)  # 旧页面不带 revision，按到达顺序
+    essay1 = _mock_writing.clean_essay(data.get("essay_task1"))
+    essay2 = _mock_writing.clean_essay(data.get("essay_task2"))
+    _MOCK_EXAM_DRAFTS.stage(app, sess.id, essay1, essay2, revision)
+    if data.get("flush"):  # 离开页面时前端要求立即落库
+        try:
+            _MOCK_EXAM_DRAFTS.flush_and_commit([sess.id])
+        except Exception as exc:
+            # 草稿已放回缓冲，后台线程会重试；只是不能告诉前端已经落库。
+            current_app.logger.warning("Mock exam draft flush failed for session %s: %s", sess.id, exc)
+            return jsonify({"ok": False, "error": "draft_flush_failed"}), 503
+    return jsonify({
+        "ok": True,
+        "task1_words": _mock_writing.count_words(essay1),
+        "task2_words": _mock_writing.count_words(essay2),
+    })
 
 
 @app.post("/api/exam/<int:exam_id>/session/<token>/submit-writing")
@@ -8406,6 +8583,8 @@ def api_mock_exam_submit_writing(exam_id, token):
 
     now = datetime.utcnow()
     auto_submitted = _mock_writing.is_auto_submitted(sess.writing_deadline_at, now)
+    _MOCK_EXAM_DRAFTS.discard(sess.id)
+    _mock_autosave.drop_deltas(sess)
     counts = _mock_writing.finalize_writing_submission(
         sess,
         data.get("essay_task1"),
@@ -8914,22 +9093,6 @@ def listening_upload():
     return render_template("listening/upload.html")
 
 
-# 存储异步处理任务状态（文件持久化，避免多 worker 进程内字典不共享）
-def _task_status_path(task_id):
-    d = Path(app.static_folder) / "listening" / ".tasks"
-    d.mkdir(parents=True, exist_ok=True)
-    return d / f"{task_id}.json"
-
-def _set_task_status(task_id, data):
-    _task_status_path(task_id).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
-
-def _get_task_status(task_id):
-    p = _task_status_path(task_id)
-    if p.exists():
-        return json.loads(p.read_text(encoding="utf-8"))
-    return None
-
-
 @app.route("/api/listening/upload", methods=["POST"])
 @login_required
 @role_required(User.ROLE_ADMIN, User.ROLE_TEACHER, User.ROLE_ASSISTANT)
@@ -8968,240 +9131,62 @@ def api_listening_upload():
     transcript_path = listening_dir / f"{exercise_id}.txt"
     transcript_path.write_text(transcript, encoding="utf-8")
 
-    # 创建任务
-    task_id = uuid.uuid4().hex[:12]
-    _set_task_status(task_id, {
-        "status": "processing",
-        "message": "正在处理音频，请稍候...",
-        "progress": 20,
-        "exercise_id": exercise_id,
-        "title": title,
-    })
-
-    # 启动后台线程处理
-    import threading
-    thread = threading.Thread(
-        target=_process_listening_task,
-        args=(task_id, exercise_id, title, str(audio_dest), transcript, translation, str(listening_dir), audio_ext, skip_seconds),
-        daemon=True,
+    # 创建对齐任务：由独立 worker 进程认领处理（scripts/listening_alignment_worker.py）
+    job = _listening_alignment_jobs.enqueue_job(
+        exercise_id=exercise_id,
+        title=title,
+        audio_path=str(audio_dest),
+        audio_ext=audio_ext,
+        output_dir=str(listening_dir),
+        transcript=transcript,
+        translation=translation,
+        skip_seconds=skip_seconds,
+        created_by_id=current_user.id,
+        max_attempts=int(app.config.get("LISTENING_ALIGNMENT_MAX_ATTEMPTS") or 2),
     )
-    thread.start()
-
-    return jsonify({"task_id": task_id})
-
-
-def _process_listening_task(task_id, exercise_id, title, audio_path, transcript, translation, output_dir, audio_ext="mp3", skip_seconds=0):
-    """后台线程：用 Whisper 转录并与原文对齐。"""
-    import ssl
-    ssl._create_default_https_context = ssl._create_unverified_context
-
-    try:
-        _set_task_status(task_id, {
-            "status": "processing", "message": "正在加载语音识别模型...",
-            "progress": 30, "exercise_id": exercise_id, "title": title,
-        })
-
-        import whisper
-        model = whisper.load_model("base")
+    if app.config.get("LISTENING_ALIGNMENT_INLINE"):
+        _listening_alignment_jobs.drain_queue_inline(app)
 
-        _set_task_status(task_id, {
-            "status": "processing", "message": "正在识别音频...",
-            "progress": 50, "exercise_id": exercise_id, "title": title,
-        })
-
-        result = model.transcribe(audio_path, word_timestamps=True, language="en", verbose=False)
-
-        _set_task_status(task_id, {
-            "status": "processing", "message": "正在对齐文本...",
-            "progress": 80, "exercise_id": exercise_id, "title": title,
-        })
-
-        # 解析用户提供的原文
-        user_sentences = [_strip_listening_speaker_label(s) for s in transcript.strip().splitlines() if s.strip()]
-        user_sentences = [s for s in user_sentences if s]
-
-        # 如果用户没有分行，按标点自动断句
-        if len(user_sentences) == 1:
-            import re as _re
-            text = user_sentences[0]
-            user_sentences = [_strip_listening_speaker_label(s) for s in _re.split(r'(?<=[.!?])\s+', text) if s.strip()]
-            user_sentences = [s for s in user_sentences if s]
-
-        translation_sentences = _split_translation_text(translation, len(user_sentences))
-
-        # 获取 Whisper 的段级时间戳
-        whisper_segments = []
-        for seg in result.get("segments", []):
-            text = seg["text"].strip()
-            if text:
-                whisper_segments.append({
-                    "start": round(seg["start"], 2),
-                    "end": round(seg["end"], 2),
-                    "text": text,
-                })
-
-        # 对齐策略：用户提供的句子数 vs Whisper 的段数
-        if len(user_sentences) > 1 and len(whisper_segments) > 0:
-            # 用户已分句，尝试将 Whisper 时间戳匹配到用户的句子
-            segments = _align_user_text_with_whisper(user_sentences, whisper_segments, skip_seconds)
-        else:
-            # 直接使用 Whisper 的分段结果，跳过指定秒数之前的段
-            segments = []
-            for i, seg in enumerate(whisper_segments):
-                if skip_seconds > 0 and seg["end"] <= skip_seconds:
-                    continue
-                segments.append({
-                    "id": len(segments) + 1,
-                    "start": seg["start"],
-                    "end": seg["end"],
-                    "text": _strip_listening_speaker_label(seg["text"]),
-                })
-
-        # 合并过短的片段
-        segments = _merge_short(segments)
-
-        if translation_sentences:
-            for i, seg in enumerate(segments):
-                if i < len(translation_sentences):
-                    seg["translation"] = translation_sentences[i]
-
-        # 生成 JSON
-        data = {
-            "id": exercise_id,
-            "title": title,
-            "audio": f"{exercise_id}.{audio_ext}",
-            "parts": [{"name": "Full", "segments": segments}],
-        }
-        json_path = Path(output_dir) / f"{exercise_id}.json"
-        json_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-
-        # 清理临时文本文件
-        txt_path = Path(output_dir) / f"{exercise_id}.txt"
-        if txt_path.exists():
-            txt_path.unlink()
-
-        _set_task_status(task_id, {
-            "status": "done",
-            "message": "处理完成",
-            "progress": 100,
-            "exercise_id": exercise_id,
-            "title": title,
-            "segment_count": len(segments),
-        })
-
-    except Exception as e:
-        _set_task_status(task_id, {
-            "status": "error",
-            "exercise_id": exercise_id,
-            "title": title,
-            "error": str(e),
-        })
-
-
-def _align_user_text_with_whisper(user_sentences, whisper_segments, skip_seconds=0):
-    """将用户提供的句子文本与 Whisper 的时间戳对齐。"""
-    def normalize(t):
-        return re.sub(r"[^\w\s]", "", t.lower()).split()
-
-    # 如果指定了跳过秒数，过滤掉开头的 Whisper 段
-    if skip_seconds > 0:
-        whisper_segments = [s for s in whisper_segments if s["end"] > skip_seconds]
-
-    segments = []
-    w_idx = 0
+    return jsonify({"task_id": job.job_key})
 
-    for u_idx, user_text in enumerate(user_sentences):
-        user_text = _strip_listening_speaker_label(user_text)
-        user_words = normalize(user_text)
-        if not user_words:
-            continue
-
-        # 第一句搜索全部剩余 whisper 段（正文可能在音频中间才开始）
-        # 后续句子只往前搜 5 段（前一句已经定位好了）
-        search_range = len(whisper_segments) - w_idx if u_idx == 0 else min(5, len(whisper_segments) - w_idx)
-
-        best_start = w_idx
-        best_score = -1
-        for offset in range(search_range):
-            check = w_idx + offset
-            if check >= len(whisper_segments):
-                break
-            w_words = normalize(whisper_segments[check]["text"])
-            # 计算前几个词的匹配度
-            score = sum(1 for a, b in zip(user_words[:4], w_words[:4]) if a == b)
-            if score > best_score:
-                best_score = score
-                best_start = check
-
-        # 确定这个用户句子覆盖多少个 whisper 段
-        start_time = whisper_segments[best_start]["start"]
-        end_idx = best_start
-
-        # 累积 whisper 段的词数直到接近用户句子的词数
-        accumulated_words = 0
-        target_words = len(user_words)
-        while end_idx < len(whisper_segments) and accumulated_words < target_words:
-            w_words = normalize(whisper_segments[end_idx]["text"])
-            accumulated_words += len(w_words)
-            end_idx += 1
-
-        end_time = whisper_segments[min(end_idx, len(whisper_segments)) - 1]["end"]
-        w_idx = end_idx
-
-        segments.append({
-            "id": len(segments) + 1,
-            "start": round(start_time, 2),
-            "end": round(end_time, 2),
-            "text": user_text,
-        })
-
-    return segments
 
+@app.route("/api/listening/upload/status/<task_id>")
+@login_required
+@role_required(User.ROLE_ADMIN, User.ROLE_TEACHER, User.ROLE_ASSISTANT)
+def api_listening_upload_status(task_id):
+    """查询处理任务状态。"""
+    job = _listening_alignment_jobs.get_job(task_id)
+    if not job:
+        return jsonify({"error": "任务不存在"}), 404
+    return jsonify(_listening_alignment_jobs.job_status_payload(job))
 
-def _split_translation_text(translation_text, expected_count=0):
-    """解析译文；优先按行，其次按中文句末标点自动断句。"""
-    if not translation_text:
-        return []
 
-    lines = [s.strip() for s in translation_text.strip().splitlines() if s.strip()]
-    if len(lines) > 1:
-        return lines
-
-    if len(lines) == 1 and expected_count != 1:
-        import re as _re
-        text = lines[0]
-        auto = [s.strip() for s in _re.split(r'(?<=[。！？!?])\s*', text) if s.strip()]
-        if auto:
-            return auto
-
-    return lines
-
-
-def _merge_short(segments, min_dur=1.5):
-    """合并过短的片段。"""
-    if not segments:
-        return segments
-    merged = [segments[0]]
-    for seg in segments[1:]:
-        if seg["end"] - seg["start"] < min_dur and merged:
-            merged[-1]["end"] = seg["end"]
-            merged[-1]["text"] += " " + seg["text"]
-        else:
-            merged.append(seg)
-    for i, s in enumerate(merged):
-        s["id"] = i + 1
-    return merged
+@app.route("/api/listening/upload/<task_id>/cancel", methods=["POST"])
+@login_required
+@role_required(User.ROLE_ADMIN, User.ROLE_TEACHER, User.ROLE_ASSISTANT)
+def api_listening_upload_cancel(task_id):
+    """取消排队中或处理中的对齐任务。"""
+    job = _listening_alignment_jobs.get_job(task_id)
+    if not job:
+        return jsonify({"error": "任务不存在"}), 404
+    if not _listening_alignment_jobs.request_cancel(job):
+        return jsonify({"error": "任务已结束，无法取消"}), 409
+    return jsonify(_listening_alignment_jobs.job_status_payload(job))
 
 
-@app.route("/api/listening/upload/status/<task_id>")
+@app.route("/api/listening/upload/<task_id>/retry", methods=["POST"])
 @login_required
 @role_required(User.ROLE_ADMIN, User.ROLE_TEACHER, User.ROLE_ASSISTANT)
-def api_listening_upload_status(task_id):
-    """查询处理任务状态。"""
-    task = _get_task_status(task_id)
-    if not task:
+def api_listening_upload_retry(task_id):
+    """失败或已取消的对齐任务重新排队。"""
+    job = _listening_alignment_jobs.get_job(task_id)
+    if not job:
         return jsonify({"error": "任务不存在"}), 404
-    return jsonify(task)
+    if not _listening_alignment_jobs.retry_job(job):
+        return jsonify({"error": "任务不可重试"}), 409
+    if app.config.get("LISTENING_ALIGNMENT_INLINE"):
+        _listening_alignment_jobs.drain_queue_inline(app)
+    return jsonify(_listening_alignment_jobs.job_status_payload(job))
 
 
 def _resolve_listening_access_token():
@@ -63,9 +63,43 @@ class Config:
         os.path.join(BASE_DIR, "private_uploads", "toefl_mock"),
     )
 
+    # 入学测试报告 PDF 中题干图片的打印尺寸缓存副本（首次生成后复用）。
+    ENTRANCE_PDF_IMAGE_CACHE_DIR = os.environ.get(
+        "ENTRANCE_PDF_IMAGE_CACHE_DIR",
+        os.path.join(BASE_DIR, "data", "pdf_image_cache"),
+    )
+
+    # 上传/导入 PDF 的逐页文本缓存（按文件 SHA-256 复用）。
+    PDF_TEXT_CACHE_DIR = os.environ.get(
+        "PDF_TEXT_CACHE_DIR",
+        os.path.join(BASE_DIR, "data", "pdf_text_cache"),
+    )
+
+    # 阅读结果页只比对判分版本；答案更新导致的重判在 web 进程的后台线程里批量完成。
+    REGRADE_IN_BACKGROUND = _env_bool("REGRADE_IN_BACKGROUND", True)
+
+    # 模考写作草稿先在进程内缓冲，按这个间隔（秒）批量以增量形式落库。
+    MOCK_EXAM_DRAFT_FLUSH_SECONDS = float(os.environ.get("MOCK_EXAM_DRAFT_FLUSH_SECONDS", "15"))
+    MOCK_EXAM_DRAFT_BACKGROUND_FLUSH = _env_bool("MOCK_EXAM_DRAFT_BACKGROUND_FLUSH", True)
+
+    # 入学测试心跳只记在进程内存里，由后台线程每 30 秒批量写回 last_seen_at。
+    ENTRANCE_HEARTBEAT_BACKGROUND_FLUSH = _env_bool("ENTRANCE_HEARTBEAT_BACKGROUND_FLUSH", True)
+
     # 上传文件大小限制（100MB，精听音频可能较大）
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024
 
+    # 精听上传的 Whisper 对齐由独立 worker 进程处理（scripts/listening_alignment_worker.py）。
+    # 本地开发没有起 worker 时可设 LISTENING_ALIGNMENT_INLINE=1，在 web 进程的后台线程里跑。
+    LISTENING_ALIGNMENT_MODEL = os.environ.get("LISTENING_ALIGNMENT_MODEL", "base")
+    LISTENING_ALIGNMENT_MAX_ATTEMPTS = os.environ.get("LISTENING_ALIGNMENT_MAX_ATTEMPTS", "2")
+    LISTENING_ALIGNMENT_MAX_RUNNING = os.environ.get("LISTENING_ALIGNMENT_MAX_RUNNING", "1")
+    LISTENING_ALIGNMENT_INLINE = _env_bool("LISTENING_ALIGNMENT_INLINE")
+
+    # 小程序 Bearer 鉴权的用户缓存：按 token 哈希缓存，短 TTL + 条数上限；
+    # 通过 ORM 修改用户/学生档案时立即失效，TTL 兜底脚本等进程外的改动。
+    API_PRINCIPAL_CACHE_TTL = int(os.environ.get("API_PRINCIPAL_CACHE_TTL", "60"))
+    API_PRINCIPAL_CACHE_SIZE = int(os.environ.get("API_PRINCIPAL_CACHE_SIZE", "4096"))
+
     # 课堂模式口令：老师上课进入刷题库的轻量门禁，验证通过后写长效 cookie
     CLASSROOM_PASSCODE = os.environ.get("CLASSROOM_PASSCODE", "5188")
 
@@ -84,10 +118,19 @@ class Config:
         "WECHAT_FEEDBACK_TEMPLATE_ID",
         "jh8kXPp8x2qnzE3g894HlDzdJ5j7ItGHVG0Qx6oD7PA",
     )
+    # 课程提醒 / 课表变动推送的并发发送（services/wechat_push.py）：线程数、
+    # 每个模板每秒最多发送条数、瞬时失败（网络、-1 系统繁忙等）的最大尝试次数。
+    WECHAT_PUSH_CONCURRENCY = int(os.environ.get("WECHAT_PUSH_CONCURRENCY", "8"))
+    WECHAT_PUSH_RATE_PER_TEMPLATE = float(os.environ.get("WECHAT_PUSH_RATE_PER_TEMPLATE", "20"))
+    WECHAT_PUSH_MAX_ATTEMPTS = int(os.environ.get("WECHAT_PUSH_MAX_ATTEMPTS", "3"))
 
     # Scheduler system integration
     SCHEDULER_BASE_URL = os.environ.get("SCHEDULER_BASE_URL", "http://aliyun-server:5000")
     SCHEDULER_PUSH_TOKEN = os.environ.get("SCHEDULER_PUSH_TOKEN")
+    # 排课 range 接口的本地缓存（services/scheduler_client.py）：老师反复打开课表页时
+    # 在 TTL 秒内直接复用缓存；排课系统不可用时最多回退到这么旧的缓存。
+    SCHEDULER_RANGE_CACHE_TTL = int(os.environ.get("SCHEDULER_RANGE_CACHE_TTL", "60"))
+    SCHEDULER_RANGE_STALE_SECONDS = int(os.environ.get("SCHEDULER_RANGE_STALE_SECONDS", str(24 * 3600)))
 
     # 允许查看“全部老师课表”的老师账号白名单（username 或 wechat_openid，逗号分隔）。
     # 默认包含管理员周鑫的账号；admin 角色无需在此列表也始终放行。
@@ -103,6 +146,19 @@ class Config:
     DEEPSEEK_MODEL = os.environ.get("DEEPSEEK_MODEL", "deepseek-chat")
     DEEPSEEK_TIMEOUT = os.environ.get("DEEPSEEK_TIMEOUT", "90")
     DEEPSEEK_RETRIES = os.environ.get("DEEPSEEK_RETRIES", "1")
+    # 耗时的 AI 批改（DeepSeek/Qwen）可用 "async": true 走后台任务（services/ai_jobs.py），
+    # 客户端轮询 /api/ai-jobs/<key>。默认在 web 进程内起少量守护线程执行；
+    # 部署了 scripts/ai_job_worker.py 时可设 AI_JOBS_INLINE=0。
+    AI_JOBS_INLINE = _env_bool("AI_JOBS_INLINE", True)
+    AI_JOBS_INLINE_THREADS = int(os.environ.get("AI_JOBS_INLINE_THREADS", "2"))
+    # 口语评测里 DeepSeek 打分与腾讯 SOE 发音评测并发执行，共用这一个截止时间；
+    # 超时的一方以 *_timeout 错误返回，另一方结果照常返回。两边各自的超时与重试都压在这个时间内，
+    # 并发池按 GUNICORN_THREADS + AI_JOBS_INLINE_THREADS 定容，请求不会在池里排队。
+    SPEAKING_EVAL_DEADLINE_SECONDS = os.environ.get("SPEAKING_EVAL_DEADLINE_SECONDS", "90")
+    # 相同输入（模型 + 提示词版本 + 规范化后的请求）的 AI 批改结果缓存在 ai_response_cache 表，
+    # 学生重复提交时直接返回；TTL 设为 0 即关闭缓存。
+    AI_RESPONSE_CACHE_TTL = int(os.environ.get("AI_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+    AI_RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("AI_RESPONSE_CACHE_MAX_ENTRIES", "20000"))
 
     # Aliyun ASR (DashScope Model Studio)
     ALIYUN_API_KEY = os.environ.get("ALIYUN_API_KEY")
@@ -19,6 +19,7 @@
 
   let paperData = null;
   let sessionData = null;
+  let lastSavedAnswers = {};
   let saveTimer = null;
   let countdownTimer = null;
   let heartbeatTimer = null;
@@ -101,9 +102,11 @@
       const data = await fetchJson(`${API}/session/${token}/start`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ device_id: deviceId }),
+        body: JSON.stringify({ device_id: deviceId, include_paper: false }),
       });
-      paperData = data.paper;
+      // 试卷单独拉取：服务端带 ETag，刷新/恢复时浏览器缓存会换成 304。
+      const paper = await fetchJson(`${API}/session/${token}/paper`);
+      paperData = paper.paper;
       sessionData = data.session;
       sessionStarted = true;
       renderPaper(paperData, sessionData);
@@ -179,6 +182,7 @@
     });
 
     restoreAnswers(savedAnswers);
+    rememberSaved(savedAnswers);
     $('duration-note').textContent = totalMin;
     show('timer');
     show('exam-form');
@@ -233,10 +237,28 @@
     saveTimer = setTimeout(() => saveDraft(false), SAVE_DELAY_MS);
   }
 
+  function rememberSaved(answers) {
+    Object.entries(answers || {}).forEach(([questionId, answer]) => {
+      lastSavedAnswers[String(questionId)] = String(answer || '');
+    });
+  }
+
+  // 服务端按题合并草稿，只需发送上次保存成功后改动过的题目。
+  function changedAnswers() {
+    return collectAnswers().filter(
+      a => (lastSavedAnswers[String(a.question_id)] || '') !== a.answer_text,
+    );
+  }
+
   async function saveDraft(useBeacon) {
     if (!sessionStarted || submitting) return;
     clearTimeout(saveTimer);
-    const body = JSON.stringify({ device_id: deviceId, answers: collectAnswers() });
+    const changed = changedAnswers();
+    if (!changed.length) {
+      if (!useBeacon) updateSaveStatus('已自动保存', 'text-teal-700');
+      return;
+    }
+    const body = JSON.stringify({ device_id: deviceId, answers: changed });
     if (useBeacon && navigator.sendBeacon) {
       navigator.sendBeacon(
         `${API}/session/${token}/save`,
@@ -251,6 +273,7 @@
         body,
       });
       sessionData = data.session;
+      changed.forEach(a => { lastSavedAnswers[String(a.question_id)] = a.answer_text; });
       updateSaveStatus('已自动保存', 'text-teal-700');
     } catch (e) {
       if (!handleSessionError(e, '自动保存失败', true)) {
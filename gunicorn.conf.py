@@ -1,7 +1,10 @@
+import os
+
 bind = "127.0.0.1:5002"
 workers = 1
 worker_class = "gthread"
-threads = 6
+# api/miniprogram.py sizes the speaking evaluation pool from GUNICORN_THREADS.
+threads = int(os.environ.get("GUNICORN_THREADS", "6"))
 accesslog = "-"
 errorlog = "-"
 loglevel = "info"
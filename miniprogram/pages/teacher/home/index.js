@@ -216,6 +216,9 @@ Page({
                 }
                 this.setData({ bindRequired: false })
                 this.applyScheduleData(list, dashboardList)
+                if (res.stale) {
+                    wx.showToast({ title: '排课系统暂不可用，显示的是缓存课表', icon: 'none', duration: 3000 })
+                }
                 await this.fetchPracticeStudentCount()
             } else {
                 if (res && res.error === 'missing_scheduler_teacher_id') {
@@ -597,6 +597,79 @@ class ListeningRepeatResult(db.Model):
     )
 
 
+class ListeningAlignmentJob(db.Model, TimestampMixin):
+    """精听上传后的 Whisper 对齐任务，由独立 worker 进程认领执行。"""
+
+    __tablename__ = "listening_alignment_job"
+
+    STATUS_QUEUED = "queued"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_ERROR = "error"
+    STATUS_CANCELLED = "cancelled"
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_PROCESSING)
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_key = db.Column(db.String(32), unique=True, nullable=False, index=True)
+    exercise_id = db.Column(db.String(128), nullable=False, index=True)
+    title = db.Column(db.String(255), nullable=False)
+    audio_path = db.Column(db.String(500), nullable=False)
+    audio_ext = db.Column(db.String(8), nullable=False, default="mp3")
+    output_dir = db.Column(db.String(500), nullable=False)
+    transcript = db.Column(db.Text, nullable=False)
+    translation = db.Column(db.Text)
+    skip_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    status = db.Column(db.String(16), nullable=False, default=STATUS_QUEUED, index=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    segment_count = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=2)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    available_at = db.Column(db.DateTime, default=utcnow_naive, nullable=False, index=True)
+    worker_id = db.Column(db.String(64))
+    heartbeat_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_by_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+
+    def __repr__(self) -> str:
+        return f"<ListeningAlignmentJob {self.job_key} {self.status}>"
+
+
+class AiJob(db.Model, TimestampMixin):
+    """Long-running AI grading call (DeepSeek / Qwen) run off the request thread."""
+
+    __tablename__ = "ai_job"
+
+    STATUS_QUEUED = "queued"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_ERROR = "error"
+    TERMINAL_STATUSES = (STATUS_DONE, STATUS_ERROR)
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_key = db.Column(db.String(32), unique=True, nullable=False, index=True)
+    kind = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(16), nullable=False, default=STATUS_QUEUED, index=True)
+    payload_json = db.Column(db.Text, nullable=False)
+    result_json = db.Column(db.Text)
+    result_status = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=2)
+    timeout_seconds = db.Column(db.Integer, nullable=False, default=120)
+    available_at = db.Column(db.DateTime, default=utcnow_naive, nullable=False, index=True)
+    worker_id = db.Column(db.String(64))
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_by_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+
+    def __repr__(self) -> str:
+        return f"<AiJob {self.job_key} {self.kind} {self.status}>"
+
+
 class ListeningTestSubmission(db.Model):
     """剑桥雅思听力整套 Test 的自动判分结果。"""
 
@@ -644,6 +717,8 @@ class ReadingTestSubmission(db.Model):
     results_json = db.Column(db.Text)
     wrong_numbers_json = db.Column(db.Text)
     attempt_count = db.Column(db.Integer, default=1, nullable=False)
+    # 判分所用答案版本（评分规则版本 + 题目答案摘要）；与当前版本不同则后台重判。
+    grade_version = db.Column(db.String(40))
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -806,6 +881,8 @@ class ToeflMockAttempt(db.Model):
     current_phase = db.Column(db.String(80))
     remaining_seconds = db.Column(db.Integer)
     state_json = db.Column(db.Text, nullable=False, default="{}")
+    # Bumped on every navigation/timer write; delta syncs must name it.
+    state_version = db.Column(db.Integer, default=1, nullable=False)
     routes_json = db.Column(db.Text, nullable=False, default="{}")
     started_at = db.Column(db.DateTime, default=utcnow_naive, nullable=False)
     completed_at = db.Column(db.DateTime)
@@ -935,6 +1012,49 @@ class ScheduleSnapshot(db.Model, TimestampMixin):
     def __repr__(self) -> str:
         return f"<ScheduleSnapshot {self.schedule_uid} {self.status}>"
 
+
+class SchedulerRangeCache(db.Model):
+    """Last scheduler range response per (teacher, date range), shared by workers."""
+
+    __tablename__ = "scheduler_range_cache"
+
+    # "<scheduler_teacher_id or 'all'>:<start>:<end>"
+    range_key = db.Column(db.String(64), primary_key=True)
+    scheduler_teacher_id = db.Column(db.Integer, index=True)
+    start_date = db.Column(db.String(10), nullable=False)
+    end_date = db.Column(db.String(10), nullable=False)
+    payload_json = db.Column(db.Text, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+    etag = db.Column(db.String(128))
+    # Epoch seconds (float) so TTL checks are plain comparisons.
+    fetched_at = db.Column(db.Float, nullable=False, index=True)
+    changed_at = db.Column(db.Float, nullable=False)
+    # content_hash the schedule-change check last diffed against ScheduleSnapshot.
+    diffed_hash = db.Column(db.String(64))
+
+    def __repr__(self) -> str:
+        return f"<SchedulerRangeCache {self.range_key} {self.content_hash[:8]}>"
+
+
+class SubscribePushLog(db.Model):
+    """Outcome of one WeChat subscribe message, written in bulk per fan-out run."""
+
+    __tablename__ = "subscribe_push_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    batch = db.Column(db.String(64), nullable=False, index=True)
+    category = db.Column(db.String(32))
+    template_id = db.Column(db.String(64), nullable=False)
+    openid = db.Column(db.String(64), nullable=False, index=True)
+    ok = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.String(64))
+    errcode = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=utcnow_naive, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<SubscribePushLog {self.batch} {self.openid} ok={self.ok}>"
+
 # ============================================================================
 # Material Bank System (Structured Questions)
 # ============================================================================
@@ -1193,6 +1313,12 @@ class DictationWord(db.Model, TimestampMixin):
     vocab_ai_generated_at = db.Column(db.DateTime)
     vocab_reviewed_at = db.Column(db.DateTime, index=True)
     vocab_report_count = db.Column(db.Integer, default=0, nullable=False, index=True)
+
+    __table_args__ = (
+        # Expression index so click-to-translate's ``LOWER(word) = :word``
+        # lookup is an index seek instead of a scan over every book.
+        db.Index("ix_dictation_word_word_lower", db.func.lower(word)),
+    )
     
     def __repr__(self):
         return f"<DictationWord {self.word}>"
@@ -2420,6 +2546,8 @@ class MockExamSession(db.Model):
     writing_task2_words = db.Column(db.Integer)
     writing_duration_seconds = db.Column(db.Integer, default=0)
     writing_auto_submitted = db.Column(db.Boolean, default=False, nullable=False)
+    # 上面两篇作文全文对应的草稿 revision；之后的修改存在 mock_exam_draft_delta
+    writing_draft_revision = db.Column(db.BigInteger, default=0, nullable=False)
 
     exam = db.relationship("MockExam", backref=db.backref("sessions", lazy="dynamic"))
     student_profile = db.relationship(
@@ -2440,6 +2568,28 @@ class MockExamSession(db.Model):
         return f"<MockExamSession exam={self.exam_id} student={self.student_name} section={self.current_section}>"
 
 
+class MockExamDraftDelta(db.Model):
+    """写作草稿相对 ``base_revision`` 的压缩增量，见 services/mock_exam_autosave.py。"""
+
+    __tablename__ = "mock_exam_draft_delta"
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(
+        db.Integer,
+        db.ForeignKey("mock_exam_session.id"),
+        nullable=False,
+        index=True,
+    )
+    base_revision = db.Column(db.BigInteger, nullable=False)
+    revision = db.Column(db.BigInteger, nullable=False)
+    delta = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("session_id", "revision", name="uq_mock_exam_draft_revision"),
+    )
+
+
 class MockExamReview(db.Model, TimestampMixin):
     """Teacher-owned writing review attached one-to-one to a submitted mock exam."""
 
@@ -2629,3 +2779,38 @@ class WritingTypingAttempt(db.Model, TimestampMixin):
             f"<WritingTypingAttempt student={self.student_profile_id} "
             f"exercise={self.exercise_id} band={self.band}>"
         )
+
+
+class RateLimitBucket(db.Model):
+    """Token bucket shared by every web worker; one row per (limiter, client)."""
+
+    __tablename__ = "rate_limit_bucket"
+
+    bucket_key = db.Column(db.String(160), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    # Epoch seconds (float) so refill arithmetic stays inside one SQL statement.
+    updated_at = db.Column(db.Float, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<RateLimitBucket {self.bucket_key} tokens={self.tokens:.2f}>"
+
+
+class AiResponseCache(db.Model):
+    """Stored result of a deterministic AI grading call, shared by every worker."""
+
+    __tablename__ = "ai_response_cache"
+
+    # sha256 of (namespace, model, prompt version, normalized request).
+    cache_key = db.Column(db.String(64), primary_key=True)
+    namespace = db.Column(db.String(64), nullable=False, index=True)
+    model = db.Column(db.String(80), nullable=False)
+    prompt_version = db.Column(db.String(32), nullable=False)
+    response_json = db.Column(db.Text, nullable=False)
+    # Epoch seconds (float), like RateLimitBucket, so TTL checks are plain comparisons.
+    created_at = db.Column(db.Float, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+    last_hit_at = db.Column(db.Float, nullable=False, index=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<AiResponseCache {self.namespace} {self.cache_key[:12]} hits={self.hit_count}>"
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Run the AI grading job worker (systemd service).
+
+Claims queued ``ai_job`` rows (DeepSeek / Qwen grading submitted with
+``"async": true``) and runs them on ``--threads`` threads.  The work is
+network-bound, so threads rather than processes; several instances may share
+the DB safely.
+
+    python scripts/ai_job_worker.py --threads 4
+    python scripts/ai_job_worker.py --once   # drain queue and exit
+"""
+
+import argparse
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4, help="concurrent jobs in this process")
+    parser.add_argument("--kinds", help="comma separated job kinds to claim (default: all)")
+    parser.add_argument("--poll-seconds", type=float, default=1.0)
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    from app import app
+    from services.ai_jobs import registered_kinds, run_worker
+
+    kinds = [k.strip() for k in (args.kinds or "").split(",") if k.strip()] or None
+    print(f"ai job kinds: {', '.join(kinds or registered_kinds())}")
+    counts: list[int] = []
+
+    def work() -> None:
+        counts.append(
+            run_worker(app, kinds=kinds, poll_seconds=args.poll_seconds, stop_when_idle=args.once)
+        )
+
+    threads = [threading.Thread(target=work, name=f"ai-job-{i}") for i in range(max(1, args.threads))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"processed {sum(counts)} job(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
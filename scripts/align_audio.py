@@ -3,7 +3,7 @@
 音频-文本句级对齐脚本
 
 用法:
-    python scripts/align_audio.py --audio audio.mp3 --text text.txt --output output.json [--title "标题"] [--translation trans.txt]
+    python scripts/align_audio.py --audio audio.mp3 --text text.txt --output output.json [--title "标题"] [--translation trans.txt] [--method lcs|greedy]
 
 输入:
     - audio: 整篇音频文件 (mp3/wav/m4a)
@@ -18,16 +18,25 @@
 
 原理:
     1. 用 Whisper 对音频做带词级时间戳的转录
-    2. 将 Whisper 的词级结果与你提供的文本做 fuzzy 对齐
+    2. 将 Whisper 的词级结果与你提供的文本对齐（services/listening_alignment.py，默认全局 LCS）
     3. 输出每句的精确时间戳
 """
 
 import argparse
 import json
-import re
+import subprocess
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.listening_alignment import (  # noqa: E402
+    STRATEGIES,
+    STRATEGY_LCS,
+    align_sentences,
+    whisper_words_from_result,
+)
+
 
 def split_sentences(text_path: str) -> list[str]:
     """读取文本文件，每行作为一个 segment。"""
@@ -35,14 +44,24 @@ def split_sentences(text_path: str) -> list[str]:
     return [line.strip() for line in lines if line.strip()]
 
 
-def normalize(text: str) -> str:
-    """标准化文本用于比较。"""
-    text = text.lower()
-    text = re.sub(r"[^\w\s]", "", text)
-    return " ".join(text.split())
-
-
-def align_with_whisper(audio_path: str, sentences: list[str]) -> list[dict]:
+def get_audio_duration(audio_path: str) -> float:
+    """ffprobe 读取音频时长；失败返回 0。"""
+    try:
+        out = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                str(audio_path),
+            ],
+            capture_output=True, text=True, timeout=15,
+        )
+        return float(out.stdout.strip())
+    except Exception:
+        return 0.0
+
+
+def align_with_whisper(audio_path: str, sentences: list[str], method: str = STRATEGY_LCS) -> list[dict]:
     """使用 Whisper 做强制对齐。"""
     try:
         import whisper
@@ -60,106 +79,13 @@ def align_with_whisper(audio_path: str, sentences: list[str]) -> list[dict]:
         language="en",
     )
 
-    # 收集所有词级时间戳
-    words = []
-    for seg in result["segments"]:
-        for w in seg.get("words", []):
-            words.append({
-                "word": w["word"].strip(),
-                "start": w["start"],
-                "end": w["end"],
-            })
-
+    words = whisper_words_from_result(result)
     if not words:
         print("警告: Whisper 未返回词级时间戳，回退到段级时间戳")
         return align_fallback_segment(result, sentences)
 
-    # 将词按顺序分配给每个句子
-    segments = []
-    word_idx = 0
-
-    for sent_idx, sentence in enumerate(sentences):
-        sent_words = normalize(sentence).split()
-        if not sent_words:
-            continue
-
-        # 第一句：全局搜（音频常有 IELTS 片头不在文本里），后续小窗口搜
-        if sent_idx == 0:
-            search_range = max(0, len(words) - word_idx)
-            anchor_len = min(6, len(sent_words))
-        else:
-            search_range = min(20, len(words) - word_idx)
-            anchor_len = min(5, len(sent_words))
-
-        scored = []
-        for offset in range(search_range):
-            check_idx = word_idx + offset
-            if check_idx >= len(words):
-                break
-            score = 0
-            for j, sw in enumerate(sent_words[:anchor_len]):
-                if check_idx + j < len(words):
-                    if normalize(words[check_idx + j]["word"]) == sw:
-                        score += 1
-            scored.append((check_idx, score))
-
-        if not scored:
-            best_start_idx = word_idx
-            best_score = -1
-        else:
-            max_score = max(s for _, s in scored)
-            if sent_idx == 0:
-                # IELTS Section 1 example 节选会先出现，再放完整录音 → 选最后一个高分候选
-                high = [ci for ci, s in scored if s >= max_score - 1 and s >= 2]
-                best_start_idx = high[-1] if high else scored[0][0]
-                best_score = max_score
-            else:
-                best_start_idx = next(ci for ci, s in scored if s == max_score)
-                best_score = max_score
-
-        if sent_idx == 0 and best_score < 2:
-            print(f"  [warn] first-sentence anchor weak (score={best_score}); 可能仍落在片头", file=sys.stderr)
-
-        # If the transcript continues after Whisper has no more timed words,
-        # the audio source is probably truncated or silent at the end. Do not
-        # invent 2-second timestamps for text that has no audio.
-        if best_start_idx >= len(words):
-            prev_end = segments[-1]["end"] if segments else (words[-1]["end"] if words else 0)
-            print(
-                f"  [warn] stopping at sentence {sent_idx + 1}: no timed words remain "
-                f"after {prev_end:.2f}s",
-                file=sys.stderr,
-            )
-            break
-
-        remaining_words = len(words) - best_start_idx
-        if remaining_words < len(sent_words):
-            coverage = remaining_words / max(1, len(sent_words))
-            if coverage < 0.75:
-                print(
-                    f"  [warn] stopping at sentence {sent_idx + 1}: only "
-                    f"{remaining_words}/{len(sent_words)} words have audio timestamps",
-                    file=sys.stderr,
-                )
-                break
-            start_time = words[best_start_idx]["start"]
-            end_idx = len(words) - 1
-            end_time = words[end_idx]["end"]
-        else:
-            start_time = words[best_start_idx]["start"]
-            end_idx = min(best_start_idx + len(sent_words), len(words)) - 1
-            end_time = words[end_idx]["end"] if end_idx < len(words) else start_time + 5
-
-        segments.append({
-            "id": sent_idx + 1,
-            "start": round(start_time, 2),
-            "end": round(end_time, 2),
-            "text": sentence,
-        })
-
-        word_idx = end_idx + 1
-
-    return segments
+    duration = get_audio_duration(audio_path) or max(w["end"] for w in words)
+    return align_sentences(sentences, words, duration, strategy=method)
 
 
 def align_fallback_segment(result: dict, sentences: list[str]) -> list[dict]:
@@ -197,6 +123,8 @@ def main():
     parser.add_argument("--title", default="Listening Exercise", help="练习标题")
     parser.add_argument("--translation", help="翻译文件路径 (每行一句，可选)")
     parser.add_argument("--audio-url", help="音频在网页中的访问路径 (默认使用文件名)")
+    parser.add_argument("--method", choices=STRATEGIES, default=STRATEGY_LCS,
+                        help="lcs（全局单调对齐，默认）或 greedy（锚点窗口）")
 
     args = parser.parse_args()
 
@@ -212,7 +140,7 @@ def main():
             print(f"警告: 翻译行数 ({len(translations)}) 与文本行数 ({len(sentences)}) 不一致")
 
     # 对齐
-    segments = align_with_whisper(args.audio, sentences)
+    segments = align_with_whisper(args.audio, sentences, args.method)
 
     # 添加翻译
     if translations:
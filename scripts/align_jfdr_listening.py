@@ -26,13 +26,18 @@ from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.path.insert(0, str(PROJECT_ROOT))
 
 from batch_align_ielts import (  # noqa: E402
     align_with_model,
     get_audio_duration,
     strip_speaker_label,
 )
-from lcs_align import align_sentences as lcs_align_sentences  # noqa: E402
+from services.listening_alignment import (  # noqa: E402
+    STRATEGIES,
+    STRATEGY_LCS,
+    align_sentences as align_transcript,
+)
 
 MERGED_DIR = PROJECT_ROOT / "data" / "jfdr6" / "merged"
 AUDIO_DIR = PROJECT_ROOT / "data" / "jfdr6" / "audio"
@@ -143,7 +148,7 @@ def main() -> None:
     parser.add_argument("--resume", action="store_true", help="skip existing aligned outputs")
     parser.add_argument("--prewarm", action="store_true",
                         help="only transcribe all audio into whisper_cache (no merged needed)")
-    parser.add_argument("--method", choices=["greedy", "lcs"], default="lcs",
+    parser.add_argument("--method", choices=STRATEGIES, default=STRATEGY_LCS,
                         help="lcs (global monotonic, robust to sparse ASR) or greedy "
                              "(batch_align_ielts anchor-window)")
     args = parser.parse_args()
@@ -192,11 +197,11 @@ def main() -> None:
         duration = get_audio_duration(entry["audio"])
         print(f"aligning {entry['id']} ({len(align_sentences)} sentences, {args.method})")
         try:
-            if args.method == "lcs":
+            if args.method == STRATEGY_LCS:
                 words = model.words(entry["audio"])
-                segments = lcs_align_sentences(align_sentences, words, duration)
+                segments = align_transcript(align_sentences, words, duration, strategy=STRATEGY_LCS)
             else:
-                segments = align_with_model(model, entry["audio"], align_sentences)
+                segments = align_with_model(model, entry["audio"], align_sentences, args.method)
         except Exception as exc:  # noqa: BLE001
             report["failed"].append({"id": entry["id"], "reason": repr(exc)})
             print(f"  failed: {exc}")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""Align a whole directory of listening audio + transcripts in parallel.
+
+Pairs are discovered by file stem inside ``--input``:
+
+    ielts20_test1_s1.mp3          audio (mp3 / wav / m4a)
+    ielts20_test1_s1.txt          transcript, one sentence or paragraph per line
+    ielts20_test1_s1.zh.txt       optional translation, one line per sentence
+
+Pairs are spread across ``--workers`` processes; each process loads its own
+Whisper model, and only when it meets an audio file that is not yet in the
+word-timestamp cache (keyed by audio SHA-256, see services/listening_asr_cache).
+A re-run over an unchanged series therefore does no ASR at all and finishes in
+the time the alignment itself takes.  Exercise JSON is written atomically.
+
+Usage:
+    python scripts/align_listening_book.py --input data/cam20_audio --workers 4
+    python scripts/align_listening_book.py --input data/cam20_audio --strategy lcs \\
+        --title-template "Cambridge IELTS 20 {id}" --resume
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from batch_align_ielts import ensure_mp3, get_audio_duration, split_sentences  # noqa: E402
+from services.listening_alignment import (  # noqa: E402
+    STRATEGIES,
+    STRATEGY_LCS,
+    align_sentences,
+    whisper_words_from_result,
+)
+from services.listening_asr_cache import (  # noqa: E402
+    WordTimestampCache,
+    file_sha256,
+    write_json_atomic,
+)
+
+AUDIO_SUFFIXES = (".mp3", ".wav", ".m4a")
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "whisper_cache"
+DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "static" / "listening"
+
+# Per-process state, populated lazily inside each pool worker.
+_MODEL = None
+_MODEL_NAME = ""
+
+
+def _worker_init(model_name: str) -> None:
+    global _MODEL, _MODEL_NAME
+    _MODEL = None
+    _MODEL_NAME = model_name
+
+
+def _transcribe(audio_path: Path) -> dict:
+    global _MODEL
+    if _MODEL is None:
+        import whisper
+
+        _MODEL = whisper.load_model(_MODEL_NAME)
+    return _MODEL.transcribe(str(audio_path), word_timestamps=True, language="en", verbose=False)
+
+
+def discover_pairs(input_dir: Path) -> list[dict]:
+    pairs = []
+    for audio in sorted(p for p in input_dir.iterdir() if p.suffix.lower() in AUDIO_SUFFIXES):
+        transcript = audio.with_suffix(".txt")
+        translation = audio.with_name(f"{audio.stem}.zh.txt")
+        pairs.append({
+            "id": audio.stem,
+            "audio": str(audio),
+            "transcript": str(transcript) if transcript.exists() else None,
+            "translation": str(translation) if translation.exists() else None,
+            "size": audio.stat().st_size,
+        })
+    # Longest recordings first so the last worker is not left with a big tail.
+    pairs.sort(key=lambda p: p["size"], reverse=True)
+    return pairs
+
+
+def align_pair(pair: dict, options: dict) -> dict:
+    """Runs inside a pool worker: cached-or-fresh ASR, alignment, atomic write."""
+    started = time.perf_counter()
+    exercise_id = pair["id"]
+    audio = Path(pair["audio"])
+    output_dir = Path(options["output_dir"])
+    json_path = output_dir / f"{exercise_id}.json"
+    if not pair["transcript"]:
+        return {"id": exercise_id, "status": "failed", "reason": "missing transcript"}
+
+    cache = WordTimestampCache(options["cache_dir"], options["model"])
+    digest = file_sha256(audio)
+    entry = cache.load(digest)
+    asr_cached = entry is not None
+    if entry is None:
+        entry = cache.store(digest, _transcribe(audio), get_audio_duration(audio))
+
+    sentences = split_sentences(Path(pair["transcript"]))
+    segments = align_sentences(
+        sentences,
+        whisper_words_from_result(entry),
+        entry.get("duration") or 0.0,
+        strategy=options["strategy"],
+    )
+    if pair["translation"]:
+        lines = [
+            line.strip()
+            for line in Path(pair["translation"]).read_text(encoding="utf-8").splitlines()
+            if line.strip()
+        ]
+        for seg in segments:
+            idx = seg["id"] - 1
+            if 0 <= idx < len(lines):
+                seg["translation"] = lines[idx]
+
+    audio_out = output_dir / f"{exercise_id}.mp3"
+    ensure_mp3(audio, audio_out)
+    write_json_atomic(
+        json_path,
+        {
+            "id": exercise_id,
+            "title": options["title_template"].format(id=exercise_id),
+            "audio": audio_out.name,
+            "parts": [{"name": "Full", "segments": segments}],
+        },
+    )
+    return {
+        "id": exercise_id,
+        "status": "processed",
+        "asr_cached": asr_cached,
+        "segments": len(segments),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def run_pipeline(pairs: list[dict], options: dict, workers: int) -> dict:
+    report: dict = {"processed": [], "skipped": [], "failed": []}
+    todo = []
+    for pair in pairs:
+        if options.get("resume") and (Path(options["output_dir"]) / f"{pair['id']}.json").exists():
+            report["skipped"].append(pair["id"])
+        else:
+            todo.append(pair)
+
+    def record(result: dict) -> None:
+        if result["status"] == "processed":
+            report["processed"].append(result)
+            tag = "cached" if result["asr_cached"] else "asr"
+            print(f"ok   {result['id']} ({result['segments']} segments, {tag}, {result['seconds']}s)")
+        else:
+            report["failed"].append(result)
+            print(f"fail {result['id']}: {result['reason']}")
+
+    if workers <= 1:
+        _worker_init(options["model"])
+        for pair in todo:
+            try:
+                record(align_pair(pair, options))
+            except Exception as exc:  # noqa: BLE001
+                record({"id": pair["id"], "status": "failed", "reason": repr(exc)})
+        return report
+
+    # spawn, not fork: torch/whisper state must not be shared across processes.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_worker_init,
+        initargs=(options["model"],),
+    ) as pool:
+        futures = {pool.submit(align_pair, pair, options): pair for pair in todo}
+        for future in as_completed(futures):
+            pair = futures[future]
+            try:
+                record(future.result())
+            except Exception as exc:  # noqa: BLE001
+                record({"id": pair["id"], "status": "failed", "reason": repr(exc)})
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", required=True, help="directory of audio + transcript pairs")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT_DIR), help="exercise JSON/mp3 output dir")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes (one model each)")
+    parser.add_argument("--model", default="small", help="whisper model name")
+    parser.add_argument("--strategy", choices=STRATEGIES, default=STRATEGY_LCS)
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="word-timestamp cache root")
+    parser.add_argument("--title-template", default="{id}", help="exercise title, {id} is the file stem")
+    parser.add_argument("--only", help="comma separated stems to process")
+    parser.add_argument("--resume", action="store_true", help="skip pairs whose exercise JSON exists")
+    parser.add_argument("--report", help="write the JSON report here (default: <input>/align_report.json)")
+    args = parser.parse_args()
+
+    input_dir = Path(args.input)
+    pairs = discover_pairs(input_dir)
+    if args.only:
+        wanted = {x.strip() for x in args.only.split(",") if x.strip()}
+        pairs = [p for p in pairs if p["id"] in wanted]
+    if not pairs:
+        raise SystemExit(f"no audio files found under {input_dir}")
+
+    options = {
+        "output_dir": args.output,
+        "cache_dir": args.cache_dir,
+        "model": args.model,
+        "strategy": args.strategy,
+        "title_template": args.title_template,
+        "resume": args.resume,
+    }
+    started = time.perf_counter()
+    report = run_pipeline(pairs, options, args.workers)
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+
+    report_path = Path(args.report) if args.report else input_dir / "align_report.json"
+    write_json_atomic(report_path, report)
+    summary = {k: (len(v) if isinstance(v, list) else v) for k, v in report.items()}
+    print(json.dumps(summary, ensure_ascii=False))
+    print(f"report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
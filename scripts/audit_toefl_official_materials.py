@@ -18,9 +18,11 @@ import argparse
 import csv
 import hashlib
 import json
+import os
 import re
 import shutil
 import subprocess
+import sys
 from collections import defaultdict
 from collections.abc import Iterable
 from dataclasses import dataclass
@@ -28,6 +30,12 @@ from datetime import datetime
 from difflib import SequenceMatcher
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from services.file_fingerprints import DEFAULT_INDEX_PATH, FingerprintIndex, sha256_file  # noqa: E402,F401
+
 DEFAULT_SOURCE = Path.home() / "Desktop" / "新托福资料"
 DEFAULT_OUTPUT = Path("data") / "toefl_official_audit"
 NOTICE = "内部学习资料，禁止外传或用于商业用途"
@@ -72,14 +80,6 @@ class OfficialSource:
     text_end_pattern: str | None = None
 
 
-def sha256_file(path: Path) -> str:
-    digest = hashlib.sha256()
-    with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
-
-
 def discover_sources(root: Path) -> list[OfficialSource]:
     specs = [
         (
@@ -348,18 +348,25 @@ def classify_file_duplicate(rows: list[dict]) -> str:
     return "cross_set_content_duplicate"
 
 
-def file_inventory(sources: list[OfficialSource], root: Path) -> tuple[list[dict], list[dict]]:
+def file_inventory(
+    sources: list[OfficialSource],
+    root: Path,
+    fingerprints: FingerprintIndex | None = None,
+    workers: int = 1,
+) -> tuple[list[dict], list[dict]]:
+    fingerprints = fingerprints or FingerprintIndex()
+    located = [(source, path) for source in sources for path in iter_source_files(source)]
+    digests = fingerprints.sha256_many([path for _source, path in located], workers=workers)
     records = []
-    for source in sources:
-        for path in iter_source_files(source):
-            records.append({
-                "source_id": source.source_id,
-                "path": str(path.relative_to(root)),
-                "relative_name": path.name,
-                "extension": path.suffix.lower(),
-                "size_bytes": path.stat().st_size,
-                "sha256": sha256_file(path),
-            })
+    for (source, path), digest in zip(located, digests):
+        records.append({
+            "source_id": source.source_id,
+            "path": str(path.relative_to(root)),
+            "relative_name": path.name,
+            "extension": path.suffix.lower(),
+            "size_bytes": path.stat().st_size,
+            "sha256": digest,
+        })
 
     grouped: dict[str, list[dict]] = defaultdict(list)
     for record in records:
@@ -563,13 +570,20 @@ def build_summary(
     return "\n".join(lines)
 
 
-def run(source_root: Path, output_dir: Path, near_threshold: float = 0.94) -> dict:
+def run(
+    source_root: Path,
+    output_dir: Path,
+    near_threshold: float = 0.94,
+    fingerprints: FingerprintIndex | None = None,
+    workers: int = 1,
+) -> dict:
+    fingerprints = fingerprints or FingerprintIndex()
     sources = discover_sources(source_root)
-    file_records, file_duplicates = file_inventory(sources, source_root)
+    file_records, file_duplicates = file_inventory(sources, source_root, fingerprints, workers)
     question_blocks = []
     for source in sources:
-        text = slice_source_text(source, extract_pdf_text(source.pdf_path))
-        question_blocks.extend(extract_question_blocks(source, text))
+        text = fingerprints.text(source.pdf_path, "pdftotext_layout", extract_pdf_text)
+        question_blocks.extend(extract_question_blocks(source, slice_source_text(source, text)))
     question_duplicates = compare_question_blocks(question_blocks, near_threshold)
 
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -584,7 +598,7 @@ def run(source_root: Path, output_dir: Path, near_threshold: float = 0.94) -> di
                 "label": source.label,
                 "kind": source.kind,
                 "pdf_path": str(source.pdf_path.relative_to(source_root)),
-                "pdf_sha256": sha256_file(source.pdf_path),
+                "pdf_sha256": fingerprints.sha256(source.pdf_path),
                 "question_block_count": sum(
                     block["source_id"] == source.source_id for block in question_blocks
                 ),
@@ -650,8 +664,24 @@ def main() -> int:
     parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
     parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
     parser.add_argument("--near-threshold", type=float, default=0.94)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument(
+        "--fingerprint-index",
+        type=Path,
+        default=DEFAULT_INDEX_PATH,
+        help="persistent hash/text index shared with the other material scripts",
+    )
+    parser.add_argument("--no-fingerprint-index", action="store_true", help="rehash every file")
     args = parser.parse_args()
-    payload = run(args.source.expanduser().resolve(), args.output, args.near_threshold)
+    fingerprints = FingerprintIndex(None if args.no_fingerprint_index else args.fingerprint_index)
+    payload = run(
+        args.source.expanduser().resolve(),
+        args.output,
+        args.near_threshold,
+        fingerprints=fingerprints,
+        workers=args.workers,
+    )
+    fingerprints.save()
     print(
         json.dumps(
             {
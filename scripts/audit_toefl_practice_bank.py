@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
-"""Audit the file-backed TOEFL practice bank and produce review artifacts."""
+"""Audit the file-backed TOEFL practice bank and produce review artifacts.
+
+Per-exam results are cached in ``--cache`` and reused while an exam's files,
+source profile and referenced sources/audio are unchanged; changed exams are
+re-checked across ``--workers`` processes.  Each run also writes a diff
+against the previous ``--output-json`` report to ``--output-diff``.
+"""
 
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
 from collections import Counter
 from pathlib import Path
@@ -15,8 +22,10 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from services.toefl_bank_quality import (  # noqa: E402
+    AuditCache,
     analyze_bank,
     blocking_issues,
+    diff_reports,
     load_source_profiles,
 )
 
@@ -24,6 +33,8 @@ DEFAULT_DATA_ROOT = REPO_ROOT / "data" / "toefl_practice"
 DEFAULT_PROFILE = REPO_ROOT / "data" / "toefl_quality" / "source_profiles.json"
 DEFAULT_JSON = REPO_ROOT / "data" / "toefl_quality" / "latest_audit.json"
 DEFAULT_MARKDOWN = REPO_ROOT / "docs" / "toefl_quality_audit.md"
+DEFAULT_CACHE = REPO_ROOT / "data" / "toefl_quality" / "audit_cache.json"
+DEFAULT_DIFF = REPO_ROOT / "data" / "toefl_quality" / "latest_audit_diff.json"
 
 
 def _write_json(path: Path, payload: dict[str, Any]) -> None:
@@ -169,6 +180,19 @@ def main() -> int:
     parser.add_argument("--source-root", type=Path)
     parser.add_argument("--output-json", type=Path, default=DEFAULT_JSON)
     parser.add_argument("--output-markdown", type=Path, default=DEFAULT_MARKDOWN)
+    parser.add_argument("--output-diff", type=Path, default=DEFAULT_DIFF)
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE)
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-check every exam and do not update the cache.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="Processes used for exams that need re-checking.",
+    )
     parser.add_argument(
         "--require-release-ready",
         action="append",
@@ -178,13 +202,25 @@ def main() -> int:
     )
     args = parser.parse_args()
 
+    previous = None
+    if args.output_json.is_file():
+        try:
+            previous = json.loads(args.output_json.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            previous = None
+    cache = AuditCache(None if args.no_cache else args.cache)
     report = analyze_bank(
         args.data_root,
         REPO_ROOT,
         profiles=load_source_profiles(args.profile),
         source_root=args.source_root,
+        cache=cache,
+        workers=args.workers,
     )
+    cache.save()
+    diff = diff_reports(previous, report)
     _write_json(args.output_json, report)
+    _write_json(args.output_diff, diff)
     args.output_markdown.parent.mkdir(parents=True, exist_ok=True)
     args.output_markdown.write_text(render_markdown(report), encoding="utf-8")
 
@@ -192,7 +228,13 @@ def main() -> int:
     print(
         f"Audited {summary.get('exam_count', 0)} exams; "
         f"critical={summary.get('issue_counts', {}).get('critical', 0)}, "
-        f"high={summary.get('issue_counts', {}).get('high', 0)}."
+        f"high={summary.get('issue_counts', {}).get('high', 0)} "
+        f"(re-checked {cache.misses}, reused {cache.hits})."
+    )
+    print(
+        f"Since last run: +{len(diff['issues_added'])} / "
+        f"-{len(diff['issues_resolved'])} issues, "
+        f"{len(diff['release_status_changes'])} release status change(s)."
     )
     if args.require_release_ready:
         blockers = blocking_issues(report, args.require_release_ready)
@@ -4,6 +4,10 @@ Batch align normalized IELTS audio with transcript text files.
 
 Usage:
     python scripts/batch_align_ielts.py --manifest data/ielts_audio_manifest.json
+
+Runs sequentially with one model.  For a whole series prefer
+scripts/align_listening_book.py, which shards files across worker processes
+and caches word timestamps by audio hash.
 """
 
 from __future__ import annotations
@@ -13,6 +17,7 @@ import json
 import re
 import shutil
 import subprocess
+import sys
 from pathlib import Path
 
 
@@ -20,19 +25,17 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 TEXT_ROOT = PROJECT_ROOT / "data" / "ielts_transcripts"
 LISTENING_ROOT = PROJECT_ROOT / "static" / "listening"
 
+sys.path.insert(0, str(PROJECT_ROOT))
 
-def normalize_text(text: str) -> str:
-    text = text.lower()
-    text = re.sub(r"[^\w\s]", "", text)
-    return " ".join(text.split())
-
-
-def strip_speaker_label(text: str) -> str:
-    return re.sub(
-        r"^(?:[A-Z][A-Z\s.'&/-]{0,40}|[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,3})\s*:\s*",
-        "",
-        (text or "").strip(),
-    )
+from services.listening_alignment import (  # noqa: E402
+    STRATEGIES,
+    STRATEGY_GREEDY,
+    align_sentences,
+    normalize_text,
+    whisper_words_from_result,
+)
+from services.listening_asr_cache import write_json_atomic  # noqa: E402
+from services.listening_cloze import strip_speaker_label  # noqa: E402,F401
 
 
 # Common English abbreviations whose trailing period is NOT a sentence boundary.
@@ -120,7 +123,7 @@ def get_audio_duration(audio_path: Path) -> float:
         return 0.0
 
 
-def align_with_model(model, audio_path: Path, sentences: list[str]) -> list[dict]:
+def align_with_model(model, audio_path: Path, sentences: list[str], strategy: str = STRATEGY_GREEDY) -> list[dict]:
     audio_duration = get_audio_duration(audio_path)
     result = model.transcribe(
         str(audio_path),
@@ -129,21 +132,9 @@ def align_with_model(model, audio_path: Path, sentences: list[str]) -> list[dict
         verbose=False,
     )
 
-    words: list[dict] = []
-    for seg in result["segments"]:
-        for word in seg.get("words", []):
-            words.append(
-                {
-                    "word": word["word"].strip(),
-                    "start": word["start"],
-                    "end": word["end"],
-                }
-            )
-
-    segments: list[dict] = []
-    word_idx = 0
-
+    words = whisper_words_from_result(result)
     if not words:
+        segments: list[dict] = []
         for idx, sentence in enumerate(sentences):
             seg = result["segments"][idx] if idx < len(result["segments"]) else None
             start = seg["start"] if seg else float(idx * 5)
@@ -153,171 +144,7 @@ def align_with_model(model, audio_path: Path, sentences: list[str]) -> list[dict
             )
         return segments
 
-    # Pre-compute effective sentences (skip empty after normalize) so we can
-    # spread the tail evenly across remaining audio time when Whisper drops
-    # the last words of a recording.
-    effective = [(i, s) for i, s in enumerate(sentences) if normalize_text(s).split()]
-
-    for eff_pos, (idx, sentence) in enumerate(effective):
-        sent_words = normalize_text(sentence).split()
-        if not sent_words:
-            continue
-
-        # 第一句：全局搜（音频常有 IELTS 标准片头 ~25-40s 不在文本里），
-        # 后续句子：本地小窗口搜，避免相似句干扰。
-        if idx == 0:
-            # 限制在音频前 50% 的词内搜索：IELTS Section 1 主对话一定在前半段开始；
-            # 否则 "Hello" 之类常见词容易被尾部重复出现的同形词锚住（曾出现首句
-            # 跳到 428s/493s 的 bug）。
-            search_range = max(0, min(len(words), len(words) // 2 + 1) - word_idx)
-            # Build the anchor phrase. If sentence 0 is very short (e.g. just
-            # "Hello?" → 1 word), a 1-word anchor cannot discriminate the IELTS
-            # intro from the actual conversation start. Borrow words from the
-            # next sentences until we have ~5-6 words to match against.
-            anchor_words = list(sent_words)
-            borrow_idx = 1
-            while len(anchor_words) < 5 and borrow_idx < len(sentences):
-                next_words = normalize_text(sentences[borrow_idx]).split()
-                anchor_words.extend(next_words)
-                borrow_idx += 1
-            anchor_len = min(6, len(anchor_words))
-        else:
-            # 窗口大小按 anchor 长度缩放：
-            # - 长 anchor (>=5 词)：200 词窗口能跨过 IELTS 题间 announcement
-            # - 中 anchor (3-4 词)：80 词，避免公共词 ("right"/"OK") 随机匹配
-            # - 短 anchor (1-2 词)：30 词，几乎没法可靠 anchor，限制漂移范围
-            anchor_len_real = len(sent_words)
-            if anchor_len_real >= 5:
-                max_window = 200
-            elif anchor_len_real >= 3:
-                max_window = 80
-            else:
-                max_window = 30
-            search_range = min(max_window, len(words) - word_idx)
-            anchor_words = sent_words
-            anchor_len = min(5, len(sent_words))
-
-        scored = []  # [(check_idx, score)]
-        for offset in range(search_range):
-            check_idx = word_idx + offset
-            score = 0
-            for j, sent_word in enumerate(anchor_words[:anchor_len]):
-                if check_idx + j < len(words) and normalize_text(words[check_idx + j]["word"]) == sent_word:
-                    score += 1
-            scored.append((check_idx, score))
-
-        if not scored:
-            best_start_idx = word_idx
-            best_score = -1
-        else:
-            max_score = max(s for _, s in scored)
-            if idx == 0:
-                # IELTS Section 1 常有 "example" 节选先放 ~第一句到第三句，再播完整录音。
-                # 取得分最高（或差 1 分）的所有候选，选最后一个 → 跳过 example，命中真正录音。
-                # Threshold scales with anchor_len so 1-word first sentences (now
-                # using a borrowed multi-word anchor) still pass.
-                threshold = max(2, anchor_len // 2)
-                high = [ci for ci, s in scored if s >= max_score - 1 and s >= threshold]
-                if not high and max_score >= 2:
-                    high = [ci for ci, s in scored if s == max_score]
-                if not high and max_score >= 1:
-                    # Last resort: pick the latest single-word match (skips
-                    # any earlier intro-narrator occurrence).
-                    high = [ci for ci, s in scored if s == max_score]
-                best_start_idx = high[-1] if high else scored[0][0]
-                best_score = max_score
-            else:
-                # 后续句子：取首个最佳匹配，避免漂到后面相似句。
-                # 大窗口下要求至少匹配一定阈值的 anchor 词，否则视为
-                # "当前句子在 announcement 期内/Whisper 漏词"，保守续写
-                # 在上一句结尾后约 1s（不漂到无关位置）。
-                # 关键：阈值必须 >=2（除非 anchor 只有 1 词），单词匹配
-                # 太容易在公共词上 false-positive 导致逐句累积漂移。
-                if anchor_len <= 1:
-                    min_required = 1
-                else:
-                    min_required = max(2, (anchor_len + 1) // 2)
-                if max_score >= min_required:
-                    best_start_idx = next(ci for ci, s in scored if s == max_score)
-                else:
-                    best_start_idx = word_idx
-                best_score = max_score
-
-        # 第一句：要求至少匹配 2 个 anchor 词；否则放弃强行对齐，保守留 t=0 fallback
-        if idx == 0 and best_score < 2:
-            print(f"  [warn] first-sentence anchor weak (score={best_score}); using t=0 fallback")
-
-        # 词数耗尽：Whisper 漏转录尾部内容（在 IELTS 题间静默/低能量段易丢词）。
-        # 改为：把剩下的句子均匀分布在 [扩展后的起点, 音频实际结尾]，
-        # 学生点击后能听到对应区间内的真实音频。
-        if best_start_idx >= len(words):
-            prev_end = segments[-1]["end"] if segments else (words[-1]["end"] if words else 0)
-            remaining = len(effective) - eff_pos
-            min_slot = 2.0  # 每句至少 2s 播放窗口，否则学生听不清
-
-            if audio_duration:
-                hard_end = audio_duration - 0.05
-                # 始终给尾部预留至少 N*min_slot 或 10s（取较大者）。
-                # 上一句的 anchor 即使已经接近音频末尾也允许往回 rewind，
-                # 否则会出现 10 个 fallback 句全部 start=同一时刻、互相覆盖
-                # 同 0.5s 音频的问题。少量与已对齐句子的 overlap 是可以接受的
-                # （音频在那段时间确实有对话，学生听到正确内容）。
-                if prev_end > hard_end:
-                    prev_end = hard_end
-                needed = max(remaining * min_slot, 10.0)
-                prev_end = max(0.0, min(prev_end, hard_end - needed))
-                slot = (hard_end - prev_end) / max(1, remaining)
-                slot = max(min_slot, slot)
-                last_valid_start = hard_end - 0.5
-            else:
-                slot = min_slot
-                last_valid_start = prev_end + remaining * slot
-
-            cursor = prev_end
-            for tail_idx in range(eff_pos, len(effective)):
-                t_idx, t_sent = effective[tail_idx]
-                seg_start = min(cursor, last_valid_start)
-                seg_end = seg_start + slot
-                segments.append(
-                    {
-                        "id": t_idx + 1,
-                        "start": round(seg_start, 2),
-                        "end": round(seg_end, 2),
-                        "text": t_sent,
-                    }
-                )
-                cursor += slot
-            return segments
-
-        remaining_words = len(words) - best_start_idx
-        if remaining_words < len(sent_words):
-            # 剩余 audio 词不够该句长度：用所有剩余词覆盖
-            start_time = words[best_start_idx]["start"]
-            end_idx = len(words) - 1
-            end_time = words[end_idx]["end"]
-        else:
-            start_time = words[best_start_idx]["start"]
-            end_idx = min(best_start_idx + len(sent_words), len(words)) - 1
-            end_time = words[end_idx]["end"] if end_idx < len(words) else start_time + 5
-        # Whisper 偶尔给最后几个词 timestamp 超过音频实际长度（hallucinated tail）。
-        # 必须 clamp，否则 fallback 分支会从过界的 prev_end 继续往后排，
-        # 导致后续所有 segment 落在音频范围之外，播放器找不到位置就停。
-        if audio_duration:
-            cap = audio_duration - 0.05
-            if start_time > cap: start_time = cap
-            if end_time > cap: end_time = cap
-            if end_time < start_time: end_time = start_time
-        segments.append(
-            {
-                "id": idx + 1,
-                "start": round(start_time, 2),
-                "end": round(end_time, 2),
-                "text": sentence,
-            }
-        )
-        word_idx = end_idx + 1
-
-    return segments
+    return align_sentences(sentences, words, audio_duration, strategy=strategy)
 
 
 def ensure_mp3(src: Path, dest: Path) -> None:
@@ -356,6 +183,9 @@ def main() -> None:
     parser.add_argument("--only", help="comma separated exercise ids, e.g. ielts10_test4_s1,ielts11_test1_s1")
     parser.add_argument("--limit", type=int, help="max entries to process")
     parser.add_argument("--resume", action="store_true", help="skip outputs that already exist")
+    parser.add_argument("--method", choices=STRATEGIES, default=STRATEGY_GREEDY,
+                        help="greedy (anchor-window, historical default) or lcs "
+                             "(global monotonic, robust to sparse ASR)")
     args = parser.parse_args()
 
     manifest = json.loads(Path(args.manifest).read_text(encoding="utf-8"))
@@ -412,7 +242,7 @@ def main() -> None:
         print(f"processing {exercise_id}")
         try:
             sentences = split_sentences(text_path)
-            segments = align_with_model(model, normalized_audio, sentences)
+            segments = align_with_model(model, normalized_audio, sentences, args.method)
             ensure_mp3(normalized_audio, audio_out)
             payload = {
                 "id": exercise_id,
@@ -420,7 +250,7 @@ def main() -> None:
                 "audio": audio_out.name,
                 "parts": [{"name": f"Section {section}", "segments": segments}],
             }
-            json_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+            write_json_atomic(json_path, payload)
             processed += 1
         except Exception as exc:  # noqa: BLE001
             failed.append({"exercise_id": exercise_id, "reason": repr(exc)})
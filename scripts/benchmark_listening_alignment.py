@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Benchmark the listening forced-alignment engine on 9分达人 books.
+
+For every exercise in data/jfdr{book}/aligned the reviewed segment times are
+the reference.  ASR words come from data/jfdr{book}/whisper_cache when the
+cache exists; otherwise they are synthesized from the reference segments
+(evenly spaced inside each sentence) and degraded with word drops and
+substitutions, which is what makes greedy drift and LCS interpolate.
+
+Reports, per book and strategy: total alignment time, mean absolute start
+error and the share of sentences starting within 1s of the reference.  The
+LCS core is also timed against the original O(nm) table implementation.
+
+Usage:
+    python scripts/benchmark_listening_alignment.py
+    python scripts/benchmark_listening_alignment.py --books 6 --drop 0.3 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.listening_alignment import (  # noqa: E402
+    STRATEGIES,
+    align_sentences,
+    lcs_match,
+    normalize_words,
+)
+from services.listening_cloze import strip_speaker_label  # noqa: E402
+
+
+def legacy_table_lcs(book: list[str], asr: list[str]) -> dict[int, int]:
+    """The pre-refactor O(nm)-memory pure Python DP, kept as the timing baseline."""
+    n, m = len(book), len(asr)
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        row, nxt = dp[i], dp[i + 1]
+        bi = book[i]
+        for j in range(m - 1, -1, -1):
+            if bi == asr[j]:
+                row[j] = nxt[j + 1] + 1
+            else:
+                row[j] = nxt[j] if nxt[j] >= row[j + 1] else row[j + 1]
+    match: dict[int, int] = {}
+    i = j = 0
+    while i < n and j < m:
+        if book[i] == asr[j]:
+            match[i] = j
+            i += 1
+            j += 1
+        elif dp[i + 1][j] >= dp[i][j + 1]:
+            i += 1
+        else:
+            j += 1
+    return match
+
+
+def synthetic_words(segments: list[dict], rng: random.Random, drop: float, noise: float) -> list[dict]:
+    words = []
+    for seg in segments:
+        tokens = re.findall(r"\S+", strip_speaker_label(seg["text"]))
+        if not tokens:
+            continue
+        span = max(0.2, float(seg["end"]) - float(seg["start"]))
+        step = span / len(tokens)
+        for k, token in enumerate(tokens):
+            if rng.random() < drop:
+                continue
+            if rng.random() < noise:
+                token = "uh"
+            start = float(seg["start"]) + k * step
+            words.append({"word": token, "start": round(start, 2), "end": round(start + step, 2)})
+    return words
+
+
+def cached_words(book_root: Path, exercise_id: str) -> list[dict] | None:
+    for cache in sorted((book_root / "whisper_cache").glob(f"{exercise_id}.*.json")):
+        result = json.loads(cache.read_text(encoding="utf-8"))
+        return [w for seg in result.get("segments", []) for w in seg.get("words", [])]
+    return None
+
+
+def load_cases(book: int, rng: random.Random, drop: float, noise: float) -> list[dict]:
+    book_root = PROJECT_ROOT / "data" / f"jfdr{book}"
+    cases = []
+    for path in sorted((book_root / "aligned").glob(f"jfdr{book}_*.json")):
+        aligned = json.loads(path.read_text(encoding="utf-8"))
+        segments = aligned.get("segments") or []
+        words = cached_words(book_root, aligned["id"])
+        source = "whisper_cache"
+        if words is None:
+            words = synthetic_words(segments, rng, drop, noise)
+            source = "synthetic"
+        cases.append({
+            "id": aligned["id"],
+            "sentences": [strip_speaker_label(seg["text"]) for seg in segments],
+            "reference": [float(seg["start"]) for seg in segments],
+            "duration": float(aligned.get("audio_duration") or 0),
+            "words": words,
+            "source": source,
+        })
+    return cases
+
+
+def score(segments: list[dict], reference: list[float]) -> tuple[float, float]:
+    by_id = {seg["id"]: float(seg["start"]) for seg in segments}
+    errors = [abs(by_id[i + 1] - ref) if i + 1 in by_id else 60.0 for i, ref in enumerate(reference)]
+    if not errors:
+        return 0.0, 1.0
+    return sum(errors) / len(errors), sum(1 for e in errors if e <= 1.0) / len(errors)
+
+
+def run_book(book: int, args: argparse.Namespace) -> dict:
+    cases = load_cases(book, random.Random(args.seed + book), args.drop, args.noise)
+    if not cases:
+        return {"book": book, "cases": 0}
+    report: dict = {
+        "book": book,
+        "cases": len(cases),
+        "sentences": sum(len(c["sentences"]) for c in cases),
+        "asr_source": sorted({c["source"] for c in cases}),
+        "strategies": {},
+        "lcs_core_seconds": {},
+    }
+    for strategy in STRATEGIES:
+        elapsed = 0.0
+        mae_total = within_total = 0.0
+        for case in cases:
+            t0 = time.perf_counter()
+            segments = align_sentences(case["sentences"], case["words"], case["duration"], strategy=strategy)
+            elapsed += time.perf_counter() - t0
+            mae, within = score(segments, case["reference"])
+            mae_total += mae
+            within_total += within
+        report["strategies"][strategy] = {
+            "seconds": round(elapsed, 3),
+            "mean_abs_start_error": round(mae_total / len(cases), 3),
+            "within_1s": round(within_total / len(cases), 4),
+        }
+
+    pairs = []
+    for case in cases:
+        book_words = [w for s in case["sentences"] for w in normalize_words(s)]
+        asr_words = [(normalize_words(w["word"]) or [""])[0] for w in case["words"]]
+        pairs.append((book_words, asr_words))
+    backends = {"legacy_table": legacy_table_lcs, "python": lambda a, b: lcs_match(a, b, use_numpy=False)}
+    try:
+        import numpy  # noqa: F401
+
+        backends["numpy"] = lambda a, b: lcs_match(a, b, use_numpy=True)
+    except ImportError:
+        pass
+    for name, fn in backends.items():
+        t0 = time.perf_counter()
+        for book_words, asr_words in pairs:
+            fn(book_words, asr_words)
+        report["lcs_core_seconds"][name] = round(time.perf_counter() - t0, 3)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", default="6,7", help="comma separated jfdr book numbers")
+    parser.add_argument("--drop", type=float, default=0.15, help="synthetic ASR word drop rate")
+    parser.add_argument("--noise", type=float, default=0.05, help="synthetic ASR substitution rate")
+    parser.add_argument("--seed", type=int, default=20260515)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON only")
+    args = parser.parse_args()
+    # greedy logs a warning per weak first-sentence anchor; the summary already shows it.
+    logging.getLogger("services.listening_alignment").setLevel(logging.ERROR)
+
+    reports = [run_book(int(b), args) for b in args.books.split(",") if b.strip()]
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        return
+    for rep in reports:
+        if not rep.get("cases"):
+            print(f"jfdr{rep['book']}: no aligned exercises")
+            continue
+        print(f"jfdr{rep['book']}: {rep['cases']} exercises, {rep['sentences']} sentences, "
+              f"asr={'/'.join(rep['asr_source'])}")
+        for strategy, stats in rep["strategies"].items():
+            print(f"  {strategy:7s} {stats['seconds']:7.3f}s  "
+                  f"mae={stats['mean_abs_start_error']:.2f}s  within1s={stats['within_1s']:.1%}")
+        core = "  ".join(f"{k}={v:.3f}s" for k, v in rep["lcs_core_seconds"].items())
+        print(f"  lcs core: {core}")
+
+
+if __name__ == "__main__":
+    main()
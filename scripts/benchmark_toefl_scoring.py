@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Benchmark TOEFL v2 objective scoring for a cohort of attempts.
+
+Synthesizes ``--attempts`` response sets for each package (a mix of correct,
+wrong and skipped answers drawn from the private key) and times three ways
+of scoring them:
+
+* ``legacy``  re-reads answer_key.json and re-filters blocked ids per
+  attempt, as score_responses did before answer keys were compiled;
+* ``single``  calls score_responses once per attempt (warm compiled key);
+* ``batch``   scores the whole cohort with one score_attempts call.
+
+Every strategy must produce identical results; the script exits non-zero
+if they disagree.
+
+Usage:
+    python scripts/benchmark_toefl_scoring.py
+    python scripts/benchmark_toefl_scoring.py --packages ets-practice-1 --attempts 500 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.toefl_mock_v2 import (  # noqa: E402
+    _package_dirs,
+    answer_is_correct,
+    clear_caches,
+    load_json,
+    resolve_package,
+    score_attempts,
+    score_responses,
+)
+
+
+def legacy_score(test_id: str, responses: dict) -> dict:
+    """The pre-compilation scorer, kept as the timing baseline."""
+    answer_key = load_json(resolve_package(test_id) / "answer_key.json")
+    blocked_ids = {
+        item.get("question_id")
+        for item in answer_key.get("blocked", [])
+        if item.get("question_id")
+    }
+    answers = [
+        item
+        for item in answer_key.get("answers", [])
+        if item.get("grading_status", "auto") == "auto"
+        and item.get("question_id") not in blocked_ids
+    ]
+    results = [
+        {
+            "question_id": answer["question_id"],
+            "answered": answer["question_id"] in responses,
+            "correct": answer_is_correct(answer, responses.get(answer["question_id"])),
+        }
+        for answer in answers
+    ]
+    correct = sum(item["correct"] for item in results)
+    return {
+        "correct": correct,
+        "auto_total": len(results),
+        "answered": sum(item["answered"] for item in results),
+        "accuracy": round(correct / len(results), 4) if results else None,
+        "results": results,
+    }
+
+
+def synthetic_cohort(test_id: str, attempts: int, rng: random.Random) -> dict[str, dict]:
+    answers = load_json(resolve_package(test_id) / "answer_key.json").get("answers", [])
+    cohort = {}
+    for number in range(attempts):
+        responses = {}
+        for item in answers:
+            roll = rng.random()
+            if roll < 0.1:
+                continue
+            if roll < 0.7:
+                value = (
+                    item.get("canonical_text")
+                    or item.get("ordered_tokens")
+                    or (item.get("correct_option_keys") or ["A"])[0]
+                )
+            else:
+                value = rng.choice(["A", "B", "C", "D", "wrong"])
+            responses[item["question_id"]] = value
+        cohort[f"attempt-{number}"] = responses
+    return cohort
+
+
+def timed(fn) -> tuple[float, dict]:
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def run_package(test_id: str, args: argparse.Namespace) -> dict:
+    cohort = synthetic_cohort(test_id, args.attempts, random.Random(args.seed))
+    clear_caches()
+    legacy_seconds, legacy = timed(
+        lambda: {key: legacy_score(test_id, value) for key, value in cohort.items()}
+    )
+    clear_caches()
+    single_seconds, single = timed(
+        lambda: {key: score_responses(test_id, value) for key, value in cohort.items()}
+    )
+    clear_caches()
+    batch_seconds, batch = timed(lambda: score_attempts(test_id, cohort))
+    return {
+        "package": test_id,
+        "attempts": len(cohort),
+        "questions": next(iter(batch.values()))["auto_total"] if batch else 0,
+        "agree": legacy == single == batch,
+        "seconds": {
+            "legacy": round(legacy_seconds, 4),
+            "single": round(single_seconds, 4),
+            "batch": round(batch_seconds, 4),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--packages",
+        default="",
+        help="comma separated package slugs (default: every package)",
+    )
+    parser.add_argument("--attempts", type=int, default=200, help="attempts per package")
+    parser.add_argument("--seed", type=int, default=20260121)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON only")
+    args = parser.parse_args()
+
+    packages = [item for item in args.packages.split(",") if item] or [
+        path.name for path in _package_dirs()
+    ]
+    reports = [run_package(test_id, args) for test_id in packages]
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for rep in reports:
+            seconds = rep["seconds"]
+            speedup = seconds["legacy"] / seconds["batch"] if seconds["batch"] else float("inf")
+            print(
+                f"{rep['package']}: {rep['attempts']} attempts x {rep['questions']} questions  "
+                f"legacy {seconds['legacy']:.3f}s  single {seconds['single']:.3f}s  "
+                f"batch {seconds['batch']:.3f}s  ({speedup:.1f}x)"
+                + ("" if rep["agree"] else "  RESULTS DIFFER")
+            )
+    if not all(rep["agree"] for rep in reports):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Fingerprint and precompress the static practice payloads (deploy step).
+
+Writes ``.gz`` (and ``.br`` with the ``brotli`` package) siblings for the
+JSON/text files under static/listening_*, reading_*, writing_tests, records
+content hashes in ``static/asset-manifest.json`` and emits an nginx snippet
+that serves those directories from disk with ``gzip_static`` and immutable
+caching for ``?v=<hash>`` URLs.  Incremental: siblings newer than their source
+are left alone, so re-runs after a content import are quick.
+
+    python scripts/build_static_assets.py
+    python scripts/build_static_assets.py --nginx-out /etc/nginx/snippets/studytracker_static.conf
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from services import static_assets  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--static-root", type=Path, default=ROOT / "static")
+    parser.add_argument("--roots", help="comma separated directories under static/ (default: all asset roots)")
+    parser.add_argument("--no-brotli", action="store_true", help="skip .br siblings even if brotli is installed")
+    parser.add_argument("--nginx-out", type=Path, default=ROOT / "ops" / "nginx" / "studytracker_static.conf")
+    args = parser.parse_args()
+
+    roots = tuple(r.strip() for r in (args.roots or "").split(",") if r.strip()) or static_assets.ASSET_ROOTS
+    use_brotli = not args.no_brotli and static_assets.brotli is not None
+    manifest = static_assets.build(args.static_root, roots, use_brotli=use_brotli)
+
+    files = manifest["files"]
+    encoded = sum(1 for entry in files.values() if entry["encodings"])
+    print(f"{len(files)} file(s) fingerprinted, {encoded} precompressed (brotli: {'on' if use_brotli else 'off'})")
+
+    args.nginx_out.parent.mkdir(parents=True, exist_ok=True)
+    args.nginx_out.write_text(
+        static_assets.nginx_config(args.static_root, roots, brotli_static=use_brotli), encoding="utf-8"
+    )
+    print(f"nginx snippet: {os.path.relpath(args.nginx_out, ROOT)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -17,19 +17,16 @@ import re
 import sys
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.pdf_text import iter_pages  # noqa: E402
+
 
 def extract_pages(pdf_path: str) -> list[str]:
-    """提取每页文本，无文本或出错则返回空字符串。"""
-    from pypdf import PdfReader
-    reader = PdfReader(pdf_path)
-    pages = []
-    for page in reader.pages:
-        try:
-            text = page.extract_text() or ""
-        except Exception:
-            text = ""
-        pages.append(text)
-    return pages
+    """提取每页文本（多进程分块、按文件哈希缓存），无文本或出错则返回空字符串。"""
+    return list(iter_pages(pdf_path, engines=("pypdf",)))
 
 
 def roman_to_int(s: str) -> int | None:
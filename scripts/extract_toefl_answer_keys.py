@@ -20,7 +20,7 @@ import hashlib
 import json
 import re
 import shutil
-import subprocess
+import sys
 import unicodedata
 from collections import defaultdict
 from dataclasses import asdict, dataclass
@@ -28,6 +28,12 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Iterable
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from services.pdf_text import iter_pages  # noqa: E402
+
 
 SCHEMA_VERSION = "1.0"
 ANSWER_PDF_PATTERN = re.compile(r"参考答案|答案", re.I)
@@ -290,19 +296,10 @@ def discover_candidates(
 
 
 def extract_pdf_text(path: Path) -> str:
-    pdftotext = shutil.which("pdftotext")
-    if not pdftotext:
+    if not shutil.which("pdftotext"):
         raise RuntimeError("pdftotext is required; install Poppler first")
-    proc = subprocess.run(
-        [pdftotext, "-layout", str(path), "-"],
-        check=False,
-        capture_output=True,
-        text=True,
-        timeout=120,
-    )
-    if proc.returncode != 0:
-        raise RuntimeError(proc.stderr.strip() or "pdftotext failed")
-    text = unicodedata.normalize("NFKC", proc.stdout).replace("\u00a0", " ")
+    raw = "\f".join(iter_pages(path, layout=True, engines=("pdftotext",)))
+    text = unicodedata.normalize("NFKC", raw).replace("\u00a0", " ")
     if not re.sub(r"\s+", "", text):
         raise RuntimeError("answer PDF has no extractable text layer; OCR required")
     return text
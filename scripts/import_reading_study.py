@@ -28,6 +28,7 @@ for _path in (str(ROOT), str(SCRIPTS_DIR)):
 
 from flask import Flask  # noqa: E402
 
+from api.reading_study import invalidate_caches  # noqa: E402
 from api.reading_study_glossary import resolve_role  # noqa: E402
 from config import Config  # noqa: E402
 from models import ReadingPassageAnalysis, db  # noqa: E402
@@ -146,6 +147,7 @@ def run_import(
             print(f"{status.upper()} {message}")
     if not dry_run:
         db.session.commit()
+        invalidate_caches()
     return summary
 
 
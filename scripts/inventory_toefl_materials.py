@@ -25,11 +25,16 @@ import subprocess
 import sys
 import zipfile
 from collections import Counter, defaultdict
-from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from services.file_fingerprints import DEFAULT_INDEX_PATH, FingerprintIndex  # noqa: E402
 
 
 DEFAULT_SOURCE = Path.home() / "Desktop" / "新托福资料"
@@ -252,14 +257,6 @@ def assign_sources(
     return assignments, unmatched
 
 
-def sha256_file(path: Path) -> str:
-    digest = hashlib.sha256()
-    with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
-
-
 def run_command(args: list[str], timeout: int = 60) -> subprocess.CompletedProcess[str]:
     return subprocess.run(
         args,
@@ -290,6 +287,7 @@ def probe_pdf(path: Path, text_threshold: int) -> dict[str, Any]:
         else:
             text_characters = len(re.sub(r"\s+", "", text_proc.stdout))
             result["text_characters"] = text_characters
+            result["text_sha256"] = hashlib.sha256(text_proc.stdout.encode("utf-8")).hexdigest()
             if text_characters == 0:
                 result["ocr_status"] = "ocr_required"
             elif text_characters < text_threshold:
@@ -453,6 +451,24 @@ def _relative(path: Path, root: Path) -> str:
         return str(path)
 
 
+def cached_probe(
+    fingerprints: FingerprintIndex,
+    path: Path,
+    name: str,
+    tools: tuple[str, ...],
+    probe: Callable[[Path], dict[str, Any]],
+) -> dict[str, Any]:
+    # A "tool missing" result must not outlive installing the tool, and a
+    # failed probe (timeout, unreadable file) is retried on the next run.
+    if not all(shutil.which(tool) for tool in tools):
+        return probe(path)
+    return fingerprints.derived(path, name, probe, keep=probe_succeeded)
+
+
+def probe_succeeded(result: dict[str, Any]) -> bool:
+    return "probe_error" not in result and ("pages" not in result or result["pages"] is not None)
+
+
 def build_file_records(
     files: list[Path],
     assignments: dict[Path, SourceAssignment],
@@ -461,10 +477,11 @@ def build_file_records(
     probe_pdfs: bool,
     probe_media_files: bool,
     workers: int,
+    fingerprints: FingerprintIndex | None = None,
 ) -> list[dict[str, Any]]:
+    fingerprints = fingerprints or FingerprintIndex()
     assigned_files = sorted(assignments, key=lambda item: str(item).lower())
-    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
-        hashes = list(pool.map(sha256_file, assigned_files))
+    hashes = fingerprints.sha256_many(assigned_files, workers=max(1, workers))
 
     hash_cache: dict[str, dict[str, Any]] = {}
     records: list[dict[str, Any]] = []
@@ -475,9 +492,17 @@ def build_file_records(
             probe: dict[str, Any] = {}
             archive_info: dict[str, Any] = {}
             if extension == ".pdf" and probe_pdfs:
-                probe.update(probe_pdf(path, text_threshold))
+                probe.update(
+                    cached_probe(
+                        fingerprints,
+                        path,
+                        f"pdf_probe:{text_threshold}",
+                        ("pdftotext", "pdfinfo"),
+                        lambda target: probe_pdf(target, text_threshold),
+                    )
+                )
             elif extension in AUDIO_EXTENSIONS | VIDEO_EXTENSIONS and probe_media_files:
-                probe.update(probe_media(path))
+                probe.update(cached_probe(fingerprints, path, "media_probe", ("ffprobe",), probe_media))
             elif extension in ARCHIVE_EXTENSIONS:
                 archive_info = inspect_archive(path)
                 probe.update(archive_info)
@@ -664,6 +689,7 @@ def build_inventory(
     probe_pdfs: bool = True,
     probe_media_files: bool = True,
     workers: int = 4,
+    fingerprints: FingerprintIndex | None = None,
 ) -> dict[str, Any]:
     root = root.expanduser().resolve()
     files = list(iter_relevant_files(root))
@@ -676,6 +702,7 @@ def build_inventory(
         probe_pdfs,
         probe_media_files,
         workers,
+        fingerprints,
     )
     exams = build_exam_records(file_records)
     duplicates = build_duplicate_groups(file_records)
@@ -1039,6 +1066,13 @@ def main() -> int:
     parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
     parser.add_argument("--skip-pdf-probe", action="store_true")
     parser.add_argument("--skip-media-probe", action="store_true")
+    parser.add_argument(
+        "--fingerprint-index",
+        type=Path,
+        default=DEFAULT_INDEX_PATH,
+        help="persistent hash/probe index shared with the other material scripts",
+    )
+    parser.add_argument("--no-fingerprint-index", action="store_true", help="rehash every file")
     args = parser.parse_args()
 
     source = args.source.expanduser().resolve()
@@ -1046,6 +1080,7 @@ def main() -> int:
         print(f"Source directory not found: {source}", file=sys.stderr)
         return 2
 
+    fingerprints = FingerprintIndex(None if args.no_fingerprint_index else args.fingerprint_index)
     inventory = build_inventory(
         source,
         default_year=args.year,
@@ -1053,7 +1088,9 @@ def main() -> int:
         probe_pdfs=not args.skip_pdf_probe,
         probe_media_files=not args.skip_media_probe,
         workers=args.workers,
+        fingerprints=fingerprints,
     )
+    fingerprints.save()
     output = args.output.expanduser().resolve()
     write_reports(inventory, output)
 
@@ -1064,6 +1101,7 @@ def main() -> int:
     print(f"Duplicate groups: {summary['duplicate_group_count']}")
     print(f"Asset-complete exams: {summary['asset_complete_exam_count']}")
     print(f"Structured import candidates: {summary['structured_import_candidate_count']}")
+    print(f"Fingerprints reused: {fingerprints.hits} hashed: {fingerprints.misses}")
     print(f"Reports: {output}")
     return 0
 
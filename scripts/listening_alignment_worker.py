@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Run the intensive-listening alignment worker (systemd service).
+
+Each worker process loads the Whisper model once and then claims queued
+``listening_alignment_job`` rows until stopped.  ``--processes`` starts that
+many independent workers, each with its own model; ``--max-running`` caps how
+many jobs may be processing at once across every worker sharing the DB.
+
+    python scripts/listening_alignment_worker.py --processes 1
+    python scripts/listening_alignment_worker.py --once   # drain queue and exit
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _worker_main(args: argparse.Namespace) -> int:
+    from app import app
+    from services.listening_alignment_jobs import run_worker
+
+    max_running = args.max_running
+    if max_running is None:
+        max_running = int(app.config.get("LISTENING_ALIGNMENT_MAX_RUNNING") or 0) or None
+    return run_worker(
+        app,
+        max_running=max_running,
+        poll_seconds=args.poll_seconds,
+        stop_when_idle=args.once,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    parser.add_argument(
+        "--max-running",
+        type=int,
+        default=None,
+        help="global cap on concurrently processing jobs (default: LISTENING_ALIGNMENT_MAX_RUNNING)",
+    )
+    parser.add_argument("--poll-seconds", type=float, default=2.0)
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        processed = _worker_main(args)
+        print(f"processed {processed} job(s)")
+        return 0
+
+    ctx = multiprocessing.get_context("spawn")
+    children = [ctx.Process(target=_worker_main, args=(args,)) for _ in range(args.processes)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    return max((child.exitcode or 0) for child in children)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -18,6 +18,7 @@ if str(ROOT) not in sys.path:
 from sqlalchemy import inspect, text  # noqa: E402
 
 from app import app, db  # noqa: E402
+from models import MockExamDraftDelta  # noqa: E402
 
 
 def _add_column(table: str, column: str, ddl: str) -> bool:
@@ -56,6 +57,12 @@ def main() -> int:
             "writing_auto_submitted",
             "BOOLEAN NOT NULL DEFAULT 0",
         )
+        _add_column(
+            "mock_exam_session",
+            "writing_draft_revision",
+            "BIGINT NOT NULL DEFAULT 0",
+        )
+        MockExamDraftDelta.__table__.create(bind=db.engine, checkfirst=True)
     return 0
 
 
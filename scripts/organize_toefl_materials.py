@@ -9,17 +9,22 @@ from __future__ import annotations
 
 import argparse
 import csv
-import hashlib
 import json
 import os
 import re
 import shutil
+import sys
 from collections import Counter, defaultdict
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Iterable
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from services.file_fingerprints import DEFAULT_INDEX_PATH, FingerprintIndex  # noqa: E402
+
 
 DEFAULT_SOURCE = Path.home() / "Desktop" / "新托福资料"
 DEFAULT_OUTPUT = Path.home() / "Desktop" / "新托福资料_整理"
@@ -76,14 +81,6 @@ def read_csv(path: Path) -> list[dict]:
         return list(csv.DictReader(handle))
 
 
-def sha256_file(path: Path) -> str:
-    digest = hashlib.sha256()
-    with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
-
-
 def canonical_rank(relative_path: str) -> tuple[int, int, int, str]:
     normalized = relative_path.lower()
     penalty = 0
@@ -313,7 +310,9 @@ def build_library(
     imported_ids: set[str],
     force: bool = False,
     workers: int = 4,
+    fingerprints: FingerprintIndex | None = None,
 ) -> dict:
+    fingerprints = fingerprints or FingerprintIndex()
     source = source.expanduser().resolve()
     output = output.expanduser().resolve()
     prepare_output(output, force)
@@ -334,8 +333,10 @@ def build_library(
 
     exam_by_key = {exam["exam_key"]: exam for exam in real_inventory.get("exams") or []}
     files_by_exam: dict[str, list[dict]] = defaultdict(list)
+    files_by_path: dict[str, dict] = {}
     for row in real_inventory.get("files") or []:
         files_by_exam[row["exam_key"]].append(row)
+        files_by_path.setdefault(row["path"], row)
 
     real_duplicate_lookup = {}
     for group_id, group in enumerate(real_inventory.get("duplicates") or [], start=1):
@@ -507,14 +508,8 @@ def build_library(
         candidate = collection["candidate_key"]
         manual_dir = output / "04_待人工确认" / candidate
         for relative_path in collection["files"]:
-            row = next(
-                (
-                    item for item in real_inventory.get("files") or []
-                    if item["path"] == relative_path
-                ),
-                None,
-            )
-            digest = (row or {}).get("sha256") or sha256_file(source / relative_path)
+            row = files_by_path.get(relative_path)
+            digest = (row or {}).get("sha256") or fingerprints.sha256(source / relative_path)
             link_path = create_link(
                 source / relative_path,
                 manual_dir / Path(relative_path).name,
@@ -562,13 +557,10 @@ def build_library(
                 "notes": "盘点后源文件已不存在",
             }
 
-    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
-        hashes = list(
-            pool.map(
-                sha256_file,
-                [source / relative_path for relative_path, _category, _note in support_candidates],
-            )
-        )
+    hashes = fingerprints.sha256_many(
+        [source / relative_path for relative_path, _category, _note in support_candidates],
+        workers=max(1, workers),
+    )
     support_by_hash: dict[str, list[tuple[str, str, str]]] = defaultdict(list)
     for item, digest in zip(support_candidates, hashes):
         support_by_hash[digest].append(item)
@@ -785,8 +777,16 @@ def main() -> int:
     parser.add_argument("--practice-root", type=Path, default=Path("data") / "toefl_practice")
     parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
     parser.add_argument("--force", action="store_true")
+    parser.add_argument(
+        "--fingerprint-index",
+        type=Path,
+        default=DEFAULT_INDEX_PATH,
+        help="persistent hash index shared with the other material scripts",
+    )
+    parser.add_argument("--no-fingerprint-index", action="store_true", help="rehash every file")
     args = parser.parse_args()
 
+    fingerprints = FingerprintIndex(None if args.no_fingerprint_index else args.fingerprint_index)
     result = build_library(
         args.source,
         args.output,
@@ -796,7 +796,9 @@ def main() -> int:
         imported_exam_ids(args.practice_root),
         force=args.force,
         workers=args.workers,
+        fingerprints=fingerprints,
     )
+    fingerprints.save()
     print(
         json.dumps(
             {
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Local stand-in for the external scheduler API (development and tests).
+
+Serves ``/api/schedules/range`` and ``/api/schedules/tomorrow`` from a JSON
+file (a list of schedule dicts with ``schedule_date``/``start_time``) and
+answers ``If-None-Match`` with 304, like the range cache expects.
+
+    python scripts/scheduler_stub.py --data schedules.json --port 5055
+    SCHEDULER_BASE_URL=http://127.0.0.1:5055 SCHEDULER_PUSH_TOKEN=dev flask run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+from flask import Flask, jsonify, request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _schedule_date(item: dict) -> str:
+    value = item.get("schedule_date") or item.get("date") or str(item.get("start_time") or "").split(" ")[0]
+    return str(value)
+
+
+def create_app(schedules: list[dict] | None = None, token: str = "dev") -> Flask:
+    """Build the stub; mutate ``app.config["SCHEDULES"]`` to simulate changes."""
+    app = Flask(__name__)
+    app.config["SCHEDULES"] = list(schedules or [])
+    app.config["PUSH_TOKEN"] = token
+    app.config["REQUEST_LOG"] = []
+
+    def _guard():
+        app.config["REQUEST_LOG"].append((request.path, dict(request.args)))
+        if request.headers.get("X-Push-Token") != app.config["PUSH_TOKEN"]:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+        if app.config.get("FAIL"):
+            return jsonify({"ok": False, "error": "unavailable"}), 503
+        return None
+
+    def _respond(items: list[dict]):
+        body = json.dumps({"ok": True, "schedules": items}, ensure_ascii=False, sort_keys=True)
+        etag = '"%s"' % hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+        if etag in request.headers.get("If-None-Match", ""):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(body, mimetype="application/json")
+        response.headers["ETag"] = etag
+        return response
+
+    @app.get("/api/schedules/range")
+    def schedules_range():
+        denied = _guard()
+        if denied:
+            return denied
+        start = request.args.get("start", "")
+        end = request.args.get("end", "9999-12-31")
+        teacher_id = request.args.get("teacher_id")
+        items = [
+            item for item in app.config["SCHEDULES"]
+            if start <= _schedule_date(item) <= end
+            and (teacher_id is None or str(item.get("teacher_id")) == teacher_id)
+        ]
+        return _respond(items)
+
+    @app.get("/api/schedules/tomorrow")
+    def schedules_tomorrow():
+        denied = _guard()
+        if denied:
+            return denied
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        return _respond([item for item in app.config["SCHEDULES"] if _schedule_date(item) == tomorrow])
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", help="JSON file with a list of schedules")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--token", default=os.environ.get("SCHEDULER_PUSH_TOKEN", "dev"))
+    args = parser.parse_args()
+
+    schedules = []
+    if args.data:
+        with open(args.data, encoding="utf-8") as fh:
+            schedules = json.load(fh)
+    create_app(schedules, token=args.token).run(host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
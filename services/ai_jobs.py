@@ -0,0 +1,316 @@
+"""DB-backed background jobs for slow AI grading calls.
+
+DeepSeek / Qwen requests can block for 60–90 s.  Endpoints that opt in
+(``"async": true`` in the JSON body, or ``?async=1``) store an ``AiJob`` row and
+answer 202 at once; a worker pool claims rows, runs the registered handler
+inside an app context and stores its ``(payload, status)``.  Clients poll
+``GET /api/ai-jobs/<job_key>`` (optionally long-polling with ``?wait=``).
+
+Workers run either in ``scripts/ai_job_worker.py`` or, with ``AI_JOBS_INLINE``,
+as a few daemon threads of the web process that exit when the queue is idle.
+Claiming is the same single conditional ``UPDATE`` as the listening alignment
+queue, so any number of workers can share the table.
+
+Handlers return ``(payload, status)``.  A 502/503/504 status or an exception
+is retried up to ``max_attempts`` with exponential backoff and jitter; a job
+still ``processing`` after its ``timeout_seconds`` (worker died or hung) is
+requeued or failed by whichever worker notices first.  Every write after the
+claim is conditional on the claim token, so a worker whose job was requeued
+under it drops its late result instead of overwriting the new attempt.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import and_, select, update
+
+from models import AiJob, db, utcnow_naive
+from services.listening_alignment_jobs import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 2
+DEFAULT_TIMEOUT_SECONDS = 120
+DEFAULT_POLL_SECONDS = 0.5
+RETRY_BASE_SECONDS = 2.0
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+# Long-polls hold a gunicorn thread; keep them short and let clients re-poll.
+MAX_WAIT_SECONDS = 5.0
+
+Handler = Callable[[dict[str, Any]], tuple[dict[str, Any], int]]
+
+
+@dataclass(frozen=True)
+class JobKind:
+    handler: Handler
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    timeout_seconds: int = DEFAULT_TIMEOUT_SECONDS
+
+
+_HANDLERS: dict[str, JobKind] = {}
+
+
+def register_handler(
+    kind: str,
+    handler: Handler,
+    *,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    timeout_seconds: int = DEFAULT_TIMEOUT_SECONDS,
+) -> None:
+    """Make ``kind`` runnable by workers; modules register at import time."""
+    _HANDLERS[kind] = JobKind(handler, max(1, int(max_attempts)), int(timeout_seconds))
+
+
+def registered_kinds() -> list[str]:
+    return sorted(_HANDLERS)
+
+
+# ---- web side -------------------------------------------------------------
+
+
+def wants_async(data: dict[str, Any] | None = None) -> bool:
+    flag = (data or {}).get("async")
+    if flag is None:
+        flag = request.args.get("async")
+    return str(flag).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def submit_job(kind: str, payload: dict[str, Any], *, created_by_id: int | None = None) -> AiJob:
+    spec = _HANDLERS.get(kind)
+    if spec is None:
+        raise KeyError(f"unknown ai job kind: {kind}")
+    job = AiJob(
+        job_key=uuid.uuid4().hex,
+        kind=kind,
+        status=AiJob.STATUS_QUEUED,
+        payload_json=json.dumps(payload, ensure_ascii=False),
+        max_attempts=spec.max_attempts,
+        timeout_seconds=spec.timeout_seconds,
+        created_by_id=created_by_id,
+    )
+    db.session.add(job)
+    db.session.commit()
+    if current_app.config.get("AI_JOBS_INLINE"):
+        ensure_inline_workers(current_app._get_current_object())
+    return job
+
+
+def get_job(job_key: str) -> AiJob | None:
+    return AiJob.query.filter_by(job_key=job_key).first()
+
+
+def job_status_payload(job: AiJob) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "ok": True,
+        "job": {
+            "key": job.job_key,
+            "kind": job.kind,
+            "status": job.status,
+            "attempts": int(job.attempts or 0),
+            "max_attempts": int(job.max_attempts or 0),
+        },
+    }
+    if job.status == AiJob.STATUS_DONE:
+        payload["result"] = json.loads(job.result_json or "null")
+        payload["result_status"] = int(job.result_status or 200)
+    if job.status == AiJob.STATUS_ERROR:
+        payload["job"]["error"] = job.error or "ai_job_failed"
+    return payload
+
+
+def accepted_response(job: AiJob):
+    """The 202 answer an opted-in endpoint returns instead of blocking."""
+    body = job_status_payload(job)
+    body["poll_url"] = url_for("ai_jobs.ai_job_status", job_key=job.job_key)
+    return jsonify(body), 202
+
+
+def wait_for_job(job: AiJob, wait_seconds: float, poll_seconds: float = DEFAULT_POLL_SECONDS) -> AiJob:
+    """Long-poll: return once ``job`` is terminal or ``wait_seconds`` elapse."""
+    deadline = time.monotonic() + max(0.0, min(float(wait_seconds), MAX_WAIT_SECONDS))
+    while job.status not in AiJob.TERMINAL_STATUSES and time.monotonic() < deadline:
+        time.sleep(poll_seconds)
+        db.session.commit()  # end the read transaction so the next refresh sees worker writes
+        db.session.refresh(job)
+    return job
+
+
+# ---- worker side ----------------------------------------------------------
+
+
+def requeue_timed_out_jobs() -> int:
+    """Requeue (or fail) jobs that overran their timeout, e.g. a dead worker."""
+    now = utcnow_naive()
+    touched = 0
+    for job in AiJob.query.filter_by(status=AiJob.STATUS_PROCESSING).all():
+        if not job.started_at or job.started_at + timedelta(seconds=job.timeout_seconds) > now:
+            continue
+        if job.attempts < job.max_attempts:
+            values = {"status": AiJob.STATUS_QUEUED, "available_at": now, "worker_id": None}
+        else:
+            values = {"status": AiJob.STATUS_ERROR, "error": "ai_job_timeout", "finished_at": now}
+        touched += _update_claimed(job.id, job.worker_id, **values)
+    db.session.commit()
+    return touched
+
+
+def claim_next_job(worker_id: str, kinds: list[str] | None = None) -> AiJob | None:
+    """Atomically move the oldest due queued job to ``processing`` for this worker."""
+    now = utcnow_naive()
+    candidates = select(AiJob.id).where(
+        AiJob.status == AiJob.STATUS_QUEUED,
+        AiJob.available_at <= now,
+    )
+    if kinds:
+        candidates = candidates.where(AiJob.kind.in_(kinds))
+    next_id = candidates.order_by(AiJob.id).limit(1).scalar_subquery()
+    claim_token = f"{worker_id[:56]}:{uuid.uuid4().hex[:6]}"
+    result = db.session.execute(
+        update(AiJob)
+        .where(and_(AiJob.id == next_id, AiJob.status == AiJob.STATUS_QUEUED))
+        .values(
+            status=AiJob.STATUS_PROCESSING,
+            worker_id=claim_token,
+            attempts=AiJob.attempts + 1,
+            started_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if not result.rowcount:
+        return None
+    return AiJob.query.filter_by(worker_id=claim_token, status=AiJob.STATUS_PROCESSING).first()
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff with ±50% jitter so retries from a burst spread out."""
+    return RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)) * random.uniform(0.5, 1.5)
+
+
+def _update_claimed(job_id: int, claim_token: str | None, **values) -> int:
+    """Write ``values`` only while the job is still ``processing`` under ``claim_token``."""
+    result = db.session.execute(
+        update(AiJob)
+        .where(
+            AiJob.id == job_id,
+            AiJob.worker_id == claim_token,
+            AiJob.status == AiJob.STATUS_PROCESSING,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def run_job(job: AiJob) -> None:
+    """Execute one claimed job and record its terminal (or retry) state."""
+    job_id, claim_token, attempts = job.id, job.worker_id, int(job.attempts or 0)
+    spec = _HANDLERS.get(job.kind)
+    error = None
+    try:
+        if spec is None:
+            raise KeyError(f"unknown ai job kind: {job.kind}")
+        payload, status = spec.handler(json.loads(job.payload_json or "{}"))
+    except Exception as exc:
+        logger.exception("AI job %s (%s) failed", job.job_key, job.kind)
+        db.session.rollback()
+        payload, status, error = None, None, str(exc) or exc.__class__.__name__
+
+    retryable = error is not None or status in RETRYABLE_STATUSES
+    if retryable and spec is not None and attempts < job.max_attempts:
+        values = {
+            "status": AiJob.STATUS_QUEUED,
+            "available_at": utcnow_naive() + timedelta(seconds=retry_delay_seconds(attempts)),
+            "worker_id": None,
+        }
+    elif error is not None:
+        values = {"status": AiJob.STATUS_ERROR, "error": error, "finished_at": utcnow_naive()}
+    else:
+        # Upstream failures the handler reported are results too: the client
+        # gets the same payload/status the synchronous endpoint would return.
+        values = {
+            "status": AiJob.STATUS_DONE,
+            "result_json": json.dumps(payload, ensure_ascii=False),
+            "result_status": int(status or 200),
+            "error": None,
+            "finished_at": utcnow_naive(),
+        }
+    if not _update_claimed(job_id, claim_token, **values):
+        logger.warning("AI job %s was reclaimed while running; dropping this result", job.job_key)
+    db.session.commit()
+
+
+def run_worker(
+    app,
+    *,
+    worker_id: str | None = None,
+    kinds: list[str] | None = None,
+    poll_seconds: float = DEFAULT_POLL_SECONDS,
+    max_jobs: int | None = None,
+    stop_when_idle: bool = False,
+) -> int:
+    """Claim and run jobs until stopped; returns the number of jobs processed."""
+    worker_id = worker_id or f"{default_worker_id()}:{threading.get_ident() % 10000}"
+    processed = 0
+    last_timeout_check = 0.0
+    while max_jobs is None or processed < max_jobs:
+        with app.app_context():
+            if time.monotonic() - last_timeout_check > 30:
+                requeue_timed_out_jobs()
+                last_timeout_check = time.monotonic()
+            job = claim_next_job(worker_id, kinds)
+            if job is not None:
+                run_job(job)
+                processed += 1
+                continue
+        if stop_when_idle and not _has_queued_jobs(app, kinds):
+            break
+        time.sleep(poll_seconds)
+    return processed
+
+
+def _has_queued_jobs(app, kinds: list[str] | None) -> bool:
+    # Includes jobs waiting out a retry backoff, so inline workers do not exit
+    # and strand them until the next submit.
+    with app.app_context():
+        query = AiJob.query.filter_by(status=AiJob.STATUS_QUEUED)
+        if kinds:
+            query = query.filter(AiJob.kind.in_(kinds))
+        return db.session.query(query.exists()).scalar()
+
+
+_INLINE_LOCK = threading.Lock()
+_INLINE_THREADS: list[threading.Thread] = []
+
+
+def ensure_inline_workers(app) -> None:
+    """Keep up to ``AI_JOBS_INLINE_THREADS`` daemon workers draining the queue.
+
+    Threads exit once the queue is idle and are restarted by the next submit,
+    so an idle web process carries no background work.
+    """
+    limit = max(1, int(app.config.get("AI_JOBS_INLINE_THREADS") or 2))
+    with _INLINE_LOCK:
+        _INLINE_THREADS[:] = [t for t in _INLINE_THREADS if t.is_alive()]
+        if len(_INLINE_THREADS) >= limit:
+            return
+        thread = threading.Thread(
+            target=run_worker,
+            args=(app,),
+            kwargs={"stop_when_idle": True},
+            name="ai-job-inline",
+            daemon=True,
+        )
+        _INLINE_THREADS.append(thread)
+        thread.start()
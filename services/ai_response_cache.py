@@ -0,0 +1,181 @@
+"""Persistent cache for deterministic AI grading responses.
+
+Students re-submit identical transcripts and essays (retries after a network
+error, the same quick-reply prompt twice), and each re-submit used to cost a
+fresh DeepSeek call.  Callers key a response by ``(namespace, model,
+prompt_version, request)``; the request is normalized first (dict keys sorted,
+strings stripped and runs of spaces within a line collapsed) so cosmetic
+differences still hit.  Line and paragraph breaks are kept: an essay
+re-paragraphed is a different essay for coherence and cohesion.
+
+Rows live in the ``ai_response_cache`` table so every gunicorn worker and the
+AI job workers share one cache.  Entries expire after ``AI_RESPONSE_CACHE_TTL``
+seconds and the table is trimmed to ``AI_RESPONSE_CACHE_MAX_ENTRIES`` rows
+(least recently hit first).  Bump a caller's prompt version whenever its
+prompt or result normalization changes so stale shapes are never served.
+
+Only successful, parsed results should be stored; the cache never turns an
+upstream failure into a sticky answer.  Any database problem is treated as a
+miss so grading keeps working without the table.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import AiResponseCache, db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+PRUNE_INTERVAL_SECONDS = 600
+
+_stats_lock = threading.Lock()
+_stats: dict[str, dict[str, int]] = {}
+_last_prune = 0.0
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        lines = value.replace("\r\n", "\n").replace("\r", "\n").strip().split("\n")
+        return "\n".join(" ".join(line.split()) for line in lines)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def cache_key(namespace: str, model: str, prompt_version: str, request_payload: Any) -> str:
+    material = json.dumps(
+        [namespace, model, prompt_version, _normalize(request_payload)],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _ttl_seconds() -> int:
+    return int(current_app.config.get("AI_RESPONSE_CACHE_TTL", DEFAULT_TTL_SECONDS) or 0)
+
+
+def _count(namespace: str, field: str) -> None:
+    with _stats_lock:
+        bucket = _stats.setdefault(namespace, {"hits": 0, "misses": 0, "stores": 0})
+        bucket[field] += 1
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """Per-namespace hit/miss/store counters of this process, with hit rate."""
+    with _stats_lock:
+        snapshot = {ns: dict(counts) for ns, counts in _stats.items()}
+    for counts in snapshot.values():
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+    return snapshot
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def lookup(namespace: str, model: str, prompt_version: str, request_payload: Any) -> Any | None:
+    """Return the cached response, or None on a miss, expiry or disabled cache."""
+    if _ttl_seconds() <= 0:
+        return None
+    key = cache_key(namespace, model, prompt_version, request_payload)
+    now = time.time()
+    table = AiResponseCache.__table__
+    try:
+        with db.engine.begin() as conn:
+            response_json = conn.execute(
+                select(table.c.response_json).where(
+                    table.c.cache_key == key,
+                    table.c.expires_at > now,
+                )
+            ).scalar()
+            if response_json is not None:
+                conn.execute(
+                    table.update()
+                    .where(table.c.cache_key == key)
+                    .values(hit_count=table.c.hit_count + 1, last_hit_at=now)
+                )
+    except SQLAlchemyError:
+        logger.warning("AI response cache lookup failed for %s", namespace, exc_info=True)
+        return None
+    if response_json is None:
+        _count(namespace, "misses")
+        return None
+    _count(namespace, "hits")
+    return json.loads(response_json)
+
+
+def store(namespace: str, model: str, prompt_version: str, request_payload: Any, response: Any) -> None:
+    """Cache ``response`` (JSON-serializable) for later identical requests."""
+    ttl = _ttl_seconds()
+    if ttl <= 0:
+        return
+    now = time.time()
+    values = {
+        "namespace": namespace,
+        "model": str(model)[:80],
+        "prompt_version": str(prompt_version)[:32],
+        "response_json": json.dumps(response, ensure_ascii=False),
+        "created_at": now,
+        "expires_at": now + ttl,
+        "last_hit_at": now,
+        "hit_count": 0,
+    }
+    stmt = sqlite_insert(AiResponseCache.__table__).values(
+        cache_key=cache_key(namespace, model, prompt_version, request_payload),
+        **values,
+    )
+    stmt = stmt.on_conflict_do_update(index_elements=["cache_key"], set_=values)
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(stmt)
+    except SQLAlchemyError:
+        logger.warning("AI response cache store failed for %s", namespace, exc_info=True)
+        return
+    _count(namespace, "stores")
+    _maybe_prune(now)
+
+
+def prune(now: float | None = None) -> int:
+    """Drop expired rows, then the least recently hit rows beyond the size cap."""
+    now = time.time() if now is None else now
+    max_entries = int(current_app.config.get("AI_RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES) or 0)
+    table = AiResponseCache.__table__
+    with db.engine.begin() as conn:
+        removed = conn.execute(table.delete().where(table.c.expires_at <= now)).rowcount
+        if max_entries > 0:
+            keep = select(table.c.cache_key).order_by(table.c.last_hit_at.desc()).limit(max_entries)
+            removed += conn.execute(table.delete().where(table.c.cache_key.not_in(keep))).rowcount
+    return removed
+
+
+def _maybe_prune(now: float) -> None:
+    global _last_prune
+    if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+        return
+    with _stats_lock:
+        if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = now
+    try:
+        prune(now)
+    except SQLAlchemyError:
+        logger.warning("AI response cache prune failed", exc_info=True)
@@ -0,0 +1,70 @@
+"""On-demand daemon thread shared by the in-process write buffers.
+
+:class:`~services.regrade_queue.RegradeQueue`, the mock exam
+:class:`~services.mock_exam_autosave.DraftBuffer` and the entrance test
+``HeartbeatBuffer`` keep work in memory and write it off the request path.
+Each owns a :class:`BackgroundFlusher`: ``wake`` starts one daemon thread
+unless it is already running, the thread calls the owner's ``flush_once``
+every ``interval`` seconds and exits once the owner's buffer is empty, so an
+idle process carries no background work.
+
+The thread gives up its slot under the owner's lock, in the same critical
+section that finds the buffer empty, and ``wake`` is called with that lock
+held, so an item added while the thread is exiting always gets a new thread.
+Each owner has a config flag (default on) that turns the thread off for tests
+and one-off scripts, which then flush themselves.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundFlusher:
+    def __init__(
+        self,
+        name: str,
+        lock: threading.Lock,
+        flush_once: Callable[[object], None],
+        is_empty: Callable[[], bool],
+        *,
+        config_flag: str,
+        interval: float = 0.0,
+    ):
+        self.name = name
+        self.lock = lock
+        self.flush_once = flush_once
+        self.is_empty = is_empty
+        self.config_flag = config_flag
+        self.interval = interval
+        self._thread: threading.Thread | None = None
+
+    def wake(self, app) -> bool:
+        """Start the thread unless one is running; call with ``lock`` held.
+
+        Returns False when ``config_flag`` turns background flushing off.
+        """
+        if not app.config.get(self.config_flag, True):
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, args=(app,), name=self.name, daemon=True)
+            self._thread.start()
+        return True
+
+    def _run(self, app) -> None:
+        while True:
+            if self.interval:
+                time.sleep(self.interval)
+            try:
+                self.flush_once(app)
+            except Exception:
+                logger.exception("Background flush %s failed", self.name)
+            with self.lock:
+                if self.is_empty():
+                    self._thread = None
+                    return
@@ -0,0 +1,189 @@
+"""Persistent SHA-256 fingerprints for the TOEFL source material tree.
+
+scripts/inventory_toefl_materials.py, scripts/organize_toefl_materials.py and
+scripts/audit_toefl_official_materials.py all need content hashes of the same
+tens of GB of PDFs and audio.  :class:`FingerprintIndex` remembers each file's
+digest under its (size, mtime_ns, inode) stat key, so a re-run only reads files
+that are new or changed, and hashes those on a thread pool.
+
+The index also keeps values derived from a file (pdftotext output, probe
+results) next to its digest.  Extracted text is stored content-addressed under
+``text/<sha256>.txt`` beside the index, and the entry records that text hash.
+Everything is invalidated together when the stat key changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+DEFAULT_INDEX_PATH = Path("data") / "toefl_fingerprints" / "index.json"
+INDEX_SCHEMA_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_key(path: Path) -> list[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+class FingerprintIndex:
+    """Content hashes and derived values keyed by resolved path and stat key.
+
+    ``path=None`` keeps the index in memory only, which gives the scripts
+    their old always-rehash behaviour.  A file that was moved or renamed
+    without being modified keeps its inode, size and mtime, so its digest is
+    found again under the new path instead of being recomputed.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        payload: dict[str, Any] = {}
+        if path is not None and path.is_file():
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                payload = {}
+        if payload.get("schema_version") != INDEX_SCHEMA_VERSION:
+            payload = {}
+        self._files: dict[str, dict[str, Any]] = payload.get("files") or {}
+        self._by_stat = {tuple(entry["stat"]): entry for entry in self._files.values()}
+        self._dirty = False
+
+    @property
+    def text_dir(self) -> Path | None:
+        return self.path.parent / "text" if self.path is not None else None
+
+    def _entry(self, path: Path) -> tuple[str, list[int], dict[str, Any] | None]:
+        key = str(path.resolve())
+        stat = _stat_key(path)
+        entry = self._files.get(key)
+        if entry is not None and entry["stat"] == stat:
+            return key, stat, entry
+        moved = self._by_stat.get(tuple(stat))
+        if moved is not None:
+            entry = {"stat": stat, "sha256": moved["sha256"], "derived": dict(moved.get("derived") or {})}
+            self._remember(key, entry)
+            return key, stat, entry
+        return key, stat, None
+
+    def _remember(self, key: str, entry: dict[str, Any]) -> None:
+        self._files[key] = entry
+        self._by_stat[tuple(entry["stat"])] = entry
+        self._dirty = True
+
+    def sha256(self, path: Path) -> str:
+        return self.sha256_many([path])[0]
+
+    def sha256_many(self, paths: Iterable[Path], workers: int = 1) -> list[str]:
+        """Digests for ``paths`` in order; only unknown or changed files are read."""
+        paths = list(paths)
+        digests: list[str | None] = [None] * len(paths)
+        pending: list[tuple[int, str, list[int]]] = []
+        for position, path in enumerate(paths):
+            key, stat, entry = self._entry(path)
+            if entry is not None:
+                self.hits += 1
+                digests[position] = entry["sha256"]
+            else:
+                self.misses += 1
+                pending.append((position, key, stat))
+        if pending:
+            targets = [paths[position] for position, _key, _stat in pending]
+            if workers <= 1 or len(targets) <= 1:
+                computed = [sha256_file(path) for path in targets]
+            else:
+                with ThreadPoolExecutor(max_workers=min(workers, len(targets))) as pool:
+                    computed = list(pool.map(sha256_file, targets))
+            for (position, key, stat), digest in zip(pending, computed, strict=True):
+                self._remember(key, {"stat": stat, "sha256": digest, "derived": {}})
+                digests[position] = digest
+        return digests  # type: ignore[return-value]
+
+    def derived(
+        self,
+        path: Path,
+        name: str,
+        compute: Callable[[Path], Any],
+        keep: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """A JSON-safe value computed from ``path``, cached until the file changes.
+
+        Values for which ``keep`` returns false are returned but not cached.
+        """
+        _key, _stat, entry = self._entry(path)
+        if entry is None:
+            self.sha256(path)
+            _key, _stat, entry = self._entry(path)
+        derived = entry.setdefault("derived", {})
+        if name in derived:
+            return derived[name]
+        value = compute(path)
+        if keep is None or keep(value):
+            derived[name] = value
+            self._dirty = True
+        return value
+
+    def text(self, path: Path, name: str, extract: Callable[[Path], str]) -> str:
+        """Extracted text for ``path``; the entry stores its SHA-256 under ``name``."""
+        text_dir = self.text_dir
+        if text_dir is None:
+            return extract(path)
+        text_sha256 = self.derived(
+            path,
+            name,
+            lambda target: self._store_text(extract(target)),
+        )
+        blob = text_dir / f"{text_sha256}.txt"
+        try:
+            return blob.read_text(encoding="utf-8")
+        except OSError:
+            text = extract(path)
+            self._files[str(path.resolve())]["derived"][name] = self._store_text(text)
+            self._dirty = True
+            return text
+
+    def _store_text(self, text: str) -> str:
+        text_sha256 = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        blob = self.text_dir / f"{text_sha256}.txt"
+        if not blob.is_file():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp = blob.with_suffix(".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            tmp.replace(blob)
+        return text_sha256
+
+    def save(self) -> None:
+        """Write the index atomically, dropping files that no longer exist."""
+        if self.path is None:
+            return
+        alive = {key: entry for key, entry in self._files.items() if os.path.isfile(key)}
+        if not self._dirty and len(alive) == len(self._files):
+            return
+        self._files = alive
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {"schema_version": INDEX_SCHEMA_VERSION, "files": self._files},
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+        self._dirty = False
@@ -0,0 +1,64 @@
+"""Conditional, precompressed responses for immutable-until-reimported bodies.
+
+Build a :class:`CachedBody` once per content version (hash + gzip), keep it in
+an in-process cache, and :func:`send` it per request: a matching
+``If-None-Match`` gets an empty 304, clients that accept gzip get the
+precompressed bytes, everyone else the raw body.  The gzip representation has
+its own ETag (``<hash>-gz``) as required for strong validators.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+
+from flask import Response, request
+
+GZIP_MIN_BYTES = 1024
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    etag: str
+    raw: bytes
+    gzipped: bytes | None = None
+
+    @property
+    def gzip_etag(self) -> str:
+        return f"{self.etag}-gz"
+
+
+def build_body(raw: bytes | str) -> CachedBody:
+    """Hash and (for bodies worth it) gzip ``raw`` once."""
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    etag = hashlib.sha256(raw).hexdigest()[:32]
+    gzipped = None
+    if len(raw) >= GZIP_MIN_BYTES:
+        packed = gzip.compress(raw, compresslevel=6, mtime=0)
+        if len(packed) < len(raw):
+            gzipped = packed
+    return CachedBody(etag=etag, raw=raw, gzipped=gzipped)
+
+
+def send(
+    body: CachedBody,
+    mimetype: str = "application/json",
+    *,
+    cache_control: str = "no-cache",
+) -> Response:
+    """Serve ``body`` for the current request (304 / gzip / identity)."""
+    use_gzip = body.gzipped is not None and "gzip" in request.accept_encodings
+    etag = body.gzip_etag if use_gzip else body.etag
+    if request.if_none_match.contains(body.etag) or request.if_none_match.contains(body.gzip_etag):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(body.gzipped, mimetype=mimetype)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body.raw, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,271 @@
+"""Shared pooled HTTP client for upstream providers.
+
+Every upstream call (DeepSeek, Qwen/DashScope, WeChat, scheduler, Tencent SOE,
+Youdao, Azure, dictionary lookups, ...) used to go through bare
+``requests.get/post``, paying a fresh TCP + TLS handshake each time.  This
+module keeps one ``requests.Session`` per provider whose adapter holds a
+keep-alive connection pool per host, and adds per-provider policy:
+
+* a short connect timeout, so a dead host fails fast even when the caller
+  allows a long read (LLM calls), and a default read timeout for callers
+  that passed none;
+* urllib3 retries with backoff: connection failures for every method, and
+  502/503/504 / read errors only for idempotent methods, so a POST that may
+  have reached the provider is never silently replayed;
+* a circuit breaker: after ``failure_threshold`` consecutive failures
+  (exception or 5xx) calls fail immediately with :class:`CircuitOpenError`
+  for ``cooldown_seconds``, then one trial call is let through;
+* latency/error metrics per provider, see :func:`metrics_snapshot`.
+
+Call sites keep their own timeouts and error handling; :class:`CircuitOpenError`
+is a ``requests.ConnectionError`` so existing ``except requests.RequestException``
+blocks already cover it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = (502, 503, 504)
+LATENCY_SAMPLES = 512
+
+
+@dataclass(frozen=True)
+class ProviderPolicy:
+    connect_timeout: float = 3.05
+    read_timeout: float = 30.0
+    retries: int = 2
+    backoff_factor: float = 0.3
+    pool_maxsize: int = 16
+    failure_threshold: int = 5
+    cooldown_seconds: float = 30.0
+
+
+DEFAULT_POLICY = ProviderPolicy()
+
+# LLM endpoints get a single connect retry (their POSTs are never replayed
+# once sent) and a higher breaker threshold, since one bad answer is not an
+# outage.  The word lookups trip early: they are an optional 2.5 s nicety.
+# Google and Youdao are separate fallbacks, so each has its own breaker.
+_WORD_LOOKUP_POLICY = ProviderPolicy(connect_timeout=1.5, retries=0, failure_threshold=3, cooldown_seconds=60.0)
+POLICIES: dict[str, ProviderPolicy] = {
+    "deepseek": ProviderPolicy(connect_timeout=5.0, retries=1, failure_threshold=8),
+    "qwen": ProviderPolicy(connect_timeout=5.0, retries=1, failure_threshold=8),
+    "dashscope": ProviderPolicy(connect_timeout=5.0, retries=1),
+    "wechat": ProviderPolicy(pool_maxsize=32),
+    "scheduler": ProviderPolicy(retries=1),
+    "word_lookup_google": _WORD_LOOKUP_POLICY,
+    "word_lookup_youdao": _WORD_LOOKUP_POLICY,
+}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without contacting the provider while its breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ProviderMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.server_errors = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._samples: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, *, error: bool = False, server_error: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.server_errors += int(server_error)
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self._samples.append(seconds)
+
+    def record_rejected(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            data = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "server_errors": self.server_errors,
+                "rejected": self.rejected,
+                "avg_ms": round(1000 * self.total_seconds / self.requests, 1) if self.requests else 0.0,
+                "max_ms": round(1000 * self.max_seconds, 1),
+            }
+        for label, q in (("p50_ms", 0.5), ("p95_ms", 0.95)):
+            data[label] = round(1000 * samples[min(len(samples) - 1, int(q * len(samples)))], 1) if samples else 0.0
+        return data
+
+
+class _Provider:
+    def __init__(self, name: str, policy: ProviderPolicy):
+        self.name = name
+        self.policy = policy
+        self.session = _build_session(policy)
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.cooldown_seconds)
+        self.metrics = ProviderMetrics()
+
+
+def _build_session(policy: ProviderPolicy) -> requests.Session:
+    retry = Retry(
+        total=policy.retries,
+        connect=policy.retries,
+        read=policy.retries,
+        status=policy.retries,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        backoff_factor=policy.backoff_factor,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=policy.pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_providers: dict[str, _Provider] = {}
+_providers_lock = threading.Lock()
+
+
+def _provider(name: str) -> _Provider:
+    provider = _providers.get(name)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = _Provider(name, POLICIES.get(name, DEFAULT_POLICY))
+                _providers[name] = provider
+    return provider
+
+
+def _timeout(policy: ProviderPolicy, timeout):
+    # A scalar timeout from the caller bounds the read; the connect phase
+    # gets the provider's (shorter) connect timeout.  No call waits forever.
+    if timeout is None:
+        return (policy.connect_timeout, policy.read_timeout)
+    if isinstance(timeout, tuple):
+        return timeout
+    timeout = float(timeout)
+    return (min(policy.connect_timeout, timeout), timeout)
+
+
+def budget_timeout(provider: str, method: str, budget: float) -> tuple[float, float]:
+    """``(connect, read)`` timeouts so every attempt ``provider`` may make fits in ``budget``.
+
+    Failed connects are retried for every method, read errors only for
+    idempotent ones (see the module docstring); retry backoff is not counted.
+    """
+    policy = POLICIES.get(provider, DEFAULT_POLICY)
+    attempts = policy.retries + 1
+    budget = max(0.1, float(budget))
+    connect = min(policy.connect_timeout, budget / (2 * attempts))
+    if method.upper() in IDEMPOTENT_METHODS:
+        return connect, max(0.05, budget / attempts - connect)
+    return connect, max(0.05, budget - attempts * connect)
+
+
+def request(provider: str, method: str, url: str, **kwargs) -> requests.Response:
+    """``requests.request`` through the pooled session of ``provider``."""
+    state = _provider(provider)
+    if not state.breaker.allow():
+        state.metrics.record_rejected()
+        raise CircuitOpenError(f"{provider} circuit open")
+    kwargs["timeout"] = _timeout(state.policy, kwargs.get("timeout"))
+    started = time.perf_counter()
+    try:
+        response = state.session.request(method, url, **kwargs)
+    except Exception:
+        # Anything, not just RequestException: a half-open breaker must not
+        # keep its trial slot after the trial call blew up.
+        state.metrics.record(time.perf_counter() - started, error=True)
+        state.breaker.record_failure()
+        raise
+    server_error = response.status_code >= 500
+    state.metrics.record(time.perf_counter() - started, server_error=server_error)
+    if server_error:
+        state.breaker.record_failure()
+    else:
+        state.breaker.record_success()
+    return response
+
+
+def get(provider: str, url: str, **kwargs) -> requests.Response:
+    return request(provider, "GET", url, **kwargs)
+
+
+def post(provider: str, url: str, **kwargs) -> requests.Response:
+    return request(provider, "POST", url, **kwargs)
+
+
+def metrics_snapshot() -> dict[str, dict]:
+    """Per-provider latency/error counters and breaker state for this process."""
+    with _providers_lock:
+        providers = list(_providers.values())
+    return {
+        p.name: {**p.metrics.snapshot(), "circuit": p.breaker.state}
+        for p in providers
+    }
+
+
+def reset() -> None:
+    """Drop all sessions, breakers and metrics (tests, or after a fork)."""
+    with _providers_lock:
+        for p in _providers.values():
+            p.session.close()
+        _providers.clear()
@@ -11,6 +11,10 @@ from __future__ import annotations
 
 import re
 
+# Bump when grade_reading_test_answers starts scoring the same answers
+# differently; stored reading submissions are then regraded in the background.
+READING_GRADER_VERSION = 1
+
 READING_FULL_JUDGMENT_ANSWERS = {"YES", "NO", "NOT GIVEN", "TRUE", "FALSE"}
 READING_SHORT_JUDGMENT_ANSWERS = {"Y", "N", "NG", "T", "F"}
 READING_JUDGMENT_ALIASES = {
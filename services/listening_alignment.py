@@ -0,0 +1,616 @@
+"""Forced alignment of listening transcripts against Whisper word timestamps.
+
+One library for every alignment caller: the web upload worker, the Cambridge
+batch importer and the 9分达人 book pipeline.  Two strategies share a single
+entry point, :func:`align_sentences`:
+
+``lcs``
+    Global monotonic longest-common-subsequence match between transcript words
+    and ASR words.  Robust when Whisper under-transcribes a region: sentences
+    with no matched words are interpolated between their neighbours' anchors.
+``greedy``
+    The historical anchor-window aligner from ``batch_align_ielts.py``; kept
+    for re-running old imports byte-for-byte.
+
+The LCS core computes each DP row with a NumPy reverse cumulative max (pure
+Python fallback when NumPy is unavailable) and keeps only one traceback bit
+per cell, so a full-length recording aligns in milliseconds and memory is
+``n*m/8`` bytes instead of an ``n*m`` integer table.  Tie-breaking is identical
+to the original table-based implementation, so existing aligned outputs do
+not move.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any
+
+from services.listening_cloze import strip_speaker_label
+
+try:  # NumPy ships with openai-whisper; the web process may not have it.
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_LCS = "lcs"
+STRATEGY_GREEDY = "greedy"
+STRATEGIES = (STRATEGY_LCS, STRATEGY_GREEDY)
+
+
+def split_transcript_sentences(transcript: str) -> list[str]:
+    """按行拆分原文；老师没有分行时按英文句末标点自动断句。"""
+    sentences = [strip_speaker_label(s) for s in (transcript or "").strip().splitlines() if s.strip()]
+    sentences = [s for s in sentences if s]
+    if len(sentences) == 1:
+        text = sentences[0]
+        sentences = [strip_speaker_label(s) for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+        sentences = [s for s in sentences if s]
+    return sentences
+
+
+def split_translation_text(translation_text: str | None, expected_count: int = 0) -> list[str]:
+    """解析译文；优先按行，其次按中文句末标点自动断句。"""
+    if not translation_text:
+        return []
+
+    lines = [s.strip() for s in translation_text.strip().splitlines() if s.strip()]
+    if len(lines) > 1:
+        return lines
+
+    if len(lines) == 1 and expected_count != 1:
+        text = lines[0]
+        auto = [s.strip() for s in re.split(r"(?<=[。！？!?])\s*", text) if s.strip()]
+        if auto:
+            return auto
+
+    return lines
+
+
+def whisper_segments_from_result(result: dict[str, Any]) -> list[dict[str, Any]]:
+    """Keep Whisper's non-empty segment-level timestamps."""
+    segments = []
+    for seg in result.get("segments", []):
+        text = (seg.get("text") or "").strip()
+        if text:
+            segments.append({
+                "start": round(seg["start"], 2),
+                "end": round(seg["end"], 2),
+                "text": text,
+            })
+    return segments
+
+
+def whisper_words_from_result(result: dict[str, Any]) -> list[dict[str, Any]]:
+    """Flatten Whisper ``word_timestamps=True`` output into ``[{word,start,end}]``."""
+    words = []
+    for seg in result.get("segments", []):
+        for word in seg.get("words", []) or []:
+            words.append({
+                "word": (word.get("word") or "").strip(),
+                "start": word["start"],
+                "end": word["end"],
+            })
+    return words
+
+
+# ---- LCS core ---------------------------------------------------------------
+
+
+def normalize_words(text: str) -> list[str]:
+    """Tokenization used by the LCS strategy (punctuation splits words)."""
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return text.split()
+
+
+def _intern(book: list[str], asr: list[str]) -> tuple[list[int], list[int]]:
+    vocab: dict[str, int] = {}
+    book_ids = [vocab.setdefault(w, len(vocab)) for w in book]
+    # ASR-only words get -1 so they can never equal a transcript word.
+    asr_ids = [vocab.get(w, -1) for w in asr]
+    return book_ids, asr_ids
+
+
+def _lcs_directions_numpy(book_ids: list[int], asr_ids: list[int]):
+    """Backward DP over book rows; returns packed ``dp[i+1][j] >= dp[i][j+1]`` bits."""
+    n, m = len(book_ids), len(asr_ids)
+    asr_arr = np.asarray(asr_ids, dtype=np.int64)
+    dtype = np.int32 if min(n, m) > 32000 else np.int16
+    nxt = np.zeros(m + 1, dtype=dtype)
+    row = np.zeros(m + 1, dtype=dtype)
+    directions = np.empty((n, (m + 7) // 8), dtype=np.uint8)
+    for i in range(n - 1, -1, -1):
+        # row[j] = max(nxt[j], row[j+1], nxt[j+1] + 1 if equal) is a reverse
+        # cumulative max of the per-column candidate, so one vector pass suffices.
+        cand = np.where(asr_arr == book_ids[i], nxt[1:] + 1, nxt[:m])
+        row[:m] = np.maximum.accumulate(cand[::-1])[::-1]
+        directions[i] = np.packbits(nxt[:m] >= row[1:])
+        nxt, row = row, nxt
+    return directions
+
+
+def _lcs_directions_python(book_ids: list[int], asr_ids: list[int]):
+    n, m = len(book_ids), len(asr_ids)
+    nxt = [0] * (m + 1)
+    directions = []
+    for i in range(n - 1, -1, -1):
+        row = [0] * (m + 1)
+        bits = bytearray(m)
+        bi = book_ids[i]
+        for j in range(m - 1, -1, -1):
+            right = row[j + 1]
+            down = nxt[j]
+            if bi == asr_ids[j]:
+                row[j] = nxt[j + 1] + 1
+            else:
+                row[j] = down if down >= right else right
+            bits[j] = down >= right
+        directions.append(bits)
+        nxt = row
+    directions.reverse()
+    return directions
+
+
+def lcs_match(book: list[str], asr: list[str], *, use_numpy: bool | None = None) -> dict[int, int]:
+    """Return ``{book_word_index: asr_word_index}`` for a longest common subsequence.
+
+    Walks from the start taking every equal pair and otherwise preferring to
+    skip a book word on ties — the same path the original O(nm) table produced.
+    """
+    n, m = len(book), len(asr)
+    if not n or not m:
+        return {}
+    book_ids, asr_ids = _intern(book, asr)
+    if use_numpy is None:
+        use_numpy = np is not None
+    match: dict[int, int] = {}
+    i = j = 0
+    if use_numpy:
+        directions = _lcs_directions_numpy(book_ids, asr_ids)
+        while i < n and j < m:
+            if book_ids[i] == asr_ids[j]:
+                match[i] = j
+                i += 1
+                j += 1
+            elif (directions[i, j >> 3] >> (7 - (j & 7))) & 1:
+                i += 1
+            else:
+                j += 1
+        return match
+    directions = _lcs_directions_python(book_ids, asr_ids)
+    while i < n and j < m:
+        if book_ids[i] == asr_ids[j]:
+            match[i] = j
+            i += 1
+            j += 1
+        elif directions[i][j]:
+            i += 1
+        else:
+            j += 1
+    return match
+
+
+def align_sentences_lcs(
+    sentences: list[str],
+    whisper_words: list[dict],
+    audio_duration: float,
+) -> list[dict]:
+    """Align each sentence to a [start, end] window via global LCS.
+
+    sentences: display/plain sentence strings, in audio order (1:1 output).
+    whisper_words: [{"word","start","end"}] flattened, in time order.
+    Returns [{"id","start","end","text"}] with one entry per sentence.
+    """
+    asr_words = [normalize_words(w["word"])[0] if normalize_words(w["word"]) else "" for w in whisper_words]
+    asr_times = [(float(w["start"]), float(w["end"])) for w in whisper_words]
+
+    # Flatten book into words with their owning sentence index.
+    book_words: list[str] = []
+    owner: list[int] = []
+    for si, sent in enumerate(sentences):
+        for w in normalize_words(sent):
+            book_words.append(w)
+            owner.append(si)
+
+    match = lcs_match(book_words, asr_words) if book_words and asr_words else {}
+
+    # Per-sentence: collect matched asr times.
+    sent_starts: list[float | None] = [None] * len(sentences)
+    sent_ends: list[float | None] = [None] * len(sentences)
+    for bi, ai in match.items():
+        si = owner[bi]
+        s, e = asr_times[ai]
+        if sent_starts[si] is None or s < sent_starts[si]:
+            sent_starts[si] = s
+        if sent_ends[si] is None or e > sent_ends[si]:
+            sent_ends[si] = e
+
+    # Enforce monotonic anchors: a matched sentence start must not precede the
+    # previous matched sentence start (LCS is monotonic so this rarely fires,
+    # but guards against a stray early match).
+    last = -1.0
+    for si in range(len(sentences)):
+        if sent_starts[si] is not None:
+            if sent_starts[si] < last:
+                sent_starts[si] = last
+            last = sent_starts[si]
+
+    # Interpolate sentences with no matched words between neighbouring anchors.
+    anchors = [si for si in range(len(sentences)) if sent_starts[si] is not None]
+    segments: list[dict] = []
+    if not anchors:
+        # Degenerate: spread evenly.
+        slot = audio_duration / max(1, len(sentences))
+        for si, sent in enumerate(sentences):
+            segments.append({"id": si + 1, "start": round(si * slot, 2),
+                             "end": round((si + 1) * slot, 2), "text": sent})
+        return segments
+
+    first_anchor, last_anchor = anchors[0], anchors[-1]
+    for si in range(len(sentences)):
+        if sent_starts[si] is not None:
+            start = sent_starts[si]
+            end = sent_ends[si] if sent_ends[si] and sent_ends[si] > start else start + 0.5
+        else:
+            # Find bracketing anchors.
+            prev = max((a for a in anchors if a < si), default=None)
+            nxt = min((a for a in anchors if a > si), default=None)
+            if prev is None:
+                # Before first anchor: back off from it.
+                span = sent_starts[first_anchor]
+                slot = span / max(1, first_anchor + 1)
+                start = si * slot
+                end = start + slot
+            elif nxt is None:
+                # After last anchor: spread to audio end.
+                base = sent_ends[last_anchor] or sent_starts[last_anchor]
+                remaining = len(sentences) - last_anchor - 1
+                slot = max(1.0, (audio_duration - base) / max(1, remaining))
+                start = base + (si - last_anchor) * slot
+                end = start + slot
+            else:
+                # Between two anchors: even split of the gap.
+                gap_start = sent_ends[prev] or sent_starts[prev]
+                gap_end = sent_starts[nxt]
+                between = nxt - prev
+                slot = (gap_end - gap_start) / max(1, between)
+                start = gap_start + (si - prev) * slot
+                end = start + slot
+        if audio_duration:
+            cap = audio_duration - 0.05
+            start = min(start, cap)
+            end = min(max(end, start), cap)
+        segments.append({"id": si + 1, "start": round(start, 2),
+                         "end": round(end, 2), "text": sentences[si]})
+    return segments
+
+
+# ---- greedy anchor-window strategy -----------------------------------------
+
+
+def normalize_text(text: str) -> str:
+    """Normalization used by the greedy strategy (punctuation is dropped)."""
+    text = text.lower()
+    text = re.sub(r"[^\w\s]", "", text)
+    return " ".join(text.split())
+
+
+def align_sentences_greedy(
+    sentences: list[str],
+    words: list[dict],
+    audio_duration: float,
+) -> list[dict]:
+    """Anchor-window alignment originally written for Cambridge IELTS imports."""
+    segments: list[dict] = []
+    word_idx = 0
+    word_norms = [normalize_text(w["word"]) for w in words]
+
+    # Pre-compute effective sentences (skip empty after normalize) so we can
+    # spread the tail evenly across remaining audio time when Whisper drops
+    # the last words of a recording.
+    effective = [(i, s) for i, s in enumerate(sentences) if normalize_text(s).split()]
+
+    for eff_pos, (idx, sentence) in enumerate(effective):
+        sent_words = normalize_text(sentence).split()
+        if not sent_words:
+            continue
+
+        # 第一句：全局搜（音频常有 IELTS 标准片头 ~25-40s 不在文本里），
+        # 后续句子：本地小窗口搜，避免相似句干扰。
+        if idx == 0:
+            # 限制在音频前 50% 的词内搜索：IELTS Section 1 主对话一定在前半段开始；
+            # 否则 "Hello" 之类常见词容易被尾部重复出现的同形词锚住（曾出现首句
+            # 跳到 428s/493s 的 bug）。
+            search_range = max(0, min(len(words), len(words) // 2 + 1) - word_idx)
+            # Build the anchor phrase. If sentence 0 is very short (e.g. just
+            # "Hello?" → 1 word), a 1-word anchor cannot discriminate the IELTS
+            # intro from the actual conversation start. Borrow words from the
+            # next sentences until we have ~5-6 words to match against.
+            anchor_words = list(sent_words)
+            borrow_idx = 1
+            while len(anchor_words) < 5 and borrow_idx < len(sentences):
+                next_words = normalize_text(sentences[borrow_idx]).split()
+                anchor_words.extend(next_words)
+                borrow_idx += 1
+            anchor_len = min(6, len(anchor_words))
+        else:
+            # 窗口大小按 anchor 长度缩放：
+            # - 长 anchor (>=5 词)：200 词窗口能跨过 IELTS 题间 announcement
+            # - 中 anchor (3-4 词)：80 词，避免公共词 ("right"/"OK") 随机匹配
+            # - 短 anchor (1-2 词)：30 词，几乎没法可靠 anchor，限制漂移范围
+            anchor_len_real = len(sent_words)
+            if anchor_len_real >= 5:
+                max_window = 200
+            elif anchor_len_real >= 3:
+                max_window = 80
+            else:
+                max_window = 30
+            search_range = min(max_window, len(words) - word_idx)
+            anchor_words = sent_words
+            anchor_len = min(5, len(sent_words))
+
+        scored = []  # [(check_idx, score)]
+        for offset in range(search_range):
+            check_idx = word_idx + offset
+            score = 0
+            for j, sent_word in enumerate(anchor_words[:anchor_len]):
+                if check_idx + j < len(words) and word_norms[check_idx + j] == sent_word:
+                    score += 1
+            scored.append((check_idx, score))
+
+        if not scored:
+            best_start_idx = word_idx
+            best_score = -1
+        else:
+            max_score = max(s for _, s in scored)
+            if idx == 0:
+                # IELTS Section 1 常有 "example" 节选先放 ~第一句到第三句，再播完整录音。
+                # 取得分最高（或差 1 分）的所有候选，选最后一个 → 跳过 example，命中真正录音。
+                # Threshold scales with anchor_len so 1-word first sentences (now
+                # using a borrowed multi-word anchor) still pass.
+                threshold = max(2, anchor_len // 2)
+                high = [ci for ci, s in scored if s >= max_score - 1 and s >= threshold]
+                if not high and max_score >= 2:
+                    high = [ci for ci, s in scored if s == max_score]
+                if not high and max_score >= 1:
+                    # Last resort: pick the latest single-word match (skips
+                    # any earlier intro-narrator occurrence).
+                    high = [ci for ci, s in scored if s == max_score]
+                best_start_idx = high[-1] if high else scored[0][0]
+                best_score = max_score
+            else:
+                # 后续句子：取首个最佳匹配，避免漂到后面相似句。
+                # 大窗口下要求至少匹配一定阈值的 anchor 词，否则视为
+                # "当前句子在 announcement 期内/Whisper 漏词"，保守续写
+                # 在上一句结尾后约 1s（不漂到无关位置）。
+                # 关键：阈值必须 >=2（除非 anchor 只有 1 词），单词匹配
+                # 太容易在公共词上 false-positive 导致逐句累积漂移。
+                if anchor_len <= 1:
+                    min_required = 1
+                else:
+                    min_required = max(2, (anchor_len + 1) // 2)
+                if max_score >= min_required:
+                    best_start_idx = next(ci for ci, s in scored if s == max_score)
+                else:
+                    best_start_idx = word_idx
+                best_score = max_score
+
+        # 第一句：要求至少匹配 2 个 anchor 词；否则放弃强行对齐，保守留 t=0 fallback
+        if idx == 0 and best_score < 2:
+            logger.warning("first-sentence anchor weak (score=%s); using t=0 fallback", best_score)
+
+        # 词数耗尽：Whisper 漏转录尾部内容（在 IELTS 题间静默/低能量段易丢词）。
+        # 改为：把剩下的句子均匀分布在 [扩展后的起点, 音频实际结尾]，
+        # 学生点击后能听到对应区间内的真实音频。
+        if best_start_idx >= len(words):
+            prev_end = segments[-1]["end"] if segments else (words[-1]["end"] if words else 0)
+            remaining = len(effective) - eff_pos
+            min_slot = 2.0  # 每句至少 2s 播放窗口，否则学生听不清
+
+            if audio_duration:
+                hard_end = audio_duration - 0.05
+                # 始终给尾部预留至少 N*min_slot 或 10s（取较大者）。
+                # 上一句的 anchor 即使已经接近音频末尾也允许往回 rewind，
+                # 否则会出现 10 个 fallback 句全部 start=同一时刻、互相覆盖
+                # 同 0.5s 音频的问题。少量与已对齐句子的 overlap 是可以接受的
+                # （音频在那段时间确实有对话，学生听到正确内容）。
+                if prev_end > hard_end:
+                    prev_end = hard_end
+                needed = max(remaining * min_slot, 10.0)
+                prev_end = max(0.0, min(prev_end, hard_end - needed))
+                slot = (hard_end - prev_end) / max(1, remaining)
+                slot = max(min_slot, slot)
+                last_valid_start = hard_end - 0.5
+            else:
+                slot = min_slot
+                last_valid_start = prev_end + remaining * slot
+
+            cursor = prev_end
+            for tail_idx in range(eff_pos, len(effective)):
+                t_idx, t_sent = effective[tail_idx]
+                seg_start = min(cursor, last_valid_start)
+                seg_end = seg_start + slot
+                segments.append(
+                    {
+                        "id": t_idx + 1,
+                        "start": round(seg_start, 2),
+                        "end": round(seg_end, 2),
+                        "text": t_sent,
+                    }
+                )
+                cursor += slot
+            return segments
+
+        remaining_words = len(words) - best_start_idx
+        if remaining_words < len(sent_words):
+            # 剩余 audio 词不够该句长度：用所有剩余词覆盖
+            start_time = words[best_start_idx]["start"]
+            end_idx = len(words) - 1
+            end_time = words[end_idx]["end"]
+        else:
+            start_time = words[best_start_idx]["start"]
+            end_idx = min(best_start_idx + len(sent_words), len(words)) - 1
+            end_time = words[end_idx]["end"] if end_idx < len(words) else start_time + 5
+        # Whisper 偶尔给最后几个词 timestamp 超过音频实际长度（hallucinated tail）。
+        # 必须 clamp，否则 fallback 分支会从过界的 prev_end 继续往后排，
+        # 导致后续所有 segment 落在音频范围之外，播放器找不到位置就停。
+        if audio_duration:
+            cap = audio_duration - 0.05
+            start_time = min(start_time, cap)
+            end_time = min(end_time, cap)
+            end_time = max(end_time, start_time)
+        segments.append(
+            {
+                "id": idx + 1,
+                "start": round(start_time, 2),
+                "end": round(end_time, 2),
+                "text": sentence,
+            }
+        )
+        word_idx = end_idx + 1
+
+    return segments
+
+
+def align_sentences(
+    sentences: list[str],
+    whisper_words: list[dict],
+    audio_duration: float = 0.0,
+    *,
+    strategy: str = STRATEGY_LCS,
+) -> list[dict]:
+    """Align transcript sentences to Whisper word timestamps.
+
+    ``lcs`` returns exactly one segment per sentence; ``greedy`` skips
+    sentences that normalize to nothing.
+    """
+    if strategy == STRATEGY_LCS:
+        return align_sentences_lcs(sentences, whisper_words, audio_duration)
+    if strategy == STRATEGY_GREEDY:
+        return align_sentences_greedy(sentences, whisper_words, audio_duration)
+    raise ValueError(f"unknown alignment strategy: {strategy!r}")
+
+
+# ---- web upload path --------------------------------------------------------
+
+
+def align_user_text_with_whisper(user_sentences, whisper_segments, skip_seconds=0):
+    """将用户提供的句子文本与 Whisper 的时间戳对齐。"""
+    def normalize(t):
+        return re.sub(r"[^\w\s]", "", t.lower()).split()
+
+    # 如果指定了跳过秒数，过滤掉开头的 Whisper 段
+    if skip_seconds > 0:
+        whisper_segments = [s for s in whisper_segments if s["end"] > skip_seconds]
+
+    segments = []
+    w_idx = 0
+
+    for u_idx, user_text in enumerate(user_sentences):
+        user_text = strip_speaker_label(user_text)
+        user_words = normalize(user_text)
+        if not user_words or not whisper_segments:
+            continue
+
+        # 第一句搜索全部剩余 whisper 段（正文可能在音频中间才开始）
+        # 后续句子只往前搜 5 段（前一句已经定位好了）
+        search_range = len(whisper_segments) - w_idx if u_idx == 0 else min(5, len(whisper_segments) - w_idx)
+
+        best_start = min(w_idx, len(whisper_segments) - 1)
+        best_score = -1
+        for offset in range(search_range):
+            check = w_idx + offset
+            if check >= len(whisper_segments):
+                break
+            w_words = normalize(whisper_segments[check]["text"])
+            # 计算前几个词的匹配度
+            head = min(4, len(user_words), len(w_words))
+            score = sum(1 for a, b in zip(user_words[:head], w_words[:head], strict=True) if a == b)
+            if score > best_score:
+                best_score = score
+                best_start = check
+
+        # 确定这个用户句子覆盖多少个 whisper 段
+        start_time = whisper_segments[best_start]["start"]
+        end_idx = best_start
+
+        # 累积 whisper 段的词数直到接近用户句子的词数
+        accumulated_words = 0
+        target_words = len(user_words)
+        while end_idx < len(whisper_segments) and accumulated_words < target_words:
+            w_words = normalize(whisper_segments[end_idx]["text"])
+            accumulated_words += len(w_words)
+            end_idx += 1
+
+        end_time = whisper_segments[max(min(end_idx, len(whisper_segments)) - 1, best_start)]["end"]
+        w_idx = end_idx
+
+        segments.append({
+            "id": len(segments) + 1,
+            "start": round(start_time, 2),
+            "end": round(end_time, 2),
+            "text": user_text,
+        })
+
+    return segments
+
+
+def merge_short(segments, min_dur=1.5):
+    """合并过短的片段。"""
+    if not segments:
+        return segments
+    merged = [segments[0]]
+    for seg in segments[1:]:
+        if seg["end"] - seg["start"] < min_dur and merged:
+            merged[-1]["end"] = seg["end"]
+            merged[-1]["text"] += " " + seg["text"]
+        else:
+            merged.append(seg)
+    for i, s in enumerate(merged):
+        s["id"] = i + 1
+    return merged
+
+
+def build_listening_segments(
+    result: dict[str, Any],
+    transcript: str,
+    translation: str | None = None,
+    skip_seconds: float = 0,
+) -> list[dict[str, Any]]:
+    """Whisper 结果 + 原文/译文 → 精听练习的 segments 列表。"""
+    user_sentences = split_transcript_sentences(transcript)
+    translation_sentences = split_translation_text(translation, len(user_sentences))
+    whisper_segments = whisper_segments_from_result(result)
+
+    words = whisper_words_from_result(result)
+    if skip_seconds > 0:
+        words = [w for w in words if w["end"] > skip_seconds]
+
+    # 对齐策略：用户已分句且有词级时间戳 → 全局 LCS；否则退回段级匹配
+    if len(user_sentences) > 1 and words:
+        duration = max((seg["end"] for seg in whisper_segments), default=words[-1]["end"])
+        segments = align_sentences(user_sentences, words, duration, strategy=STRATEGY_LCS)
+    elif len(user_sentences) > 1 and whisper_segments:
+        # 用户已分句，尝试将 Whisper 时间戳匹配到用户的句子
+        segments = align_user_text_with_whisper(user_sentences, whisper_segments, skip_seconds)
+    else:
+        # 直接使用 Whisper 的分段结果，跳过指定秒数之前的段
+        segments = []
+        for seg in whisper_segments:
+            if skip_seconds > 0 and seg["end"] <= skip_seconds:
+                continue
+            segments.append({
+                "id": len(segments) + 1,
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": strip_speaker_label(seg["text"]),
+            })
+
+    segments = merge_short(segments)
+
+    for i, seg in enumerate(segments):
+        if i < len(translation_sentences):
+            seg["translation"] = translation_sentences[i]
+    return segments
@@ -0,0 +1,441 @@
+"""DB-backed job queue for intensive-listening Whisper alignment.
+
+The upload route only records a ``ListeningAlignmentJob`` row.  A dedicated
+worker process (``scripts/listening_alignment_worker.py``) claims queued rows,
+keeps the Whisper model loaded across jobs and reports progress back through
+the same row, so web workers never load the model or burn CPU on ASR.
+
+Claiming is a single conditional ``UPDATE`` so several worker processes can
+share the table safely; ``max_running`` caps how many jobs run at once across
+all of them.  Cancellation is cooperative: the worker checks the flag between
+stages (Whisper itself cannot be interrupted mid-transcription).
+
+While a job runs, a side thread refreshes its ``heartbeat_at`` every
+``HEARTBEAT_SECONDS``, so only jobs whose worker actually died look stale.
+Every write is tied to the claim token in ``worker_id``: a worker whose job
+was requeued away from it drops its result instead of overwriting the new
+run's state.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import ssl
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import and_, func, select, update
+
+from models import ListeningAlignmentJob, db, utcnow_naive
+from services.listening_alignment import build_listening_segments
+from services.listening_asr_cache import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "base"
+DEFAULT_MAX_ATTEMPTS = 2
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_STALE_SECONDS = 30 * 60
+# Must stay well below DEFAULT_STALE_SECONDS.
+HEARTBEAT_SECONDS = 60
+RETRY_BACKOFF_SECONDS = 30
+
+Transcriber = Callable[[str], dict[str, Any]]
+
+_MODEL_CACHE: dict[str, Any] = {}
+
+
+class AlignmentJobCancelled(Exception):
+    """Raised inside the worker when a teacher cancelled the running job."""
+
+
+class AlignmentJobLost(Exception):
+    """Raised inside the worker when its claim was requeued to someone else."""
+
+
+def get_whisper_model(name: str = DEFAULT_MODEL_NAME):
+    """Load the Whisper model once per process and reuse it for later jobs."""
+    model = _MODEL_CACHE.get(name)
+    if model is None:
+        # 部分服务器缺根证书，首次下载模型时 urllib 会校验失败。
+        ssl._create_default_https_context = ssl._create_unverified_context
+        import whisper
+
+        model = whisper.load_model(name)
+        _MODEL_CACHE[name] = model
+    return model
+
+
+def whisper_transcriber(model_name: str = DEFAULT_MODEL_NAME) -> Transcriber:
+    def transcribe(audio_path: str) -> dict[str, Any]:
+        model = get_whisper_model(model_name)
+        return model.transcribe(audio_path, word_timestamps=True, language="en", verbose=False)
+
+    return transcribe
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ---- web side -------------------------------------------------------------
+
+
+def enqueue_job(
+    *,
+    exercise_id: str,
+    title: str,
+    audio_path: str,
+    audio_ext: str,
+    output_dir: str,
+    transcript: str,
+    translation: str = "",
+    skip_seconds: float = 0.0,
+    created_by_id: int | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> ListeningAlignmentJob:
+    job = ListeningAlignmentJob(
+        job_key=uuid.uuid4().hex[:12],
+        exercise_id=exercise_id,
+        title=title,
+        audio_path=audio_path,
+        audio_ext=audio_ext or "mp3",
+        output_dir=output_dir,
+        transcript=transcript,
+        translation=translation or "",
+        skip_seconds=float(skip_seconds or 0),
+        status=ListeningAlignmentJob.STATUS_QUEUED,
+        progress=10,
+        message="已加入处理队列，请稍候...",
+        max_attempts=max(1, int(max_attempts)),
+        created_by_id=created_by_id,
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def get_job(job_key: str) -> ListeningAlignmentJob | None:
+    return ListeningAlignmentJob.query.filter_by(job_key=job_key).first()
+
+
+def job_status_payload(job: ListeningAlignmentJob) -> dict[str, Any]:
+    """Shape kept compatible with the old JSON status files polled by upload.html."""
+    payload: dict[str, Any] = {
+        "status": job.status,
+        "message": job.message or "",
+        "progress": int(job.progress or 0),
+        "exercise_id": job.exercise_id,
+        "title": job.title,
+        "attempts": int(job.attempts or 0),
+    }
+    if job.status == ListeningAlignmentJob.STATUS_QUEUED:
+        ahead = (
+            db.session.query(func.count(ListeningAlignmentJob.id))
+            .filter(
+                ListeningAlignmentJob.status == ListeningAlignmentJob.STATUS_QUEUED,
+                ListeningAlignmentJob.id < job.id,
+            )
+            .scalar()
+        )
+        payload["queue_position"] = int(ahead or 0) + 1
+    if job.status == ListeningAlignmentJob.STATUS_DONE:
+        payload["segment_count"] = int(job.segment_count or 0)
+    if job.error:
+        payload["error"] = job.error
+    return payload
+
+
+def request_cancel(job: ListeningAlignmentJob) -> bool:
+    """Queued jobs cancel immediately; running jobs stop at the next stage boundary."""
+    if job.status == ListeningAlignmentJob.STATUS_QUEUED:
+        job.status = ListeningAlignmentJob.STATUS_CANCELLED
+        job.message = "任务已取消"
+        job.finished_at = utcnow_naive()
+        db.session.commit()
+        return True
+    if job.status == ListeningAlignmentJob.STATUS_PROCESSING:
+        job.cancel_requested = True
+        job.message = "正在取消..."
+        db.session.commit()
+        return True
+    return False
+
+
+def retry_job(job: ListeningAlignmentJob) -> bool:
+    """Put a failed or cancelled job back on the queue with a fresh attempt budget."""
+    if job.status not in (ListeningAlignmentJob.STATUS_ERROR, ListeningAlignmentJob.STATUS_CANCELLED):
+        return False
+    if not Path(job.audio_path).exists():
+        return False
+    job.status = ListeningAlignmentJob.STATUS_QUEUED
+    job.progress = 10
+    job.message = "已重新加入处理队列..."
+    job.error = None
+    job.attempts = 0
+    job.cancel_requested = False
+    job.available_at = utcnow_naive()
+    job.worker_id = None
+    job.finished_at = None
+    db.session.commit()
+    return True
+
+
+# ---- worker side ----------------------------------------------------------
+
+
+def requeue_stale_jobs(stale_seconds: int = DEFAULT_STALE_SECONDS) -> int:
+    """Requeue jobs whose worker died mid-run (no heartbeat); returns how many were handled.
+
+    The dead run already used up the attempt counted at claim time, so a job
+    that keeps killing its worker is failed once ``max_attempts`` is reached
+    instead of being requeued forever.
+    """
+    now = utcnow_naive()
+    stale = (
+        ListeningAlignmentJob.status == ListeningAlignmentJob.STATUS_PROCESSING,
+        ListeningAlignmentJob.heartbeat_at < now - timedelta(seconds=stale_seconds),
+    )
+    failed = db.session.execute(
+        update(ListeningAlignmentJob)
+        .where(*stale, ListeningAlignmentJob.attempts >= ListeningAlignmentJob.max_attempts)
+        .values(
+            status=ListeningAlignmentJob.STATUS_ERROR,
+            worker_id=None,
+            message="处理失败",
+            error="处理进程多次中断",
+            finished_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    requeued = db.session.execute(
+        update(ListeningAlignmentJob)
+        .where(*stale, ListeningAlignmentJob.attempts < ListeningAlignmentJob.max_attempts)
+        .values(
+            status=ListeningAlignmentJob.STATUS_QUEUED,
+            worker_id=None,
+            message="处理进程中断，已重新排队...",
+            available_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return int(failed.rowcount or 0) + int(requeued.rowcount or 0)
+
+
+def claim_next_job(worker_id: str, *, max_running: int | None = None) -> ListeningAlignmentJob | None:
+    """Atomically move the oldest due queued job to ``processing`` for this worker."""
+    now = utcnow_naive()
+    next_id = (
+        select(ListeningAlignmentJob.id)
+        .where(
+            ListeningAlignmentJob.status == ListeningAlignmentJob.STATUS_QUEUED,
+            ListeningAlignmentJob.available_at <= now,
+        )
+        .order_by(ListeningAlignmentJob.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    conditions = [
+        ListeningAlignmentJob.id == next_id,
+        ListeningAlignmentJob.status == ListeningAlignmentJob.STATUS_QUEUED,
+    ]
+    if max_running:
+        running = (
+            select(func.count(ListeningAlignmentJob.id))
+            .where(ListeningAlignmentJob.status == ListeningAlignmentJob.STATUS_PROCESSING)
+            .scalar_subquery()
+        )
+        conditions.append(running < int(max_running))
+    claim_token = f"{worker_id}:{uuid.uuid4().hex[:6]}"
+    result = db.session.execute(
+        update(ListeningAlignmentJob)
+        .where(and_(*conditions))
+        .values(
+            status=ListeningAlignmentJob.STATUS_PROCESSING,
+            worker_id=claim_token,
+            attempts=ListeningAlignmentJob.attempts + 1,
+            started_at=now,
+            heartbeat_at=now,
+            progress=20,
+            message="已开始处理...",
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if not result.rowcount:
+        return None
+    return ListeningAlignmentJob.query.filter_by(
+        worker_id=claim_token, status=ListeningAlignmentJob.STATUS_PROCESSING
+    ).first()
+
+
+@contextmanager
+def _heartbeat(job_id: int, claim_token: str) -> Iterator[None]:
+    """Refresh ``heartbeat_at`` from a side thread while a long stage runs."""
+    app = current_app._get_current_object()
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            with app.app_context():
+                try:
+                    db.session.execute(
+                        update(ListeningAlignmentJob)
+                        .where(
+                            ListeningAlignmentJob.id == job_id,
+                            ListeningAlignmentJob.worker_id == claim_token,
+                            ListeningAlignmentJob.status == ListeningAlignmentJob.STATUS_PROCESSING,
+                        )
+                        .values(heartbeat_at=utcnow_naive())
+                        .execution_options(synchronize_session=False)
+                    )
+                    db.session.commit()
+                except Exception as exc:
+                    db.session.rollback()
+                    logger.warning("Listening alignment heartbeat for job %s failed: %s", job_id, exc)
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=beat, name=f"alignment-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _report(job: ListeningAlignmentJob, claim_token: str, progress: int, message: str) -> None:
+    db.session.refresh(job)
+    if job.worker_id != claim_token or job.status != ListeningAlignmentJob.STATUS_PROCESSING:
+        raise AlignmentJobLost()
+    if job.cancel_requested:
+        raise AlignmentJobCancelled()
+    job.progress = progress
+    job.message = message
+    job.heartbeat_at = utcnow_naive()
+    db.session.commit()
+
+
+def run_job(job: ListeningAlignmentJob, transcribe: Transcriber) -> None:
+    """Execute one claimed job and record its terminal (or retry) state."""
+    claim_token = job.worker_id
+    try:
+        _report(job, claim_token, 40, "正在识别音频...")
+        with _heartbeat(job.id, claim_token):
+            result = transcribe(job.audio_path)
+
+        _report(job, claim_token, 80, "正在对齐文本...")
+        segments = build_listening_segments(
+            result, job.transcript, job.translation, job.skip_seconds or 0
+        )
+        data = {
+            "id": job.exercise_id,
+            "title": job.title,
+            "audio": f"{job.exercise_id}.{job.audio_ext}",
+            "parts": [{"name": "Full", "segments": segments}],
+        }
+
+        _report(job, claim_token, 95, "正在保存练习...")
+        output_dir = Path(job.output_dir)
+        write_json_atomic(output_dir / f"{job.exercise_id}.json", data)
+        txt_path = output_dir / f"{job.exercise_id}.txt"
+        if txt_path.exists():
+            txt_path.unlink()
+
+        job.status = ListeningAlignmentJob.STATUS_DONE
+        job.progress = 100
+        job.message = "处理完成"
+        job.segment_count = len(segments)
+        job.error = None
+    except AlignmentJobLost:
+        logger.warning("Listening alignment job %s was requeued away from %s", job.job_key, claim_token)
+        db.session.rollback()
+        return
+    except AlignmentJobCancelled:
+        job.status = ListeningAlignmentJob.STATUS_CANCELLED
+        job.message = "任务已取消"
+    except Exception as exc:
+        logger.exception("Listening alignment job %s failed", job.job_key)
+        db.session.rollback()
+        job = db.session.get(ListeningAlignmentJob, job.id)
+        if job.worker_id != claim_token:
+            return
+        if job.attempts < job.max_attempts and not job.cancel_requested:
+            delay = RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+            job.status = ListeningAlignmentJob.STATUS_QUEUED
+            job.available_at = utcnow_naive() + timedelta(seconds=delay + random.uniform(0, 5))
+            job.worker_id = None
+            job.message = f"处理失败，{int(delay)} 秒后自动重试..."
+            job.error = None
+            db.session.commit()
+            return
+        job.status = ListeningAlignmentJob.STATUS_ERROR
+        job.error = str(exc) or exc.__class__.__name__
+        job.message = "处理失败"
+    job.finished_at = utcnow_naive()
+    job.heartbeat_at = job.finished_at
+    db.session.commit()
+
+
+def run_worker(
+    app,
+    *,
+    transcribe: Transcriber | None = None,
+    worker_id: str | None = None,
+    max_running: int | None = None,
+    poll_seconds: float = DEFAULT_POLL_SECONDS,
+    stale_seconds: int = DEFAULT_STALE_SECONDS,
+    max_jobs: int | None = None,
+    stop_when_idle: bool = False,
+) -> int:
+    """Claim and run jobs until stopped; returns the number of jobs processed."""
+    worker_id = worker_id or default_worker_id()
+    if transcribe is None:
+        model_name = app.config.get("LISTENING_ALIGNMENT_MODEL") or DEFAULT_MODEL_NAME
+        get_whisper_model(model_name)  # pay the load cost once, before the first claim
+        transcribe = whisper_transcriber(model_name)
+
+    processed = 0
+    last_stale_check = 0.0
+    while max_jobs is None or processed < max_jobs:
+        with app.app_context():
+            if time.monotonic() - last_stale_check > 60:
+                requeue_stale_jobs(stale_seconds)
+                last_stale_check = time.monotonic()
+            job = claim_next_job(worker_id, max_running=max_running)
+            if job is not None:
+                run_job(job, transcribe)
+                processed += 1
+                continue
+        if stop_when_idle:
+            break
+        time.sleep(poll_seconds)
+    return processed
+
+
+def drain_queue_inline(app) -> None:
+    """Development fallback: drain the queue from a thread of the web process.
+
+    Only used when ``LISTENING_ALIGNMENT_INLINE`` is on, i.e. no dedicated
+    worker is running; production keeps ASR out of gunicorn entirely.
+    """
+    import threading
+
+    threading.Thread(
+        target=run_worker,
+        args=(app,),
+        kwargs={"max_running": 1, "stop_when_idle": True},
+        daemon=True,
+    ).start()
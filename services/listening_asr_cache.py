@@ -0,0 +1,87 @@
+"""On-disk cache of Whisper word timestamps keyed by audio content hash.
+
+Transcription is the only expensive step of listening imports; alignment is
+pure computation.  Keying the cache by the SHA-256 of the audio bytes (not the
+file name) means renamed or re-copied files still hit, and an edited recording
+never reuses a stale transcription.  Entries are slimmed to what alignment
+needs — segment bounds and words — plus the audio duration so re-runs can also
+skip ffprobe.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_sha256(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path: str | Path, data: Any, *, indent: int | None = 2) -> None:
+    """Write JSON next to ``path`` and rename over it so readers never see half a file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=indent), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def slim_result(result: dict[str, Any]) -> dict[str, Any]:
+    """Drop tokens/logprobs from a Whisper result, keeping only timing data."""
+    return {
+        "segments": [
+            {
+                "start": seg.get("start"),
+                "end": seg.get("end"),
+                "text": seg.get("text", ""),
+                "words": [
+                    {"word": w["word"], "start": w["start"], "end": w["end"]}
+                    for w in seg.get("words", []) or []
+                ],
+            }
+            for seg in result.get("segments", [])
+        ]
+    }
+
+
+class WordTimestampCache:
+    """``{root}/{sha[:2]}/{sha}.{model}.json`` entries, one per (audio, model)."""
+
+    def __init__(self, root: str | Path, model_name: str):
+        self.root = Path(root)
+        self.model_name = model_name
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.{self.model_name}.json"
+
+    def load(self, digest: str) -> dict[str, Any] | None:
+        path = self.path_for(digest)
+        if not path.exists():
+            return None
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("audio_sha256") != digest or entry.get("model") != self.model_name:
+            return None
+        return entry
+
+    def store(self, digest: str, result: dict[str, Any], duration: float) -> dict[str, Any]:
+        entry = {
+            "audio_sha256": digest,
+            "model": self.model_name,
+            "duration": round(float(duration or 0), 3),
+            **slim_result(result),
+        }
+        write_json_atomic(self.path_for(digest), entry, indent=None)
+        return entry
@@ -0,0 +1,262 @@
+"""模考写作草稿的合并写入（write-coalescing autosave）。
+
+以前每次自动保存都把两篇作文全文写回 ``mock_exam_session`` 并提交一次；
+一个班 40 人同时写作时就是 40 路请求轮流抢 SQLite 写锁。现在：
+
+1. 保存请求只把最新草稿放进本进程的 :class:`DraftBuffer`（同一会话只留最新
+   revision），请求本身不写库；
+2. 缓冲区由一个按需启动的后台线程每 ``flush_interval`` 秒批量落库，所有会话
+   一次提交；页面切走（``flush``）、进入写作页或交卷时立即处理该会话；
+3. 落库的是相对上一版本的压缩增量（``mock_exam_draft_delta``：公共前后缀之外
+   的一段替换，zlib 压缩），每 ``COMPACT_EVERY`` 条增量或交卷时才把全文写回
+   会话行并清掉增量。
+
+revision 由前端生成（``Date.now()``），多个 gunicorn worker 各自缓冲同一会话时，
+落库前按库里的最新 revision 丢弃旧草稿；每条增量记录其基准 revision，重建时
+沿最新的链走，不会把两个 worker 并发写入的增量叠错。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+from models import MockExamDraftDelta, MockExamSession, db
+from services.background_flush import BackgroundFlusher
+from services.mock_exam_writing import apply_writing_draft, clean_essay, count_words
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_SECONDS = 15.0
+# 积累这么多条增量后把全文写回会话行，限制重建草稿时要回放的条数。
+COMPACT_EVERY = 20
+TASKS = ("task1", "task2")
+
+
+def encode_delta(old: str, new: str) -> list | None:
+    """``[start, end, text]``：把 ``old[start:end]`` 换成 ``text`` 即得到 ``new``。"""
+    if old == new:
+        return None
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    suffix = 0
+    while suffix < limit - start and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]:
+        suffix += 1
+    return [start, len(old) - suffix, new[start:len(new) - suffix]]
+
+
+def apply_delta(old: str, delta: list | None) -> str:
+    if not delta:
+        return old
+    start, end, text = delta
+    return old[:start] + text + old[end:]
+
+
+def pack_delta(deltas: dict) -> bytes:
+    return zlib.compress(json.dumps(deltas, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_delta(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _delta_chain(sess: MockExamSession) -> list[MockExamDraftDelta]:
+    rows = (
+        MockExamDraftDelta.query.filter(
+            MockExamDraftDelta.session_id == sess.id,
+            MockExamDraftDelta.revision > int(sess.writing_draft_revision or 0),
+        )
+        .order_by(MockExamDraftDelta.revision.desc())
+        .all()
+    )
+    by_base: dict[int, MockExamDraftDelta] = {}
+    for row in rows:
+        by_base.setdefault(int(row.base_revision), row)  # 同一基准取最新的一条
+    chain = []
+    revision = int(sess.writing_draft_revision or 0)
+    while revision in by_base:
+        row = by_base[revision]
+        chain.append(row)
+        revision = int(row.revision)
+    return chain
+
+
+def current_draft(sess: MockExamSession) -> tuple[str, str, int]:
+    """会话行里的全文 + 之后的增量 → ``(task1, task2, revision)``。"""
+    texts = {"task1": sess.writing_essay_task1 or "", "task2": sess.writing_essay_task2 or ""}
+    revision = int(sess.writing_draft_revision or 0)
+    for row in _delta_chain(sess):
+        deltas = unpack_delta(row.delta)
+        for task in TASKS:
+            texts[task] = apply_delta(texts[task], deltas.get(task))
+        revision = int(row.revision)
+    return texts["task1"], texts["task2"], revision
+
+
+def drop_deltas(sess: MockExamSession) -> None:
+    MockExamDraftDelta.query.filter(MockExamDraftDelta.session_id == sess.id).delete(
+        synchronize_session=False
+    )
+
+
+def compact(sess: MockExamSession, essay1: str, essay2: str, revision: int) -> None:
+    """把全文写回会话行，清掉已并入的增量。"""
+    apply_writing_draft(sess, essay1, essay2)
+    sess.writing_draft_revision = int(revision)
+    drop_deltas(sess)
+
+
+def write_draft(sess: MockExamSession, essay1, essay2, revision: int) -> bool:
+    """以增量形式落库一版草稿；比库里旧的 revision 或内容未变时不写。
+
+    词数照常更新到会话行，process 页的进度展示不受影响。
+    """
+    text1, text2 = clean_essay(essay1), clean_essay(essay2)
+    base1, base2, base_revision = current_draft(sess)
+    if int(revision) <= base_revision:
+        return False
+    deltas = {"task1": encode_delta(base1, text1), "task2": encode_delta(base2, text2)}
+    if not any(deltas.values()):
+        return False
+    pending = MockExamDraftDelta.query.filter(MockExamDraftDelta.session_id == sess.id).count()
+    if pending + 1 >= COMPACT_EVERY:
+        compact(sess, text1, text2, revision)
+        return True
+    sess.writing_task1_words = count_words(text1)
+    sess.writing_task2_words = count_words(text2)
+    db.session.add(
+        MockExamDraftDelta(
+            session_id=sess.id,
+            base_revision=base_revision,
+            revision=int(revision),
+            delta=pack_delta(deltas),
+        )
+    )
+    return True
+
+
+@dataclass
+class PendingDraft:
+    essay1: str
+    essay2: str
+    revision: int
+    buffered_at: float
+
+
+class DraftBuffer:
+    """按会话缓冲最新草稿，定时或按需批量落库。"""
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_SECONDS):
+        self.flush_interval = flush_interval
+        self._pending: dict[int, PendingDraft] = {}
+        self._lock = threading.Lock()
+        self._worker = BackgroundFlusher(
+            "mock-exam-draft-flush",
+            self._lock,
+            self._flush_due,
+            lambda: not self._pending,
+            config_flag="MOCK_EXAM_DRAFT_BACKGROUND_FLUSH",
+            interval=max(0.05, flush_interval / 2),
+        )
+
+    def stage(self, app, session_id: int, essay1, essay2, revision: int) -> bool:
+        """放入缓冲；比已缓冲版本旧的 revision 直接丢弃。"""
+        with self._lock:
+            current = self._pending.get(session_id)
+            if current is not None and current.revision >= revision:
+                return False
+            self._pending[session_id] = PendingDraft(
+                clean_essay(essay1),
+                clean_essay(essay2),
+                int(revision),
+                current.buffered_at if current else time.monotonic(),
+            )
+            self._worker.wake(app)
+        return True
+
+    def peek(self, session_id: int) -> PendingDraft | None:
+        with self._lock:
+            return self._pending.get(session_id)
+
+    def discard(self, session_id: int) -> None:
+        with self._lock:
+            self._pending.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def _take(self, session_ids=None, due_before: float | None = None) -> dict[int, PendingDraft]:
+        with self._lock:
+            keys = [
+                key
+                for key, draft in self._pending.items()
+                if (session_ids is None or key in session_ids)
+                and (due_before is None or draft.buffered_at <= due_before)
+            ]
+            return {key: self._pending.pop(key) for key in keys}
+
+    def _restore(self, drafts: dict[int, PendingDraft]) -> None:
+        """把没能落库的草稿放回缓冲；其间又收到更新 revision 的会话保留新的。"""
+        with self._lock:
+            for session_id, draft in drafts.items():
+                current = self._pending.get(session_id)
+                if current is None or current.revision < draft.revision:
+                    self._pending[session_id] = draft
+
+    def _write(self, drafts: dict[int, PendingDraft]) -> int:
+        sessions = MockExamSession.query.filter(MockExamSession.id.in_(list(drafts))).all()
+        written = 0
+        for sess in sessions:
+            if sess.writing_submitted_at:
+                continue
+            draft = drafts[sess.id]
+            if write_draft(sess, draft.essay1, draft.essay2, draft.revision):
+                written += 1
+        return written
+
+    def flush(self, session_ids=None, *, due_only: bool = False) -> int:
+        """把缓冲写入当前 session（不提交）；返回实际写入的会话数。
+
+        需要在 app context 里调用，由调用方决定何时提交；写入出错时草稿放回缓冲。
+        调用方提交失败时草稿就丢了，需要提交结果的用 :meth:`flush_and_commit`。
+        """
+        due_before = time.monotonic() - self.flush_interval if due_only else None
+        drafts = self._take(set(session_ids) if session_ids is not None else None, due_before)
+        if not drafts:
+            return 0
+        try:
+            return self._write(drafts)
+        except Exception:
+            self._restore(drafts)
+            raise
+
+    def flush_and_commit(self, session_ids=None, *, due_only: bool = False) -> int:
+        """落库并提交；失败时回滚、草稿放回缓冲（留给下一轮），异常照常抛出。"""
+        due_before = time.monotonic() - self.flush_interval if due_only else None
+        drafts = self._take(set(session_ids) if session_ids is not None else None, due_before)
+        if not drafts:
+            return 0
+        try:
+            written = self._write(drafts)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self._restore(drafts)
+            raise
+        return written
+
+    def _flush_due(self, app) -> None:
+        with app.app_context():
+            try:
+                self.flush_and_commit(due_only=True)
+            except Exception as exc:
+                logger.warning("Mock exam draft flush failed, will retry: %s", exc)
+            finally:
+                db.session.remove()
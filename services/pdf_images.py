@@ -0,0 +1,172 @@
+"""Image resolution for WeasyPrint report PDFs.
+
+Report templates used to inline every stem image as a base64 data URI on each
+render, so an image-heavy paper meant megabytes of base64 in the HTML string
+plus the decoded copies inside WeasyPrint.  Templates now reference images as
+``pdf-image:<static|uploads path>`` and :func:`make_url_fetcher` resolves
+them: the file is validated (only ``static/`` and ``uploads/`` under the app
+root), downscaled once to a print-resolution variant stored on disk (keyed by
+path, mtime and size, so an edited image gets a new variant), and the variant
+bytes are kept in a size-capped in-process cache shared by later renders.
+Without Pillow the original file is used as-is.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import unquote
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow ships with WeasyPrint in production
+    Image = None
+
+URL_SCHEME = "pdf-image:"
+# A4 content box is ~178 mm wide; 1400 px is ~200 dpi across it.
+PRINT_MAX_WIDTH = 1400
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+MIME_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+
+class ByteBudgetCache:
+    """Thread-safe LRU bounded by the total size of its byte values."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, data: bytes, mime: str) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = (data, mime)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _key, (evicted, _mime) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_bytes_cache = ByteBudgetCache(CACHE_MAX_BYTES)
+
+
+def resolve(root: str, url_path) -> str | None:
+    """Absolute path for a ``/static/...`` or ``/uploads/...`` image, or None.
+
+    仅允许 static/uploads 目录下的真实图片文件，防止路径穿越。
+    """
+    rel = str(url_path or "").strip().lstrip("/")
+    top = rel.split("/", 1)[0]
+    if top not in ("static", "uploads"):
+        return None
+    base = os.path.realpath(os.path.join(root, top))
+    full = os.path.realpath(os.path.join(root, rel))
+    if not full.startswith(base + os.sep) or not os.path.isfile(full):
+        return None
+    if full.rsplit(".", 1)[-1].lower() not in MIME_TYPES:
+        return None
+    return full
+
+
+def image_src(root: str, url_path) -> str | None:
+    """Template ``src`` for an image the fetcher can serve, or None if invalid."""
+    if resolve(root, url_path) is None:
+        return None
+    return URL_SCHEME + str(url_path).strip().lstrip("/")
+
+
+def print_variant(full: str, cache_dir: str, max_width: int = PRINT_MAX_WIDTH) -> tuple[str, str]:
+    """Path and mime type of a ≤ ``max_width`` copy of ``full``, built on first use."""
+    ext = full.rsplit(".", 1)[-1].lower()
+    mime = MIME_TYPES[ext]
+    if Image is None or ext == "gif":
+        return full, mime
+    stat = os.stat(full)
+    digest = hashlib.sha1(f"{full}|{stat.st_mtime_ns}|{stat.st_size}|{max_width}".encode()).hexdigest()
+    jpeg = ext in ("jpg", "jpeg")
+    target = os.path.join(cache_dir, digest + (".jpg" if jpeg else ".png"))
+    if os.path.isfile(target):
+        return target, "image/jpeg" if jpeg else "image/png"
+    try:
+        with Image.open(full) as img:
+            if img.width <= max_width:
+                return full, mime
+            img.thumbnail((max_width, max_width * 20), Image.LANCZOS)
+            if jpeg and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            if jpeg:
+                img.save(tmp, "JPEG", quality=85, optimize=True)
+            else:
+                img.save(tmp, "PNG", optimize=True)
+            os.replace(tmp, target)
+    except (OSError, ValueError):
+        return full, mime
+    return target, "image/jpeg" if jpeg else "image/png"
+
+
+def load(root: str, url_path, cache_dir: str) -> tuple[bytes, str] | None:
+    """Print-variant bytes and mime type for an image path, via the byte cache."""
+    full = resolve(root, url_path)
+    if full is None:
+        return None
+    try:
+        stat = os.stat(full)
+    except OSError:
+        return None
+    key = f"{full}|{stat.st_mtime_ns}|{stat.st_size}"
+    cached = _bytes_cache.get(key)
+    if cached is not None:
+        return cached
+    path, mime = print_variant(full, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    _bytes_cache.set(key, data, mime)
+    return data, mime
+
+
+def make_url_fetcher(root: str, cache_dir: str, fallback=None):
+    """WeasyPrint ``url_fetcher`` serving ``pdf-image:`` URLs; others go to ``fallback``."""
+
+    def fetch(url, *args, **kwargs):
+        if url.startswith(URL_SCHEME):
+            # WeasyPrint percent-encodes <img src> before it reaches the fetcher.
+            loaded = load(root, unquote(url[len(URL_SCHEME):]), cache_dir)
+            if loaded is None:
+                raise ValueError(f"unavailable report image: {url}")
+            data, mime = loaded
+            return {"string": data, "mime_type": mime, "redirected_url": url}
+        if fallback is None:
+            raise ValueError(f"unsupported report URL: {url}")
+        return fallback(url, *args, **kwargs)
+
+    return fetch
@@ -0,0 +1,225 @@
+"""Page-level PDF text extraction shared by uploads and import scripts.
+
+Vocab book uploads (api/dictation.py), grammar PDF uploads (api/materials.py)
+and the answer-key / IELTS diagnosis scripts used to walk a PDF page by page
+in one thread, and extracted the same file again on every attempt.  They now
+go through :func:`iter_pages`:
+
+* for the import scripts, pages are extracted in chunks on a process pool
+  (pypdf / pdfplumber are pure Python, so threads would serialize on the
+  GIL).  ``pdftotext`` chunks run as parallel subprocesses instead.  Inside a
+  request the extraction stays serial, so an upload never spawns a pool of
+  interpreters in a gunicorn thread;
+* pages are yielded in order as soon as their chunk is done, so callers can
+  start parsing before the whole document is read;
+* the per-page text is stored under ``cache_dir`` keyed by the file's SHA-256,
+  the engine and the layout flag, so re-uploading or re-running on the same
+  file skips extraction entirely.
+
+Engines are tried in the order given; the default matches the old dictation
+fallback chain (pypdf, then pdfplumber, then the ``pdftotext`` binary).
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import subprocess
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from flask import current_app, has_request_context
+
+from services.file_fingerprints import sha256_file
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("pypdf", "pdfplumber", "pdftotext")
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "data" / "pdf_text_cache"
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# Spawning a pool costs more than extracting a short handout serially.
+MIN_PARALLEL_PAGES = 16
+CACHE_SCHEMA_VERSION = 1
+
+
+def available_engine(engines: Iterable[str] = ENGINES) -> str | None:
+    for engine in engines:
+        if engine == "pdftotext":
+            if shutil.which("pdftotext"):
+                return engine
+        elif importlib.util.find_spec(engine) is not None:
+            return engine
+    return None
+
+
+def _page_text(page, engine: str, layout: bool) -> str:
+    try:
+        if engine == "pypdf":
+            text = page.extract_text(extraction_mode="layout") if layout else page.extract_text()
+        else:
+            text = page.extract_text(layout=layout)
+    except Exception as exc:  # one damaged page must not lose the rest of the book
+        logger.warning("PDF page text extraction failed: %s", exc)
+        text = ""
+    return text or ""
+
+
+def _run_pdftotext(path: str, layout: bool, first: int | None = None, last: int | None = None) -> list[str]:
+    args = [shutil.which("pdftotext") or "pdftotext"]
+    if layout:
+        args.append("-layout")
+    if first is not None:
+        args += ["-f", str(first), "-l", str(last)]
+    proc = subprocess.run(
+        [*args, path, "-"],
+        check=False,
+        capture_output=True,
+        text=True,
+        timeout=180,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"failed to extract pdf text: {proc.stderr.strip()}")
+    # pdftotext ends every page with a form feed.
+    pages = proc.stdout.split("\f")
+    if pages and pages[-1] == "":
+        pages.pop()
+    return pages
+
+
+def _extract_range(path: str, engine: str, layout: bool, start: int, stop: int) -> list[str]:
+    """Text of pages ``[start, stop)``; runs inside pool workers."""
+    if engine == "pdftotext":
+        return _run_pdftotext(path, layout, start + 1, stop)
+    if engine == "pypdf":
+        from pypdf import PdfReader
+
+        reader = PdfReader(path)
+        return [_page_text(reader.pages[number], engine, layout) for number in range(start, stop)]
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [_page_text(pdf.pages[number], engine, layout) for number in range(start, stop)]
+
+
+def _extract_range_task(args: tuple) -> list[str]:
+    return _extract_range(*args)
+
+
+def page_count(path: str, engine: str) -> int | None:
+    if engine == "pypdf":
+        from pypdf import PdfReader
+
+        return len(PdfReader(path).pages)
+    if engine == "pdfplumber":
+        import pdfplumber
+
+        with pdfplumber.open(path) as pdf:
+            return len(pdf.pages)
+    pdfinfo = shutil.which("pdfinfo")
+    if not pdfinfo:
+        return None
+    proc = subprocess.run([pdfinfo, path], check=False, capture_output=True, text=True, timeout=30)
+    match = re.search(r"^Pages:\s+(\d+)", proc.stdout, re.M)
+    return int(match.group(1)) if match else None
+
+
+def _chunks(pages: int, workers: int) -> list[tuple[int, int]]:
+    size = max(1, math.ceil(pages / (workers * 2)))
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def _extract_pages(path: str, engine: str, layout: bool, workers: int) -> Iterator[str]:
+    pages = page_count(path, engine) if workers > 1 else None
+    if not pages or pages < MIN_PARALLEL_PAGES:
+        if engine == "pdftotext":
+            yield from _run_pdftotext(path, layout)
+        else:
+            yield from _extract_range(path, engine, layout, 0, pages or page_count(path, engine) or 0)
+        return
+    tasks = [(path, engine, layout, start, stop) for start, stop in _chunks(pages, workers)]
+    if engine == "pdftotext":
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(tasks)))
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=get_context("spawn"))
+    with pool:
+        for chunk in pool.map(_extract_range_task, tasks):
+            yield from chunk
+
+
+def _cache_path(cache_dir: Path, digest: str, engine: str, layout: bool) -> Path:
+    return cache_dir / f"{digest}-{engine}{'-layout' if layout else ''}.json"
+
+
+def _read_cache(path: Path) -> list[str] | None:
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if payload.get("schema_version") != CACHE_SCHEMA_VERSION:
+        return None
+    pages = payload.get("pages")
+    return pages if isinstance(pages, list) else None
+
+
+def _write_cache(path: Path, pages: list[str]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({"schema_version": CACHE_SCHEMA_VERSION, "pages": pages}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        tmp.replace(path)
+    except OSError as exc:
+        logger.warning("PDF text cache write failed: %s", exc)
+
+
+def iter_pages(
+    path,
+    *,
+    layout: bool = False,
+    engines: Iterable[str] = ENGINES,
+    workers: int | None = None,
+    cache_dir=DEFAULT_CACHE_DIR,
+) -> Iterator[str]:
+    """Yield the text of every page of ``path`` in order (empty pages as "").
+
+    ``cache_dir=None`` disables the on-disk cache.
+    """
+    path = str(path)
+    engine = available_engine(engines)
+    if engine is None:
+        raise RuntimeError(f"no PDF text engine available (tried {', '.join(engines)})")
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = _cache_path(Path(cache_dir), sha256_file(Path(path)), engine, layout)
+        cached = _read_cache(cache_file)
+        if cached is not None:
+            yield from cached
+            return
+    workers = max(1, int(workers or DEFAULT_WORKERS))
+    if workers > 1 and has_request_context():
+        workers = 1
+    pages: list[str] = []
+    for text in _extract_pages(path, engine, layout, workers):
+        pages.append(text)
+        yield text
+    if cache_file is not None:
+        _write_cache(cache_file, pages)
+
+
+def app_options() -> dict:
+    """Cache directory from the Flask config, for request handlers."""
+    return {"cache_dir": current_app.config.get("PDF_TEXT_CACHE_DIR", DEFAULT_CACHE_DIR)}
+
+
+def extract_text(path, **options) -> str:
+    """All non-empty pages joined by newlines, as the old per-caller loops did."""
+    return "\n".join(text for text in iter_pages(path, **options) if text)
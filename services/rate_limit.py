@@ -0,0 +1,81 @@
+"""Token-bucket rate limiting shared across gunicorn workers.
+
+Buckets live in the ``rate_limit_bucket`` table rather than process memory, so
+adding workers does not multiply the effective limit.  Refill and consume are
+one SQLite UPSERT: the row is only written when at least ``cost`` tokens are
+available after refill, and the affected-row count says whether the call was
+allowed.  No read-modify-write window exists between workers.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import RateLimitBucket, db
+
+PRUNE_INTERVAL_SECONDS = 600
+
+
+class TokenBucketLimiter:
+    def __init__(self, name: str, capacity: float, refill_per_second: float):
+        self.name = name
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+    def bucket_key(self, client_key: str) -> str:
+        return f"{self.name}:{client_key}"[:160]
+
+    def allow(self, client_key: str, *, cost: float = 1.0, now: float | None = None) -> bool:
+        """Consume ``cost`` tokens for ``client_key``; False when the bucket is empty."""
+        now = time.time() if now is None else now
+        table = RateLimitBucket.__table__
+        stmt = sqlite_insert(table).values(
+            bucket_key=self.bucket_key(client_key),
+            tokens=self.capacity - cost,
+            updated_at=now,
+        )
+        refilled = func.min(
+            self.capacity,
+            table.c.tokens + (now - table.c.updated_at) * self.refill_per_second,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.bucket_key],
+            set_={"tokens": refilled - cost, "updated_at": now},
+            where=refilled >= cost,
+        )
+        with db.engine.begin() as conn:
+            allowed = conn.execute(stmt).rowcount == 1
+        self._maybe_prune(now)
+        return allowed
+
+    def reset(self, client_key: str) -> None:
+        with db.engine.begin() as conn:
+            conn.execute(
+                RateLimitBucket.__table__.delete().where(
+                    RateLimitBucket.bucket_key == self.bucket_key(client_key)
+                )
+            )
+
+    def _maybe_prune(self, now: float) -> None:
+        # A bucket idle long enough to be full again carries no state; drop it
+        # so one-off clients do not grow the table forever.
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        with self._prune_lock:
+            if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = now
+        full_after = self.capacity / self.refill_per_second if self.refill_per_second else 0
+        with db.engine.begin() as conn:
+            conn.execute(
+                RateLimitBucket.__table__.delete().where(
+                    RateLimitBucket.bucket_key.like(f"{self.name}:%"),
+                    RateLimitBucket.updated_at < now - full_after,
+                )
+            )
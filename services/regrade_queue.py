@@ -0,0 +1,104 @@
+"""In-process queue for refreshing stale stored grades off the request path.
+
+Result pages used to regrade a submission on every GET and commit when the
+answer key had changed, so each view could take the SQLite write lock.  Now a
+read only compares the submission's stored grade version with the current
+one; a stale row is handed to :meth:`RegradeQueue.enqueue`, which just adds
+the key to an in-memory set.  One daemon thread per queue (a
+:class:`~services.background_flush.BackgroundFlusher`, started on demand and
+exiting once the queue is empty) regrades pending keys in batches and commits
+once per batch.
+
+Handlers must be idempotent and re-check staleness themselves: several
+gunicorn workers may queue the same key, and a key can be queued again while
+its regrade is already running.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable, Hashable
+
+from models import db
+from services.background_flush import BackgroundFlusher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+
+Handler = Callable[[Hashable], None]
+
+
+class RegradeQueue:
+    def __init__(self, name: str, handler: Handler, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.name = name
+        self.handler = handler
+        self.batch_size = max(1, int(batch_size))
+        self._pending: dict[Hashable, None] = {}
+        self._lock = threading.Lock()
+        self._worker = BackgroundFlusher(
+            f"regrade-{name}",
+            self._lock,
+            self.drain,
+            lambda: not self._pending,
+            config_flag="REGRADE_IN_BACKGROUND",
+        )
+
+    def pending(self) -> list[Hashable]:
+        with self._lock:
+            return list(self._pending)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def enqueue(self, app, key: Hashable) -> bool:
+        """Queue ``key``; returns False when it was already pending.
+
+        With ``REGRADE_IN_BACKGROUND`` off (tests, one-off scripts) nothing is
+        started and the caller drains the queue itself.  Otherwise a drain
+        thread is started whenever none is running, even for a key that was
+        already pending, so a thread that died never strands the queue.
+        """
+        with self._lock:
+            added = key not in self._pending
+            self._pending[key] = None
+            self._worker.wake(app)
+        return added
+
+    def _take_batch(self) -> list[Hashable]:
+        with self._lock:
+            batch = list(self._pending)[: self.batch_size]
+            for key in batch:
+                del self._pending[key]
+            return batch
+
+    def drain(self, app) -> int:
+        """Regrade until the queue is empty; returns how many keys were handled."""
+        handled = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return handled
+            with app.app_context():
+                done: list[Hashable] = []
+                for key in batch:
+                    try:
+                        self.handler(key)
+                        done.append(key)
+                    except Exception as exc:
+                        # The rollback also drops this batch's earlier regrades; redo them later.
+                        db.session.rollback()
+                        logger.warning("Regrade %s %r failed: %s", self.name, key, exc)
+                        with self._lock:
+                            self._pending.update(dict.fromkeys(done))
+                        done = []
+                try:
+                    db.session.commit()
+                except Exception as exc:
+                    db.session.rollback()
+                    logger.warning("Regrade %s batch commit failed: %s", self.name, exc)
+                finally:
+                    db.session.remove()
+            handled += len(batch)
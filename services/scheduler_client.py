@@ -1,45 +1,286 @@
-"""Small server-side client for the external scheduler range API."""
+"""Small server-side client for the external scheduler range API.
 
+Range responses are cached in ``scheduler_range_cache`` keyed by (teacher,
+start, end), so a teacher re-opening the schedule tab reuses a response up to
+``SCHEDULER_RANGE_CACHE_TTL`` seconds old instead of re-fetching the range.
+Refreshes are conditional: the stored ETag is sent as ``If-None-Match`` and a
+304 only bumps ``fetched_at``.  While the scheduler is down, readers get the
+last good copy (at most ``SCHEDULER_RANGE_STALE_SECONDS`` old, flagged
+``stale``); rows older than that are pruned from the fetch path about once an
+hour.  Each row also
+keeps a content hash and the hash the schedule-change check last diffed, so
+that check can skip ranges that have not changed since its previous run.
+
+Point ``SCHEDULER_BASE_URL`` at ``scripts/scheduler_stub.py`` to develop and
+test against a local stand-in scheduler.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import date
+from typing import Any
 
-import requests
 from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
 
+from models import SchedulerRangeCache, db
+from services import http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL_SECONDS = 60
+DEFAULT_STALE_SECONDS = 24 * 3600
+PRUNE_INTERVAL_SECONDS = 3600
+
+# range key -> [lock, number of requests holding or waiting for it]
+_key_locks: dict[str, list] = {}
+_key_locks_guard = threading.Lock()
+_last_prune = 0.0
 
-def fetch_range_schedules_by_dates(
-    start: date,
-    end: date,
-    teacher_id=None,
-):
-    """Fetch schedules for a date range, optionally scoped to one scheduler teacher."""
 
+@dataclass
+class RangeSnapshot:
+    range_key: str
+    payload: Any
+    content_hash: str
+    diffed_hash: str | None = None
+    stale: bool = False
+
+    @property
+    def needs_diff(self) -> bool:
+        return self.content_hash != self.diffed_hash
+
+
+def _range_request(start: date, end: date, teacher_id=None, etag: str | None = None):
+    """One range call; returns ``(payload, etag, not_modified, error)``."""
     base_url = current_app.config.get("SCHEDULER_BASE_URL")
     token = current_app.config.get("SCHEDULER_PUSH_TOKEN")
     if not base_url or not token:
-        return None, "scheduler_config_missing"
+        return None, None, False, "scheduler_config_missing"
 
     params = {"start": start.isoformat(), "end": end.isoformat()}
     if teacher_id is not None:
         params["teacher_id"] = teacher_id
+    headers = {"X-Push-Token": token}
+    if etag:
+        headers["If-None-Match"] = etag
 
     try:
-        response = requests.get(
+        response = http_client.get(
+            "scheduler",
             f"{base_url}/api/schedules/range",
-            headers={"X-Push-Token": token},
+            headers=headers,
             params=params,
             timeout=5,
         )
+        if response.status_code == 304 and etag:
+            return None, etag, True, None
         if response.status_code != 200:
             current_app.logger.warning(
                 "Scheduler range API error: %s %s",
                 response.status_code,
                 response.text,
             )
-            return None, "scheduler_api_error"
-        return response.json(), None
+            return None, None, False, "scheduler_api_error"
+        return response.json(), response.headers.get("ETag"), False, None
     except Exception as exc:  # pragma: no cover - network failure is environment-specific
         current_app.logger.error("Scheduler range API request failed: %s", exc)
-        return None, "scheduler_request_failed"
+        return None, None, False, "scheduler_request_failed"
+
+
+def fetch_range_schedules_by_dates(
+    start: date,
+    end: date,
+    teacher_id=None,
+):
+    """Fetch schedules for a date range, optionally scoped to one scheduler teacher."""
+
+    payload, _etag, _not_modified, err = _range_request(start, end, teacher_id)
+    if err:
+        return None, err
+    return payload, None
+
+
+def range_cache_key(start: date, end: date, teacher_id=None) -> str:
+    owner = "all" if teacher_id is None else str(teacher_id)
+    return f"{owner}:{start.isoformat()}:{end.isoformat()}"
+
+
+def content_hash(payload: Any) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _key_lock(key: str):
+    """Per-range lock, dropped again once no request is using it."""
+    with _key_locks_guard:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+def _load_row(key: str):
+    table = SchedulerRangeCache.__table__
+    with db.engine.connect() as conn:
+        return conn.execute(select(table).where(table.c.range_key == key)).mappings().first()
+
+
+def _save_row(key: str, start: date, end: date, teacher_id, values: dict[str, Any]) -> None:
+    stmt = sqlite_insert(SchedulerRangeCache.__table__).values(
+        range_key=key,
+        scheduler_teacher_id=int(teacher_id) if str(teacher_id).isdigit() else None,
+        start_date=start.isoformat(),
+        end_date=end.isoformat(),
+        **values,
+    )
+    stmt = stmt.on_conflict_do_update(index_elements=["range_key"], set_=values)
+    with db.engine.begin() as conn:
+        conn.execute(stmt)
+
+
+def get_range_snapshot(
+    start: date,
+    end: date,
+    teacher_id=None,
+    *,
+    max_age: float | None = None,
+    allow_stale: bool = True,
+) -> tuple[RangeSnapshot | None, str | None]:
+    """Range response from the cache, refreshed when older than ``max_age`` seconds.
+
+    ``max_age=0`` always revalidates (still conditionally).  With
+    ``allow_stale`` a failed refresh falls back to the cached copy, flagged
+    ``stale=True``.  Returns ``(snapshot, None)`` or ``(None, error)``.
+    """
+    config = current_app.config
+    if max_age is None:
+        max_age = float(config.get("SCHEDULER_RANGE_CACHE_TTL", DEFAULT_CACHE_TTL_SECONDS))
+    key = range_cache_key(start, end, teacher_id)
+
+    # Concurrent requests for the same range in this process share one refresh.
+    with _key_lock(key):
+        try:
+            row = _load_row(key)
+        except SQLAlchemyError:
+            logger.warning("Scheduler range cache read failed for %s", key, exc_info=True)
+            payload, err = fetch_range_schedules_by_dates(start, end, teacher_id)
+            if err:
+                return None, err
+            return RangeSnapshot(key, payload, content_hash(payload)), None
+
+        now = time.time()
+        if row is not None and now - row["fetched_at"] < max_age:
+            return _snapshot(row), None
+
+        payload, etag, not_modified, err = _range_request(
+            start, end, teacher_id, etag=row["etag"] if row is not None else None
+        )
+        if err:
+            stale_seconds = float(config.get("SCHEDULER_RANGE_STALE_SECONDS", DEFAULT_STALE_SECONDS))
+            if allow_stale and row is not None and now - row["fetched_at"] < stale_seconds:
+                logger.warning("Serving stale scheduler range %s after %s", key, err)
+                return _snapshot(row, stale=True), None
+            return None, err
+
+        if not_modified:
+            values = {"fetched_at": now}
+            snapshot = _snapshot(row)
+        else:
+            digest = content_hash(payload)
+            changed = row is None or row["content_hash"] != digest
+            values = {
+                "payload_json": json.dumps(payload, ensure_ascii=False),
+                "content_hash": digest,
+                "etag": etag,
+                "fetched_at": now,
+                "changed_at": now if changed else row["changed_at"],
+            }
+            snapshot = RangeSnapshot(key, payload, digest, row["diffed_hash"] if row is not None else None)
+        try:
+            _save_row(key, start, end, teacher_id, values)
+        except SQLAlchemyError:
+            logger.warning("Scheduler range cache write failed for %s", key, exc_info=True)
+    _maybe_prune()
+    return snapshot, None
+
+
+def _snapshot(row, stale: bool = False) -> RangeSnapshot:
+    return RangeSnapshot(
+        range_key=row["range_key"],
+        payload=json.loads(row["payload_json"]),
+        content_hash=row["content_hash"],
+        diffed_hash=row["diffed_hash"],
+        stale=stale,
+    )
+
+
+def fetch_range_schedules_cached(start: date, end: date, teacher_id=None, *, max_age: float | None = None):
+    """Same contract as :func:`fetch_range_schedules_by_dates`, served through the cache."""
+
+    snapshot, err = get_range_snapshot(start, end, teacher_id, max_age=max_age)
+    if err:
+        return None, err
+    return snapshot.payload, None
+
+
+def mark_range_diffed(snapshot: RangeSnapshot) -> None:
+    """Record that ``snapshot``'s content has been applied to ScheduleSnapshot rows."""
+    table = SchedulerRangeCache.__table__
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                table.update()
+                .where(
+                    table.c.range_key == snapshot.range_key,
+                    table.c.content_hash == snapshot.content_hash,
+                )
+                .values(diffed_hash=snapshot.content_hash)
+            )
+    except SQLAlchemyError:
+        logger.warning("Scheduler range cache mark failed for %s", snapshot.range_key, exc_info=True)
+
+
+def prune_range_cache(older_than_seconds: float | None = None) -> int:
+    """Drop ranges nobody has fetched within the stale window."""
+    if older_than_seconds is None:
+        older_than_seconds = float(
+            current_app.config.get("SCHEDULER_RANGE_STALE_SECONDS", DEFAULT_STALE_SECONDS)
+        )
+    table = SchedulerRangeCache.__table__
+    with db.engine.begin() as conn:
+        return conn.execute(
+            table.delete().where(table.c.fetched_at < time.time() - older_than_seconds)
+        ).rowcount
+
+
+def _maybe_prune() -> None:
+    global _last_prune
+    now = time.monotonic()
+    with _key_locks_guard:
+        if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = now
+    try:
+        prune_range_cache()
+    except SQLAlchemyError:
+        logger.warning("Scheduler range cache prune failed", exc_info=True)
 
 
 def coerce_schedule_list(payload):
@@ -0,0 +1,237 @@
+"""Fingerprinted, precompressed delivery for the large practice payloads.
+
+``scripts/build_static_assets.py`` walks :data:`ASSET_ROOTS` under
+``static/``, writes ``.gz`` (and ``.br`` when the ``brotli`` package is
+installed) siblings next to compressible files, and records a content hash
+per file in ``static/asset-manifest.json`` plus an nginx snippet that serves
+the same files straight from disk.
+
+At runtime :func:`asset_url` turns ``"listening_tests/x.json"`` into
+``/static/listening_tests/x.json?v=<hash>``.  A request carrying the current
+hash is immutable, so it gets a one-year ``Cache-Control``; anything else is
+revalidated with the ETag.  :func:`init_app` swaps Flask's static view for
+:func:`send_static_asset`, which also serves the precompressed sibling when
+the client accepts it and did not ask for a byte range.  Without a manifest
+everything behaves like plain Flask static files.
+
+Files can change on disk between builds (content imports overwrite them), so
+a manifest entry only counts while the source still has the size and mtime
+recorded at build time, and a sibling is only served if it is not older than
+its source; otherwise the plain file is served and revalidated.
+``static/listening`` is not an asset root: the alignment worker and
+``scripts/align_listening_book.py`` rewrite its JSON at runtime, and nginx
+``gzip_static`` cannot tell that a ``.gz`` sibling went stale.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:  # optional: brotli siblings are only built when the package exists
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+ASSET_ROOTS = (
+    "listening_jijing",
+    "listening_tests",
+    "reading_jijing",
+    "reading_tests",
+    "writing_tests",
+)
+COMPRESSIBLE_SUFFIXES = frozenset({".json", ".html", ".txt", ".vtt", ".srt", ".svg", ".css", ".js"})
+MIN_COMPRESS_BYTES = 1024
+MANIFEST_NAME = "asset-manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Preferred first; only encodings with a sibling on disk are offered.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest_lock = threading.Lock()
+_manifest_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _write_sibling(path: Path, suffix: str, data: bytes, compress) -> bool:
+    """(Re)write ``path + suffix`` unless it is newer than ``path``; False if not worth it."""
+    target = path.with_name(path.name + suffix)
+    if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+        return True
+    packed = compress(data)
+    if len(packed) >= len(data):
+        target.unlink(missing_ok=True)
+        return False
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(packed)
+    os.replace(tmp, target)
+    return True
+
+
+def build(static_root: Path, roots: tuple[str, ...] = ASSET_ROOTS, *, use_brotli: bool = True) -> dict[str, Any]:
+    """Compress and fingerprint every file under ``roots``; writes and returns the manifest."""
+    static_root = Path(static_root)
+    files: dict[str, Any] = {}
+    for root in roots:
+        base = static_root / root
+        if not base.is_dir():
+            continue
+        for path in sorted(base.rglob("*")):
+            if not path.is_file() or path.suffix in (".gz", ".br", ".tmp"):
+                continue
+            rel = path.relative_to(static_root).as_posix()
+            stat = path.stat()
+            entry: dict[str, Any] = {
+                "hash": _file_hash(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "encodings": [],
+            }
+            if path.suffix.lower() in COMPRESSIBLE_SUFFIXES and entry["size"] >= MIN_COMPRESS_BYTES:
+                data = path.read_bytes()
+                if use_brotli and brotli is not None and _write_sibling(path, ".br", data, brotli.compress):
+                    entry["encodings"].append("br")
+                if _write_sibling(path, ".gz", data, lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)):
+                    entry["encodings"].append("gzip")
+            files[rel] = entry
+    manifest = {"version": 1, "roots": list(roots), "files": files}
+    target = static_root / MANIFEST_NAME
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, target)
+    return manifest
+
+
+def load_manifest(static_root: Path | str | None = None) -> dict[str, Any]:
+    """Manifest for ``static_root`` (default: the app's), reloaded when the file changes."""
+    path = Path(static_root or current_app.static_folder) / MANIFEST_NAME
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return {}
+    key = str(path)
+    cached = _manifest_cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _manifest_lock:
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            current_app.logger.warning("Unreadable static asset manifest %s", path)
+            manifest = {}
+        _manifest_cache[key] = (mtime, manifest)
+    return manifest
+
+
+def _entry(filename: str) -> dict[str, Any] | None:
+    """Manifest entry for ``filename`` while the file on disk is still the one built."""
+    entry = (load_manifest().get("files") or {}).get(filename)
+    if entry is None:
+        return None
+    path = safe_join(current_app.static_folder, filename)
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        return None
+    if stat is None or stat.st_size != entry.get("size") or stat.st_mtime_ns != entry.get("mtime_ns"):
+        return None
+    return entry
+
+
+def _fresh_sibling(filename: str, suffix: str) -> str | None:
+    source = safe_join(current_app.static_folder, filename)
+    sibling = safe_join(current_app.static_folder, filename + suffix)
+    try:
+        if os.stat(sibling).st_mtime_ns >= os.stat(source).st_mtime_ns:
+            return sibling
+    except (OSError, TypeError):
+        pass
+    return None
+
+
+def asset_url(filename: str) -> str:
+    """``/static/<filename>``, with ``?v=<hash>`` when the manifest knows the file."""
+    url = f"{current_app.static_url_path}/{filename}"
+    entry = _entry(filename)
+    return f"{url}?v={entry['hash']}" if entry else url
+
+
+def _accepted_encoding(entry: dict[str, Any]) -> tuple[str, str] | None:
+    offered = set(entry.get("encodings") or ())
+    for encoding, suffix in ENCODINGS:
+        if encoding in offered and encoding in request.accept_encodings:
+            return encoding, suffix
+    return None
+
+
+def send_static_asset(filename: str):
+    """Flask ``static`` endpoint with manifest-aware caching and precompressed siblings."""
+    static_folder = current_app.static_folder
+    entry = _entry(filename)
+    if entry is None:
+        return send_from_directory(static_folder, filename)
+
+    # Byte ranges always address the identity representation.
+    encoded = None if request.range else _accepted_encoding(entry)
+    if encoded and _fresh_sibling(filename, encoded[1]):
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_from_directory(static_folder, filename + encoded[1], mimetype=mimetype)
+        response.headers["Content-Encoding"] = encoded[0]
+    else:
+        response = send_from_directory(static_folder, filename)
+    if entry.get("encodings"):
+        response.vary.add("Accept-Encoding")
+    immutable = request.args.get("v") == entry["hash"]
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    return response
+
+
+def init_app(app) -> None:
+    app.view_functions["static"] = send_static_asset
+    app.jinja_env.globals["asset_url"] = asset_url
+
+
+def nginx_config(static_root: Path | str, roots: tuple[str, ...] = ASSET_ROOTS, *, brotli_static: bool = False) -> str:
+    """nginx snippet serving the asset roots from disk (include inside ``server {}``).
+
+    Needs ``map $arg_v $studytracker_static_cache`` at ``http {}`` level, which
+    is emitted as a comment at the top so the snippet stays copy-pasteable.
+    """
+    static_root = Path(static_root).resolve()
+    lines = [
+        "# Generated by scripts/build_static_assets.py -- do not edit.",
+        "# Put this map in the http {} block:",
+        "#   map $arg_v $studytracker_static_cache {",
+        f'#       ""      "{REVALIDATE_CACHE_CONTROL}";',
+        f'#       default "{IMMUTABLE_CACHE_CONTROL}";',
+        "#   }",
+    ]
+    for root in roots:
+        lines += [
+            "",
+            f"location /static/{root}/ {{",
+            f"    alias {static_root / root}/;",
+            "    gzip_static on;",
+            f"    {'' if brotli_static else '# '}brotli_static on;",
+            "    etag on;",
+            "    add_header Vary Accept-Encoding;",
+            "    add_header Cache-Control $studytracker_static_cache;",
+            "}",
+        ]
+    return "\n".join(lines) + "\n"
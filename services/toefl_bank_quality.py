@@ -13,7 +13,9 @@ import json
 import re
 from collections import Counter
 from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass
+from multiprocessing import get_context
 from pathlib import Path
 from typing import Any
 
@@ -26,6 +28,7 @@ SEVERITY_ORDER = {
 AUTO_RESPONSE_TYPES = {"mc", "fill", "order"}
 MANUAL_RESPONSE_TYPES = {"free", "record"}
 QUESTION_MODULE_RE = re.compile(r"_m(\d+)_")
+CACHE_SCHEMA_VERSION = 1
 
 
 @dataclass(frozen=True)
@@ -73,6 +76,25 @@ def _sha256(path: Path) -> str:
     return digest.hexdigest()
 
 
+def _stat_key(path: Path) -> list[int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _cached_sha256(path: Path, known_hashes: dict[str, list[Any]]) -> str:
+    stat = _stat_key(path)
+    known = known_hashes.get(str(path))
+    if stat is not None and known and known[:2] == stat:
+        return known[2]
+    digest = _sha256(path)
+    if stat is not None:
+        known_hashes[str(path)] = [*stat, digest]
+    return digest
+
+
 def _severity_for_published(published: bool, published_level: str, draft_level: str) -> str:
     return published_level if published else draft_level
 
@@ -134,8 +156,13 @@ def _profile_source_issues(
     exam_id: str,
     profile: dict[str, Any],
     source_root: Path | None,
+    *,
+    deps: dict[str, list[int] | None] | None = None,
+    known_hashes: dict[str, list[Any]] | None = None,
 ) -> list[QualityIssue]:
     issues: list[QualityIssue] = []
+    deps = {} if deps is None else deps
+    known_hashes = {} if known_hashes is None else known_hashes
     sources = profile.get("sources")
     if not isinstance(sources, list) or not sources:
         issues.append(QualityIssue(
@@ -159,6 +186,7 @@ def _profile_source_issues(
         relative = str(source.get("path") or "")
         path = source_root / relative
         role = str(source.get("role") or "source")
+        deps[str(path)] = _stat_key(path)
         if not path.is_file():
             issues.append(QualityIssue(
                 "critical",
@@ -169,7 +197,7 @@ def _profile_source_issues(
             ))
             continue
         expected_hash = str(source.get("sha256") or "").lower()
-        if expected_hash and _sha256(path) != expected_hash:
+        if expected_hash and _cached_sha256(path, known_hashes) != expected_hash:
             issues.append(QualityIssue(
                 "critical",
                 "source_hash_mismatch",
@@ -450,232 +478,386 @@ def _subject_profile_issues(
     return issues
 
 
-def analyze_bank(
-    data_root: Path,
+def _analyze_exam(
+    exam_dir: Path,
     repo_root: Path,
-    *,
-    profiles: dict[str, Any] | None = None,
-    source_root: Path | None = None,
-) -> dict[str, Any]:
-    profiles = profiles or {}
-    all_issues: list[QualityIssue] = []
-    exam_results: list[dict[str, Any]] = []
+    exam_profile: dict[str, Any] | None,
+    source_root: Path | None,
+    known_hashes: dict[str, list[Any]],
+) -> dict[str, Any] | None:
+    """Check one exam directory; the result is JSON-safe so it can be cached.
+
+    Besides the exam row, issues and summary counters, the result lists every
+    file outside the exam directory the checks looked at (``deps``) and the
+    source hashes it used, so a cached result can be revalidated by ``stat``
+    alone.
+    """
     totals: Counter[str] = Counter()
+    deps: dict[str, list[int] | None] = {}
+    known_hashes = dict(known_hashes)
+    manifest = _read_json(exam_dir / "manifest.json")
+    if not manifest:
+        return None
+    exam_id = exam_dir.name
+    published = (
+        manifest.get("publish_status") == "published"
+        and manifest.get("duplicate_status") == "clear"
+    )
+    totals["exam_count"] += 1
+    totals["published_exam_count"] += int(published)
+    exam_issues: list[QualityIssue] = []
+    if published and manifest.get("content_status") != "complete":
+        exam_issues.append(QualityIssue(
+            "critical",
+            "published_exam_incomplete",
+            "Incomplete exam is visible in the published catalog.",
+            exam_id,
+            evidence={"content_status": manifest.get("content_status")},
+        ))
+        totals["published_partial_count"] += 1
+    if exam_profile:
+        exam_issues.extend(_profile_source_issues(
+            exam_id, exam_profile, source_root, deps=deps, known_hashes=known_hashes
+        ))
 
-    for exam_dir in sorted(path for path in data_root.iterdir() if path.is_dir()):
-        manifest = _read_json(exam_dir / "manifest.json")
-        if not manifest:
+    subject_results = []
+    for subject in ("reading", "listening", "writing", "speaking"):
+        subject_path = exam_dir / f"{subject}.json"
+        if not subject_path.is_file():
             continue
-        exam_id = exam_dir.name
-        published = (
-            manifest.get("publish_status") == "published"
-            and manifest.get("duplicate_status") == "clear"
-        )
-        totals["exam_count"] += 1
-        totals["published_exam_count"] += int(published)
-        exam_issues: list[QualityIssue] = []
-        exam_profile = profiles.get(exam_id) if isinstance(profiles.get(exam_id), dict) else None
-        if published and manifest.get("content_status") != "complete":
+        payload = _read_json(subject_path)
+        questions = payload.get("questions")
+        if not isinstance(questions, list):
             exam_issues.append(QualityIssue(
                 "critical",
-                "published_exam_incomplete",
-                "Incomplete exam is visible in the published catalog.",
+                "subject_questions_invalid",
+                "Subject file does not contain a question list.",
                 exam_id,
-                evidence={"content_status": manifest.get("content_status")},
+                subject,
             ))
-            totals["published_partial_count"] += 1
-        if exam_profile:
-            exam_issues.extend(_profile_source_issues(exam_id, exam_profile, source_root))
-
-        subject_results = []
-        for subject in ("reading", "listening", "writing", "speaking"):
-            subject_path = exam_dir / f"{subject}.json"
-            if not subject_path.is_file():
+            continue
+        totals["subject_count"] += 1
+        totals["question_object_count"] += len(questions)
+        subject_issues: list[QualityIssue] = []
+        ids = [str(question.get("id") or "") for question in questions if isinstance(question, dict)]
+        duplicate_ids = sorted(key for key, count in Counter(ids).items() if key and count > 1)
+        if duplicate_ids:
+            subject_issues.append(QualityIssue(
+                "critical",
+                "question_id_duplicate",
+                "Subject contains duplicate question IDs.",
+                exam_id,
+                subject,
+                evidence={"question_ids": duplicate_ids},
+            ))
+
+        audio_modules = (
+            (payload.get("exam") or {}).get("audio_modules")
+            if isinstance(payload.get("exam"), dict)
+            else []
+        )
+        audio_modules = audio_modules if isinstance(audio_modules, list) else []
+        audio_module_ids = {
+            str(module.get("id") or "")
+            for module in audio_modules
+            if isinstance(module, dict) and str(module.get("id") or "")
+        }
+        audio_urls = [
+            str(module.get("url") or "")
+            for module in audio_modules
+            if isinstance(module, dict) and str(module.get("url") or "")
+        ]
+        if subject == "listening" and len(audio_urls) > 1 and len(set(audio_urls)) != len(audio_urls):
+            subject_issues.append(QualityIssue(
+                _severity_for_published(published, "critical", "high"),
+                "module_audio_reused",
+                "Multiple listening modules reuse the same full audio asset.",
+                exam_id,
+                subject,
+                evidence={"urls": audio_urls},
+            ))
+            totals["duplicate_audio_binding_count"] += 1
+        for module in audio_modules:
+            if not isinstance(module, dict):
                 continue
-            payload = _read_json(subject_path)
-            questions = payload.get("questions")
-            if not isinstance(questions, list):
-                exam_issues.append(QualityIssue(
+            url = str(module.get("url") or "")
+            asset_path = _static_asset_path(repo_root, url)
+            if asset_path is not None:
+                deps[str(asset_path)] = _stat_key(asset_path)
+            if asset_path is None:
+                subject_issues.append(QualityIssue(
                     "critical",
-                    "subject_questions_invalid",
-                    "Subject file does not contain a question list.",
+                    "audio_url_invalid",
+                    "Audio module does not use a repository static asset.",
                     exam_id,
                     subject,
+                    str(module.get("id") or ""),
+                    evidence={"url": url},
                 ))
-                continue
-            totals["subject_count"] += 1
-            totals["question_object_count"] += len(questions)
-            subject_issues: list[QualityIssue] = []
-            ids = [str(question.get("id") or "") for question in questions if isinstance(question, dict)]
-            duplicate_ids = sorted(key for key, count in Counter(ids).items() if key and count > 1)
-            if duplicate_ids:
+            elif not asset_path.is_file():
                 subject_issues.append(QualityIssue(
                     "critical",
-                    "question_id_duplicate",
-                    "Subject contains duplicate question IDs.",
+                    "audio_asset_missing",
+                    "Audio module points to a missing static asset.",
                     exam_id,
                     subject,
-                    evidence={"question_ids": duplicate_ids},
+                    str(module.get("id") or ""),
+                    evidence={"url": url},
                 ))
 
-            audio_modules = (
-                (payload.get("exam") or {}).get("audio_modules")
-                if isinstance(payload.get("exam"), dict)
-                else []
-            )
-            audio_modules = audio_modules if isinstance(audio_modules, list) else []
-            audio_module_ids = {
-                str(module.get("id") or "")
-                for module in audio_modules
-                if isinstance(module, dict) and str(module.get("id") or "")
-            }
-            audio_urls = [
-                str(module.get("url") or "")
-                for module in audio_modules
-                if isinstance(module, dict) and str(module.get("url") or "")
-            ]
-            if subject == "listening" and len(audio_urls) > 1 and len(set(audio_urls)) != len(audio_urls):
-                subject_issues.append(QualityIssue(
-                    _severity_for_published(published, "critical", "high"),
-                    "module_audio_reused",
-                    "Multiple listening modules reuse the same full audio asset.",
-                    exam_id,
-                    subject,
-                    evidence={"urls": audio_urls},
-                ))
-                totals["duplicate_audio_binding_count"] += 1
-            for module in audio_modules:
-                if not isinstance(module, dict):
-                    continue
-                url = str(module.get("url") or "")
-                asset_path = _static_asset_path(repo_root, url)
-                if asset_path is None:
-                    subject_issues.append(QualityIssue(
-                        "critical",
-                        "audio_url_invalid",
-                        "Audio module does not use a repository static asset.",
-                        exam_id,
-                        subject,
-                        str(module.get("id") or ""),
-                        evidence={"url": url},
-                    ))
-                elif not asset_path.is_file():
-                    subject_issues.append(QualityIssue(
-                        "critical",
-                        "audio_asset_missing",
-                        "Audio module points to a missing static asset.",
-                        exam_id,
-                        subject,
-                        str(module.get("id") or ""),
-                        evidence={"url": url},
-                    ))
-
-            covered_numbers: dict[str, set[int]] = {}
-            module_counts: dict[str, Counter[str]] = {}
-            orders = []
-            for question in questions:
-                if not isinstance(question, dict):
-                    subject_issues.append(QualityIssue(
-                        "critical",
-                        "question_object_invalid",
-                        "Question list contains a non-object value.",
-                        exam_id,
-                        subject,
-                    ))
-                    continue
-                module_id = _module_id(question)
-                numbers = _question_numbers(question)
-                covered_numbers.setdefault(module_id, set()).update(numbers)
-                counts = module_counts.setdefault(module_id, Counter())
-                counts["question_objects"] += 1
-                counts["item_count"] += len(numbers) if numbers else 1
-                totals["item_count"] += len(numbers) if numbers else 1
-                response_type = str(question.get("response_type") or "")
-                if response_type in AUTO_RESPONSE_TYPES:
-                    counts["auto_candidates"] += 1
-                    if not isinstance(question.get("answer"), dict):
-                        totals["missing_answer_count"] += 1
-                    if question.get("grading_status") != "auto":
-                        totals["not_auto_count"] += 1
-                if response_type == "mc" and len(question.get("options") or []) != 4:
-                    totals["invalid_mc_option_count"] += 1
-                try:
-                    orders.append(int(question.get("order")))
-                except (TypeError, ValueError):
-                    pass
-                subject_issues.extend(_question_issues(
-                    exam_id,
-                    subject,
-                    question,
-                    published,
-                    audio_module_ids,
-                ))
-            if orders and orders != list(range(1, len(orders) + 1)):
+        covered_numbers: dict[str, set[int]] = {}
+        module_counts: dict[str, Counter[str]] = {}
+        orders = []
+        for question in questions:
+            if not isinstance(question, dict):
                 subject_issues.append(QualityIssue(
-                    "medium",
-                    "question_order_noncontiguous",
-                    "Question order values are not contiguous after import filtering.",
+                    "critical",
+                    "question_object_invalid",
+                    "Question list contains a non-object value.",
                     exam_id,
                     subject,
-                    evidence={"question_count": len(orders)},
                 ))
-
-            subject_profile = None
-            if exam_profile and isinstance(exam_profile.get("subjects"), dict):
-                candidate = exam_profile["subjects"].get(subject)
-                subject_profile = candidate if isinstance(candidate, dict) else None
-            subject_issues.extend(_subject_profile_issues(
+                continue
+            module_id = _module_id(question)
+            numbers = _question_numbers(question)
+            covered_numbers.setdefault(module_id, set()).update(numbers)
+            counts = module_counts.setdefault(module_id, Counter())
+            counts["question_objects"] += 1
+            counts["item_count"] += len(numbers) if numbers else 1
+            totals["item_count"] += len(numbers) if numbers else 1
+            response_type = str(question.get("response_type") or "")
+            if response_type in AUTO_RESPONSE_TYPES:
+                counts["auto_candidates"] += 1
+                if not isinstance(question.get("answer"), dict):
+                    totals["missing_answer_count"] += 1
+                if question.get("grading_status") != "auto":
+                    totals["not_auto_count"] += 1
+            if response_type == "mc" and len(question.get("options") or []) != 4:
+                totals["invalid_mc_option_count"] += 1
+            try:
+                orders.append(int(question.get("order")))
+            except (TypeError, ValueError):
+                pass
+            subject_issues.extend(_question_issues(
                 exam_id,
                 subject,
-                subject_profile,
-                covered_numbers,
+                question,
                 published,
+                audio_module_ids,
+            ))
+        if orders and orders != list(range(1, len(orders) + 1)):
+            subject_issues.append(QualityIssue(
+                "medium",
+                "question_order_noncontiguous",
+                "Question order values are not contiguous after import filtering.",
+                exam_id,
+                subject,
+                evidence={"question_count": len(orders)},
             ))
-            exam_issues.extend(subject_issues)
-            severity_counts = Counter(issue.severity for issue in subject_issues)
-            release_status = (
-                "blocked"
-                if severity_counts["critical"] or severity_counts["high"]
-                else "review_required"
-                if severity_counts["medium"]
-                else "ready"
-            )
-            totals["release_ready_subject_count"] += int(release_status == "ready")
-            subject_results.append({
-                "subject": subject,
-                "question_objects": len(questions),
-                "item_count": sum(count["item_count"] for count in module_counts.values()),
-                "modules": {
-                    module_id: dict(counts)
-                    for module_id, counts in sorted(module_counts.items())
+
+        subject_profile = None
+        if exam_profile and isinstance(exam_profile.get("subjects"), dict):
+            candidate = exam_profile["subjects"].get(subject)
+            subject_profile = candidate if isinstance(candidate, dict) else None
+        subject_issues.extend(_subject_profile_issues(
+            exam_id,
+            subject,
+            subject_profile,
+            covered_numbers,
+            published,
+        ))
+        exam_issues.extend(subject_issues)
+        severity_counts = Counter(issue.severity for issue in subject_issues)
+        release_status = (
+            "blocked"
+            if severity_counts["critical"] or severity_counts["high"]
+            else "review_required"
+            if severity_counts["medium"]
+            else "ready"
+        )
+        totals["release_ready_subject_count"] += int(release_status == "ready")
+        subject_results.append({
+            "subject": subject,
+            "question_objects": len(questions),
+            "item_count": sum(count["item_count"] for count in module_counts.values()),
+            "modules": {
+                module_id: dict(counts)
+                for module_id, counts in sorted(module_counts.items())
+            },
+            "issue_counts": dict(severity_counts),
+            "release_status": release_status,
+        })
+
+    exam_severity_counts = Counter(issue.severity for issue in exam_issues)
+    exam_result = {
+        "exam_id": exam_id,
+        "title": manifest.get("title") or exam_id,
+        "published": published,
+        "content_status": manifest.get("content_status") or "",
+        "profile_status": (
+            str(exam_profile.get("status") or "") if exam_profile else "missing"
+        ),
+        "subjects": subject_results,
+        "issue_counts": dict(exam_severity_counts),
+        "release_status": (
+            "blocked"
+            if exam_severity_counts["critical"] or exam_severity_counts["high"]
+            else "review_required"
+            if exam_severity_counts["medium"]
+            else "ready"
+        ),
+    }
+    return {
+        "exam": exam_result,
+        "issues": [issue.to_dict() for issue in exam_issues],
+        "totals": dict(totals),
+        "deps": deps,
+        "hashes": {path: known_hashes[path] for path in deps if path in known_hashes},
+    }
+
+
+def _analyze_exam_task(args: tuple) -> dict[str, Any] | None:
+    return _analyze_exam(*args)
+
+
+def _cache_key(
+    exam_dir: Path,
+    repo_root: Path,
+    exam_profile: dict[str, Any] | None,
+    source_root: Path | None,
+) -> dict[str, Any]:
+    profile_text = json.dumps(exam_profile, sort_keys=True, ensure_ascii=False)
+    return {
+        "files": {path.name: _stat_key(path) for path in sorted(exam_dir.glob("*.json"))},
+        "profile": hashlib.sha256(profile_text.encode("utf-8")).hexdigest(),
+        "repo_root": str(repo_root),
+        "source_root": str(source_root) if source_root is not None else None,
+    }
+
+
+class AuditCache:
+    """Per-exam results from earlier runs, reused while their inputs are unchanged.
+
+    An entry is valid when the exam directory's JSON files, its source
+    profile and the roots match the stored key, and every recorded external
+    dependency (source files, audio assets) still has the same mtime/size.
+    Source hashes are kept by (mtime, size) too, so an exam whose JSON changed
+    does not re-hash untouched source PDFs.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        payload = _read_json(path) if path is not None else {}
+        if payload.get("schema_version") != CACHE_SCHEMA_VERSION:
+            payload = {}
+        self._exams: dict[str, Any] = payload.get("exams") or {}
+        self.hashes: dict[str, list[Any]] = payload.get("hashes") or {}
+
+    def lookup(self, name: str, key: dict[str, Any]) -> dict[str, Any] | None:
+        entry = self._exams.get(name)
+        if not entry or entry.get("key") != key:
+            return None
+        deps = (entry.get("outcome") or {}).get("deps") or {}
+        if any(_stat_key(Path(path)) != stat for path, stat in deps.items()):
+            return None
+        return entry
+
+    def store(self, name: str, key: dict[str, Any], outcome: dict[str, Any] | None) -> None:
+        self._exams[name] = {"key": key, "outcome": outcome}
+        if outcome:
+            self.hashes.update(outcome.get("hashes") or {})
+
+    def retain(self, names: Iterable[str]) -> None:
+        wanted = set(names)
+        self._exams = {name: entry for name, entry in self._exams.items() if name in wanted}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "schema_version": CACHE_SCHEMA_VERSION,
+                    "exams": self._exams,
+                    "hashes": self.hashes,
                 },
-                "issue_counts": dict(severity_counts),
-                "release_status": release_status,
-            })
-
-        all_issues.extend(exam_issues)
-        exam_severity_counts = Counter(issue.severity for issue in exam_issues)
-        exam_results.append({
-            "exam_id": exam_id,
-            "title": manifest.get("title") or exam_id,
-            "published": published,
-            "content_status": manifest.get("content_status") or "",
-            "profile_status": (
-                str(exam_profile.get("status") or "") if exam_profile else "missing"
+                ensure_ascii=False,
             ),
-            "subjects": subject_results,
-            "issue_counts": dict(exam_severity_counts),
-            "release_status": (
-                "blocked"
-                if exam_severity_counts["critical"] or exam_severity_counts["high"]
-                else "review_required"
-                if exam_severity_counts["medium"]
-                else "ready"
-            ),
-        })
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+
+
+def _run_exams(tasks: list[tuple], workers: int) -> list[dict[str, Any] | None]:
+    if workers <= 1 or len(tasks) <= 1:
+        return [_analyze_exam_task(task) for task in tasks]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tasks)),
+        mp_context=get_context("spawn"),
+    ) as pool:
+        return list(pool.map(_analyze_exam_task, tasks))
+
 
-    issue_counts = Counter(issue.severity for issue in all_issues)
-    issue_code_counts = Counter(issue.code for issue in all_issues)
+def analyze_bank(
+    data_root: Path,
+    repo_root: Path,
+    *,
+    profiles: dict[str, Any] | None = None,
+    source_root: Path | None = None,
+    cache: AuditCache | None = None,
+    workers: int = 1,
+) -> dict[str, Any]:
+    """Audit every exam under ``data_root``.
+
+    With a ``cache`` only exams whose inputs changed are re-checked; those are
+    spread over ``workers`` processes.  The report is identical either way.
+    """
+    profiles = profiles or {}
+    cache = cache or AuditCache()
+    exam_dirs = sorted(path for path in data_root.iterdir() if path.is_dir())
+    outcomes: dict[str, dict[str, Any] | None] = {}
+    pending: list[tuple[Path, dict[str, Any], tuple]] = []
+    for exam_dir in exam_dirs:
+        exam_profile = (
+            profiles.get(exam_dir.name)
+            if isinstance(profiles.get(exam_dir.name), dict)
+            else None
+        )
+        key = _cache_key(exam_dir, repo_root, exam_profile, source_root)
+        entry = cache.lookup(exam_dir.name, key)
+        if entry is not None:
+            cache.hits += 1
+            outcomes[exam_dir.name] = entry["outcome"]
+            continue
+        cache.misses += 1
+        pending.append((
+            exam_dir,
+            key,
+            (exam_dir, repo_root, exam_profile, source_root, cache.hashes),
+        ))
+    results = _run_exams([task for _, _, task in pending], workers)
+    for (exam_dir, key, _), outcome in zip(pending, results, strict=True):
+        cache.store(exam_dir.name, key, outcome)
+        outcomes[exam_dir.name] = outcome
+    cache.retain(outcomes)
+
+    all_issues: list[dict[str, Any]] = []
+    exam_results: list[dict[str, Any]] = []
+    totals: Counter[str] = Counter()
+    for exam_dir in exam_dirs:
+        outcome = outcomes[exam_dir.name]
+        if outcome is None:
+            continue
+        totals.update(outcome["totals"])
+        all_issues.extend(outcome["issues"])
+        exam_results.append(outcome["exam"])
+
+    issue_counts = Counter(issue["severity"] for issue in all_issues)
+    issue_code_counts = Counter(issue["code"] for issue in all_issues)
     summary = dict(totals)
     summary["issue_counts"] = dict(issue_counts)
     summary["issue_code_counts"] = dict(issue_code_counts)
@@ -687,20 +869,54 @@ def analyze_bank(
         "data_root": data_root.name,
         "summary": summary,
         "exams": exam_results,
-        "issues": [
-            issue.to_dict()
-            for issue in sorted(
-                all_issues,
-                key=lambda item: (
-                    -SEVERITY_ORDER[item.severity],
-                    item.exam_id,
-                    item.subject,
-                    item.module_id,
-                    item.question_id,
-                    item.code,
-                ),
-            )
+        "issues": sorted(
+            all_issues,
+            key=lambda item: (
+                -SEVERITY_ORDER[item["severity"]],
+                item["exam_id"],
+                item["subject"],
+                item["module_id"],
+                item["question_id"],
+                item["code"],
+            ),
+        ),
+    }
+
+
+def _issue_identity(issue: dict[str, Any]) -> str:
+    return json.dumps(issue, sort_keys=True, ensure_ascii=False)
+
+
+def diff_reports(previous: dict[str, Any] | None, current: dict[str, Any]) -> dict[str, Any]:
+    """Machine-readable change list between two ``analyze_bank`` reports."""
+    previous = previous or {}
+    old_issues = {_issue_identity(item): item for item in previous.get("issues") or []}
+    new_issues = {_issue_identity(item): item for item in current.get("issues") or []}
+    old_exams = {item["exam_id"]: item for item in previous.get("exams") or []}
+    new_exams = {item["exam_id"]: item for item in current.get("exams") or []}
+    old_summary = previous.get("summary") or {}
+    new_summary = current.get("summary") or {}
+    return {
+        "schema_version": "1.0",
+        "has_previous": bool(previous),
+        "exams_added": sorted(set(new_exams) - set(old_exams)),
+        "exams_removed": sorted(set(old_exams) - set(new_exams)),
+        "release_status_changes": [
+            {
+                "exam_id": exam_id,
+                "from": old_exams[exam_id]["release_status"],
+                "to": new_exams[exam_id]["release_status"],
+            }
+            for exam_id in sorted(set(old_exams) & set(new_exams))
+            if old_exams[exam_id]["release_status"] != new_exams[exam_id]["release_status"]
         ],
+        "summary_changes": {
+            key: {"from": old_summary.get(key), "to": new_summary.get(key)}
+            for key in sorted(set(old_summary) | set(new_summary))
+            if old_summary.get(key) != new_summary.get(key)
+        },
+        "issues_added": [new_issues[key] for key in new_issues if key not in old_issues],
+        "issues_resolved": [old_issues[key] for key in old_issues if key not in new_issues],
     }
 
 
@@ -14,9 +14,10 @@ from sqlalchemy.orm.attributes import set_committed_value
 
 from models import ToeflMockAttempt, ToeflMockResponse, db
 from services.toefl_mock_v2 import (
+    compiled_answer_key,
     definition,
-    load_private_answer_key,
-    resolve_package,
+    review_context_index,
+    score_attempts,
     score_responses,
 )
 from services.toefl_rubrics import (
@@ -98,26 +99,15 @@ def _definition(attempt: ToeflMockAttempt) -> dict[str, Any]:
 
 
 def _answer_index(test_id: str) -> dict[str, dict[str, Any]]:
-    return {
-        item["question_id"]: item
-        for item in load_private_answer_key(test_id).get("answers", [])
-        if item.get("question_id")
-    }
+    return compiled_answer_key(test_id).answers
 
 
 def _review_context_index(test_id: str) -> dict[str, str]:
     """Load only post-submit prompt context stripped from the exam API."""
     try:
-        content = json.loads(
-            (resolve_package(test_id) / "content.json").read_text(encoding="utf-8")
-        )
+        return review_context_index(test_id)
     except (OSError, TypeError, ValueError):
         return {}
-    return {
-        str(item["id"]): str(item["context_sentence"])
-        for item in content.get("questions", [])
-        if item.get("id") and item.get("context_sentence")
-    }
 
 
 def _response_index(attempt: ToeflMockAttempt) -> dict[str, ToeflMockResponse]:
@@ -294,27 +284,34 @@ def ensure_review_state(attempt: ToeflMockAttempt) -> bool:
     return changed
 
 
+def _auto_question_ids(mock_definition: dict[str, Any]) -> set[str]:
+    return {
+        item["id"]
+        for item in mock_definition.get("questions", [])
+        if item.get("grading_status") == "auto"
+    }
+
+
+def _response_values(responses: dict[str, ToeflMockResponse]) -> dict[str, Any]:
+    return {key: _raw_response(row) for key, row in responses.items()}
+
+
 def _objective_units(
     attempt: ToeflMockAttempt,
     mock_definition: dict[str, Any],
     responses: dict[str, ToeflMockResponse],
+    score: dict[str, Any] | None = None,
 ) -> list[dict[str, Any]]:
     groups = {item["id"]: item for item in mock_definition.get("groups", [])}
     modules = {item["id"]: item for item in mock_definition.get("modules", [])}
     audio_urls = _audio_urls(mock_definition)
     answers = _answer_index(attempt.exam_id)
-    response_values = {
-        key: _raw_response(row) for key, row in responses.items()
-    }
-    score = score_responses(
-        attempt.exam_id,
-        response_values,
-        question_ids={
-            item["id"]
-            for item in mock_definition.get("questions", [])
-            if item.get("grading_status") == "auto"
-        },
-    )
+    if score is None:
+        score = score_responses(
+            attempt.exam_id,
+            _response_values(responses),
+            question_ids=_auto_question_ids(mock_definition),
+        )
     score_by_id = {item["question_id"]: item for item in score.get("results", [])}
     units = []
     for question in mock_definition.get("questions", []):
@@ -508,16 +505,18 @@ def build_review(
     *,
     student_view: bool = False,
     recording_url_factory: Callable[[ToeflMockResponse], str] | None = None,
+    objective_score: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     """Return one shared, JSON-safe review view model.
 
     This function is only called after the HTTP layer has checked ownership and
     completion.  It never includes recording tokens, storage paths, or private
-    answer-key evidence paths.
+    answer-key evidence paths.  ``objective_score`` is this attempt's entry
+    from a batch :func:`score_attempts` call, see :func:`attempt_summaries`.
     """
     mock_definition = _definition(attempt)
     responses = _response_index(attempt)
-    objective = _objective_units(attempt, mock_definition, responses)
+    objective = _objective_units(attempt, mock_definition, responses, objective_score)
     manual = _manual_units(
         attempt,
         mock_definition,
@@ -562,9 +561,13 @@ def build_review(
     }
 
 
-def attempt_summary(attempt: ToeflMockAttempt) -> dict[str, Any]:
+def attempt_summary(
+    attempt: ToeflMockAttempt,
+    *,
+    objective_score: dict[str, Any] | None = None,
+) -> dict[str, Any]:
     mock_definition = _definition(attempt)
-    review = build_review(attempt)
+    review = build_review(attempt, objective_score=objective_score)
     student = getattr(attempt, "student", None)
     return {
         "id": attempt.id,
@@ -583,6 +586,27 @@ def attempt_summary(attempt: ToeflMockAttempt) -> dict[str, Any]:
     }
 
 
+def attempt_summaries(attempts: list[ToeflMockAttempt]) -> list[dict[str, Any]]:
+    """``attempt_summary`` for a list view, scoring each package's attempts in one batch.
+
+    Attempts are grouped by exam and section selection, so the compiled key
+    and the auto-graded question filter are resolved once per group.
+    """
+    groups: dict[tuple[str, str], list[ToeflMockAttempt]] = {}
+    for attempt in attempts:
+        groups.setdefault((attempt.exam_id, attempt.sections_json or ""), []).append(attempt)
+    scores: dict[Any, dict[str, Any]] = {}
+    for (exam_id, _sections), members in groups.items():
+        scores.update(
+            score_attempts(
+                exam_id,
+                {attempt.id: _response_values(_response_index(attempt)) for attempt in members},
+                question_ids=_auto_question_ids(_definition(members[0])),
+            )
+        )
+    return [attempt_summary(attempt, objective_score=scores[attempt.id]) for attempt in attempts]
+
+
 def save_reviews(
     attempt: ToeflMockAttempt,
     payload: dict[str, Any],
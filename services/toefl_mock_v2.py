@@ -1,13 +1,30 @@
-"""Definition and scoring services for source-backed TOEFL v2 mock packages."""
+"""Definition and scoring services for source-backed TOEFL v2 mock packages.
+
+Attempt endpoints ask for the definition on every state sync, so compiled
+definitions are cached per (package, sections, section order, package file
+versions) and package JSON is parsed once per file version.  A file version
+is its (mtime, size); re-running the build scripts therefore invalidates
+naturally.  Cached values are shared between requests: treat them as
+read-only.
+
+Private answer keys are compiled the same way into a
+:class:`CompiledAnswerKey` (blocked ids removed, expected values
+normalised), so :func:`score_responses` and the batch :func:`score_attempts`
+never touch the disk for a warm package.
+"""
 
 from __future__ import annotations
 
 import json
 import re
+from collections.abc import Mapping
 from copy import deepcopy
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from services.lru import LruCache
+
 SECTION_ORDER = ("reading", "listening", "writing", "speaking")
 LEGACY_SECTION_ORDER = ("reading", "listening", "speaking", "writing")
 PACKAGE_PATTERN = re.compile(
@@ -30,6 +47,17 @@ SPEAKING_RESPONSE_SECONDS = {
     "listen_and_repeat": {8, 10, 12},
     "take_an_interview": {45},
 }
+DEFINITION_CACHE_SIZE = 64
+PACKAGE_JSON_CACHE_SIZE = 64
+ANSWER_KEY_CACHE_SIZE = 32
+# Files whose change alters a compiled definition.
+DEFINITION_SOURCE_FILES = ("content.json", "manifest.json", "validation_result.json")
+
+_package_json_cache = LruCache(PACKAGE_JSON_CACHE_SIZE)
+_definition_cache = LruCache(DEFINITION_CACHE_SIZE)
+_answer_key_cache = LruCache(ANSWER_KEY_CACHE_SIZE)
+_review_context_cache = LruCache(ANSWER_KEY_CACHE_SIZE)
+_package_index_cache: dict[str, tuple[tuple, dict[str, Path]]] = {}
 
 
 class PackageNotFoundError(LookupError):
@@ -49,6 +77,35 @@ def load_json(path: Path) -> Any:
         return json.load(handle)
 
 
+def _file_version(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_package_json(path: Path) -> Any:
+    """Parsed package JSON, shared until the file changes (read-only)."""
+    version = _file_version(path)
+    if version is None:
+        return load_json(path)
+    key = (str(path), version)
+    value = _package_json_cache.get(key)
+    if value is None:
+        value = load_json(path)
+        _package_json_cache.set(key, value)
+    return value
+
+
+def clear_caches() -> None:
+    _package_json_cache.clear()
+    _definition_cache.clear()
+    _answer_key_cache.clear()
+    _review_context_cache.clear()
+    _package_index_cache.clear()
+
+
 def _package_dirs(root: Path | None = None) -> list[Path]:
     base = root or data_root()
     return sorted(
@@ -66,14 +123,27 @@ def resolve_package(test_id: str, root: Path | None = None) -> Path:
     direct = base / raw
     if direct.is_dir() and (direct / "content.json").is_file():
         return direct
-    lowered = raw.lower()
-    for package_dir in _package_dirs(base):
-        content = load_json(package_dir / "content.json")
-        if content.get("exam", {}).get("id", "").lower() == lowered:
-            return package_dir
+    package_dir = _package_index(base).get(raw.lower())
+    if package_dir is not None:
+        return package_dir
     raise PackageNotFoundError(f"Unknown TOEFL v2 test: {test_id}")
 
 
+def _package_index(base: Path) -> dict[str, Path]:
+    """Lower-cased exam id -> package dir, rebuilt when any content.json changes."""
+    package_dirs = _package_dirs(base)
+    signature = tuple((path.name, _file_version(path / "content.json")) for path in package_dirs)
+    cached = _package_index_cache.get(str(base))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    index: dict[str, Path] = {}
+    for package_dir in package_dirs:
+        exam_id = load_package_json(package_dir / "content.json").get("exam", {}).get("id", "")
+        index.setdefault(str(exam_id).lower(), package_dir)
+    _package_index_cache[str(base)] = (signature, index)
+    return index
+
+
 def _release_blockers(
     content: dict[str, Any], manifest: dict[str, Any]
 ) -> list[str]:
@@ -191,7 +261,7 @@ def _validation_status(package_dir: Path) -> str:
     path = package_dir / "validation_result.json"
     if not path.is_file():
         return "not_run"
-    return str(load_json(path).get("status", "unknown"))
+    return str(load_package_json(path).get("status", "unknown"))
 
 
 def _preview_audio_ready(content: dict[str, Any]) -> bool:
@@ -214,8 +284,8 @@ def _preview_audio_ready(content: dict[str, Any]) -> bool:
 def catalog(root: Path | None = None) -> list[dict[str, Any]]:
     rows: list[dict[str, Any]] = []
     for package_dir in _package_dirs(root):
-        content = load_json(package_dir / "content.json")
-        manifest = load_json(package_dir / "manifest.json")
+        content = load_package_json(package_dir / "content.json")
+        manifest = load_package_json(package_dir / "manifest.json")
         blockers = _release_blockers(content, manifest)
         validation_status = _validation_status(package_dir)
         preview_ready = (
@@ -426,10 +496,27 @@ def definition(
     root: Path | None = None,
     section_order: tuple[str, ...] = SECTION_ORDER,
 ) -> dict[str, Any]:
+    """Public definition for the selected sections (cached; do not mutate)."""
     package_dir = resolve_package(test_id, root)
-    content = load_json(package_dir / "content.json")
-    manifest = load_json(package_dir / "manifest.json")
     selected = parse_sections(sections, section_order=section_order)
+    key = (
+        str(package_dir),
+        tuple(selected),
+        tuple(section_order),
+        tuple(_file_version(package_dir / name) for name in DEFINITION_SOURCE_FILES),
+    )
+    compiled = _definition_cache.get(key)
+    if compiled is None:
+        compiled = _compile_definition(package_dir, selected, tuple(section_order))
+        _definition_cache.set(key, compiled)
+    return compiled
+
+
+def _compile_definition(
+    package_dir: Path, selected: list[str], section_order: tuple[str, ...]
+) -> dict[str, Any]:
+    content = load_package_json(package_dir / "content.json")
+    manifest = load_package_json(package_dir / "manifest.json")
     modules = [
         _public_record(item)
         for item in content.get("modules", [])
@@ -511,33 +598,112 @@ def require_attempt_allowed(mock_definition: dict[str, Any], preview: bool) -> N
 
 def load_private_answer_key(test_id: str, root: Path | None = None) -> dict[str, Any]:
     package_dir = resolve_package(test_id, root)
-    return load_json(package_dir / "answer_key.json")
+    return load_package_json(package_dir / "answer_key.json")
 
 
 def _normalise_scalar(value: Any) -> str:
     return str(value if value is not None else "").strip().casefold()
 
 
-def answer_is_correct(answer: dict[str, Any], response: Any) -> bool:
+# (kind, expected) with ``expected`` already normalised for comparison.
+Matcher = tuple[str, Any]
+
+
+def _compile_answer(answer: dict[str, Any]) -> Matcher:
     if "correct_option_keys" in answer:
-        expected = sorted(_normalise_scalar(item) for item in answer["correct_option_keys"])
-        actual_values = response if isinstance(response, list) else [response]
-        return sorted(_normalise_scalar(item) for item in actual_values) == expected
+        return "options", sorted(
+            _normalise_scalar(item) for item in answer["correct_option_keys"]
+        )
     if "ordered_tokens" in answer:
-        return list(response or []) == answer["ordered_tokens"]
+        return "tokens", answer["ordered_tokens"]
     accepted = answer.get("accepted_text") or answer.get("accepted_texts")
     if accepted:
         values = accepted if isinstance(accepted, list) else [accepted]
-        return _normalise_scalar(response) in {
-            _normalise_scalar(value) for value in values
-        }
+        return "text", frozenset(_normalise_scalar(value) for value in values)
     if "canonical_text" in answer:
-        return _normalise_scalar(response) == _normalise_scalar(
-            answer["canonical_text"]
-        )
+        return "text", frozenset({_normalise_scalar(answer["canonical_text"])})
+    return "none", None
+
+
+def _matches(matcher: Matcher, response: Any) -> bool:
+    kind, expected = matcher
+    if kind == "options":
+        actual_values = response if isinstance(response, list) else [response]
+        return sorted(_normalise_scalar(item) for item in actual_values) == expected
+    if kind == "tokens":
+        return list(response or []) == expected
+    if kind == "text":
+        return _normalise_scalar(response) in expected
     return False
 
 
+def answer_is_correct(answer: dict[str, Any], response: Any) -> bool:
+    return _matches(_compile_answer(answer), response)
+
+
+@dataclass(frozen=True)
+class CompiledAnswerKey:
+    """One package's answer key, prepared once per file version.
+
+    ``answers`` maps question id to the raw entry (review display needs the
+    evidence); ``scorable`` lists the auto-graded, unblocked questions in key
+    order with their precompiled matchers.
+    """
+
+    answers: dict[str, dict[str, Any]]
+    blocked_ids: frozenset[str]
+    scorable: tuple[tuple[str, Matcher], ...]
+
+
+def _compile_answer_key(answer_key: dict[str, Any]) -> CompiledAnswerKey:
+    blocked_ids = frozenset(
+        item["question_id"]
+        for item in answer_key.get("blocked", [])
+        if item.get("question_id")
+    )
+    answers = {
+        item["question_id"]: item
+        for item in answer_key.get("answers", [])
+        if item.get("question_id")
+    }
+    scorable = tuple(
+        (question_id, _compile_answer(item))
+        for question_id, item in answers.items()
+        if item.get("grading_status", "auto") == "auto"
+        and question_id not in blocked_ids
+    )
+    return CompiledAnswerKey(answers, blocked_ids, scorable)
+
+
+def compiled_answer_key(test_id: str, root: Path | None = None) -> CompiledAnswerKey:
+    path = resolve_package(test_id, root) / "answer_key.json"
+    version = _file_version(path)
+    key = (str(path), version)
+    compiled = _answer_key_cache.get(key)
+    if compiled is None:
+        compiled = _compile_answer_key(load_json(path))
+        if version is not None:
+            _answer_key_cache.set(key, compiled)
+    return compiled
+
+
+def review_context_index(test_id: str, root: Path | None = None) -> dict[str, str]:
+    """Post-submit context sentences by question id (stripped from the exam API)."""
+    path = resolve_package(test_id, root) / "content.json"
+    version = _file_version(path)
+    key = (str(path), version)
+    index = _review_context_cache.get(key)
+    if index is None:
+        index = {
+            str(item["id"]): str(item["context_sentence"])
+            for item in load_package_json(path).get("questions", [])
+            if item.get("id") and item.get("context_sentence")
+        }
+        if version is not None:
+            _review_context_cache.set(key, index)
+    return index
+
+
 def validate_response_value(question: dict[str, Any], response: Any) -> str | None:
     """Validate a public response shape without consulting the private key."""
 
@@ -629,35 +795,25 @@ def validate_navigation_state(
     return "invalid_navigation_jump"
 
 
-def score_responses(
-    test_id: str,
+def _scorable(
+    answer_key: CompiledAnswerKey, question_ids: set[str] | None
+) -> tuple[tuple[str, Matcher], ...] | list[tuple[str, Matcher]]:
+    if question_ids is None:
+        return answer_key.scorable
+    return [item for item in answer_key.scorable if item[0] in question_ids]
+
+
+def _score(
+    scorable: tuple[tuple[str, Matcher], ...] | list[tuple[str, Matcher]],
     responses: dict[str, Any],
-    *,
-    question_ids: set[str] | None = None,
-    root: Path | None = None,
 ) -> dict[str, Any]:
-    answer_key = load_private_answer_key(test_id, root)
-    blocked_ids = {
-        item.get("question_id")
-        for item in answer_key.get("blocked", [])
-        if item.get("question_id")
-    }
-    answers = [
-        item
-        for item in answer_key.get("answers", [])
-        if item.get("grading_status", "auto") == "auto"
-        and item.get("question_id") not in blocked_ids
-        and (question_ids is None or item.get("question_id") in question_ids)
-    ]
     results = [
         {
-            "question_id": answer["question_id"],
-            "answered": answer["question_id"] in responses,
-            "correct": answer_is_correct(
-                answer, responses.get(answer["question_id"])
-            ),
+            "question_id": question_id,
+            "answered": question_id in responses,
+            "correct": _matches(matcher, responses.get(question_id)),
         }
-        for answer in answers
+        for question_id, matcher in scorable
     ]
     correct = sum(item["correct"] for item in results)
     return {
@@ -669,6 +825,36 @@ def score_responses(
     }
 
 
+def score_responses(
+    test_id: str,
+    responses: dict[str, Any],
+    *,
+    question_ids: set[str] | None = None,
+    root: Path | None = None,
+) -> dict[str, Any]:
+    answer_key = compiled_answer_key(test_id, root)
+    return _score(_scorable(answer_key, question_ids), responses)
+
+
+def score_attempts(
+    test_id: str,
+    responses_by_attempt: Mapping[Any, dict[str, Any]],
+    *,
+    question_ids: set[str] | None = None,
+    root: Path | None = None,
+) -> dict[Any, dict[str, Any]]:
+    """Score many attempts of one package against a single compiled key.
+
+    Returns ``{attempt key: score_responses(...) result}``; the key and the
+    question filter are resolved once for the whole batch.
+    """
+    scorable = _scorable(compiled_answer_key(test_id, root), question_ids)
+    return {
+        attempt_key: _score(scorable, responses)
+        for attempt_key, responses in responses_by_attempt.items()
+    }
+
+
 def route_module_two(
     test_id: str,
     subject: str,
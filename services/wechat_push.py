@@ -0,0 +1,257 @@
+"""Concurrent fan-out for WeChat subscribe messages.
+
+The class-reminder and schedule-change crons used to resolve recipients with
+several queries per schedule and send every message serially (5 s timeout
+each), so a few hundred students meant minutes of wall time.  Callers now:
+
+1. build a :class:`RecipientDirectory` for all schedules up front, which
+   loads student, parent and teacher openids in a handful of ``IN`` queries;
+2. collect :class:`PushMessage` objects while walking the schedules;
+3. hand them to :func:`deliver`, which sends through a bounded thread pool,
+   paces each template to ``WECHAT_PUSH_RATE_PER_TEMPLATE`` sends/second,
+   retries transient failures (network errors, WeChat "system busy", a
+   revoked token, the per-minute limit) with jittered backoff, and writes
+   every outcome to ``subscribe_push_log`` in one bulk insert.
+
+The send function is injected (``api.wechat.send_subscribe_message_result``
+in production) so this module stays free of blueprint imports.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import joinedload
+
+from models import ParentStudentLink, StudentProfile, SubscribePushLog, User, db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_PER_TEMPLATE = 20.0
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 0.5
+# -1 system busy, 40001/42001 token revoked or expired (the sender drops it),
+# 45011 per-minute API frequency limit.
+TRANSIENT_ERRCODES = frozenset({-1, 40001, 42001, 45011})
+TEACHER_ROLES = (User.ROLE_TEACHER, User.ROLE_ADMIN, User.ROLE_ASSISTANT)
+
+SendFn = Callable[..., dict[str, Any]]
+
+
+def _key(value) -> str | None:
+    # Scheduler ids arrive as int or str depending on the endpoint.
+    if value in (None, ""):
+        return None
+    return str(value).strip()
+
+
+def _int_ids(keys: set[str]) -> list[int]:
+    return [int(k) for k in keys if k.lstrip("-").isdigit()]
+
+
+class RecipientDirectory:
+    """Openids for many schedules, resolved with a fixed number of queries.
+
+    Matches the per-schedule lookups it replaces: a student is found by
+    scheduler id, else by full name; active parent links are joined by the
+    profile's full name; teachers must be active staff.
+    """
+
+    def __init__(self, students: Iterable[tuple[Any, Any]] = (), teacher_ids: Iterable[Any] = ()):
+        self._by_scheduler_id: dict[str, StudentProfile] = {}
+        self._by_name: dict[str, StudentProfile] = {}
+        self._parents_by_name: dict[str, list[str]] = {}
+        self._teachers: dict[str, str | None] = {}
+
+        students = list(students)
+        sids = _int_ids({k for k in (_key(sid) for sid, _ in students) if k})
+        names = {name for _, name in students if name}
+        if sids or names:
+            conditions = []
+            if sids:
+                conditions.append(StudentProfile.scheduler_student_id.in_(sids))
+            if names:
+                conditions.append(StudentProfile.full_name.in_(names))
+            profiles = (
+                StudentProfile.query.options(joinedload(StudentProfile.user))
+                .filter(or_(*conditions))
+                .order_by(StudentProfile.id)
+                .all()
+            )
+            for profile in profiles:
+                sid = _key(profile.scheduler_student_id)
+                if sid:
+                    self._by_scheduler_id.setdefault(sid, profile)
+                self._by_name.setdefault(profile.full_name, profile)
+            self._load_parents({p.full_name for p in profiles})
+
+        tids = _int_ids({k for k in (_key(t) for t in teacher_ids) if k})
+        if tids:
+            teachers = (
+                User.query.filter(
+                    User.scheduler_teacher_id.in_(tids),
+                    User.is_active.is_(True),
+                    User.role.in_(TEACHER_ROLES),
+                )
+                .order_by(User.id)
+                .all()
+            )
+            for teacher in teachers:
+                self._teachers.setdefault(_key(teacher.scheduler_teacher_id), teacher.wechat_openid or None)
+
+    def _load_parents(self, names: set[str]) -> None:
+        if not names:
+            return
+        rows = (
+            db.session.query(ParentStudentLink.student_name, User.wechat_openid)
+            .join(User, User.id == ParentStudentLink.parent_id)
+            .filter(
+                ParentStudentLink.student_name.in_(names),
+                ParentStudentLink.is_active.is_(True),
+            )
+            .order_by(ParentStudentLink.id)
+            .all()
+        )
+        for student_name, openid in rows:
+            if openid:
+                self._parents_by_name.setdefault(student_name, []).append(openid)
+
+    def student_openids(self, student_id, student_name) -> list[str]:
+        profile = None
+        if _key(student_id):
+            profile = self._by_scheduler_id.get(_key(student_id))
+        if profile is None and student_name:
+            profile = self._by_name.get(student_name)
+        if profile is None:
+            return []
+        openids = []
+        if profile.user and profile.user.wechat_openid:
+            openids.append(profile.user.wechat_openid)
+        openids.extend(self._parents_by_name.get(profile.full_name, []))
+        return list(dict.fromkeys(openids))
+
+    def teacher_openid(self, scheduler_teacher_id) -> str | None:
+        return self._teachers.get(_key(scheduler_teacher_id))
+
+
+@dataclass
+class PushMessage:
+    openid: str
+    template_id: str
+    data: dict[str, Any]
+    page: str
+    category: str = ""
+    ref: Any = None  # caller bookkeeping (e.g. teacher id); not persisted
+
+
+@dataclass
+class PushResult:
+    message: PushMessage
+    response: dict[str, Any]
+    attempts: int
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.response.get("ok"))
+
+
+class _TemplatePacer:
+    """Spaces sends of the same template ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, key: str) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _is_transient(response: dict[str, Any]) -> bool:
+    return response.get("error") == "request_failed" or response.get("errcode") in TRANSIENT_ERRCODES
+
+
+def _send_one(app, send: SendFn, message: PushMessage, pacer: _TemplatePacer, max_attempts: int) -> PushResult:
+    with app.app_context():
+        attempt = 0
+        while True:
+            attempt += 1
+            pacer.wait(message.template_id)
+            try:
+                response = send(message.openid, message.template_id, message.data, page=message.page)
+            except Exception as exc:  # network errors, non-JSON bodies
+                logger.warning("Subscribe push to %s failed: %s", message.openid, exc)
+                response = {"ok": False, "error": "request_failed", "errmsg": str(exc)[:200]}
+            if response.get("ok") or attempt >= max_attempts or not _is_transient(response):
+                return PushResult(message, response, attempt)
+            time.sleep(RETRY_BASE_SECONDS * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+
+def deliver(
+    messages: list[PushMessage],
+    send: SendFn,
+    *,
+    batch: str,
+    concurrency: int | None = None,
+    rate_per_template: float | None = None,
+    max_attempts: int | None = None,
+) -> list[PushResult]:
+    """Send ``messages`` concurrently; results are returned in input order."""
+    if not messages:
+        return []
+    config = current_app.config
+    concurrency = int(concurrency or config.get("WECHAT_PUSH_CONCURRENCY") or DEFAULT_CONCURRENCY)
+    if rate_per_template is None:
+        # 0 disables pacing.
+        rate_per_template = float(config.get("WECHAT_PUSH_RATE_PER_TEMPLATE", DEFAULT_RATE_PER_TEMPLATE))
+    max_attempts = max(1, int(max_attempts or config.get("WECHAT_PUSH_MAX_ATTEMPTS") or DEFAULT_MAX_ATTEMPTS))
+
+    app = current_app._get_current_object()
+    pacer = _TemplatePacer(rate_per_template)
+    workers = max(1, min(concurrency, len(messages)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wechat-push") as pool:
+        results = list(pool.map(lambda m: _send_one(app, send, m, pacer, max_attempts), messages))
+    record_results(results, batch)
+    return results
+
+
+def record_results(results: list[PushResult], batch: str) -> None:
+    """Persist delivery outcomes with one multi-row INSERT."""
+    if not results:
+        return
+    rows = [
+        {
+            "batch": batch[:64],
+            "category": (r.message.category or None),
+            "template_id": str(r.message.template_id)[:64],
+            "openid": str(r.message.openid)[:64],
+            "ok": r.ok,
+            "error": None if r.ok else str(r.response.get("error") or "send_failed")[:64],
+            "errcode": r.response.get("errcode") if isinstance(r.response.get("errcode"), int) else None,
+            "attempts": r.attempts,
+        }
+        for r in results
+    ]
+    try:
+        db.session.execute(insert(SubscribePushLog), rows)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.warning("Subscribe push log write failed: %s", exc)
@@ -80,6 +80,7 @@
     if (!response.ok) {
       const error = new Error(payload.message || payload.error || `HTTP ${response.status}`);
       error.code = payload.error;
+      error.payload = payload;
       throw error;
     }
     return payload;
@@ -810,17 +811,40 @@
       audioStates.forEach((value, key) => { audio[key] = value; });
       const statePayload = { ...state, audio, returnTo: attempt.state?.returnTo || config.returnTo };
       if (statePayload.deviceCheck?.microphone !== "passed") delete statePayload.deviceCheck;
-      const payload = {
-        state: statePayload,
-        currentPhase: currentPhase()?.id,
+      // Send only the fields the server does not already have; the reply
+      // is the matching diff rather than the whole attempt.
+      const sendDelta = () => {
+        const changed = {};
+        Object.entries(statePayload).forEach(([key, value]) => {
+          if (JSON.stringify(value) !== JSON.stringify(attempt.state?.[key])) changed[key] = value;
+        });
+        const payload = { baseVersion: attempt.version, state: changed, currentPhase: currentPhase()?.id };
+        if (includeRemaining) payload.remainingSeconds = remainingSeconds;
+        return api(`/api/toefl/attempts/${attempt.id}/state`, {
+          method: "PATCH",
+          body: JSON.stringify(payload),
+        });
       };
-      if (includeRemaining) payload.remainingSeconds = remainingSeconds;
-      const result = await api(`/api/toefl/attempts/${attempt.id}/state`, {
-        method: "PUT",
-        body: JSON.stringify(payload),
-      });
-      attempt = result.attempt;
-      remainingSeconds = attempt.remaining_seconds;
+      const applyDelta = (delta) => {
+        attempt = {
+          ...attempt,
+          version: delta.version,
+          state: { ...(attempt.state || {}), ...delta.state },
+          current_phase: delta.current_phase,
+          remaining_seconds: delta.remaining_seconds,
+        };
+        remainingSeconds = attempt.remaining_seconds;
+      };
+      let result;
+      try {
+        result = await sendDelta();
+      } catch (error) {
+        if (error.code !== "version_conflict") throw error;
+        // Another tab saved first: adopt its version and resend our diff once.
+        applyDelta({ ...error.payload, state: error.payload.state || {} });
+        result = await sendDelta();
+      }
+      applyDelta(result);
     });
     stateSaveChain = operation;
     return operation;
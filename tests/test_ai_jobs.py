@@ -0,0 +1,199 @@
+"""AI grading job queue: submit, claim, retry with jitter, timeouts and polling."""
+
+import unittest
+from datetime import UTC, datetime, timedelta
+from unittest import mock
+
+import jwt
+from flask import Flask
+
+from api.ai_jobs import ai_jobs_bp
+from api.ielts_eval import eval_bp
+from models import AiJob, User, db, utcnow_naive
+from services import ai_jobs
+
+
+class AiJobsTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SECRET_KEY="ai-jobs-test",
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+        )
+        db.init_app(self.app)
+        self.app.register_blueprint(ai_jobs_bp)
+        self.app.register_blueprint(eval_bp)
+        self.client = self.app.test_client()
+        self.responses = []
+
+        def handler(payload):
+            outcome = self.responses.pop(0) if self.responses else ({"ok": True, "echo": payload}, 200)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        patcher = mock.patch.dict(
+            ai_jobs._HANDLERS,
+            {"echo": ai_jobs.JobKind(handler, max_attempts=2, timeout_seconds=60)},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="ai_job_student", password_hash="x", role=User.ROLE_STUDENT)
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _submit(self, payload=None):
+        with self.app.test_request_context():
+            return ai_jobs.submit_job("echo", payload or {"n": 1}).job_key
+
+    def _run_next(self):
+        with self.app.app_context():
+            job = ai_jobs.claim_next_job("test-worker")
+            if job is None:
+                return None
+            ai_jobs.run_job(job)
+            return job.job_key
+
+    def _job(self, key):
+        with self.app.app_context():
+            return ai_jobs.get_job(key)
+
+    def test_submit_run_and_poll_result(self):
+        key = self._submit({"n": 7})
+        pending = self.client.get(f"/api/ai-jobs/{key}").get_json()
+        self.assertEqual(pending["job"]["status"], AiJob.STATUS_QUEUED)
+        self.assertNotIn("result", pending)
+
+        self.assertEqual(self._run_next(), key)
+        self.assertIsNone(self._run_next())
+        done = self.client.get(f"/api/ai-jobs/{key}").get_json()
+        self.assertEqual(done["job"]["status"], AiJob.STATUS_DONE)
+        self.assertEqual(done["result"], {"ok": True, "echo": {"n": 7}})
+        self.assertEqual(done["result_status"], 200)
+
+    def test_upstream_502_is_retried_after_jittered_backoff(self):
+        self.responses = [({"ok": False, "error": "deepseek_http_error"}, 502)]
+        key = self._submit()
+        with mock.patch.object(ai_jobs.random, "uniform", return_value=1.5):
+            self._run_next()
+        job = self._job(key)
+        self.assertEqual(job.status, AiJob.STATUS_QUEUED)
+        self.assertGreater(job.available_at, utcnow_naive() + timedelta(seconds=2.5))
+        # Not due yet, so nothing is claimable.
+        self.assertIsNone(self._run_next())
+
+        with self.app.app_context():
+            db.session.get(AiJob, job.id).available_at = utcnow_naive()
+            db.session.commit()
+        self._run_next()
+        job = self._job(key)
+        self.assertEqual((job.status, job.attempts, job.result_status), (AiJob.STATUS_DONE, 2, 200))
+
+    def test_handler_exception_fails_after_max_attempts(self):
+        self.responses = [RuntimeError("boom"), RuntimeError("boom again")]
+        key = self._submit()
+        with mock.patch.object(ai_jobs, "retry_delay_seconds", return_value=0):
+            self._run_next()
+            self._run_next()
+        job = self._job(key)
+        self.assertEqual(job.status, AiJob.STATUS_ERROR)
+        self.assertEqual(job.error, "boom again")
+        payload = self.client.get(f"/api/ai-jobs/{key}").get_json()
+        self.assertEqual(payload["job"]["error"], "boom again")
+
+    def test_jobs_past_their_timeout_are_requeued_then_failed(self):
+        key = self._submit()
+        with self.app.app_context():
+            claimed = ai_jobs.claim_next_job("dead-worker")
+            claimed.started_at = utcnow_naive() - timedelta(seconds=61)
+            db.session.commit()
+            self.assertEqual(ai_jobs.requeue_timed_out_jobs(), 1)
+            self.assertEqual(ai_jobs.get_job(key).status, AiJob.STATUS_QUEUED)
+            claimed = ai_jobs.claim_next_job("dead-worker")
+            claimed.started_at = utcnow_naive() - timedelta(seconds=61)
+            db.session.commit()
+            ai_jobs.requeue_timed_out_jobs()
+            job = ai_jobs.get_job(key)
+            self.assertEqual((job.status, job.error), (AiJob.STATUS_ERROR, "ai_job_timeout"))
+
+    def test_result_from_a_lost_claim_is_dropped(self):
+        key = self._submit()
+
+        def slow_handler(payload):
+            # The job overran its timeout and another worker took it meanwhile.
+            job = db.session.get(AiJob, claimed_id)
+            job.started_at = utcnow_naive() - timedelta(seconds=61)
+            db.session.commit()
+            ai_jobs.requeue_timed_out_jobs()
+            ai_jobs.claim_next_job("second-worker")
+            return {"ok": True, "from": "first"}, 200
+
+        with self.app.app_context(), mock.patch.dict(
+            ai_jobs._HANDLERS, {"echo": ai_jobs.JobKind(slow_handler, max_attempts=2, timeout_seconds=60)}
+        ):
+            claimed = ai_jobs.claim_next_job("first-worker")
+            claimed_id = claimed.id
+            ai_jobs.run_job(claimed)
+        job = self._job(key)
+        self.assertEqual((job.status, job.attempts), (AiJob.STATUS_PROCESSING, 2))
+        self.assertTrue(job.worker_id.startswith("second-worker"))
+        self.assertIsNone(job.result_json)
+
+    def test_long_poll_is_capped(self):
+        key = self._submit()
+        with self.app.app_context():
+            job = ai_jobs.get_job(key)
+            clock = iter(range(0, 100))
+            with mock.patch.object(ai_jobs.time, "sleep"), mock.patch.object(
+                ai_jobs.time, "monotonic", side_effect=lambda: float(next(clock))
+            ):
+                job = ai_jobs.wait_for_job(job, 60)
+            self.assertEqual(job.status, AiJob.STATUS_QUEUED)
+            self.assertLessEqual(next(clock), ai_jobs.MAX_WAIT_SECONDS + 2)
+
+    def test_long_poll_returns_when_job_finishes(self):
+        key = self._submit()
+        with self.app.app_context():
+            job = ai_jobs.get_job(key)
+            with mock.patch.object(ai_jobs.time, "sleep", side_effect=lambda _s: self._run_next()):
+                job = ai_jobs.wait_for_job(job, 5)
+            self.assertEqual(job.status, AiJob.STATUS_DONE)
+
+    def test_run_worker_drains_queue(self):
+        keys = [self._submit({"n": i}) for i in range(3)]
+        processed = ai_jobs.run_worker(self.app, stop_when_idle=True)
+        self.assertEqual(processed, 3)
+        self.assertEqual([self._job(k).status for k in keys], [AiJob.STATUS_DONE] * 3)
+
+    def test_ielts_evaluate_opts_in_with_async_flag(self):
+        token = jwt.encode(
+            {"sub": str(self.user_id), "exp": int((datetime.now(UTC) + timedelta(hours=1)).timestamp())},
+            "ai-jobs-test",
+            algorithm="HS256",
+        )
+        response = self.client.post(
+            "/api/v1/ielts/evaluate",
+            json={"async": True, "transcript": "I enjoy hiking."},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+        self.assertEqual(body["job"]["kind"], "ielts_eval")
+        self.assertEqual(body["poll_url"], f"/api/ai-jobs/{body['job']['key']}")
+        job = self._job(body["job"]["key"])
+        self.assertEqual(job.created_by_id, self.user_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import time
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+import toefl_practice
+from api import ielts_eval
+from models import AiResponseCache, db
+from services import ai_response_cache
+
+
+def _deepseek_response(content, status=200):
+    response = mock.Mock(status_code=status, text=json.dumps(content))
+    response.json.return_value = {
+        "choices": [{"message": {"content": json.dumps(content)}}],
+        "model": "deepseek-chat",
+        "usage": {"total_tokens": 10},
+    }
+    response.raise_for_status.return_value = None
+    return response
+
+
+class AiResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+            DEEPSEEK_API_KEY="test-key",
+            AI_RESPONSE_CACHE_TTL=3600,
+            AI_RESPONSE_CACHE_MAX_ENTRIES=100,
+        )
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        ai_response_cache.reset_stats()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_identical_ielts_eval_is_served_from_cache(self):
+        upstream = _deepseek_response({"overall_band": 6.5})
+        with mock.patch.object(ielts_eval.http_client, "post", return_value=upstream) as post:
+            first, status = ielts_eval.run_ielts_eval({"transcript": "I like  reading books.", "part": "Part1"})
+            second, second_status = ielts_eval.run_ielts_eval({"transcript": "I like reading   books.", "part": "Part1"})
+        self.assertEqual((status, second_status), (200, 200))
+        self.assertEqual(post.call_count, 1)
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["result"], first["result"])
+        self.assertEqual(ai_response_cache.stats()["ielts_eval"]["hits"], 1)
+        self.assertEqual(db.session.get(AiResponseCache, db.session.query(AiResponseCache.cache_key).scalar()).hit_count, 1)
+
+    def test_key_ignores_spacing_but_keeps_paragraphs(self):
+        key = lambda text: ai_response_cache.cache_key("ielts_eval", "m", "v1", {"essay": text})  # noqa: E731
+        essay = "First point  here.\n\nSecond point."
+        self.assertEqual(key(essay), key("  First point here. \r\n\r\nSecond   point.\n"))
+        self.assertNotEqual(key(essay), key("First point here. Second point."))
+        self.assertNotEqual(key(essay), key("First point here.\nSecond point."))
+
+    def test_different_input_model_or_failure_is_not_reused(self):
+        failing = _deepseek_response({}, status=500)
+        with mock.patch.object(ielts_eval.http_client, "post", return_value=failing):
+            _, status = ielts_eval.run_ielts_eval({"transcript": "Hello there."})
+        self.assertEqual(status, 502)
+        self.assertEqual(AiResponseCache.query.count(), 0)
+
+        with mock.patch.object(ielts_eval.http_client, "post", return_value=_deepseek_response({"reply_text": "Hi"})) as post:
+            ielts_eval.run_quick_reply({"transcript": "Hello there."})
+            ielts_eval.run_quick_reply({"transcript": "Hello again."})
+            self.app.config["DEEPSEEK_MODEL"] = "deepseek-reasoner"
+            ielts_eval.run_quick_reply({"transcript": "Hello there."})
+        self.assertEqual(post.call_count, 3)
+
+    def test_expired_entries_miss_and_prune_enforces_size(self):
+        ai_response_cache.store("ns", "m", "v1", {"q": 1}, {"answer": 1})
+        self.assertEqual(ai_response_cache.lookup("ns", "m", "v1", {"q": 1}), {"answer": 1})
+        self.assertIsNone(ai_response_cache.lookup("ns", "m", "v2", {"q": 1}))
+
+        with mock.patch.object(ai_response_cache.time, "time", return_value=time.time() + 7200):
+            self.assertIsNone(ai_response_cache.lookup("ns", "m", "v1", {"q": 1}))
+
+        self.app.config["AI_RESPONSE_CACHE_MAX_ENTRIES"] = 2
+        for i in range(4):
+            ai_response_cache.store("ns", "m", "v1", {"q": i}, {"answer": i})
+        ai_response_cache.lookup("ns", "m", "v1", {"q": 0})
+        ai_response_cache.prune()
+        self.assertEqual(AiResponseCache.query.count(), 2)
+        self.assertEqual(ai_response_cache.lookup("ns", "m", "v1", {"q": 0}), {"answer": 0})
+
+    def test_zero_ttl_disables_cache(self):
+        self.app.config["AI_RESPONSE_CACHE_TTL"] = 0
+        ai_response_cache.store("ns", "m", "v1", {"q": 1}, {"answer": 1})
+        self.assertEqual(AiResponseCache.query.count(), 0)
+        self.assertIsNone(ai_response_cache.lookup("ns", "m", "v1", {"q": 1}))
+
+    def test_missing_table_is_a_miss(self):
+        AiResponseCache.__table__.drop(bind=db.engine)
+        self.assertIsNone(ai_response_cache.lookup("ns", "m", "v1", {"q": 1}))
+        ai_response_cache.store("ns", "m", "v1", {"q": 1}, {"answer": 1})
+        AiResponseCache.__table__.create(bind=db.engine)
+
+    def test_toefl_grading_reuses_cached_grade(self):
+        upstream = _deepseek_response({"score": 4, "feedback_zh": "不错"})
+        question = {"task_type": "email", "prompt": "Write to your professor."}
+        with mock.patch.object(toefl_practice.http_client, "post", return_value=upstream) as post:
+            first = toefl_practice._evaluate_writing(question, "Dear Professor, I am writing to ask.")
+            second = toefl_practice._evaluate_writing(question, "Dear Professor,  I am writing to ask.")
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
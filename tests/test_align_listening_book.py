@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scripts import align_listening_book as pipeline
+from services.listening_asr_cache import WordTimestampCache, file_sha256
+
+SENTENCES = ["Welcome to the city library.", "The reading room is upstairs."]
+
+
+def fake_whisper_result():
+    words, t = [], 2.0
+    for sentence in SENTENCES:
+        for token in sentence.split():
+            words.append({"word": f" {token}", "start": round(t, 2), "end": round(t + 0.3, 2)})
+            t += 0.3
+        t += 0.8
+    return {"segments": [{"start": 2.0, "end": t, "text": " ".join(SENTENCES), "words": words}]}
+
+
+class AlignListeningBookTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.input_dir = root / "input"
+        self.output_dir = root / "out"
+        self.cache_dir = root / "cache"
+        self.input_dir.mkdir()
+        self.audio = self.input_dir / "cam20_test1_s1.mp3"
+        self.audio.write_bytes(b"ID3 fake audio")
+        (self.input_dir / "cam20_test1_s1.txt").write_text("\n".join(SENTENCES), encoding="utf-8")
+        (self.input_dir / "cam20_test1_s1.zh.txt").write_text("欢迎。\n阅览室在楼上。", encoding="utf-8")
+        (self.input_dir / "orphan.wav").write_bytes(b"RIFF")
+        self.options = {
+            "output_dir": str(self.output_dir),
+            "cache_dir": str(self.cache_dir),
+            "model": "small",
+            "strategy": "lcs",
+            "title_template": "Cam 20 {id}",
+            "resume": False,
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_run_transcribes_and_rerun_hits_cache(self):
+        pairs = pipeline.discover_pairs(self.input_dir)
+        self.assertEqual({p["id"] for p in pairs}, {"cam20_test1_s1", "orphan"})
+
+        with mock.patch.object(pipeline, "_transcribe", return_value=fake_whisper_result()) as asr, \
+                mock.patch.object(pipeline, "get_audio_duration", return_value=12.0):
+            report = pipeline.run_pipeline(pairs, self.options, workers=1)
+            self.assertEqual(asr.call_count, 1)
+        self.assertEqual([r["id"] for r in report["failed"]], ["orphan"])
+        self.assertFalse(report["processed"][0]["asr_cached"])
+
+        payload = json.loads((self.output_dir / "cam20_test1_s1.json").read_text(encoding="utf-8"))
+        self.assertEqual(payload["title"], "Cam 20 cam20_test1_s1")
+        self.assertEqual(payload["audio"], "cam20_test1_s1.mp3")
+        segments = payload["parts"][0]["segments"]
+        self.assertEqual([s["start"] for s in segments], [2.0, 4.3])
+        self.assertEqual(segments[1]["translation"], "阅览室在楼上。")
+        self.assertTrue((self.output_dir / "cam20_test1_s1.mp3").exists())
+
+        entry = WordTimestampCache(self.cache_dir, "small").load(file_sha256(self.audio))
+        self.assertEqual(entry["duration"], 12.0)
+
+        with mock.patch.object(pipeline, "_transcribe", side_effect=AssertionError("no ASR on rerun")):
+            rerun = pipeline.run_pipeline(pipeline.discover_pairs(self.input_dir), self.options, workers=1)
+        self.assertTrue(rerun["processed"][0]["asr_cached"])
+
+    def test_resume_skips_existing_outputs(self):
+        self.output_dir.mkdir()
+        (self.output_dir / "cam20_test1_s1.json").write_text("{}", encoding="utf-8")
+        pairs = [p for p in pipeline.discover_pairs(self.input_dir) if p["id"] == "cam20_test1_s1"]
+        report = pipeline.run_pipeline(pairs, dict(self.options, resume=True), workers=1)
+        self.assertEqual(report["skipped"], ["cam20_test1_s1"])
+
+    def test_cache_entry_for_other_model_is_ignored(self):
+        digest = file_sha256(self.audio)
+        WordTimestampCache(self.cache_dir, "base").store(digest, fake_whisper_result(), 12.0)
+        self.assertIsNone(WordTimestampCache(self.cache_dir, "small").load(digest))
+        self.assertIsNotNone(WordTimestampCache(self.cache_dir, "base").load(digest))
+
+
+if __name__ == "__main__":
+    unittest.main()
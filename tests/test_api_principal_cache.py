@@ -0,0 +1,219 @@
+import unittest
+from datetime import UTC, datetime, timedelta
+from unittest import mock
+
+import jwt
+from flask import Flask, jsonify, request
+from sqlalchemy import event
+
+from api import auth_utils
+from api.auth_utils import (
+    ApiPrincipal,
+    PrincipalCache,
+    get_principal_cache,
+    require_api_user,
+    revoke_token,
+)
+from api.miniprogram import mp_bp
+from models import StudentProfile, User, db
+
+
+def _token(user_id, secret="test-secret"):
+    payload = {
+        "sub": str(user_id),
+        "exp": int((datetime.now(UTC) + timedelta(hours=1)).timestamp()),
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+class PrincipalCacheAuthTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SECRET_KEY="test-secret",
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+        )
+        db.init_app(self.app)
+        self.app.register_blueprint(mp_bp)
+
+        @self.app.get("/me")
+        @require_api_user()
+        def me():
+            user = request.current_api_user
+            return jsonify({
+                "ok": True,
+                "user_id": user.id,
+                "username": user.username,
+                "student_profile_id": request.api_principal.student_profile_id,
+            })
+
+        @self.app.post("/me/rename")
+        @require_api_user()
+        def rename():
+            user = request.current_api_user
+            user.display_name = request.get_json()["display_name"]
+            db.session.commit()
+            return jsonify({"ok": True})
+
+        @self.app.get("/teacher-only")
+        @require_api_user(User.ROLE_TEACHER)
+        def teacher_only():
+            return jsonify({"ok": True})
+
+        @self.app.post("/logout")
+        @require_api_user()
+        def logout():
+            revoke_token(request.current_api_user)
+            return jsonify({"ok": True})
+
+        with self.app.app_context():
+            db.create_all()
+            student = User(username="cache_student", password_hash="x", role=User.ROLE_STUDENT)
+            teacher = User(username="cache_teacher", password_hash="x", role=User.ROLE_TEACHER)
+            db.session.add_all([student, teacher])
+            db.session.flush()
+            profile = StudentProfile(user_id=student.id, full_name="Cache Student")
+            db.session.add(profile)
+            db.session.commit()
+            self.student_id = student.id
+            self.teacher_id = teacher.id
+            self.profile_id = profile.id
+
+        self.client = self.app.test_client()
+        self.user_selects = 0
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _headers(self, user_id):
+        return {"Authorization": f"Bearer {_token(user_id)}"}
+
+    def _count_user_selects(self):
+        with self.app.app_context():
+            engine = db.engine
+
+        def before_execute(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM user" in statement:
+                self.user_selects += 1
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", before_execute)
+
+    def _set_user(self, user_id, **values):
+        with self.app.app_context():
+            user = db.session.get(User, user_id)
+            for key, value in values.items():
+                setattr(user, key, value)
+            db.session.commit()
+
+    def test_repeated_calls_read_user_table_once(self):
+        self._count_user_selects()
+        headers = self._headers(self.student_id)
+        for _ in range(5):
+            response = self.client.get("/me", headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()["username"], "cache_student")
+            self.assertEqual(response.get_json()["student_profile_id"], self.profile_id)
+        self.assertEqual(self.user_selects, 1)
+        cache = get_principal_cache(self.app)
+        self.assertEqual((cache.hits, cache.misses), (4, 1))
+
+    def test_student_handlers_take_profile_id_from_the_principal(self):
+        headers = self._headers(self.student_id)
+        self.client.get("/me", headers=headers)
+        with self.app.app_context():
+            engine = db.engine
+        profile_selects = []
+
+        def before_execute(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM student_profile" in statement:
+                profile_selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", before_execute)
+        response = self.client.get("/api/miniprogram/speaking/sessions", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["sessions"], [])
+        self.assertEqual(profile_selects, [])
+
+        teacher = self.client.get("/api/miniprogram/speaking/sessions", headers=self._headers(self.teacher_id))
+        self.assertEqual(teacher.status_code, 403)
+
+    def test_cached_user_is_session_bound_and_writable(self):
+        headers = self._headers(self.student_id)
+        self.client.get("/me", headers=headers)
+        response = self.client.post("/me/rename", headers=headers, json={"display_name": "Renamed"})
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            user = db.session.get(User, self.student_id)
+            self.assertEqual(user.display_name, "Renamed")
+            self.assertEqual(user.username, "cache_student")
+
+    def test_deactivation_invalidates_cached_principal(self):
+        headers = self._headers(self.student_id)
+        self.assertEqual(self.client.get("/me", headers=headers).status_code, 200)
+        self._set_user(self.student_id, is_active=False)
+        response = self.client.get("/me", headers=headers)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.get_json()["error"], "user_inactive")
+
+    def test_role_change_invalidates_cached_principal(self):
+        headers = self._headers(self.teacher_id)
+        self.assertEqual(self.client.get("/teacher-only", headers=headers).status_code, 200)
+        self._set_user(self.teacher_id, role=User.ROLE_ASSISTANT)
+        self.assertEqual(self.client.get("/teacher-only", headers=headers).status_code, 403)
+
+    def test_revoke_token_drops_cache_entries(self):
+        headers = self._headers(self.student_id)
+        self.client.get("/me", headers=headers)
+        self.assertEqual(len(get_principal_cache(self.app)), 1)
+        self.assertEqual(self.client.post("/logout", headers=headers).status_code, 200)
+        self.assertEqual(len(get_principal_cache(self.app)), 0)
+
+    def test_invalid_token_is_rejected_before_cache(self):
+        response = self.client.get("/me", headers={"Authorization": "Bearer not-a-jwt"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(get_principal_cache(self.app)), 0)
+
+
+class PrincipalCacheUnitTest(unittest.TestCase):
+    def _principal(self, user_id, token_hash):
+        return ApiPrincipal(user_id, User.ROLE_STUDENT, True, None, token_hash)
+
+    def test_lru_bound_evicts_least_recently_used(self):
+        cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+        cache.put(self._principal(1, "a"), {})
+        cache.put(self._principal(2, "b"), {})
+        cache.get("a")
+        cache.put(self._principal(3, "c"), {})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire_after_ttl(self):
+        cache = PrincipalCache(ttl_seconds=30, max_entries=8)
+        with mock.patch.object(auth_utils.time, "monotonic", return_value=100.0):
+            cache.put(self._principal(1, "a"), {})
+        with mock.patch.object(auth_utils.time, "monotonic", return_value=129.0):
+            self.assertIsNotNone(cache.get("a"))
+        with mock.patch.object(auth_utils.time, "monotonic", return_value=131.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_user_drops_every_token_of_that_user(self):
+        cache = PrincipalCache(ttl_seconds=60, max_entries=8)
+        cache.put(self._principal(1, "a"), {})
+        cache.put(self._principal(1, "b"), {})
+        cache.put(self._principal(2, "c"), {})
+        cache.invalidate_user(1)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""The shared on-demand flush thread behind the in-process write buffers."""
+
+import threading
+import unittest
+
+from flask import Flask
+
+from services.background_flush import BackgroundFlusher
+
+
+class BackgroundFlusherTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.lock = threading.Lock()
+        self.items = []
+        self.flushed = []
+
+        def flush_once(app):
+            with self.lock:
+                batch, self.items[:] = list(self.items), []
+            if batch == ["boom"]:
+                raise RuntimeError("flush failed")
+            self.flushed.extend(batch)
+
+        self.worker = BackgroundFlusher(
+            "test-flush", self.lock, flush_once, lambda: not self.items, config_flag="TEST_BACKGROUND_FLUSH"
+        )
+
+    def _add(self, item):
+        with self.lock:
+            self.items.append(item)
+            self.worker.wake(self.app)
+            return self.worker._thread
+
+    def test_thread_exits_when_empty_and_restarts_on_wake(self):
+        first = self._add("a")
+        first.join(5)
+        self.assertIsNone(self.worker._thread)
+        # A failing flush is logged; the thread still exits and the next item starts a new one.
+        self._add("boom").join(5)
+        second = self._add("b")
+        self.assertIsNot(second, first)
+        second.join(5)
+        self.assertEqual(self.flushed, ["a", "b"])
+
+    def test_config_flag_turns_the_thread_off(self):
+        self.app.config["TEST_BACKGROUND_FLUSH"] = False
+        self.assertIsNone(self._add("a"))
+        self.assertEqual(self.flushed, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
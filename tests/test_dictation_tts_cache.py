@@ -157,17 +157,17 @@ class DictationTtsHybridTest(unittest.TestCase):
             status_code = 200
             content = b"AUDIO"
 
-        def fake_get(url, timeout=None):
+        def fake_get(provider, url, timeout=None):
             captured["url"] = url
             return _FakeResp()
 
-        original_get = dictation_mod.requests.get
-        dictation_mod.requests.get = fake_get
+        original_get = dictation_mod.http_client.get
+        dictation_mod.http_client.get = fake_get
         try:
             with app.app_context():
                 result = dictation_mod._youdao_tts("inhabitant.")
         finally:
-            dictation_mod.requests.get = original_get
+            dictation_mod.http_client.get = original_get
 
         self.assertEqual(result, b"AUDIO")
         self.assertIn("audio=inhabitant&", captured["url"])
@@ -3,10 +3,13 @@ import tempfile
 import unittest
 from datetime import datetime, timedelta
 from pathlib import Path
+from unittest import mock
 
 from flask import Flask
 from flask_login import LoginManager
+from sqlalchemy import event
 
+from api import entrance, entrance_session
 from api.entrance import entrance_bp
 from models import (
     EntranceTestAnswer,
@@ -31,9 +34,14 @@ class EntranceSessionRouteTests(unittest.TestCase):
             SECRET_KEY="test-secret",
             SQLALCHEMY_DATABASE_URI=f"sqlite:///{database_path}",
             SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            ENTRANCE_HEARTBEAT_BACKGROUND_FLUSH=False,
         )
         db.init_app(self.app)
         self.app.register_blueprint(entrance_bp)
+        entrance_session.HEARTBEATS.clear()
+        self.addCleanup(entrance_session.HEARTBEATS.clear)
+        entrance._student_papers.clear()
+        self.addCleanup(entrance._student_papers.clear)
 
         login_manager = LoginManager()
         login_manager.init_app(self.app)
@@ -156,6 +164,116 @@ class EntranceSessionRouteTests(unittest.TestCase):
             "A",
         )
 
+    def count_draft_updates(self):
+        statements = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE ENTRANCE_TEST_DRAFT"):
+                statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", listener)
+        return statements
+
+    def save(self, answers):
+        return self.client.post(
+            f"/api/entrance/session/{self.token}/save",
+            json={"device_id": "device-aaaaaaaa", "answers": answers},
+        )
+
+    def test_autosave_merges_changed_answers_only(self):
+        self.assertEqual(self.start().status_code, 200)
+        with self.app.app_context():
+            second = EntranceTestQuestion(
+                section_id=self.section_id,
+                sequence=2,
+                question_type="short_answer",
+                stem="Spell it",
+                correct_answer="cat",
+                points=1,
+            )
+            db.session.add(second)
+            db.session.commit()
+            second_id = second.id
+
+        self.assertEqual(self.save([{"question_id": self.question_id, "answer_text": "A"}]).status_code, 200)
+        # A new question invalidates the cached question ids; omitted answers are kept.
+        saved = self.save([{"question_id": second_id, "answer_text": "cat"}])
+        self.assertEqual(
+            saved.get_json()["session"]["answers"],
+            {str(self.question_id): "A", str(second_id): "cat"},
+        )
+
+        updates = self.count_draft_updates()
+        unchanged = self.save([{"question_id": second_id, "answer_text": "cat"}])
+        self.assertEqual(unchanged.status_code, 200)
+        self.assertEqual(updates, [])
+
+    def test_heartbeats_are_buffered_and_flushed_in_batches(self):
+        self.assertEqual(self.start().status_code, 200)
+        with self.app.app_context():
+            draft = EntranceTestDraft.query.filter_by(invitation_id=self.invitation_id).one()
+            draft.last_seen_at = datetime.utcnow() - timedelta(seconds=100)
+            db.session.commit()
+            draft_id = draft.id
+
+        updates = self.count_draft_updates()
+        beat = self.client.post(
+            f"/api/entrance/session/{self.token}/event",
+            json={"device_id": "device-aaaaaaaa", "event": "heartbeat"},
+        )
+        self.assertEqual(beat.status_code, 200)
+        self.assertEqual(updates, [])
+        buffered = entrance_session.HEARTBEATS.last_seen(draft_id)
+        self.assertEqual(beat.get_json()["session"]["last_seen_at"], buffered.isoformat())
+
+        # The gap check on resume sees the buffered heartbeat, not the stale row.
+        with self.app.app_context():
+            draft = db.session.get(EntranceTestDraft, draft_id)
+            draft.last_seen_at = datetime.utcnow() - timedelta(seconds=300)
+            db.session.commit()
+        self.assertEqual(self.start().status_code, 200)
+
+        with self.app.app_context():
+            self.assertEqual(entrance_session.HEARTBEATS.flush(), 1)
+            db.session.commit()
+            draft = db.session.get(EntranceTestDraft, draft_id)
+            self.assertGreaterEqual(draft.last_seen_at, buffered)
+            self.assertFalse(draft.is_locked)
+
+    def test_student_paper_is_cached_and_served_with_etag(self):
+        started = self.start()
+        self.assertEqual(started.status_code, 200)
+        etag = started.get_json()["paper_etag"]
+        headers = {"X-Entrance-Device": "device-aaaaaaaa"}
+        path = f"/api/entrance/session/{self.token}/paper"
+
+        first = self.client.get(path, headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json()["paper"]["sections"][0]["questions"][0]["stem"], "Choose A")
+        self.assertEqual(first.headers["ETag"], f'"{etag}"')
+        not_modified = self.client.get(path, headers={**headers, "If-None-Match": f'"{etag}"'})
+        self.assertEqual(not_modified.status_code, 304)
+
+        with mock.patch.object(
+            entrance, "_serialize_paper_for_student", wraps=entrance._serialize_paper_for_student
+        ) as serialize:
+            self.client.get(path, headers=headers)
+            self.assertEqual(serialize.call_count, 0)
+
+            self.login_teacher()
+            edited = self.client.patch(
+                f"/api/entrance/admin/questions/{self.question_id}",
+                json={"stem": "Choose B", "options": [{"key": "A", "text": "A"}, {"key": "B", "text": "B"}]},
+            )
+            self.assertEqual(edited.status_code, 200)
+            changed = self.client.get(path, headers={**headers, "If-None-Match": f'"{etag}"'})
+            self.assertEqual(serialize.call_count, 1)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json()["paper"]["sections"][0]["questions"][0]["stem"], "Choose B")
+
     def test_short_exit_resumes_but_long_exit_locks(self):
         self.assertEqual(self.start().status_code, 200)
         hidden = self.client.post(
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from services import file_fingerprints
+from services.file_fingerprints import FingerprintIndex
+
+
+class FingerprintIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        self.index_path = self.root / "index" / "index.json"
+        self.source = self.root / "materials"
+        self.source.mkdir()
+
+    def write(self, name: str, data: bytes) -> Path:
+        path = self.source / name
+        path.write_bytes(data)
+        return path
+
+    def test_unchanged_files_are_not_rehashed_across_runs(self):
+        paths = [self.write(f"{n}.pdf", f"paper {n}".encode()) for n in range(3)]
+        first = FingerprintIndex(self.index_path)
+        digests = first.sha256_many(paths, workers=2)
+        first.save()
+        self.assertEqual(digests[0], file_fingerprints.sha256_file(paths[0]))
+
+        paths[1].write_bytes(b"paper 1, revised")
+        os.utime(paths[1], ns=(1, 1))
+        second = FingerprintIndex(self.index_path)
+        real_hash = file_fingerprints.sha256_file
+        with mock.patch.object(file_fingerprints, "sha256_file", side_effect=real_hash) as hashed:
+            again = second.sha256_many(paths, workers=2)
+        self.assertEqual(hashed.call_args_list, [mock.call(paths[1])])
+        self.assertEqual((second.hits, second.misses), (2, 1))
+        self.assertEqual(again[0], digests[0])
+        self.assertNotEqual(again[1], digests[1])
+
+    def test_moved_file_and_derived_values_are_reused(self):
+        original = self.write("listening.mp3", b"audio")
+        index = FingerprintIndex(self.index_path)
+        probe = mock.Mock(return_value={"media_status": "playable"})
+        index.derived(original, "media_probe", probe)
+        index.save()
+
+        moved = self.source / "renamed.mp3"
+        original.rename(moved)
+        reloaded = FingerprintIndex(self.index_path)
+        self.assertEqual(reloaded.derived(moved, "media_probe", probe), {"media_status": "playable"})
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(reloaded.misses, 0)
+        reloaded.save()
+        self.assertNotIn(str(original.resolve()), self.index_path.read_text(encoding="utf-8"))
+
+    def test_extracted_text_is_stored_by_hash(self):
+        pdf = self.write("og.pdf", b"%PDF")
+        extract = mock.Mock(return_value="1. Question text")
+        index = FingerprintIndex(self.index_path)
+        self.assertEqual(index.text(pdf, "pdftotext_layout", extract), "1. Question text")
+        index.save()
+
+        reloaded = FingerprintIndex(self.index_path)
+        self.assertEqual(reloaded.text(pdf, "pdftotext_layout", extract), "1. Question text")
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(len(list((self.index_path.parent / "text").glob("*.txt"))), 1)
+
+    def test_in_memory_index_always_extracts(self):
+        pdf = self.write("og.pdf", b"%PDF")
+        extract = mock.Mock(return_value="text")
+        index = FingerprintIndex()
+        index.text(pdf, "pdftotext_layout", extract)
+        index.save()
+        self.assertEqual(extract.call_count, 1)
+        self.assertFalse(self.index_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+from services import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self):
+        server = self.server
+        server.peers.append(self.client_address)
+        status = server.statuses.pop(0) if server.statuses else 200
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.peers = []
+        self.server.statuses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ping"
+        policies = mock.patch.dict(
+            http_client.POLICIES,
+            {"test": http_client.ProviderPolicy(retries=2, backoff_factor=0, failure_threshold=2, cooldown_seconds=60)},
+        )
+        policies.start()
+        self.addCleanup(policies.stop)
+        http_client.reset()
+        self.addCleanup(http_client.reset)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_kept_alive_across_calls(self):
+        for _ in range(3):
+            self.assertEqual(http_client.get("test", self.url, timeout=2).status_code, 200)
+        self.assertEqual(len(self.server.peers), 3)
+        self.assertEqual(len(set(self.server.peers)), 1)
+
+    def test_get_retries_gateway_errors_but_post_is_not_replayed(self):
+        self.server.statuses = [503, 200]
+        self.assertEqual(http_client.get("test", self.url, timeout=2).status_code, 200)
+        self.assertEqual(len(self.server.peers), 2)
+
+        self.server.statuses = [503, 200]
+        self.assertEqual(http_client.post("test", self.url, json={"a": 1}, timeout=2).status_code, 503)
+        self.assertEqual(len(self.server.peers), 3)
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        self.server.statuses = [500, 500, 500]
+        http_client.post("test", self.url, timeout=2)
+        http_client.post("test", self.url, timeout=2)
+        with self.assertRaises(requests.RequestException):
+            http_client.post("test", self.url, timeout=2)
+        self.assertEqual(len(self.server.peers), 2)
+
+        metrics = http_client.metrics_snapshot()["test"]
+        self.assertEqual((metrics["requests"], metrics["server_errors"], metrics["rejected"]), (2, 2, 1))
+        self.assertEqual(metrics["circuit"], "open")
+
+    def test_half_open_trial_closes_or_reopens_breaker(self):
+        breaker = http_client.CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one trial call at a time
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_connection_errors_count_as_failures(self):
+        dead = "http://127.0.0.1:9/unreachable"
+        with mock.patch.dict(http_client.POLICIES, {"dead": http_client.ProviderPolicy(retries=0, failure_threshold=1)}):
+            with self.assertRaises(requests.ConnectionError):
+                http_client.get("dead", dead, timeout=1)
+            with self.assertRaises(http_client.CircuitOpenError):
+                http_client.get("dead", dead, timeout=1)
+        self.assertEqual(http_client.metrics_snapshot()["dead"]["errors"], 1)
+
+    def test_unexpected_error_in_half_open_trial_releases_it(self):
+        with mock.patch.dict(http_client.POLICIES, {"flaky": http_client.ProviderPolicy(failure_threshold=1, cooldown_seconds=0)}):
+            provider = http_client._provider("flaky")
+            provider.breaker.record_failure()
+            with mock.patch.object(provider.session, "request", side_effect=ValueError("bad body")):
+                with self.assertRaises(ValueError):
+                    http_client.get("flaky", self.url)
+            self.assertFalse(provider.breaker._trial_in_flight)
+            self.assertEqual(http_client.get("flaky", self.url, timeout=2).status_code, 200)
+            self.assertEqual(provider.breaker.state, "closed")
+
+    def test_word_lookup_providers_trip_independently(self):
+        google = http_client._provider("word_lookup_google")
+        for _ in range(google.policy.failure_threshold):
+            google.breaker.record_failure()
+        self.assertEqual(google.breaker.state, "open")
+        self.assertEqual(http_client._provider("word_lookup_youdao").breaker.state, "closed")
+
+    def test_scalar_timeout_gets_provider_connect_timeout(self):
+        policy = http_client.ProviderPolicy(connect_timeout=3.05, read_timeout=30)
+        self.assertEqual(http_client._timeout(policy, 90), (3.05, 90.0))
+        self.assertEqual(http_client._timeout(policy, 2), (2.0, 2.0))
+        self.assertEqual(http_client._timeout(policy, None), (3.05, 30))
+
+    def test_budget_timeout_fits_every_attempt(self):
+        # "test" allows 3 attempts: a GET may pay connect + read three times,
+        # a POST three connects but only one read.
+        connect, read = http_client.budget_timeout("test", "GET", 12)
+        self.assertLessEqual(3 * (connect + read), 12)
+        connect, read = http_client.budget_timeout("test", "POST", 12)
+        self.assertLessEqual(3 * connect + read, 12)
+        self.assertEqual((connect, read), (2.0, 6.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,12 @@ from __future__ import annotations
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
+from scripts import inventory_toefl_materials
 from scripts.inventory_toefl_materials import (
     build_inventory,
+    cached_probe,
     classify_file,
     extract_date,
     extract_variant,
@@ -110,6 +113,31 @@ class InventoryToeflMaterialsTest(unittest.TestCase):
             inventory["unmatched_relevant_files"],
         )
 
+    def test_failed_and_partial_probes_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "paper.pdf"
+            path.write_bytes(b"%PDF")
+            fingerprints = inventory_toefl_materials.FingerprintIndex()
+            failed = {"ocr_status": "pdf_read_error", "probe_error": "timeout", "pages": 3}
+            ok = {"ocr_status": "text_extractable", "pages": 3}
+            probe = mock.Mock(side_effect=[failed, ok, {"pages": 9}])
+            tools = ("pdftotext", "pdfinfo")
+
+            with mock.patch.object(inventory_toefl_materials.shutil, "which", return_value="/bin/tool"):
+                results = [cached_probe(fingerprints, path, "pdf_probe", tools, probe) for _ in range(3)]
+            self.assertEqual(results, [failed, ok, ok])
+            self.assertEqual(probe.call_count, 2)
+
+            with mock.patch.object(
+                inventory_toefl_materials.shutil,
+                "which",
+                side_effect=lambda tool: None if tool == "pdfinfo" else "/bin/tool",
+            ):
+                probe = mock.Mock(return_value={"ocr_status": "text_extractable", "pages": None})
+                cached_probe(fingerprints, path, "pdf_probe:missing_info", tools, probe)
+                cached_probe(fingerprints, path, "pdf_probe:missing_info", tools, probe)
+            self.assertEqual(probe.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
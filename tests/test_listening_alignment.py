@@ -0,0 +1,120 @@
+"""Forced-alignment engine: LCS backends, strategies and the upload path."""
+
+import random
+import unittest
+
+from services import listening_alignment as la
+
+try:
+    import numpy  # noqa: F401
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+def table_lcs(book, asr):
+    """Reference: the original O(nm) table with its tie-breaking traceback."""
+    n, m = len(book), len(asr)
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        for j in range(m - 1, -1, -1):
+            if book[i] == asr[j]:
+                dp[i][j] = dp[i + 1][j + 1] + 1
+            else:
+                dp[i][j] = max(dp[i + 1][j], dp[i][j + 1])
+    match, i, j = {}, 0, 0
+    while i < n and j < m:
+        if book[i] == asr[j]:
+            match[i] = j
+            i += 1
+            j += 1
+        elif dp[i + 1][j] >= dp[i][j + 1]:
+            i += 1
+        else:
+            j += 1
+    return match
+
+
+def words_for(sentences, start=10.0, step=0.4, drop=()):
+    words, t, k = [], start, 0
+    for sentence in sentences:
+        for token in sentence.split():
+            if k not in drop:
+                words.append({"word": token, "start": round(t, 2), "end": round(t + step, 2)})
+            t += step
+            k += 1
+        t += 1.0
+    return words
+
+
+class LcsMatchTest(unittest.TestCase):
+    def _random_pairs(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            vocab = [f"w{k}" for k in range(rng.randint(1, 6))]
+            book = [rng.choice(vocab) for _ in range(rng.randint(0, 30))]
+            asr = [rng.choice(vocab + ["noise"]) for _ in range(rng.randint(0, 30))]
+            yield book, asr
+
+    def test_python_backend_matches_original_table(self):
+        for book, asr in self._random_pairs():
+            self.assertEqual(la.lcs_match(book, asr, use_numpy=False), table_lcs(book, asr))
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+    def test_numpy_backend_matches_original_table(self):
+        for book, asr in self._random_pairs():
+            self.assertEqual(la.lcs_match(book, asr, use_numpy=True), table_lcs(book, asr))
+
+    def test_empty_inputs(self):
+        self.assertEqual(la.lcs_match([], ["a"]), {})
+        self.assertEqual(la.lcs_match(["a"], []), {})
+
+
+class AlignSentencesTest(unittest.TestCase):
+    SENTENCES = [
+        "Good morning, everyone.",
+        "Today we will visit the old harbour.",
+        "Lunch is at one o'clock.",
+        "Please stay together.",
+    ]
+
+    def test_lcs_interpolates_sentence_whisper_missed(self):
+        # Drop every ASR word of the third sentence.
+        words = words_for(self.SENTENCES, drop={10, 11, 12, 13, 14})
+        segments = la.align_sentences(self.SENTENCES, words, 60.0, strategy=la.STRATEGY_LCS)
+        self.assertEqual(len(segments), 4)
+        starts = [seg["start"] for seg in segments]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual(starts[0], 10.0)
+        self.assertGreater(segments[2]["start"], segments[1]["end"] - 0.01)
+        self.assertLess(segments[2]["start"], segments[3]["start"])
+
+    def test_greedy_strategy_is_available_through_same_api(self):
+        words = words_for(self.SENTENCES)
+        segments = la.align_sentences(self.SENTENCES, words, 60.0, strategy=la.STRATEGY_GREEDY)
+        self.assertEqual([seg["id"] for seg in segments], [1, 2, 3, 4])
+        self.assertEqual(segments[1]["start"], 12.2)
+
+    def test_unknown_strategy_rejected(self):
+        with self.assertRaises(ValueError):
+            la.align_sentences(self.SENTENCES, [], 0.0, strategy="dtw")
+
+
+class BuildListeningSegmentsTest(unittest.TestCase):
+    def test_upload_path_uses_word_level_lcs(self):
+        sentences = ["Hello and welcome to the radio show.", "Our first guest is a chef from Lyon."]
+        result = {
+            "segments": [
+                {"start": 10.0, "end": 20.0, "text": " ".join(sentences), "words": words_for(sentences)},
+            ]
+        }
+        segments = la.build_listening_segments(result, "\n".join(sentences), "欢迎。\n第一位嘉宾。")
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(segments[0]["start"], 10.0)
+        self.assertEqual(segments[1]["start"], 13.8)
+        self.assertEqual(segments[1]["translation"], "第一位嘉宾。")
+
+
+if __name__ == "__main__":
+    unittest.main()
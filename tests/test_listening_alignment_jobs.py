@@ -0,0 +1,209 @@
+"""Listening alignment job queue: claim, progress, cancel and retry."""
+
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from flask import Flask
+
+from models import ListeningAlignmentJob, db
+from services import listening_alignment_jobs as jobs
+from services.listening_alignment import build_listening_segments
+
+WHISPER_RESULT = {
+    "segments": [
+        {"start": 0.0, "end": 3.0, "text": " Welcome to the museum."},
+        {"start": 3.0, "end": 6.5, "text": " The tour starts at ten o'clock."},
+        {"start": 6.5, "end": 9.0, "text": " Please keep your tickets."},
+    ]
+}
+TRANSCRIPT = "Welcome to the museum.\nThe tour starts at ten o'clock.\nPlease keep your tickets."
+
+
+class ListeningAlignmentJobsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.tmp.name)
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+        )
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        self.tmp.cleanup()
+
+    def _enqueue(self, exercise_id="museum_tour", **kwargs):
+        audio = self.output_dir / f"{exercise_id}.mp3"
+        audio.write_bytes(b"ID3")
+        (self.output_dir / f"{exercise_id}.txt").write_text(TRANSCRIPT, encoding="utf-8")
+        job = jobs.enqueue_job(
+            exercise_id=exercise_id,
+            title="Museum Tour",
+            audio_path=str(audio),
+            audio_ext="mp3",
+            output_dir=str(self.output_dir),
+            transcript=TRANSCRIPT,
+            translation="欢迎来到博物馆。\n参观十点开始。\n请保管好门票。",
+            **kwargs,
+        )
+        return job.job_key
+
+    def test_worker_processes_job_and_writes_exercise(self):
+        calls = []
+
+        def transcribe(path):
+            calls.append(path)
+            return WHISPER_RESULT
+
+        with self.app.app_context():
+            key = self._enqueue()
+        processed = jobs.run_worker(self.app, transcribe=transcribe, stop_when_idle=True)
+
+        self.assertEqual(processed, 1)
+        self.assertEqual(len(calls), 1)
+        with self.app.app_context():
+            payload = jobs.job_status_payload(jobs.get_job(key))
+        self.assertEqual(payload["status"], "done")
+        self.assertEqual(payload["progress"], 100)
+        self.assertEqual(payload["segment_count"], 3)
+        data = json.loads((self.output_dir / "museum_tour.json").read_text(encoding="utf-8"))
+        self.assertEqual(data["audio"], "museum_tour.mp3")
+        self.assertEqual(data["parts"][0]["segments"][1]["translation"], "参观十点开始。")
+        self.assertFalse((self.output_dir / "museum_tour.txt").exists())
+
+    def test_cancel_queued_job_is_never_claimed(self):
+        with self.app.app_context():
+            key = self._enqueue()
+            self.assertTrue(jobs.request_cancel(jobs.get_job(key)))
+            self.assertIsNone(jobs.claim_next_job("w1"))
+            self.assertEqual(jobs.get_job(key).status, "cancelled")
+
+    def test_cancel_while_processing_stops_at_next_stage(self):
+        with self.app.app_context():
+            key = self._enqueue()
+            job = jobs.claim_next_job("w1")
+
+            def transcribe(_path):
+                jobs.request_cancel(jobs.get_job(key))
+                return WHISPER_RESULT
+
+            jobs.run_job(job, transcribe)
+            self.assertEqual(jobs.get_job(key).status, "cancelled")
+        self.assertFalse((self.output_dir / "museum_tour.json").exists())
+
+    def test_failure_retries_with_backoff_then_errors(self):
+        def broken(_path):
+            raise RuntimeError("ffmpeg missing")
+
+        with self.app.app_context():
+            key = self._enqueue(max_attempts=2)
+            jobs.run_job(jobs.claim_next_job("w1"), broken)
+            job = jobs.get_job(key)
+            self.assertEqual(job.status, "queued")
+            self.assertGreater(job.available_at, job.started_at)
+            # Backoff keeps the job out of reach until it is due.
+            self.assertIsNone(jobs.claim_next_job("w1"))
+
+            job.available_at = job.started_at
+            db.session.commit()
+            jobs.run_job(jobs.claim_next_job("w1"), broken)
+            job = jobs.get_job(key)
+            self.assertEqual(job.status, "error")
+            self.assertEqual(job.error, "ffmpeg missing")
+
+            self.assertTrue(jobs.retry_job(job))
+            self.assertEqual(jobs.get_job(key).status, "queued")
+            self.assertEqual(jobs.get_job(key).attempts, 0)
+
+    def test_max_running_caps_concurrent_claims(self):
+        with self.app.app_context():
+            self._enqueue("first")
+            self._enqueue("second")
+            first = jobs.claim_next_job("w1", max_running=1)
+            self.assertEqual(first.exercise_id, "first")
+            self.assertIsNone(jobs.claim_next_job("w2", max_running=1))
+            second = jobs.claim_next_job("w2", max_running=2)
+            self.assertEqual(second.exercise_id, "second")
+
+    def test_stale_processing_job_is_requeued(self):
+        with self.app.app_context():
+            key = self._enqueue()
+            job = jobs.claim_next_job("w1")
+            job.heartbeat_at = job.started_at.replace(year=job.started_at.year - 1)
+            db.session.commit()
+            self.assertEqual(jobs.requeue_stale_jobs(60), 1)
+            self.assertEqual(jobs.get_job(key).status, "queued")
+
+    def test_stale_job_out_of_attempts_fails_instead_of_requeueing(self):
+        with self.app.app_context():
+            key = self._enqueue(max_attempts=1)
+            job = jobs.claim_next_job("w1")
+            job.heartbeat_at = job.started_at.replace(year=job.started_at.year - 1)
+            db.session.commit()
+            self.assertEqual(jobs.requeue_stale_jobs(60), 1)
+            job = jobs.get_job(key)
+            self.assertEqual(job.status, "error")
+            self.assertIsNone(jobs.claim_next_job("w2"))
+
+    def test_heartbeat_is_refreshed_during_transcription(self):
+        seen = []
+
+        def slow(_path):
+            time.sleep(0.3)
+            with self.app.app_context():
+                seen.append(jobs.get_job(key).heartbeat_at)
+            return WHISPER_RESULT
+
+        with self.app.app_context(), mock.patch.object(jobs, "HEARTBEAT_SECONDS", 0.05):
+            key = self._enqueue()
+            job = jobs.claim_next_job("w1")
+            started = job.heartbeat_at
+            jobs.run_job(job, slow)
+            self.assertGreater(seen[0], started)
+            self.assertEqual(jobs.get_job(key).status, "done")
+
+    def test_requeued_claim_drops_its_result(self):
+        with self.app.app_context():
+            key = self._enqueue()
+            job = jobs.claim_next_job("w1")
+
+            def transcribe(_path):
+                # Another worker declared this run dead and claimed the job.
+                stale = jobs.get_job(key)
+                stale.heartbeat_at = stale.started_at.replace(year=stale.started_at.year - 1)
+                db.session.commit()
+                jobs.requeue_stale_jobs(60)
+                jobs.claim_next_job("w2")
+                return WHISPER_RESULT
+
+            jobs.run_job(job, transcribe)
+            job = jobs.get_job(key)
+            self.assertEqual(job.status, "processing")
+            self.assertTrue(job.worker_id.startswith("w2:"))
+        self.assertFalse((self.output_dir / "museum_tour.json").exists())
+
+
+class BuildListeningSegmentsTest(unittest.TestCase):
+    def test_single_line_transcript_is_split_and_aligned(self):
+        segments = build_listening_segments(WHISPER_RESULT, TRANSCRIPT.replace("\n", " "))
+        self.assertEqual([s["start"] for s in segments], [0.0, 3.0, 6.5])
+        self.assertEqual(segments[2]["text"], "Please keep your tickets.")
+
+    def test_skip_seconds_drops_intro(self):
+        segments = build_listening_segments(WHISPER_RESULT, "", skip_seconds=3.0)
+        self.assertEqual(segments[0]["text"], "The tour starts at ten o'clock.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import tempfile
+import time
+import unittest
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import jwt
+import requests
+from flask import Flask
+
+from api import ielts_eval, miniprogram
+from api.miniprogram import mp_bp
+from models import StudentProfile, User, db
+
+
+def _llm_result(delay):
+    def fake(data, *, budget_seconds=None):
+        time.sleep(delay)
+        return {
+            "ok": True,
+            "result": {
+                "scores": {
+                    "fluency_coherence": 6.0,
+                    "lexical_resource": 6.0,
+                    "grammar_range_accuracy": 6.0,
+                    "pronunciation": 6.0,
+                },
+                "reply_text": "Nice answer.",
+                "follow_up_question": "Why?",
+            },
+            "model": "deepseek-chat",
+        }, 200
+
+    return fake
+
+
+def _soe_result(delay, calls):
+    def fake(audio_url, ref_text, *, audio_path=None, timeout=None):
+        calls.append({"audio_url": audio_url, "audio_path": audio_path, "timeout": timeout})
+        time.sleep(delay)
+        return True, {"engine": "tencent_soe_new", "band_9": 8.1, "suggested_score_100": 90.0}
+
+    return fake
+
+
+class SpeakingEvaluateConcurrencyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SECRET_KEY="speaking-eval-test",
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+            UPLOAD_FOLDER=self.tmp.name,
+            SPEAKING_EVAL_DEADLINE_SECONDS="2",
+        )
+        db.init_app(self.app)
+        self.app.register_blueprint(mp_bp)
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="speaker", password_hash="x", role=User.ROLE_STUDENT)
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(StudentProfile(user_id=user.id, full_name="Speaker"))
+            db.session.commit()
+            user_id = user.id
+        token = jwt.encode(
+            {"sub": str(user_id), "exp": int((datetime.now(UTC) + timedelta(hours=1)).timestamp())},
+            "speaking-eval-test",
+            algorithm="HS256",
+        )
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.client = self.app.test_client()
+        (Path(self.tmp.name) / "20260101_answer.mp3").write_bytes(b"ID3 audio")
+        self.body = {"transcript": "I like reading.", "audio_url": "/uploads/20260101_answer.mp3"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        self.tmp.cleanup()
+
+    def _post(self, llm_delay, soe_delay, calls):
+        with mock.patch.object(miniprogram, "run_ielts_eval", _llm_result(llm_delay)), \
+                mock.patch.object(miniprogram, "evaluate_pronunciation", _soe_result(soe_delay, calls)):
+            started = time.monotonic()
+            response = self.client.post("/api/miniprogram/speaking/evaluate", json=self.body, headers=self.headers)
+            return response, time.monotonic() - started
+
+    def test_scorers_run_concurrently_and_read_local_upload(self):
+        calls = []
+        response, elapsed = self._post(0.4, 0.4, calls)
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertLess(elapsed, 0.75)
+        self.assertEqual(payload["result"]["scores"]["pronunciation"], 8.1)
+        self.assertEqual(payload["pronunciation_engine"]["engine"], "tencent_soe_new")
+        self.assertEqual(calls[0]["audio_path"], str(Path(self.tmp.name).resolve() / "20260101_answer.mp3"))
+
+    def test_pronunciation_timeout_keeps_band_scores(self):
+        self.app.config["SPEAKING_EVAL_DEADLINE_SECONDS"] = "0.3"
+        response, elapsed = self._post(0.05, 1.0, [])
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(payload["result"]["scores"]["pronunciation"], 6.0)
+        self.assertEqual(payload["pronunciation_engine_error"]["error"], "tencent_soe_timeout")
+
+    def test_band_scoring_timeout_returns_pronunciation_half(self):
+        self.app.config["SPEAKING_EVAL_DEADLINE_SECONDS"] = "0.3"
+        response, elapsed = self._post(1.0, 0.05, [])
+        self.assertEqual(response.status_code, 504)
+        payload = response.get_json()
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(payload["error"], "ielts_eval_timeout")
+        self.assertEqual(payload["pronunciation"]["band_9"], 8.1)
+
+    def test_band_scoring_attempts_share_the_deadline(self):
+        self.app.config.update(DEEPSEEK_API_KEY="k", DEEPSEEK_TIMEOUT=35, DEEPSEEK_RETRIES=1)
+        timeouts = []
+
+        def slow_failure(provider, url, **kwargs):
+            timeouts.append(kwargs["timeout"])
+            raise requests.ConnectionError("upstream down")
+
+        with self.app.app_context(), \
+                mock.patch.object(ielts_eval.http_client, "post", side_effect=slow_failure), \
+                mock.patch.object(ielts_eval.time, "sleep"):
+            payload, status = ielts_eval.run_ielts_eval({"transcript": "Hello."}, budget_seconds=20)
+        self.assertEqual(status, 502)
+        self.assertEqual(len(timeouts), 2)
+        connect, read = timeouts[0]
+        self.assertLessEqual(2 * connect + read, 10)
+
+        with self.app.app_context(), mock.patch.object(ielts_eval.http_client, "post") as post:
+            payload, status = ielts_eval.run_ielts_eval({"transcript": "Hello."}, budget_seconds=0.2)
+        post.assert_not_called()
+        self.assertEqual((status, payload["error"]), (504, "ielts_eval_timeout"))
+
+    def test_foreign_or_escaping_urls_are_not_read_locally(self):
+        calls = []
+        self.body["audio_url"] = "/uploads/../config.py"
+        self._post(0.0, 0.0, calls)
+        self.assertIsNone(calls[0]["audio_path"])
+        self.body["audio_url"] = "https://cdn.example.com/uploads/20260101_answer.mp3"
+        self._post(0.0, 0.0, calls)
+        self.assertIsNone(calls[1]["audio_path"])
+        self.assertEqual(calls[1]["audio_url"], self.body["audio_url"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+"""Mock exam writing drafts are buffered in memory and stored as compressed deltas."""
+
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import event
+
+import app as app_module
+from models import MockExam, MockExamDraftDelta, MockExamSession, db
+from services import mock_exam_autosave as autosave
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class DeltaEncodingTest(unittest.TestCase):
+    def test_delta_round_trip(self):
+        cases = [
+            ("", "Some people think"),
+            ("Some people think", "Some people strongly think"),
+            ("Some people think that.", "Some think that."),
+            ("教育很重要", "教育非常重要"),
+            ("same", "same"),
+        ]
+        for old, new in cases:
+            delta = autosave.encode_delta(old, new)
+            packed = autosave.unpack_delta(autosave.pack_delta({"task1": delta}))
+            self.assertEqual(autosave.apply_delta(old, packed["task1"]), new)
+        self.assertEqual(autosave.encode_delta("abc abc", "abc abc abc"), [7, 7, " abc"])
+
+
+class MockExamAutosaveTest(unittest.TestCase):
+    def setUp(self):
+        self.original_app = app_module.app
+        self.app = Flask(__name__, static_folder=str(ROOT / "static"))
+        self.app.config.update(
+            SECRET_KEY="mock-exam-autosave-test",
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+            MOCK_EXAM_DRAFT_BACKGROUND_FLUSH=False,
+        )
+        db.init_app(self.app)
+        app_module.app = self.app
+        app_module._MOCK_EXAM_DRAFTS.clear()
+        self.addCleanup(app_module._MOCK_EXAM_DRAFTS.clear)
+
+        with self.app.app_context():
+            db.create_all()
+            exam = MockExam(
+                name="写作模考",
+                listening_test_id="l1",
+                reading_test_id="r1",
+                writing_test_id="w1",
+                pincode="1234",
+            )
+            db.session.add(exam)
+            db.session.flush()
+            sess = MockExamSession(exam_id=exam.id, student_name="小明", access_token="tok")
+            db.session.add(sess)
+            db.session.commit()
+            self.exam_id = exam.id
+            self.session_id = sess.id
+
+    def tearDown(self):
+        app_module.app = self.original_app
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _save(self, essay1, essay2, revision, **extra):
+        with self.app.test_request_context(
+            "/save",
+            method="POST",
+            json={"essay_task1": essay1, "essay_task2": essay2, "revision": revision, **extra},
+        ):
+            return app_module.api_mock_exam_save_writing_draft(self.exam_id, "tok").get_json()
+
+    def _count_commits(self):
+        commits = []
+        listener = lambda conn: commits.append(1)  # noqa: E731
+        event.listen(db.engine, "commit", listener)
+        self.addCleanup(event.remove, db.engine, "commit", listener)
+        return commits
+
+    def test_saves_are_buffered_and_flushed_as_one_delta(self):
+        with self.app.app_context():
+            commits = self._count_commits()
+            self._save("Some", "", 1)
+            self._save("Some people", "", 2)
+            body = self._save("Some people think", "Others", 3)
+            self.assertEqual(body["task1_words"], 3)
+            self.assertEqual(commits, [])
+            self.assertEqual(MockExamDraftDelta.query.count(), 0)
+
+            self.assertEqual(app_module._MOCK_EXAM_DRAFTS.flush(), 1)
+            db.session.commit()
+            self.assertEqual(len(commits), 1)
+
+            sess = db.session.get(MockExamSession, self.session_id)
+            self.assertEqual(MockExamDraftDelta.query.count(), 1)
+            self.assertEqual(sess.writing_essay_task1, None)
+            self.assertEqual(sess.writing_task1_words, 3)
+            self.assertEqual(autosave.current_draft(sess), ("Some people think", "Others", 3))
+
+    def test_stale_revision_is_ignored(self):
+        with self.app.app_context():
+            self._save("newer text", "", 20)
+            self._save("older text", "", 10)
+            app_module._MOCK_EXAM_DRAFTS.flush()
+            db.session.commit()
+
+            sess = db.session.get(MockExamSession, self.session_id)
+            # Another worker's buffer flushing an older draft after the fact.
+            self.assertFalse(autosave.write_draft(sess, "oldest", "", 5))
+            self.assertEqual(autosave.current_draft(sess)[0], "newer text")
+
+    def test_deltas_are_compacted_into_the_session_row(self):
+        with self.app.app_context():
+            sess = db.session.get(MockExamSession, self.session_id)
+            text = ""
+            for revision in range(1, autosave.COMPACT_EVERY + 3):
+                text += f" word{revision}"
+                self.assertTrue(autosave.write_draft(sess, text, "", revision))
+                db.session.commit()
+
+            self.assertLess(MockExamDraftDelta.query.count(), autosave.COMPACT_EVERY)
+            self.assertEqual(sess.writing_draft_revision, autosave.COMPACT_EVERY)
+            self.assertEqual(autosave.current_draft(sess)[0], text.strip())
+
+    def test_leaving_the_page_flushes_immediately(self):
+        with self.app.app_context():
+            self._save("draft before leaving", "", 7, flush=True)
+            self.assertIsNone(app_module._MOCK_EXAM_DRAFTS.peek(self.session_id))
+            db.session.remove()
+            sess = db.session.get(MockExamSession, self.session_id)
+            self.assertEqual(autosave.current_draft(sess)[0], "draft before leaving")
+
+    def test_failed_commit_puts_drafts_back_keeping_newer_revisions(self):
+        buffer = app_module._MOCK_EXAM_DRAFTS
+        with self.app.app_context():
+            self._save("draft one", "", 1)
+            with mock.patch.object(db.session, "commit", side_effect=RuntimeError("database is locked")):
+                with self.assertRaises(RuntimeError):
+                    buffer.flush_and_commit()
+            self.assertEqual(buffer.peek(self.session_id).revision, 1)
+
+            def commit_after_newer_save():
+                self._save("draft two", "", 2)
+                raise RuntimeError("database is locked")
+
+            with mock.patch.object(db.session, "commit", side_effect=commit_after_newer_save):
+                with self.assertRaises(RuntimeError):
+                    buffer.flush_and_commit()
+            self.assertEqual(buffer.peek(self.session_id).essay1, "draft two")
+
+            self.assertEqual(buffer.flush_and_commit(), 1)
+            db.session.remove()
+            sess = db.session.get(MockExamSession, self.session_id)
+            self.assertEqual(autosave.current_draft(sess)[0], "draft two")
+
+    def test_leaving_the_page_reports_a_failed_flush(self):
+        with self.app.app_context():
+            with mock.patch.object(db.session, "commit", side_effect=RuntimeError("database is locked")):
+                with self.app.test_request_context(
+                    "/save", method="POST", json={"essay_task1": "last words", "essay_task2": "", "revision": 9, "flush": True}
+                ):
+                    response, status = app_module.api_mock_exam_save_writing_draft(self.exam_id, "tok")
+            self.assertEqual((status, response.get_json()["ok"]), (503, False))
+            self.assertEqual(app_module._MOCK_EXAM_DRAFTS.peek(self.session_id).essay1, "last words")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from services import pdf_images
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow comes with WeasyPrint
+    Image = None
+
+
+class PdfImagesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.cache_dir = os.path.join(self.root, "cache")
+        os.makedirs(os.path.join(self.root, "static", "entrance"))
+        self.image = os.path.join(self.root, "static", "entrance", "chart.png")
+        with open(self.image, "wb") as f:
+            f.write(b"\x89PNG fake image bytes")
+        with open(os.path.join(self.root, "secret.png"), "wb") as f:
+            f.write(b"outside")
+        pdf_images._bytes_cache.clear()
+        self.addCleanup(pdf_images._bytes_cache.clear)
+
+    def test_only_static_and_upload_images_resolve(self):
+        self.assertEqual(
+            pdf_images.image_src(self.root, "/static/entrance/chart.png"),
+            "pdf-image:static/entrance/chart.png",
+        )
+        self.assertIsNone(pdf_images.image_src(self.root, "/static/../secret.png"))
+        self.assertIsNone(pdf_images.image_src(self.root, "/secret.png"))
+        self.assertIsNone(pdf_images.image_src(self.root, "/static/entrance/missing.png"))
+
+    def test_fetcher_serves_cached_bytes_and_delegates_other_urls(self):
+        fallback = mock.Mock(return_value={"string": b"css"})
+        fetch = pdf_images.make_url_fetcher(self.root, self.cache_dir, fallback)
+        with mock.patch.object(pdf_images, "Image", None):
+            first = fetch("pdf-image:static/entrance/chart.png")
+            with mock.patch("builtins.open", side_effect=AssertionError("re-read")):
+                second = fetch("pdf-image:static/entrance/chart.png", timeout=10)
+        self.assertEqual(first["string"], b"\x89PNG fake image bytes")
+        self.assertEqual((second["string"], second["mime_type"]), (first["string"], "image/png"))
+
+        self.assertEqual(fetch("data:text/css,x")["string"], b"css")
+        fallback.assert_called_once_with("data:text/css,x")
+        with self.assertRaises(ValueError):
+            fetch("pdf-image:static/../secret.png")
+
+    def test_fetcher_decodes_percent_encoded_paths(self):
+        image = os.path.join(self.root, "static", "entrance", "图表 1.png")
+        with open(image, "wb") as f:
+            f.write(b"\x89PNG cjk image bytes")
+        src = pdf_images.image_src(self.root, "/static/entrance/图表 1.png")
+        self.assertEqual(src, "pdf-image:static/entrance/图表 1.png")
+        fetch = pdf_images.make_url_fetcher(self.root, self.cache_dir)
+        with mock.patch.object(pdf_images, "Image", None):
+            fetched = fetch("pdf-image:static/entrance/%E5%9B%BE%E8%A1%A8%201.png")
+        self.assertEqual(fetched["string"], b"\x89PNG cjk image bytes")
+
+    def test_byte_budget_evicts_least_recent(self):
+        cache = pdf_images.ByteBudgetCache(10)
+        cache.set("a", b"1234", "image/png")
+        cache.set("b", b"5678", "image/png")
+        cache.get("a")
+        cache.set("c", b"90ab", "image/png")
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        cache.set("huge", b"x" * 11, "image/png")
+        self.assertIsNone(cache.get("huge"))
+
+    @unittest.skipIf(Image is None, "Pillow not installed")
+    def test_large_images_get_one_downscaled_variant(self):
+        Image.new("RGB", (3000, 1000), "white").save(self.image)
+        path, mime = pdf_images.print_variant(self.image, self.cache_dir)
+        self.assertNotEqual(path, self.image)
+        self.assertEqual(mime, "image/png")
+        with Image.open(path) as variant:
+            self.assertEqual(variant.width, pdf_images.PRINT_MAX_WIDTH)
+        self.assertEqual(pdf_images.print_variant(self.image, self.cache_dir), (path, mime))
+
+
+if __name__ == "__main__":
+    unittest.main()
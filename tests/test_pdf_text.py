@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from services import pdf_text
+
+
+class PdfTextTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.pdf = os.path.join(self.tmp.name, "book.pdf")
+        with open(self.pdf, "wb") as f:
+            f.write(b"%PDF-1.4 fake")
+
+    def test_pages_are_cached_by_file_hash(self):
+        extract = mock.Mock(return_value=["Education", "", "教育 education"])
+        with mock.patch.object(pdf_text, "available_engine", return_value="pypdf"), \
+                mock.patch.object(pdf_text, "page_count", return_value=3), \
+                mock.patch.object(pdf_text, "_extract_range", extract):
+            first = pdf_text.extract_text(self.pdf, cache_dir=self.cache_dir, workers=1)
+            again = list(pdf_text.iter_pages(self.pdf, cache_dir=self.cache_dir, workers=1))
+            self.assertEqual(extract.call_count, 1)
+
+            with open(self.pdf, "ab") as f:
+                f.write(b" revised")
+            pdf_text.extract_text(self.pdf, cache_dir=self.cache_dir, workers=1)
+            self.assertEqual(extract.call_count, 2)
+
+        self.assertEqual(first, "Education\n教育 education")
+        self.assertEqual(again, ["Education", "", "教育 education"])
+
+    def test_pdftotext_chunks_run_in_parallel_and_stream_in_order(self):
+        def run(path, layout, first=None, last=None):
+            self.assertTrue(layout)
+            return [f"page {number}" for number in range(first, last + 1)]
+
+        with mock.patch.object(pdf_text, "available_engine", return_value="pdftotext"), \
+                mock.patch.object(pdf_text, "page_count", return_value=40), \
+                mock.patch.object(pdf_text, "_run_pdftotext", side_effect=run) as runner:
+            pages = list(pdf_text.iter_pages(self.pdf, layout=True, workers=4, cache_dir=None))
+
+        self.assertEqual(pages, [f"page {number}" for number in range(1, 41)])
+        self.assertEqual(runner.call_count, 8)
+
+    def test_requests_extract_serially(self):
+        with mock.patch.object(pdf_text, "available_engine", return_value="pdftotext"), \
+                mock.patch.object(pdf_text, "page_count", return_value=40) as counted, \
+                mock.patch.object(pdf_text, "_run_pdftotext", return_value=["a", "b"]) as runner, \
+                Flask(__name__).test_request_context():
+            pages = list(pdf_text.iter_pages(self.pdf, workers=4, cache_dir=None))
+
+        self.assertEqual(pages, ["a", "b"])
+        runner.assert_called_once_with(self.pdf, False)
+        counted.assert_not_called()
+
+    def test_missing_engine_fails_clearly(self):
+        with mock.patch.object(pdf_text, "available_engine", return_value=None):
+            with self.assertRaises(RuntimeError):
+                pdf_text.extract_text(self.pdf, cache_dir=None)
+
+
+if __name__ == "__main__":
+    unittest.main()
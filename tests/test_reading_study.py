@@ -12,6 +12,7 @@ Run standalone:
 
 from __future__ import annotations
 
+import gzip
 import json
 import sys
 import tempfile
@@ -27,6 +28,7 @@ for _path in (str(ROOT), str(SCRIPTS_DIR)):
 import import_reading_study  # noqa: E402  (scripts/import_reading_study.py)
 from flask import Flask  # noqa: E402
 from flask_login import LoginManager  # noqa: E402
+from sqlalchemy import event  # noqa: E402
 
 from api.reading_study import reading_study_bp  # noqa: E402
 from api.reading_study_glossary import (  # noqa: E402
@@ -349,6 +351,52 @@ class ReadOnlyApiTest(_ApiTestBase):
         missing = self.client.get("/api/reading-study/passage/does_not_exist")
         self.assertEqual(missing.status_code, 404)
 
+    def test_passage_etag_304_and_gzip(self):
+        row = ReadingPassageAnalysis.query.filter_by(passage_id=MINI_PASSAGE_ID).one()
+        row.payload_json = json.dumps(
+            {"passage_id": MINI_PASSAGE_ID, "sentences": [{"text": "The cat sat."}] * 200}
+        )
+        db.session.commit()
+        url = f"/api/reading-study/passage/{MINI_PASSAGE_ID}"
+
+        plain = self.client.get(url)
+        self.assertEqual(plain.status_code, 200)
+        self.assertIsNone(plain.headers.get("Content-Encoding"))
+        etag = plain.headers["ETag"]
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+        packed = self.client.get(url, headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(packed.headers["Content-Encoding"], "gzip")
+        self.assertLess(len(packed.data), len(plain.data))
+        self.assertEqual(json.loads(gzip.decompress(packed.data)), plain.get_json())
+        self.assertIn("Accept-Encoding", packed.headers["Vary"])
+
+        row.payload_json = json.dumps({"passage_id": MINI_PASSAGE_ID, "sentences": []})
+        db.session.commit()
+        changed = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json()["sentences"], [])
+
+    def test_catalog_defers_payload_and_follows_imports(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, db.engine, "before_cursor_execute", listener)
+
+        first = self.client.get("/api/reading-study/catalog")
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse([sql for sql in statements if "payload_json" in sql])
+        self.assertEqual(
+            self.client.get("/api/reading-study/catalog", headers={"If-None-Match": first.headers["ETag"]}).status_code,
+            304,
+        )
+
+        row = ReadingPassageAnalysis.query.filter_by(passage_id=MINI_PASSAGE_ID).one()
+        row.passage_title = "Renamed Passage"
+        db.session.commit()
+        data = self.client.get(f"/api/reading-study/catalog?test_id={MINI_TEST_ID}").get_json()
+        self.assertEqual(data["passages"][0]["title"], "Renamed Passage")
+
     def test_glossary_endpoint(self):
         resp = self.client.get("/api/reading-study/glossary")
         self.assertEqual(resp.status_code, 200)
@@ -0,0 +1,130 @@
+"""Reading result reads compare grade versions; stale grades are regraded in the background."""
+
+import json
+import threading
+import unittest
+from pathlib import Path
+
+from flask import Flask
+from sqlalchemy import event
+
+import app as app_module
+from models import ReadingTestSubmission, Task, db
+from services.regrade_queue import RegradeQueue
+
+ROOT = Path(__file__).resolve().parents[1]
+TEST_ID = "ielts10_test1_reading"
+
+
+class ReadingTestRegradeTest(unittest.TestCase):
+    def setUp(self):
+        self.original_app = app_module.app
+        self.app = Flask(__name__, static_folder=str(ROOT / "static"))
+        self.app.config.update(
+            SECRET_KEY="reading-regrade-test",
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+            REGRADE_IN_BACKGROUND=False,
+        )
+        db.init_app(self.app)
+        app_module.app = self.app
+        app_module._READING_REGRADE_QUEUE.clear()
+        self.addCleanup(app_module._READING_REGRADE_QUEUE.clear)
+        self.payload = json.loads((ROOT / "static" / "reading_tests" / f"{TEST_ID}.json").read_text("utf-8"))
+        first_question = self.payload["passages"][0]["groups"][0]["questions"][0]
+
+        with self.app.app_context():
+            db.create_all()
+            task = Task(
+                student_name="阅读重判",
+                category="雅思-阅读-整套",
+                detail="regrade",
+                status="done",
+                reading_test_id=TEST_ID,
+                reading_access_token="reading-token",
+            )
+            db.session.add(task)
+            db.session.flush()
+            # Graded under an older answer key: stored as 0 correct, no version stamp.
+            db.session.add(ReadingTestSubmission(
+                task_id=task.id,
+                student_name=task.student_name,
+                test_id=TEST_ID,
+                answers_json=json.dumps({str(first_question["id"]): first_question["answer"]}),
+                results_json="[]",
+                wrong_numbers_json="[]",
+            ))
+            db.session.commit()
+            self.task_id = task.id
+
+    def tearDown(self):
+        app_module.app = self.original_app
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _get(self):
+        url = f"/api/reading/test/{TEST_ID}/submission?task_id={self.task_id}&token=reading-token"
+        with self.app.test_request_context(url):
+            return app_module.api_reading_test_submission(TEST_ID).get_json()
+
+    def test_stale_grade_is_read_without_writes_and_regraded_in_background(self):
+        writes = []
+
+        def record(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+                writes.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", record)
+            self.addCleanup(event.remove, db.engine, "before_cursor_execute", record)
+
+        body = self._get()
+        self.assertFalse(body["grade_current"])
+        self.assertEqual(body["submission"]["correct_count"], 0)
+        self.assertEqual(writes, [])
+        self.assertEqual(app_module._READING_REGRADE_QUEUE.pending(), [self.task_id])
+
+        self._get()
+        self.assertEqual(app_module._READING_REGRADE_QUEUE.pending(), [self.task_id])
+
+        self.assertEqual(app_module._READING_REGRADE_QUEUE.drain(self.app), 1)
+        self.assertTrue(writes)
+        body = self._get()
+        self.assertTrue(body["grade_current"])
+        self.assertEqual(body["submission"]["correct_count"], 1)
+        self.assertEqual(app_module._READING_REGRADE_QUEUE.pending(), [])
+        with self.app.app_context():
+            row = ReadingTestSubmission.query.filter_by(task_id=self.task_id).one()
+            self.assertTrue(row.grade_version.startswith(f"{app_module.READING_GRADER_VERSION}:"))
+
+    def test_pending_key_restarts_a_dead_drain_thread(self):
+        handled = []
+        release = threading.Event()
+        queue = RegradeQueue("test", lambda key: release.wait(5) and handled.append(key))
+        self.app.config["REGRADE_IN_BACKGROUND"] = True
+        # Left behind by a drain thread that exited without clearing the queue.
+        queue._pending[self.task_id] = None
+        queue._worker._thread = threading.Thread(target=lambda: None)
+
+        self.assertFalse(queue.enqueue(self.app, self.task_id))
+        drain_thread = queue._worker._thread
+        self.assertTrue(drain_thread.is_alive())
+        release.set()
+        drain_thread.join(5)
+        self.assertEqual(handled, [self.task_id])
+        self.assertEqual(queue.pending(), [])
+        self.assertIsNone(queue._worker._thread)
+
+    def test_version_tracks_question_groups(self):
+        payload, path, _safe_id = app_module._load_reading_test_payload(TEST_ID)
+        version = app_module._reading_test_grade_version(path, payload)
+        self.assertEqual(app_module._reading_test_grade_version(None, payload), version)
+        changed = json.loads(json.dumps(payload))
+        changed["passages"][0]["groups"][0]["questions"][0]["answer"] = "T"
+        self.assertNotEqual(app_module._reading_test_grade_version(None, changed), version)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import threading
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from api import miniprogram
+from models import SchedulerRangeCache, ScheduleSnapshot, User, db
+from scripts.scheduler_stub import create_app as create_scheduler_stub
+from services import http_client, scheduler_client
+
+
+class SchedulerRangeCacheTest(unittest.TestCase):
+    def setUp(self):
+        today = date.today()
+        self.start, self.end = today, today + timedelta(days=7)
+        self.stub = create_scheduler_stub([self._schedule(1, 1), self._schedule(2, 2)], token="t0k")
+        self.server = make_server("127.0.0.1", 0, self.stub, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+            SCHEDULER_BASE_URL=f"http://127.0.0.1:{self.server.server_port}",
+            SCHEDULER_PUSH_TOKEN="t0k",
+            SCHEDULER_RANGE_CACHE_TTL=60,
+            WECHAT_COURSE_TEMPLATE_ID="tpl-course",
+            WECHAT_PUSH_RATE_PER_TEMPLATE=0,
+        )
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        policies = mock.patch.dict(
+            http_client.POLICIES, {"scheduler": http_client.ProviderPolicy(retries=0, failure_threshold=100)}
+        )
+        policies.start()
+        self.addCleanup(policies.stop)
+        http_client.reset()
+        self.addCleanup(http_client.reset)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.server.shutdown()
+
+    def _schedule(self, schedule_id, day_offset, teacher_id=7):
+        day = (date.today() + timedelta(days=day_offset)).isoformat()
+        return {
+            "schedule_id": schedule_id,
+            "teacher_id": teacher_id,
+            "student_name": f"S{schedule_id}",
+            "course_name": "雅思阅读",
+            "schedule_date": day,
+            "start_time": f"{day} 09:00",
+            "end_time": f"{day} 10:00",
+        }
+
+    def _range_calls(self):
+        return [args for path, args in self.stub.config["REQUEST_LOG"] if path == "/api/schedules/range"]
+
+    def test_repeated_reads_within_ttl_hit_the_cache(self):
+        for _ in range(3):
+            data, err = scheduler_client.fetch_range_schedules_cached(self.start, self.end, teacher_id=7)
+            self.assertIsNone(err)
+            self.assertEqual([s["schedule_id"] for s in data["schedules"]], [1, 2])
+        self.assertEqual(len(self._range_calls()), 1)
+        self.assertEqual(self._range_calls()[0]["teacher_id"], "7")
+
+        # A different range is a different key.
+        scheduler_client.fetch_range_schedules_cached(self.start, self.end, teacher_id=None)
+        self.assertEqual(len(self._range_calls()), 2)
+
+    def test_refresh_is_conditional_and_tracks_content_changes(self):
+        first, _ = scheduler_client.get_range_snapshot(self.start, self.end, 7)
+        row = db.session.get(SchedulerRangeCache, first.range_key)
+        changed_at = row.changed_at
+
+        again, err = scheduler_client.get_range_snapshot(self.start, self.end, 7, max_age=0)
+        self.assertIsNone(err)
+        self.assertEqual(again.payload, first.payload)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(SchedulerRangeCache, first.range_key).changed_at, changed_at)
+
+        self.stub.config["SCHEDULES"].append(self._schedule(3, 3))
+        updated, _ = scheduler_client.get_range_snapshot(self.start, self.end, 7, max_age=0)
+        self.assertEqual(len(updated.payload["schedules"]), 3)
+        self.assertNotEqual(updated.content_hash, first.content_hash)
+        self.assertEqual(len(self._range_calls()), 3)
+
+    def test_stale_copy_is_served_while_scheduler_is_down(self):
+        scheduler_client.get_range_snapshot(self.start, self.end, 7)
+        self.stub.config["FAIL"] = True
+
+        snapshot, err = scheduler_client.get_range_snapshot(self.start, self.end, 7, max_age=0)
+        self.assertIsNone(err)
+        self.assertTrue(snapshot.stale)
+        self.assertEqual(len(snapshot.payload["schedules"]), 2)
+
+        snapshot, err = scheduler_client.get_range_snapshot(self.start, self.end, 7, max_age=0, allow_stale=False)
+        self.assertIsNone(snapshot)
+        self.assertEqual(err, "scheduler_api_error")
+
+        self.app.config["SCHEDULER_RANGE_CACHE_TTL"] = 0
+        data, err, stale = miniprogram._fetch_range_schedules_cached(self.start, self.end, teacher_id=7)
+        self.assertEqual((err, stale), (None, True))
+        self.assertEqual(len(data["schedules"]), 2)
+
+    def test_old_rows_are_pruned_and_key_locks_released(self):
+        scheduler_client.get_range_snapshot(self.start, self.end, 7)
+        self.assertEqual(scheduler_client._key_locks, {})
+        db.session.get(SchedulerRangeCache, scheduler_client.range_cache_key(self.start, self.end, 7)).fetched_at = 0
+        db.session.commit()
+
+        with mock.patch.object(scheduler_client, "_last_prune", 0.0), mock.patch.object(
+            scheduler_client.time, "monotonic", return_value=scheduler_client.PRUNE_INTERVAL_SECONDS + 1
+        ):
+            scheduler_client.get_range_snapshot(self.start, self.end + timedelta(days=1), 7)
+        db.session.expire_all()
+        self.assertEqual([row.end_date for row in SchedulerRangeCache.query], [(self.end + timedelta(days=1)).isoformat()])
+
+    def test_schedule_change_check_skips_unchanged_ranges(self):
+        teacher = User(username="teacher", password_hash="x", role=User.ROLE_TEACHER, scheduler_teacher_id=7)
+        db.session.add(teacher)
+        db.session.commit()
+
+        with mock.patch.object(miniprogram, "send_subscribe_message_result", return_value={"ok": True}):
+            first = miniprogram.check_schedule_changes_internal()
+            self.assertEqual((first["added"], first["removed"]), (2, 0))
+
+            with mock.patch.object(miniprogram, "_extract_schedule_fields") as extract:
+                unchanged = miniprogram.check_schedule_changes_internal()
+                extract.assert_not_called()
+            self.assertEqual((unchanged["added"], unchanged["removed"]), (0, 0))
+
+            self.stub.config["SCHEDULES"] = [self._schedule(1, 1), self._schedule(3, 3)]
+            changed = miniprogram.check_schedule_changes_internal()
+        self.assertEqual((changed["added"], changed["removed"]), (1, 1))
+        statuses = {s.schedule_uid: s.status for s in ScheduleSnapshot.query}
+        self.assertEqual(statuses, {"id:1": "active", "id:2": "removed", "id:3": "active"})
+        # Every check revalidates with the scheduler.
+        self.assertEqual(len(self._range_calls()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from flask import Flask
+
+from services import static_assets
+
+
+class StaticAssetsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.static = Path(self.tmp.name) / "static"
+        (self.static / "listening_tests").mkdir(parents=True)
+        (self.static / "listening_jijing").mkdir()
+        (self.static / "listening").mkdir()
+        self.payload = json.dumps({"questions": [{"text": "Where is the harbour?"}] * 100}).encode()
+        (self.static / "listening_tests" / "t1.json").write_bytes(self.payload)
+        (self.static / "listening_jijing" / "t1.mp3").write_bytes(bytes(range(256)) * 16)
+        (self.static / "listening" / "ex1.json").write_bytes(self.payload)
+        (self.static / "style.css").write_text("body {}")
+
+        self.app = Flask(__name__, static_folder=str(self.static))
+        static_assets.init_app(self.app)
+        self.client = self.app.test_client()
+
+    def test_build_writes_siblings_and_manifest(self):
+        manifest = static_assets.build(self.static, use_brotli=False)
+        files = manifest["files"]
+        # static/listening is rewritten at runtime, so it is never precompressed.
+        self.assertEqual(set(files), {"listening_tests/t1.json", "listening_jijing/t1.mp3"})
+        self.assertEqual(files["listening_tests/t1.json"]["encodings"], ["gzip"])
+        self.assertEqual(files["listening_jijing/t1.mp3"]["encodings"], [])
+        self.assertEqual(gzip.decompress((self.static / "listening_tests" / "t1.json.gz").read_bytes()), self.payload)
+        self.assertFalse((self.static / "listening_jijing" / "t1.mp3.gz").exists())
+        self.assertFalse((self.static / "listening" / "ex1.json.gz").exists())
+
+        rebuilt = static_assets.build(self.static, use_brotli=False)
+        self.assertEqual(rebuilt["files"], files)
+
+        conf = static_assets.nginx_config(self.static)
+        self.assertIn("location /static/listening_tests/ {", conf)
+        self.assertIn("gzip_static on;", conf)
+
+    def test_versioned_urls_are_immutable_and_precompressed(self):
+        static_assets.build(self.static, use_brotli=False)
+        with self.app.test_request_context():
+            url = static_assets.asset_url("listening_tests/t1.json")
+            self.assertRegex(url, r"^/static/listening_tests/t1\.json\?v=[0-9a-f]{16}$")
+            self.assertEqual(static_assets.asset_url("style.css"), "/static/style.css")
+
+        packed = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(packed.status_code, 200)
+        self.assertEqual(packed.headers["Content-Encoding"], "gzip")
+        self.assertEqual(packed.mimetype, "application/json")
+        self.assertEqual(packed.headers["Cache-Control"], static_assets.IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(gzip.decompress(packed.data), self.payload)
+        packed.close()
+
+        plain = self.client.get("/static/listening_tests/t1.json")
+        self.assertIsNone(plain.headers.get("Content-Encoding"))
+        self.assertEqual(plain.headers["Cache-Control"], "no-cache")
+        self.assertEqual(plain.data, self.payload)
+        self.assertEqual(
+            self.client.get("/static/listening_tests/t1.json", headers={"If-None-Match": plain.headers["ETag"]}).status_code,
+            304,
+        )
+        plain.close()
+
+    def test_range_requests_get_identity_bytes(self):
+        static_assets.build(self.static, use_brotli=False)
+        resp = self.client.get(
+            "/static/listening_tests/t1.json", headers={"Range": "bytes=0-9", "Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(resp.status_code, 206)
+        self.assertIsNone(resp.headers.get("Content-Encoding"))
+        self.assertEqual(resp.data, self.payload[:10])
+        resp.close()
+
+        audio = self.client.get("/static/listening_jijing/t1.mp3", headers={"Range": "bytes=16-31"})
+        self.assertEqual(audio.status_code, 206)
+        self.assertEqual(audio.data, bytes(range(16, 32)))
+        audio.close()
+
+    def test_file_rewritten_after_build_is_served_plain(self):
+        static_assets.build(self.static, use_brotli=False)
+        with self.app.test_request_context():
+            url = static_assets.asset_url("listening_tests/t1.json")
+        source = self.static / "listening_tests" / "t1.json"
+        updated = self.payload.replace(b"harbour", b"station")
+        source.write_bytes(updated)
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        resp = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertIsNone(resp.headers.get("Content-Encoding"))
+        self.assertEqual(resp.headers["Cache-Control"], static_assets.REVALIDATE_CACHE_CONTROL)
+        self.assertEqual(resp.data, updated)
+        resp.close()
+        with self.app.test_request_context():
+            self.assertEqual(static_assets.asset_url("listening_tests/t1.json"), "/static/listening_tests/t1.json")
+
+    def test_without_manifest_static_files_behave_as_before(self):
+        resp = self.client.get("/static/style.css", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, b"body {}")
+        self.assertIsNone(resp.headers.get("Content-Encoding"))
+        resp.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
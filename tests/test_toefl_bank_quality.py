@@ -1,11 +1,16 @@
 import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
+from services import toefl_bank_quality
 from services.toefl_bank_quality import (
+    AuditCache,
     analyze_bank,
     blocking_issues,
+    diff_reports,
 )
 
 
@@ -197,6 +202,76 @@ class ToeflBankQualityTest(unittest.TestCase):
             self.assertIn("subject_review_pending", codes)
             self.assertTrue(blocking_issues(report, ["fixture"]))
 
+    def test_cache_skips_unchanged_exams_and_diff_reports_changes(self):
+        with tempfile.TemporaryDirectory() as temporary:
+            root = Path(temporary)
+            source_root = root / "source"
+            source_root.mkdir()
+            (source_root / "fixture.pdf").write_bytes(b"fixture")
+            reading_path = root / "data" / "fixture" / "reading.json"
+            self._write_json(root / "data" / "fixture" / "manifest.json", self._manifest())
+            self._write_json(
+                reading_path,
+                {"exam": {"audio_modules": []}, "questions": [self._mc_question()]},
+            )
+            profiles = self._profiles()
+            profiles["fixture"]["sources"][0]["sha256"] = (
+                "f16d05ec6b29248d2c61adb1e9263f78e4f7bace1b955014a2d17872cfe4064d"
+            )
+            cache_path = root / "cache.json"
+
+            def run():
+                cache = AuditCache(cache_path)
+                report = analyze_bank(
+                    root / "data",
+                    root,
+                    profiles=profiles,
+                    source_root=source_root,
+                    cache=cache,
+                )
+                cache.save()
+                return report, cache
+
+            first, cache = run()
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            with mock.patch.object(
+                toefl_bank_quality, "_sha256", side_effect=AssertionError("rehashed")
+            ):
+                second, cache = run()
+                self.assertEqual((cache.hits, cache.misses), (1, 0))
+                self.assertEqual(second, first)
+
+                question = self._mc_question()
+                question["options"].pop()
+                self._write_json(
+                    reading_path,
+                    {"exam": {"audio_modules": []}, "questions": [question]},
+                )
+                os.utime(reading_path, ns=(0, reading_path.stat().st_mtime_ns + 1_000_000))
+                # The exam is re-checked, but the unchanged source keeps its hash.
+                third, cache = run()
+                self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+            diff = diff_reports(first, third)
+            self.assertEqual(
+                diff["release_status_changes"],
+                [{"exam_id": "fixture", "from": "ready", "to": "blocked"}],
+            )
+            self.assertIn(
+                "mc_option_count_invalid",
+                {issue["code"] for issue in diff["issues_added"]},
+            )
+            self.assertEqual(diff["issues_resolved"], [])
+            self.assertEqual(diff_reports(third, third)["issues_added"], [])
+
+            (source_root / "fixture.pdf").write_bytes(b"changed")
+            fourth, cache = run()
+            self.assertEqual(cache.misses, 1)
+            self.assertIn(
+                "source_hash_mismatch",
+                {issue["code"] for issue in fourth["issues"]},
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,7 @@
 import io
 import json
+import os
+import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -9,8 +11,10 @@ from flask_login import LoginManager
 
 from api.toefl_mock import toefl_mock_bp
 from models import StudentProfile, ToeflMockAttempt, ToeflMockResponse, User, db
+from services import toefl_mock_v2
 from services.toefl_mock_v2 import (
     catalog,
+    data_root,
     definition,
     load_private_answer_key,
     public_catalog,
@@ -294,6 +298,64 @@ def test_definition_is_public_safe_and_preserves_repaired_q33():
     assert len(q33["options"]) == 4
 
 
+def test_definition_is_compiled_once_per_package_version(tmp_path, monkeypatch):
+    shutil.copytree(data_root() / "ets-practice-1", tmp_path / "ets-practice-1")
+    content_path = tmp_path / "ets-practice-1" / "content.json"
+    exam_id = json.loads(content_path.read_text(encoding="utf-8"))["exam"]["id"]
+    first = definition("ets-practice-1", "reading", root=tmp_path)
+
+    reads = []
+    real_load_json = toefl_mock_v2.load_json
+    monkeypatch.setattr(toefl_mock_v2, "load_json", lambda path: reads.append(path) or real_load_json(path))
+    assert definition("ets-practice-1", ["reading"], root=tmp_path) is first
+    assert definition(exam_id.upper(), "reading", root=tmp_path) is first
+    assert reads == []
+    assert definition("ets-practice-1", "listening", root=tmp_path) is not first
+
+    content = json.loads(content_path.read_text(encoding="utf-8"))
+    content["exam"]["title"] = "Edited title"
+    content_path.write_text(json.dumps(content), encoding="utf-8")
+    os.utime(content_path, ns=(0, content_path.stat().st_mtime_ns + 1_000_000))
+    assert definition(exam_id, "reading", root=tmp_path)["test"]["title"] == "Edited title"
+
+
+def test_answer_key_is_compiled_once_and_batch_scores_match_single(tmp_path, monkeypatch):
+    shutil.copytree(data_root() / "ets-practice-1", tmp_path / "ets-practice-1")
+    key_path = tmp_path / "ets-practice-1" / "answer_key.json"
+    raw_key = json.loads(key_path.read_text(encoding="utf-8"))
+    auto = [item for item in raw_key["answers"] if item.get("grading_status", "auto") == "auto"]
+    first, second = auto[0], auto[1]
+
+    def correct(item):
+        return item.get("canonical_text") or item.get("ordered_tokens") or item["correct_option_keys"][0]
+
+    cohort = {
+        "perfect": {item["question_id"]: correct(item) for item in auto},
+        "partial": {first["question_id"]: correct(first), second["question_id"]: "zzz"},
+        "blank": {},
+    }
+    compiled = toefl_mock_v2.compiled_answer_key("ets-practice-1", root=tmp_path)
+    reads = []
+    real_load_json = toefl_mock_v2.load_json
+    monkeypatch.setattr(toefl_mock_v2, "load_json", lambda path: reads.append(path) or real_load_json(path))
+    batch = toefl_mock_v2.score_attempts("ets-practice-1", cohort, root=tmp_path)
+    assert toefl_mock_v2.compiled_answer_key("ets-practice-1", root=tmp_path) is compiled
+    assert reads == []
+    for attempt_key, responses in cohort.items():
+        single = toefl_mock_v2.score_responses("ets-practice-1", responses, root=tmp_path)
+        assert batch[attempt_key] == single
+    assert batch["perfect"]["correct"] == batch["perfect"]["auto_total"] == len(auto)
+    assert (batch["partial"]["correct"], batch["partial"]["answered"]) == (1, 2)
+    assert batch["blank"]["accuracy"] == 0
+
+    raw_key["blocked"] = [{"question_id": first["question_id"]}]
+    key_path.write_text(json.dumps(raw_key), encoding="utf-8")
+    os.utime(key_path, ns=(0, key_path.stat().st_mtime_ns + 1_000_000))
+    rescored = toefl_mock_v2.score_attempts("ets-practice-1", cohort, root=tmp_path)
+    assert rescored["perfect"]["auto_total"] == len(auto) - 1
+    assert rescored["partial"]["correct"] == 0
+
+
 def test_definition_follows_spec_section_order_and_does_not_invent_m2():
     payload = definition("toefl:2026-01-28-b")
 
@@ -607,6 +669,60 @@ def test_state_rejects_navigation_jump_and_timer_increase(app):
     assert increase.status_code == 409
 
 
+def test_delta_sync_applies_changes_with_optimistic_version(app):
+    client = app.test_client()
+    started = client.post(
+        "/api/toefl/attempts/start",
+        json={"testId": "2026-01-21_A", "sections": ["reading"], "preview": True},
+    ).get_json()["attempt"]
+    url = f"/api/toefl/attempts/{started['id']}/state"
+    version = started["version"]
+    qid = "toefl:2026-01-21-a:reading:m1:g01:q01"
+
+    missing_base = client.patch(url, json={"state": {"groupIndex": 1}})
+    assert missing_base.status_code == 400
+    assert missing_base.get_json()["error"] == "base_version_required"
+
+    answered = client.patch(url, json={"responses": {qid: "B"}})
+    assert answered.status_code == 200
+    assert answered.get_json()["written"] == [qid]
+    assert answered.get_json()["version"] == version
+    unchanged = client.patch(url, json={"responses": {qid: "B"}})
+    assert unchanged.get_json()["written"] == []
+
+    stepped = client.patch(
+        url,
+        json={
+            "baseVersion": version,
+            "state": {"groupIndex": 1},
+            "currentPhase": "reading:m1",
+            "responses": {qid: "C"},
+        },
+    )
+    assert stepped.status_code == 200
+    delta = stepped.get_json()
+    assert delta["version"] == version + 1
+    assert delta["state"]["groupIndex"] == 1
+    assert "returnTo" not in delta["state"]
+    assert "responses" not in delta
+    assert delta["written"] == [qid]
+
+    stale = client.patch(
+        url, json={"baseVersion": version, "state": {"groupIndex": 2}}
+    )
+    assert stale.status_code == 409
+    conflict = stale.get_json()
+    assert conflict["error"] == "version_conflict"
+    assert conflict["version"] == version + 1
+    assert conflict["state"]["groupIndex"] == 1
+
+    full = client.put(url, json={"state": {"phaseIndex": 0, "groupIndex": 2}})
+    assert full.get_json()["attempt"]["version"] == version + 2
+    resumed = client.get(f"/api/toefl/attempts/{started['id']}/resume").get_json()
+    assert resumed["attempt"]["responses"][qid] == "C"
+    assert resumed["attempt"]["state"]["groupIndex"] == 2
+
+
 def test_directions_pause_server_clock_and_running_phase_cannot_be_paused(app):
     client = app.test_client()
     started = client.post(
@@ -1267,6 +1383,32 @@ def test_student_history_only_lists_own_completed_attempts(app):
     assert other_id not in ids
 
 
+def test_teacher_list_scores_attempts_in_one_batch_per_package(app, monkeypatch):
+    from services import toefl_mock_review
+
+    client = app.test_client()
+    first_id = _login_as(app, client, User.ROLE_STUDENT, "student-batch-one", profile_name="批量一")
+    _make_completed_attempt(app, first_id)
+    second_id = _login_as(app, client, User.ROLE_STUDENT, "student-batch-two", profile_name="批量二")
+    _make_completed_attempt(app, second_id)
+    with app.app_context():
+        attempts = ToeflMockAttempt.query.order_by(ToeflMockAttempt.id).all()
+        expected = [toefl_mock_review.attempt_summary(item) for item in attempts]
+
+    batches = []
+    real_score_attempts = toefl_mock_review.score_attempts
+
+    def counting(test_id, responses_by_attempt, **kwargs):
+        batches.append(sorted(responses_by_attempt))
+        return real_score_attempts(test_id, responses_by_attempt, **kwargs)
+
+    monkeypatch.setattr(toefl_mock_review, "score_attempts", counting)
+    _login_as(app, client, User.ROLE_TEACHER, "teacher-batch")
+    listed = client.get("/api/toefl/teacher/attempts").get_json()["attempts"]
+    assert batches == [sorted(item["id"] for item in expected)]
+    assert sorted(listed, key=lambda item: item["id"]) == json.loads(json.dumps(expected))
+
+
 def test_teacher_scores_are_fixed_task_level_integers_and_rubric_is_auditable(app):
     client = app.test_client()
     student_id = _login_as(
@@ -0,0 +1,142 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import event
+
+from api import miniprogram
+from models import ParentStudentLink, StudentProfile, SubscribePushLog, User, db
+from services import wechat_push
+
+
+class WechatPushTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+            WECHAT_COURSE_TEMPLATE_ID="tpl-course",
+            WECHAT_PUSH_CONCURRENCY=8,
+            WECHAT_PUSH_RATE_PER_TEMPLATE=0,
+        )
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self._seed()
+        patcher = mock.patch.object(wechat_push, "RETRY_BASE_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def _user(self, username, role, openid=None, **extra):
+        user = User(username=username, password_hash="x", role=role, wechat_openid=openid, **extra)
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    def _seed(self):
+        alice = self._user("alice", User.ROLE_STUDENT, "oid-alice")
+        bob = self._user("bob", User.ROLE_STUDENT)
+        mum = self._user("mum", User.ROLE_PARENT, "oid-mum")
+        self._user("teacher", User.ROLE_TEACHER, "oid-teacher", scheduler_teacher_id=7)
+        self._user("old_teacher", User.ROLE_TEACHER, "oid-old", scheduler_teacher_id=8, is_active=False)
+        db.session.add_all([
+            StudentProfile(user_id=alice.id, full_name="Alice", scheduler_student_id=101),
+            StudentProfile(user_id=bob.id, full_name="Bob"),
+            ParentStudentLink(parent_id=mum.id, student_name="Alice", is_active=True),
+        ])
+        db.session.commit()
+
+    def test_directory_resolves_everyone_in_a_few_queries(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            directory = wechat_push.RecipientDirectory(
+                students=[("101", None), (None, "Bob"), (999, "Nobody")] * 50,
+                teacher_ids=["7", 8],
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertLessEqual(len(statements), 3)
+        self.assertEqual(directory.student_openids(101, "whatever"), ["oid-alice", "oid-mum"])
+        self.assertEqual(directory.student_openids(None, "Alice"), ["oid-alice", "oid-mum"])
+        self.assertEqual(directory.student_openids(None, "Bob"), [])
+        self.assertEqual(directory.teacher_openid(7), "oid-teacher")
+        self.assertIsNone(directory.teacher_openid(8))
+
+    def test_deliver_sends_concurrently_retries_transient_and_logs_in_bulk(self):
+        attempts = {}
+        lock = threading.Lock()
+
+        def send(openid, template_id, data, page=None):
+            time.sleep(0.1)
+            with lock:
+                attempts[openid] = attempts.get(openid, 0) + 1
+                count = attempts[openid]
+            if openid == "busy" and count == 1:
+                return {"ok": False, "error": "send_failed", "errcode": -1}
+            if openid == "refused":
+                return {"ok": False, "error": "send_failed", "errcode": 43101}
+            if openid == "flaky" and count == 1:
+                raise ConnectionError("reset by peer")
+            return {"ok": True}
+
+        openids = [f"oid-{i}" for i in range(12)] + ["busy", "refused", "flaky"]
+        messages = [wechat_push.PushMessage(o, "tpl", {}, "pages/x", category="student") for o in openids]
+        started = time.monotonic()
+        results = wechat_push.deliver(messages, send, batch="test-run")
+        self.assertLess(time.monotonic() - started, 0.8)
+
+        self.assertEqual([r.message.openid for r in results], openids)
+        self.assertEqual(sum(r.ok for r in results), 14)
+        self.assertEqual((attempts["busy"], attempts["refused"], attempts["flaky"]), (2, 1, 2))
+        logs = {row.openid: row for row in SubscribePushLog.query.filter_by(batch="test-run")}
+        self.assertEqual(len(logs), 15)
+        self.assertEqual((logs["refused"].ok, logs["refused"].errcode), (False, 43101))
+        self.assertEqual(logs["busy"].attempts, 2)
+
+    def test_template_pacer_spaces_sends(self):
+        pacer = wechat_push._TemplatePacer(rate_per_second=50)
+        started = time.monotonic()
+        for _ in range(6):
+            pacer.wait("tpl")
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_tomorrow_reminders_fan_out_to_students_parents_and_teachers(self):
+        schedules = [
+            {"schedule_id": 1, "student_id": 101, "course_name": "雅思听力", "start_time": "2026-10-20 09:00", "teacher_name": "T"},
+            {"schedule_id": 1, "student_id": 101, "course_name": "duplicate"},
+            {"schedule_id": 2, "student_name": "Bob", "course_name": "写作", "start_time": "2026-10-20 10:00"},
+        ]
+        sent = []
+
+        def send(openid, template_id, data, page=None):
+            sent.append((openid, page))
+            return {"ok": openid != "oid-teacher", "error": "send_failed", "errcode": 43101}
+
+        with mock.patch.object(miniprogram, "_fetch_tomorrow_schedules", return_value=(schedules, None)), \
+                mock.patch.object(miniprogram, "_fetch_range_schedules_by_dates", return_value=(schedules[:1], None)), \
+                mock.patch.object(miniprogram, "send_subscribe_message_result", send):
+            result = miniprogram.send_tomorrow_class_reminders_internal()
+
+        self.assertEqual(sorted(sent), [
+            ("oid-alice", "pages/student/home/index"),
+            ("oid-mum", "pages/student/home/index"),
+            ("oid-teacher", "pages/teacher/home/index"),
+        ])
+        self.assertEqual((result["sent"], result["student_sent"], result["teacher_sent"]), (2, 2, 0))
+        self.assertEqual(result["teacher_errors"][0]["error"], "user_refused")
+        self.assertEqual(SubscribePushLog.query.count(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
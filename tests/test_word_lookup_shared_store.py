@@ -0,0 +1,169 @@
+"""Word lookup: cross-worker token bucket, the LRU over word_translation_cache and the dictation index."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from flask import Flask
+from sqlalchemy import event, text
+
+import app as app_module
+from models import DictationBook, DictationWord, RateLimitBucket, User, db
+from services.lru import LruCache
+from services.rate_limit import TokenBucketLimiter
+
+
+class SharedStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SECRET_KEY="word-lookup-test",
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{Path(self.tmp.name) / 'shared.db'}",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            TESTING=True,
+        )
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+
+class TokenBucketLimiterTest(SharedStoreTestCase):
+    def test_workers_share_one_bucket(self):
+        # Two limiter instances stand in for two gunicorn worker processes.
+        worker_a = TokenBucketLimiter("lookup", capacity=3, refill_per_second=1)
+        worker_b = TokenBucketLimiter("lookup", capacity=3, refill_per_second=1)
+        results = [
+            worker_a.allow("1.2.3.4", now=100.0),
+            worker_b.allow("1.2.3.4", now=100.0),
+            worker_a.allow("1.2.3.4", now=100.0),
+            worker_b.allow("1.2.3.4", now=100.0),
+        ]
+        self.assertEqual(results, [True, True, True, False])
+        self.assertTrue(worker_a.allow("5.6.7.8", now=100.0))
+
+    def test_tokens_refill_over_time_up_to_capacity(self):
+        limiter = TokenBucketLimiter("lookup", capacity=2, refill_per_second=0.5)
+        self.assertTrue(limiter.allow("ip", now=0.0))
+        self.assertTrue(limiter.allow("ip", now=0.0))
+        self.assertFalse(limiter.allow("ip", now=1.0))
+        self.assertTrue(limiter.allow("ip", now=2.0))
+        self.assertFalse(limiter.allow("ip", now=2.0))
+        bucket = db.session.get(RateLimitBucket, "lookup:ip")
+        self.assertAlmostEqual(bucket.tokens, 0.0)
+        self.assertTrue(limiter.allow("ip", now=1000.0))
+        db.session.expire_all()
+        self.assertAlmostEqual(db.session.get(RateLimitBucket, "lookup:ip").tokens, 1.0)
+
+    def test_idle_buckets_are_pruned(self):
+        limiter = TokenBucketLimiter("lookup", capacity=2, refill_per_second=1)
+        limiter.allow("old-client", now=1000.0)
+        limiter.allow("new-client", now=5000.0)
+        keys = {row.bucket_key for row in RateLimitBucket.query.all()}
+        self.assertEqual(keys, {"lookup:new-client"})
+
+
+class WordTranslationLruTest(SharedStoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self._ready = app_module._WORD_TRANSLATION_CACHE_READY
+        app_module._WORD_TRANSLATION_CACHE_READY = False
+        app_module._WORD_TRANSLATION_LRU.clear()
+        self.addCleanup(app_module._WORD_TRANSLATION_LRU.clear)
+        self.selects = 0
+
+        def count(conn, cursor, statement, params, context, executemany):
+            if "FROM word_translation_cache" in statement:
+                self.selects += 1
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        self.addCleanup(event.remove, db.engine, "before_cursor_execute", count)
+
+    def tearDown(self):
+        app_module._WORD_TRANSLATION_CACHE_READY = self._ready
+        super().tearDown()
+
+    def test_repeated_lookups_skip_the_database(self):
+        app_module._cache_word_translation("harbour", "港口", "google")
+        first = app_module._lookup_cached_word_translation("harbour")
+        second = app_module._lookup_cached_word_translation("harbour")
+        self.assertEqual(first, second)
+        self.assertEqual(first["translation"], "港口")
+        self.assertEqual(first["cached_source"], "google")
+        self.assertEqual(self.selects, 1)
+
+    def test_misses_are_not_cached(self):
+        self.assertIsNone(app_module._lookup_cached_word_translation("quay"))
+        app_module._cache_word_translation("quay", "码头", "youdao")
+        self.assertEqual(app_module._lookup_cached_word_translation("quay")["translation"], "码头")
+
+
+class DictationWordLookupTest(SharedStoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self._ready = app_module._WORD_TRANSLATION_CACHE_READY
+        app_module._WORD_TRANSLATION_CACHE_READY = False
+        app_module._WORD_TRANSLATION_LRU.clear()
+        self.addCleanup(app_module._WORD_TRANSLATION_LRU.clear)
+        teacher = User(username="t", password_hash="x", role=User.ROLE_TEACHER)
+        db.session.add(teacher)
+        db.session.flush()
+        retired = DictationBook(title="old", created_by=teacher.id, is_active=False)
+        current = DictationBook(title="new", created_by=teacher.id)
+        db.session.add_all([retired, current])
+        db.session.flush()
+        db.session.add_all([
+            DictationWord(book_id=retired.id, sequence=1, word="Harbour", translation="旧释义"),
+            DictationWord(book_id=current.id, sequence=1, word="Harbour", translation="港口", core_meaning_zh="港湾"),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        app_module._WORD_TRANSLATION_CACHE_READY = self._ready
+        super().tearDown()
+
+    def test_lookup_is_case_insensitive_and_skips_inactive_books(self):
+        found = app_module._lookup_dictation_word_translation("harbour")
+        self.assertEqual((found["translation"], found["source"]), ("港湾", "dictation"))
+        self.assertIsNone(app_module._lookup_dictation_word_translation("quay"))
+        self.assertEqual(app_module._lookup_cached_word_translation("harbour")["translation"], "港湾")
+
+    def test_lookup_seeks_the_lower_word_index(self):
+        plan = db.session.execute(
+            text(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT w.word FROM dictation_word w
+                JOIN dictation_book b ON w.book_id = b.id
+                WHERE LOWER(w.word) = :word
+                ORDER BY w.id ASC LIMIT 1
+                """
+            ),
+            {"word": "harbour"},
+        ).all()
+        details = " ".join(str(row[-1]) for row in plan)
+        self.assertIn("ix_dictation_word_word_lower", details)
+        self.assertNotIn("SCAN w", details)
+
+
+class LruCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LruCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,6 +31,7 @@ from models import (
     User,
     db,
 )
+from services import ai_jobs, ai_response_cache, http_client
 
 toefl_bp = Blueprint("toefl", __name__)
 
@@ -597,6 +598,10 @@ def _extract_json_object(value: str) -> dict | None:
         return parsed if isinstance(parsed, dict) else None
 
 
+# Bump when a grading prompt or rubric changes so cached grades are not reused.
+GRADING_PROMPT_VERSION = "toefl-grade-1"
+
+
 def _deepseek_json(system_prompt: str, payload: dict, max_tokens: int = 1400) -> tuple[dict | None, str]:
     api_key = current_app.config.get("DEEPSEEK_API_KEY")
     if not api_key:
@@ -606,23 +611,28 @@ def _deepseek_json(system_prompt: str, payload: dict, max_tokens: int = 1400) ->
         or f"{str(current_app.config.get('DEEPSEEK_API_BASE') or 'https://api.deepseek.com').rstrip('/')}/v1/chat/completions"
     )
     model = current_app.config.get("DEEPSEEK_MODEL") or "deepseek-chat"
+    request_body = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+        ],
+        "temperature": 0.1,
+        "max_tokens": max_tokens,
+        "response_format": {"type": "json_object"},
+    }
+    cached = ai_response_cache.lookup("toefl_grade", model, GRADING_PROMPT_VERSION, request_body)
+    if cached is not None:
+        return cached, ""
     try:
-        response = requests.post(
+        response = http_client.post(
+            "deepseek",
             base_url,
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
             },
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
-                ],
-                "temperature": 0.1,
-                "max_tokens": max_tokens,
-                "response_format": {"type": "json_object"},
-            },
+            json=request_body,
             timeout=min(
                 45.0,
                 float(current_app.config.get("DEEPSEEK_TIMEOUT") or 45),
@@ -635,6 +645,7 @@ def _deepseek_json(system_prompt: str, payload: dict, max_tokens: int = 1400) ->
         if not parsed:
             return None, "invalid_ai_json"
         parsed["_model"] = raw.get("model") or model
+        ai_response_cache.store("toefl_grade", model, GRADING_PROMPT_VERSION, request_body, parsed)
         return parsed, ""
     except (requests.RequestException, ValueError, TypeError) as exc:
         current_app.logger.warning("TOEFL grading request failed: %s", exc)
@@ -1032,6 +1043,7 @@ def _apply_constructed_response_grades(
     recording_tokens: dict,
     profile: StudentProfile | None,
     result: dict,
+    actor: str | None,
 ) -> tuple[dict, dict]:
     source = _load_source_exam(exam_id, subject) or {}
     public = public_exam_payload(exam_id, subject) or {}
@@ -1041,7 +1053,6 @@ def _apply_constructed_response_grades(
     constructed_scores = []
     pending_review_count = 0
     machine_scored_count = 0
-    actor = _recording_actor(profile)
 
     for question in source.get("questions") or []:
         question_id = str(question.get("id") or "")
@@ -1504,16 +1515,17 @@ def upload_speaking_recording(exam_id: str):
     })
 
 
-@toefl_bp.post("/api/toefl/test/<exam_id>/<subject>/grade")
-def grade(exam_id: str, subject: str):
-    body = request.get_json(silent=True) or {}
+def _grade_submission(
+    exam_id: str,
+    subject: str,
+    body: dict,
+    profile: StudentProfile | None,
+    actor: str | None,
+) -> tuple[dict, int]:
     responses = body.get("responses")
-    if not isinstance(responses, dict):
-        return jsonify({"ok": False, "error": "invalid_responses"}), 400
     result = grade_exam_payload(exam_id, subject, responses)
     if not result:
-        return jsonify({"ok": False, "error": "exam_not_found"}), 404
-    profile = _current_practice_profile()
+        return {"ok": False, "error": "exam_not_found"}, 404
     recording_tokens = (
         body.get("recording_tokens")
         if isinstance(body.get("recording_tokens"), dict)
@@ -1528,6 +1540,7 @@ def grade(exam_id: str, subject: str):
             recording_tokens,
             profile,
             result,
+            actor,
         )
     try:
         duration_seconds = max(0, int(body.get("duration_seconds") or 0))
@@ -1547,7 +1560,52 @@ def grade(exam_id: str, subject: str):
     result["synced"] = bool(submission)
     result["student_name"] = profile.full_name if profile else ""
     result["submission"] = _serialize_submission(submission) if submission else None
-    return jsonify(result)
+    return result, 200
+
+
+def _grade_submission_job(job_payload: dict) -> tuple[dict, int]:
+    profile = None
+    if job_payload.get("profile_id"):
+        profile = StudentProfile.query.filter_by(
+            id=int(job_payload["profile_id"]),
+            is_deleted=False,
+        ).first()
+    return _grade_submission(
+        str(job_payload.get("exam_id") or ""),
+        str(job_payload.get("subject") or ""),
+        job_payload.get("body") or {},
+        profile,
+        job_payload.get("actor"),
+    )
+
+
+# Writing/speaking grading makes one DeepSeek call per constructed response.
+ai_jobs.register_handler("toefl_grade", _grade_submission_job, timeout_seconds=600)
+
+
+@toefl_bp.post("/api/toefl/test/<exam_id>/<subject>/grade")
+def grade(exam_id: str, subject: str):
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body.get("responses"), dict):
+        return jsonify({"ok": False, "error": "invalid_responses"}), 400
+    profile = _current_practice_profile()
+    # Recording ownership comes from the web session, so resolve it here.
+    actor = _recording_actor(profile) if subject in {"writing", "speaking"} else None
+    if ai_jobs.wants_async(body):
+        job = ai_jobs.submit_job(
+            "toefl_grade",
+            {
+                "exam_id": exam_id,
+                "subject": subject,
+                "body": body,
+                "profile_id": profile.id if profile else None,
+                "actor": actor,
+            },
+            created_by_id=profile.user_id if profile else None,
+        )
+        return ai_jobs.accepted_response(job)
+    payload, status = _grade_submission(exam_id, subject, body, profile, actor)
+    return jsonify(payload), status
 
 
 @toefl_bp.get("/api/toefl/submissions")